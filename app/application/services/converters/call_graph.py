@@ -0,0 +1,159 @@
+# app/application/services/converters/call_graph.py
+"""
+Grafo de llamadas agregado para los diagramas de secuencia.
+
+Los convertidores registran cada llamada observada en el código como una arista
+función -> participante. Las llamadas repetidas se colapsan en una sola arista con
+su cantidad (que se muestra en el mensaje, 'json (x4)'), y las que ocurren dentro
+de un bucle quedan marcadas y se emiten en un fragmento loop. Al emitir, el
+diagrama se recorre desde los puntos de entrada elegidos (a lo sumo
+DEFAULT_MAX_ENTRY_POINTS por defecto) hasta una profundidad máxima y con un
+presupuesto de líneas (secciones, fragmentos, llamadas y respuestas), así el
+tamaño del diagrama queda acotado sin importar cuántas llamadas tenga el código.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_MAX_MESSAGES = 300
+DEFAULT_MAX_ENTRY_POINTS = 10
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CallEdge:
+    """Llamadas de una función a un mensaje de un participante"""
+    source: str  # Participante que llama
+    target: str  # Participante llamado
+    message: str
+    kind: str = 'sync'
+    count: int = 0
+    looped: bool = False  # Alguna de las llamadas ocurre dentro de un bucle
+    callee: Optional[str] = None  # Función del grafo que atiende la llamada (para expandirla)
+
+    @property
+    def label(self) -> str:
+        """Mensaje con la cantidad de llamadas fusionadas en la arista"""
+        return f"{self.message} (x{self.count})" if self.count > 1 else self.message
+
+
+class SequenceStep(NamedTuple):
+    """
+    Paso del recorrido: 'entry' (inicio de un punto de entrada), 'call' y 'return'
+    de una arista, y 'loop'/'end' para abrir y cerrar un fragmento loop.
+    """
+    kind: str
+    edge: Optional[CallEdge] = None
+    function: str = ''
+    label: str = ''
+
+
+class CallGraph:
+    """Funciones (con su participante) y sus aristas de llamada en orden de aparición"""
+
+    def __init__(self):
+        self.participants: Dict[str, str] = {}
+        self.calls: Dict[str, Dict[Tuple[str, str, str], CallEdge]] = {}
+
+    def add_function(self, function: str, participant: str) -> None:
+        if function not in self.participants:
+            self.participants[function] = participant
+            self.calls[function] = {}
+
+    def add_call(self, function: str, target: str, message: str, kind: str = 'sync',
+                 looped: bool = False, callee: Optional[str] = None) -> CallEdge:
+        """Registra (o acumula) una llamada de la función al mensaje del participante"""
+        self.add_function(function, function)
+        edges = self.calls[function]
+        key = (target, message, kind)
+        edge = edges.get(key)
+        if edge is None:
+            edge = edges[key] = CallEdge(self.participants[function], target, message, kind, callee=callee)
+        edge.count += 1
+        edge.looped = edge.looped or looped
+        edge.callee = edge.callee or callee
+        return edge
+
+    def edge_count(self) -> int:
+        return sum(len(edges) for edges in self.calls.values())
+
+    def default_entry_points(self) -> List[str]:
+        """Funciones con llamadas que ninguna otra función del grafo invoca"""
+        called = {edge.callee for edges in self.calls.values() for edge in edges.values() if edge.callee}
+        roots = [function for function, edges in self.calls.items() if edges and function not in called]
+        # Si todo es parte de ciclos no hay raíces: se usa cualquier función con llamadas
+        return roots or [function for function, edges in self.calls.items() if edges]
+
+    def select_entry_points(self, entry_points: Optional[Sequence[str]] = None,
+                            max_entry_points: int = DEFAULT_MAX_ENTRY_POINTS) -> List[str]:
+        """
+        Funciones desde las que empezar el recorrido. Un nombre elegido coincide con
+        la función completa ('Clase.metodo'), con su nombre simple o con su participante.
+        Sin nombres se usan las primeras max_entry_points raíces del grafo; si ningún
+        nombre coincide la lista queda vacía (el diagrama no tiene interacciones).
+        """
+        if not entry_points:
+            return self.default_entry_points()[:max_entry_points]
+        wanted = set(entry_points)
+        selected, matched = [], set()
+        for function, participant in self.participants.items():
+            names = {function, function.rpartition('.')[2], participant} & wanted
+            if names:
+                selected.append(function)
+                matched |= names
+        unknown = sorted(wanted - matched)
+        if unknown:
+            logger.warning(f"Puntos de entrada sin coincidencias: {', '.join(unknown)}")
+        return selected
+
+    def iter_sequence(self, entry_points: Optional[Sequence[str]] = None, max_depth: int = DEFAULT_MAX_DEPTH,
+                      max_messages: int = DEFAULT_MAX_MESSAGES) -> Iterator[SequenceStep]:
+        """
+        Recorre las llamadas desde cada punto de entrada (funciones del grafo, como
+        las retorna select_entry_points; None usa las de por defecto y una lista vacía
+        no emite nada). Las aristas de una función se expanden con las llamadas de la
+        función que las atiende hasta max_depth niveles (sin volver a entrar en una
+        función de la pila). Las aristas dentro de bucles se emiten en fragmentos
+        loop; las consecutivas comparten fragmento. Cada sección, fragmento, llamada
+        y respuesta consume un mensaje de max_messages.
+        """
+        if entry_points is None:
+            entry_points = self.select_entry_points()
+        budget = [max_messages]
+        for function in entry_points:
+            # La sección solo se abre si alcanza al menos para una llamada y su respuesta
+            if budget[0] < 3:
+                return
+            budget[0] -= 1
+            yield SequenceStep('entry', function=function)
+            yield from self._iter_calls(function, 1, max_depth, {function}, budget)
+
+    def _iter_calls(self, function: str, depth: int, max_depth: int, stack: Set[str],
+                    budget: List[int]) -> Iterator[SequenceStep]:
+        open_fragment: Optional[CallEdge] = None  # Arista que abrió el fragmento loop actual
+        for edge in self.calls.get(function, {}).values():
+            # Una llamada reserva también su respuesta
+            if budget[0] < 2:
+                break
+            # Solo las llamadas dentro de bucles comparten fragmento
+            if open_fragment and not edge.looped:
+                yield SequenceStep('end')
+                open_fragment = None
+            if edge.looped and not open_fragment:
+                if budget[0] < 3:
+                    break
+                open_fragment = edge
+                budget[0] -= 1
+                yield SequenceStep('loop', edge, label="iteración")
+            budget[0] -= 2
+            yield SequenceStep('call', edge)
+            callee = edge.callee
+            if callee in self.calls and callee not in stack and depth < max_depth:
+                stack.add(callee)
+                yield from self._iter_calls(callee, depth + 1, max_depth, stack, budget)
+                stack.discard(callee)
+            yield SequenceStep('return', edge)
+        if open_fragment:
+            yield SequenceStep('end')
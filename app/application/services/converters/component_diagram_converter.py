@@ -1,7 +1,43 @@
 # app/application/services/converters/component_diagram_converter.py
 import re
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 import os
+from app.application.services.converters.diagram_partitioner import (
+    DiagramPartitioner, DEFAULT_MAX_ELEMENTS, INDEX_DIAGRAM_NAME, Partition, PartitionEdges
+)
+from app.application.services.converters.keyword_matcher import compile_keywords
+from app.application.services.converters.manifest_parser import guess_manifest, resolve_dependencies
+from app.application.services.converters.project_model import Manifest, ProjectModel
+
+# Nombres de MSBuild/Visual Studio que no son componentes del proyecto
+DEFAULT_EXCLUDE_KEYWORDS = (
+    'PropertyGroup', 'ItemGroup', 'Reference', 'HintPath', 'Configuration',
+    'DefineConstants', 'ErrorReport', 'WarningLevel', 'DebugType', 'Optimize',
+    'VisualStudio', 'ProjectExtensions', 'Target', 'SchemaVersion', 'Content',
+    'Microsoft', 'System', 'NuGetPackageImportStamp', 'Compile', 'None',
+    'DependentUpon', 'Folder', 'Import', 'UseIIS', 'AutoAssignPort', 'DevelopmentServerPort',
+    'DevelopmentServerVPath', 'IISUrl', 'NTLMAuthentication', 'UseCustomServer',
+    'SaveServerSettingsInUserFile', 'ErrorText', 'Error', 'ProjectGuid', 'ProjectTypeGuids',
+    'OutputType', 'AppDesignerFolder', 'RootNamespace', 'AssemblyName', 'UseIISExpress',
+    'Use64BitIISExpress', 'IISExpressSSLPort', 'IISExpressAnonymousAuthentication',
+    'IISExpressWindowsAuthentication', 'IISExpressUseClassicPipelineMode',
+    'UseGlobalApplicationHostFile', 'DebugSymbols', 'OutputPath'
+)
+# En el diagrama en árbol también se excluyen restos de archivos .sln/.csproj
+TREE_EXCLUDE_KEYWORDS = DEFAULT_EXCLUDE_KEYWORDS + ('<', '>', 'Project', 'Solution', 'Global', 'Section')
+
+# Extensiones de archivos conocidas (el resto de nombres se dibuja como carpeta)
+FILE_COMPONENT_EXTENSIONS = (
+    '.cs', '.js', '.ts', '.py', '.java', '.php', '.html', '.css',
+    '.jsx', '.tsx', '.vue', '.go', '.rs', '.cpp', '.c', '.h',
+    '.cshtml', '.aspx', '.asax', '.config'
+)
+
+# Paquete del diagrama en el que se agrupan las librerías externas de cada ecosistema
+EXTERNAL_LIBRARY_PACKAGES = {
+    'npm': 'node_modules', 'pypi': 'pip_packages', 'maven': 'maven_central',
+    'packagist': 'vendor', 'cargo': 'crates', 'go': 'go_modules', 'nuget': 'nuget_packages'
+}
 
 class ComponentDiagramConverter:
     """
@@ -15,24 +51,80 @@ class ComponentDiagramConverter:
         self.dependencies: List[Dict] = []
         self.packages: Set[str] = set()
         
-    def convert(self, code: str) -> str:
+    def convert(self, code: Union[str, ProjectModel]) -> str:
         """
         Convierte estructura de proyecto/código a diagrama UML de componentes en PlantUML.
         El 'code' puede ser:
+        - Un ProjectModel (árbol del proyecto y manifiestos, sin heurísticas de detección)
         - Estructura de directorios (separada por líneas)
         - Código fuente con imports/includes
         - JSON con configuración de proyecto
         """
-        # Detectar tipo de entrada
+        if self._build_model(code):
+            return self._generate_plantuml_tree()
+        return self._generate_plantuml()
+    
+    def iter_convert(self, code: Union[str, ProjectModel]) -> Iterator[str]:
+        """Igual que convert, pero emite el PlantUML línea a línea"""
+        if self._build_model(code):
+            yield from self._iter_plantuml_tree()
+        else:
+            yield from self._iter_plantuml()
+    
+    def convert_partitioned(self, code: Union[str, ProjectModel], max_elements: int = DEFAULT_MAX_ELEMENTS) -> Dict[str, str]:
+        """
+        Convierte la estructura del proyecto a varios diagramas de componentes,
+        particionados por paquete y acotados por max_elements, más un diagrama índice.
+        """
+        is_tree = self._build_model(code)
+        
+        partitioner = DiagramPartitioner(max_elements)
+        elements = {str(i): comp.get('package', 'root') for i, comp in enumerate(self.components)}
+        ids_by_name = {comp['name']: str(i) for i, comp in enumerate(self.components)}
+        edges = [
+            (ids_by_name[dep['from']], ids_by_name[dep['to']])
+            for dep in self.dependencies
+            if dep['from'] in ids_by_name and dep['to'] in ids_by_name
+        ]
+        partitions = partitioner.partition(elements, edges)
+        
+        # Cada dependencia va en la partición de su componente origen; los componentes de otras particiones se declaran como externos
+        assigned = partitioner.assign_edges(
+            partitions, self.dependencies,
+            lambda dep: (ids_by_name.get(dep['from']), ids_by_name.get(dep['to'], dep['to']))
+        )
+        
+        diagrams = {INDEX_DIAGRAM_NAME: partitioner.render_index(partitions, edges)}
+        for partition, partition_edges in zip(partitions, assigned):
+            components = [self.components[int(element)] for element in partition.elements]
+            if is_tree:
+                diagrams[partition.key] = self._generate_plantuml_tree(components=components)
+            else:
+                external = {
+                    self.components[int(target)]['name'] if target in elements else target: target_partition
+                    for target, target_partition in partition_edges.external.items()
+                }
+                diagrams[partition.key] = self._generate_plantuml(
+                    components=components, dependencies=partition_edges.edges, external=external
+                )
+        return diagrams
+    
+    def _build_model(self, code: Union[str, ProjectModel]) -> bool:
+        """
+        Detecta el tipo de entrada y extrae componentes y dependencias.
+        Retorna True si la entrada es una estructura de directorios (diagrama en árbol).
+        """
+        if isinstance(code, ProjectModel):
+            self._analyze_project_model(code)
+            return True
         if self._is_directory_structure(code):
             self._analyze_directory_structure(code)
-            return self._generate_plantuml_tree()
+            return True
         elif self._is_project_config(code):
             self._analyze_project_config(code)
         else:
             self._analyze_source_code(code)
-            
-        return self._generate_plantuml()
+        return False
     
     def _is_directory_structure(self, content: str) -> bool:
         """Detecta si el contenido es una estructura de directorios"""
@@ -80,17 +172,44 @@ class ComponentDiagramConverter:
                     if package_name:
                         self.packages.add(package_name)
     
+    def _analyze_project_model(self, project: ProjectModel):
+        """Extrae componentes del árbol del proyecto y librerías externas de sus manifiestos"""
+        for entry in project.tree:
+            path_info = self._parse_path(entry.path)
+            if not path_info:
+                continue
+            component_name, package_name, component_type = path_info
+            if self._is_relevant_file(component_name, entry.path):
+                self.components.append({
+                    'name': component_name,
+                    'package': package_name,
+                    'type': component_type,
+                    'path': entry.path
+                })
+                if package_name:
+                    self.packages.add(package_name)
+        
+        self._analyze_dependencies(project.manifests)
+    
+    def _analyze_dependencies(self, manifests: List[Manifest]):
+        """Agrega como librerías externas las dependencias de ejecución de los manifiestos"""
+        for ecosystem, dependencies in resolve_dependencies(manifests).items():
+            package = EXTERNAL_LIBRARY_PACKAGES.get(ecosystem, ecosystem)
+            for dependency in dependencies:
+                if dependency.dev:
+                    continue
+                self.components.append({
+                    'name': dependency.name,
+                    'type': 'external_library',
+                    'package': package,
+                    'version': dependency.version
+                })
+    
     def _analyze_project_config(self, config: str):
         """Analiza configuración de proyecto para extraer dependencias"""
-        # Analizar package.json (JavaScript/Node.js)
-        if 'package.json' in config or ('{' in config and 'dependencies' in config):
-            self._extract_npm_dependencies(config)
-        # Analizar requirements.txt (Python)
-        elif 'requirements.txt' in config or self._looks_like_requirements(config):
-            self._extract_python_dependencies(config)
-        # Analizar pom.xml o build.gradle (Java)
-        elif any(keyword in config.lower() for keyword in ['maven', 'gradle', 'dependency']):
-            self._extract_java_dependencies(config)
+        manifest = guess_manifest(config)
+        if manifest:
+            self._analyze_dependencies([manifest])
     
     def _analyze_source_code(self, code: str):
         """Analiza código fuente para extraer componentes e interfaces"""
@@ -297,94 +416,29 @@ class ComponentDiagramConverter:
         
         return list(set(methods))
     
-    def _extract_npm_dependencies(self, config: str):
-        """Extrae dependencias de package.json"""
-        # Buscar bloques de dependencies
-        dep_pattern = r'"dependencies"\s*:\s*{([^}]+)}'
-        matches = re.findall(dep_pattern, config)
-        
-        for deps_block in matches:
-            # Extraer nombres de paquetes individuales
-            pkg_pattern = r'"([^"]+)"\s*:'
-            packages = re.findall(pkg_pattern, deps_block)
-            
-            for pkg in packages:
-                self.components.append({
-                    'name': pkg,
-                    'type': 'external_library',
-                    'package': 'node_modules'
-                })
-    
-    def _extract_python_dependencies(self, config: str):
-        """Extrae dependencias de requirements.txt"""
-        lines = config.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                # Extraer nombre del paquete (sin versión)
-                pkg_name = re.split(r'[>=<!=]', line)[0].strip()
-                if pkg_name:
-                    self.components.append({
-                        'name': pkg_name,
-                        'type': 'external_library',
-                        'package': 'pip_packages'
-                    })
-    
-    def _extract_java_dependencies(self, config: str):
-        """Extrae dependencias de Maven/Gradle"""
-        # Maven dependencies
-        maven_pattern = r'<artifactId>([^<]+)</artifactId>'
-        maven_deps = re.findall(maven_pattern, config)
-        
-        # Gradle dependencies
-        gradle_pattern = r'implementation\s+["\']([^:"\']+):'
-        gradle_deps = re.findall(gradle_pattern, config)
-        
-        all_deps = maven_deps + gradle_deps
-        for dep in all_deps:
-            self.components.append({
-                'name': dep,
-                'type': 'external_library',
-                'package': 'maven_central'
-            })
-    
-    def _looks_like_requirements(self, content: str) -> bool:
-        """Verifica si el contenido parece un archivo requirements.txt"""
-        lines = content.strip().split('\n')
-        # Si más del 70% de las líneas parecen dependencias de Python
-        dep_lines = sum(1 for line in lines 
-                       if line.strip() and not line.strip().startswith('#') 
-                       and ('==' in line or '>=' in line or line.replace('-', '').replace('_', '').isalnum()))
-        return dep_lines > len(lines) * 0.7
+    def _generate_plantuml(self, exclude_keywords: List[str] = None,
+                           components: Optional[List[Dict]] = None,
+                           dependencies: Optional[List[Dict]] = None,
+                           external: Optional[Dict[str, Optional[Partition]]] = None) -> str:
+        """
+        Genera el código PlantUML para el diagrama de componentes; external son los
+        componentes de otras particiones a los que apuntan sus dependencias.
+        """
+        return '\n'.join(self._iter_plantuml(exclude_keywords, components, dependencies, external))
     
-    def _generate_plantuml(self, exclude_keywords: List[str] = None) -> str:
-        """Genera el código PlantUML para el diagrama de componentes"""
-        # Lista de palabras clave para excluir (por defecto)
-        default_exclude_keywords = [
-            'PropertyGroup', 'ItemGroup', 'Reference', 'HintPath', 'Configuration',
-            'DefineConstants', 'ErrorReport', 'WarningLevel', 'DebugType', 'Optimize',
-            'VisualStudio', 'ProjectExtensions', 'Target', 'SchemaVersion', 'Content',
-            'Microsoft', 'System', 'NuGetPackageImportStamp', 'Compile', 'None',
-            'DependentUpon', 'Folder', 'Import', 'UseIIS', 'AutoAssignPort', 'DevelopmentServerPort',
-            'DevelopmentServerVPath', 'IISUrl', 'NTLMAuthentication', 'UseCustomServer',
-            'SaveServerSettingsInUserFile', 'ErrorText', 'Error', 'ProjectGuid', 'ProjectTypeGuids',
-            'OutputType', 'AppDesignerFolder', 'RootNamespace', 'AssemblyName', 'UseIISExpress',
-            'Use64BitIISExpress', 'IISExpressSSLPort', 'IISExpressAnonymousAuthentication',
-            'IISExpressWindowsAuthentication', 'IISExpressUseClassicPipelineMode',
-            'UseGlobalApplicationHostFile', 'DebugSymbols', 'OutputPath', 'Reference', 'Content'
-        ]
-
-        # Usar palabras clave personalizadas si se proporcionan
-        exclude_keywords = exclude_keywords or default_exclude_keywords
-
-        def should_exclude(name):
-            return any(keyword in name for keyword in exclude_keywords)
+    def _iter_plantuml(self, exclude_keywords: List[str] = None,
+                       components: Optional[List[Dict]] = None,
+                       dependencies: Optional[List[Dict]] = None,
+                       external: Optional[Dict[str, Optional[Partition]]] = None) -> Iterator[str]:
+        """Emite el diagrama de componentes línea a línea"""
+        # Palabras clave personalizadas o las de MSBuild por defecto (autómata compilado una vez)
+        should_exclude = compile_keywords(exclude_keywords or DEFAULT_EXCLUDE_KEYWORDS)
 
-        plantuml = ["@startuml"]
+        yield "@startuml"
 
         # Generar paquetes
         package_components = {}
-        for component in self.components:
+        for component in (self.components if components is None else components):
             comp_name = component['name']
             if should_exclude(comp_name):
                 continue
@@ -396,18 +450,23 @@ class ComponentDiagramConverter:
 
         # Generar componentes agrupados por paquete
         for package_name, components in package_components.items():
-            plantuml.append(f'package "{package_name}" {{')
+            yield f'package "{package_name}" {{'
 
             for component in components:
                 comp_name = component['name'].replace('.', '_')
                 if should_exclude(comp_name):
                     continue
-                plantuml.append(f'  component "{comp_name}"')
+                yield f'  component "{comp_name}"'
 
-            plantuml.append('}')
+            yield '}'
+
+        for comp_name, partition in (external or {}).items():
+            comp_name = comp_name.replace('.', '_')
+            if not should_exclude(comp_name):
+                yield f'component "{comp_name}" {PartitionEdges.stereotype(partition)}'
 
         # Generar relaciones explícitas
-        for dependency in self.dependencies:
+        for dependency in (self.dependencies if dependencies is None else dependencies):
             from_comp = dependency['from'].replace('.', '_')
             to_comp = dependency['to'].replace('.', '_')
             if should_exclude(from_comp) or should_exclude(to_comp):
@@ -415,41 +474,27 @@ class ComponentDiagramConverter:
 
             dep_type = dependency.get('type', 'uses')
             arrow = '-->' if dep_type == 'uses' else '..>'
-            plantuml.append(f'{from_comp} {arrow} {to_comp}')
+            yield f'{from_comp} {arrow} {to_comp}'
 
-        plantuml.append("@enduml")
-        return '\n'.join(plantuml)
+        yield "@enduml"
     
-    def _generate_plantuml_tree(self, exclude_keywords: List[str] = None) -> str:
+    def _generate_plantuml_tree(self, exclude_keywords: List[str] = None,
+                                components: Optional[List[Dict]] = None) -> str:
         """Genera un diagrama PlantUML simplificado en forma de árbol"""
-        # Lista de palabras clave para excluir (por defecto)
-        default_exclude_keywords = [
-            'PropertyGroup', 'ItemGroup', 'Reference', 'HintPath', 'Configuration',
-            'DefineConstants', 'ErrorReport', 'WarningLevel', 'DebugType', 'Optimize',
-            'VisualStudio', 'ProjectExtensions', 'Target', 'SchemaVersion', 'Content',
-            'Microsoft', 'System', 'NuGetPackageImportStamp', 'Compile', 'None',
-            'DependentUpon', 'Folder', 'Import', 'UseIIS', 'AutoAssignPort', 'DevelopmentServerPort',
-            'DevelopmentServerVPath', 'IISUrl', 'NTLMAuthentication', 'UseCustomServer',
-            'SaveServerSettingsInUserFile', 'ErrorText', 'Error', 'ProjectGuid', 'ProjectTypeGuids',
-            'OutputType', 'AppDesignerFolder', 'RootNamespace', 'AssemblyName', 'UseIISExpress',
-            'Use64BitIISExpress', 'IISExpressSSLPort', 'IISExpressAnonymousAuthentication',
-            'IISExpressWindowsAuthentication', 'IISExpressUseClassicPipelineMode',
-            'UseGlobalApplicationHostFile', 'DebugSymbols', 'OutputPath', 'Reference', 'Content',
-            '<', '>', 'Project', 'Solution', 'Global', 'Section'
-        ]
-
-        # Usar palabras clave personalizadas si se proporcionan
-        exclude_keywords = exclude_keywords or default_exclude_keywords
-
-        def should_exclude(name):
-            return any(keyword in name for keyword in exclude_keywords)
+        return '\n'.join(self._iter_plantuml_tree(exclude_keywords, components))
+    
+    def _iter_plantuml_tree(self, exclude_keywords: List[str] = None,
+                            components: Optional[List[Dict]] = None) -> Iterator[str]:
+        """Emite el diagrama en forma de árbol línea a línea"""
+        # Palabras clave personalizadas o las de MSBuild/soluciones por defecto
+        should_exclude = compile_keywords(exclude_keywords or TREE_EXCLUDE_KEYWORDS)
 
-        plantuml = ["@startuml"]
+        yield "@startuml"
 
         # Organizar componentes por jerarquía
         hierarchy = {}
         
-        for component in self.components:
+        for component in (self.components if components is None else components):
             comp_name = component['name']
             if should_exclude(comp_name):
                 continue
@@ -462,12 +507,11 @@ class ComponentDiagramConverter:
             hierarchy[package_path].append(comp_name)
 
         # Generar estructura jerárquica usando folder y componentes
-        self._generate_folder_structure(plantuml, hierarchy)
+        yield from self._iter_folder_structure(hierarchy)
 
-        plantuml.append("@enduml")
-        return '\n'.join(plantuml)
+        yield "@enduml"
     
-    def _generate_folder_structure(self, plantuml: List[str], hierarchy: Dict):
+    def _iter_folder_structure(self, hierarchy: Dict) -> Iterator[str]:
         """Genera la estructura de folders usando sintaxis correcta de PlantUML"""
         # Procesar cada paquete
         for package_path, components in hierarchy.items():
@@ -475,61 +519,56 @@ class ComponentDiagramConverter:
                 # Elementos en la raíz
                 for comp_name in components:
                     if self._is_file_component(comp_name):
-                        plantuml.append(f'[{comp_name}]')
+                        yield f'[{comp_name}]'
                     else:
-                        plantuml.append(f'folder "{comp_name}"')
+                        yield f'folder "{comp_name}"'
             else:
                 # Crear estructura anidada
                 path_parts = package_path.split('.')
-                self._create_nested_folder(plantuml, path_parts, components)
+                yield from self._iter_nested_folder(path_parts, components)
     
-    def _create_nested_folder(self, plantuml: List[str], path_parts: List[str], components: List[str]):
+    def _iter_nested_folder(self, path_parts: List[str], components: List[str]) -> Iterator[str]:
         """Crea una estructura de folder anidada"""
         if len(path_parts) == 1:
             # Un solo nivel
             folder_name = path_parts[0]
-            plantuml.append(f'folder "{folder_name}" {{')
+            yield f'folder "{folder_name}" {{'
             for comp_name in components:
                 if self._is_file_component(comp_name):
-                    plantuml.append(f'  [{comp_name}]')
+                    yield f'  [{comp_name}]'
                 else:
-                    plantuml.append(f'  folder "{comp_name}"')
-            plantuml.append('}')
+                    yield f'  folder "{comp_name}"'
+            yield '}'
         elif len(path_parts) == 2:
             # Dos niveles
             parent_folder = path_parts[0]
             child_folder = path_parts[1]
-            plantuml.append(f'folder "{parent_folder}" {{')
-            plantuml.append(f'  folder "{child_folder}" {{')
+            yield f'folder "{parent_folder}" {{'
+            yield f'  folder "{child_folder}" {{'
             for comp_name in components:
                 if self._is_file_component(comp_name):
-                    plantuml.append(f'    [{comp_name}]')
+                    yield f'    [{comp_name}]'
                 else:
-                    plantuml.append(f'    folder "{comp_name}"')
-            plantuml.append('  }')
-            plantuml.append('}')
+                    yield f'    folder "{comp_name}"'
+            yield '  }'
+            yield '}'
         else:
             # Más de dos niveles - simplificar
             root_folder = path_parts[0]
             nested_path = '.'.join(path_parts[1:])
-            plantuml.append(f'folder "{root_folder}" {{')
-            plantuml.append(f'  folder "{nested_path}" {{')
+            yield f'folder "{root_folder}" {{'
+            yield f'  folder "{nested_path}" {{'
             for comp_name in components:
                 if self._is_file_component(comp_name):
-                    plantuml.append(f'    [{comp_name}]')
+                    yield f'    [{comp_name}]'
                 else:
-                    plantuml.append(f'    folder "{comp_name}"')
-            plantuml.append('  }')
-            plantuml.append('}')
+                    yield f'    folder "{comp_name}"'
+            yield '  }'
+            yield '}'
     
     def _is_file_component(self, name: str) -> bool:
         """Determina si un componente es un archivo o directorio"""
-        # Extensiones de archivos conocidas
-        file_extensions = ['.cs', '.js', '.ts', '.py', '.java', '.php', '.html', '.css', 
-                          '.jsx', '.tsx', '.vue', '.go', '.rs', '.cpp', '.c', '.h',
-                          '.cshtml', '.aspx', '.asax', '.config']
-        
-        return any(name.lower().endswith(ext) for ext in file_extensions)
+        return name.lower().endswith(FILE_COMPONENT_EXTENSIONS)
     
     def _get_component_icon(self, component_type: str) -> str:
         """Retorna el icono apropiado para el tipo de componente"""
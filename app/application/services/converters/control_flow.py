@@ -0,0 +1,466 @@
+# app/application/services/converters/control_flow.py
+"""
+Flujo de control estructurado para los diagramas de actividades.
+
+Los front ends de cada lenguaje recorren el cuerpo de cada función una sola vez y
+alimentan un ControlFlowBuilder con eventos: acciones, if/elseif/else, bucles,
+switch, try/catch/finally y fork/join. El builder arma un árbol de bloques
+anidados (el código fuente ya es estructurado, así que no hace falta un grafo
+general) e iter_activity_plantuml lo emite en tiempo lineal, cambiando de
+swimlane solo cuando cambia el actor.
+
+BraceFlowReader es el front end compartido por los lenguajes con llaves (C#, Java,
+PHP): sigue la profundidad de llaves, reconoce las estructuras de control y
+delega cada sentencia al convertidor.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class FlowNode:
+    """
+    Nodo del flujo. Las acciones solo tienen etiqueta; las estructuras tienen una
+    rama por cada bloque, con su condición (None es la rama else de un if).
+    """
+    kind: str  # 'action', 'if', 'loop', 'repeat', 'switch', 'try', 'fork'
+    actor: str
+    label: str = ''
+    branches: List[List['FlowNode']] = field(default_factory=list)
+    conditions: List[Optional[str]] = field(default_factory=list)
+
+
+@dataclass
+class ActivityFlow:
+    """Flujo de una función: inicio, cuerpo y fin"""
+    name: str
+    start_label: str
+    start_actor: str = 'Usuario'
+    body: List[FlowNode] = field(default_factory=list)
+    end_actor: str = 'Sistema'
+
+
+class ControlFlowBuilder:
+    """
+    Construye un ActivityFlow a partir de eventos en orden de aparición.
+    actor es el actor actual: lo usan las estructuras que se abren y las acciones
+    a las que no se les indica otro. Las decisiones implícitas (guard) quedan
+    abiertas hasta que se cierra el bloque que las contiene.
+    """
+
+    def __init__(self, name: str, start_label: str, start_actor: str = 'Usuario', actor: str = 'Sistema'):
+        self.flow = ActivityFlow(name, start_label, start_actor)
+        self.actor = actor
+        self._stack: List[Tuple[FlowNode, bool]] = []  # (estructura abierta, implícita)
+        self._block = self.flow.body
+
+    @property
+    def depth(self) -> int:
+        return len(self._stack)
+
+    def action(self, label: str, actor: Optional[str] = None) -> None:
+        self._block.append(FlowNode('action', actor or self.actor, label))
+
+    def _open(self, node: FlowNode, condition: Optional[str] = None, implicit: bool = False) -> None:
+        self._block.append(node)
+        self._stack.append((node, implicit))
+        self._add_branch(node, condition)
+
+    def _add_branch(self, node: FlowNode, condition: Optional[str]) -> None:
+        node.branches.append([])
+        node.conditions.append(condition)
+        self._block = node.branches[-1]
+
+    def _close_implicit(self) -> None:
+        while self._stack and self._stack[-1][1]:
+            self._pop()
+
+    def _pop(self) -> None:
+        self._stack.pop()
+        self._block = self._stack[-1][0].branches[-1] if self._stack else self.flow.body
+
+    def begin_if(self, condition: str, actor: Optional[str] = None) -> None:
+        self._open(FlowNode('if', actor or self.actor), condition)
+
+    def guard(self, condition: str, actor: Optional[str] = None) -> None:
+        """Decisión sin bloque propio (p. ej. una validación): abarca el resto del bloque actual"""
+        self._open(FlowNode('if', actor or self.actor), condition, implicit=True)
+
+    def begin_branch(self, condition: Optional[str] = None) -> None:
+        """Nueva rama de la estructura abierta: elseif/else de un if, case, catch/finally o fork again"""
+        self._close_implicit()
+        if self._stack:
+            self._add_branch(self._stack[-1][0], condition)
+
+    def begin_else(self) -> None:
+        self.begin_branch(None)
+
+    def begin_loop(self, condition: str, actor: Optional[str] = None) -> None:
+        self._open(FlowNode('loop', actor or self.actor, condition))
+
+    def begin_repeat(self, actor: Optional[str] = None) -> None:
+        """Bucle con la condición al final (do/while); la condición se fija con end_repeat"""
+        self._open(FlowNode('repeat', actor or self.actor))
+
+    def end_repeat(self, condition: str) -> None:
+        self._close_implicit()
+        if self._stack and self._stack[-1][0].kind == 'repeat':
+            self._stack[-1][0].label = condition
+        self.end()
+
+    def begin_switch(self, subject: str, actor: Optional[str] = None) -> None:
+        """Las sentencias previas al primer case quedan en una rama sin etiqueta que no se emite"""
+        self._open(FlowNode('switch', actor or self.actor, subject))
+
+    def begin_try(self, actor: Optional[str] = None) -> None:
+        self._open(FlowNode('try', actor or self.actor), 'try')
+
+    def begin_fork(self, actor: Optional[str] = None) -> None:
+        self._open(FlowNode('fork', actor or self.actor))
+
+    def fork(self, branches: Iterable[str], actor: Optional[str] = None) -> None:
+        """Fork con una acción por rama (Promise.all, asyncio.gather, Task.WhenAll...)"""
+        self.begin_fork(actor)
+        for i, label in enumerate(branches):
+            if i:
+                self.begin_branch()
+            self.action(label)
+        self.end()
+
+    def end(self) -> None:
+        """Cierra la estructura explícita más interna (y las implícitas dentro de ella)"""
+        self._close_implicit()
+        if self._stack:
+            self._pop()
+
+    def finish(self, end_actor: Optional[str] = None) -> ActivityFlow:
+        while self._stack:
+            self._pop()
+        self.flow.end_actor = end_actor or self.actor
+        return self.flow
+
+
+class _Lanes:
+    """Swimlane actual durante la emisión"""
+
+    def __init__(self):
+        self.current: Optional[str] = None
+
+    def switch(self, actor: str) -> Iterator[str]:
+        if actor != self.current:
+            if self.current is not None:
+                yield ""
+            yield f"|{actor}|"
+            self.current = actor
+
+
+def _iter_block(nodes: List[FlowNode], lanes: _Lanes) -> Iterator[str]:
+    for node in nodes:
+        yield from lanes.switch(node.actor)
+        if node.kind == 'action':
+            yield f":{node.label};"
+        elif node.kind == 'if':
+            for i, (condition, branch) in enumerate(zip(node.conditions, node.branches)):
+                if i == 0:
+                    yield f"if ({condition}?) then (sí)"
+                elif condition is None:
+                    yield "else (no)"
+                else:
+                    yield f"elseif ({condition}?) then (sí)"
+                yield from _iter_block(branch, lanes)
+            yield "endif"
+        elif node.kind == 'loop':
+            yield f"while ({node.label}?) is (sí)"
+            yield from _iter_block(node.branches[0], lanes)
+            yield "endwhile (no)"
+        elif node.kind == 'repeat':
+            yield "repeat"
+            yield from _iter_block(node.branches[0], lanes)
+            yield f"repeat while ({node.label or 'repetir'}?) is (sí)"
+        elif node.kind == 'switch':
+            cases = [(value, branch) for value, branch in zip(node.conditions, node.branches) if value is not None]
+            if not cases:
+                continue
+            yield f"switch ({node.label})"
+            for value, branch in cases:
+                yield f"case ({value})"
+                yield from _iter_block(branch, lanes)
+            yield "endswitch"
+        elif node.kind == 'try':
+            for label, branch in zip(node.conditions, node.branches):
+                yield f"group {label}"
+                yield from _iter_block(branch, lanes)
+                yield "end group"
+        elif node.kind == 'fork':
+            for i, branch in enumerate(node.branches):
+                yield "fork" if i == 0 else "fork again"
+                yield from _iter_block(branch, lanes)
+            yield "end fork"
+
+
+def iter_activity_plantuml(flows: Iterable[ActivityFlow]) -> Iterator[str]:
+    """Cuerpo del diagrama (sin @startuml/@enduml) con un start/stop por flujo"""
+    lanes = _Lanes()
+    for flow in flows:
+        yield from lanes.switch(flow.start_actor)
+        yield "start"
+        yield f":{flow.start_label};"
+        yield from _iter_block(flow.body, lanes)
+        yield from lanes.switch(flow.end_actor)
+        yield "stop"
+
+
+# Llamadas que ejecutan sus argumentos en paralelo (fork/join)
+PARALLEL_PATTERN = re.compile(
+    r'(?:Task\.WhenAll|Task\.WaitAll|CompletableFuture\.allOf|Promise\.all(?:Settled)?|asyncio\.gather)\s*\('
+)
+
+
+def split_arguments(arguments: str) -> List[str]:
+    """Argumentos separados por comas de primer nivel"""
+    parts, depth, current = [], 0, []
+    for char in arguments:
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        if char == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+
+def parallel_branches(statement: str) -> List[str]:
+    """Ramas de un fork si la sentencia espera varias tareas en paralelo"""
+    match = PARALLEL_PATTERN.search(statement)
+    if not match:
+        return []
+    arguments, _ = _parenthesized(statement[match.end() - 1:])
+    arguments = (arguments or '').strip()
+    # Promise.all([a, b]) recibe un arreglo
+    if arguments.startswith('[') and arguments.endswith(']'):
+        arguments = arguments[1:-1]
+    branches = split_arguments(arguments)
+    return branches if len(branches) > 1 else []
+
+
+# Encabezados de estructuras de control en lenguajes con llaves
+HEADER_PATTERN = re.compile(
+    r'(?P<keyword>else\s*if|elseif|if|for|foreach|while|switch|catch|try|finally|else|do)\b\s*'
+)
+CASE_PATTERN = re.compile(r'(?:case\s+(?P<value>[^:]+?)|default)\s*:(?!:)')
+BRACES = re.compile(r'[{}]')
+
+
+def _parenthesized(text: str) -> Tuple[Optional[str], str]:
+    """Contenido del paréntesis balanceado al inicio de text y el resto"""
+    if not text.startswith('('):
+        return None, text
+    depth = 0
+    for i, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return text[1:i].strip(), text[i + 1:]
+    return text[1:].strip(), ''
+
+
+def loop_label(keyword: str, header: str) -> str:
+    """Condición legible de un bucle: la de un for clásico o el recorrido de un for-each"""
+    if keyword == 'for' and header.count(';') == 2:
+        return header.split(';')[1].strip() or 'siempre'
+    if keyword in ('for', 'foreach') and header:
+        return f"para cada {header}"
+    return header or 'repetir'
+
+
+class _Frame:
+    __slots__ = ('kind', 'depth', 'single', 'started', 'complete')
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.depth: Optional[int] = None  # Profundidad de llaves del bloque; None si aún no abre
+        self.single = False  # Cuerpo de una sola sentencia (sin llaves)
+        self.started = False
+        self.complete = False  # Bloque cerrado; puede continuar con else/catch/finally/while
+
+
+class BraceFlowReader:
+    """
+    Recorre el cuerpo de una función de un lenguaje con llaves en una sola pasada.
+    Las estructuras de control abren y cierran bloques en el builder; cada
+    sentencia se entrega a on_statement(builder, sentencia). Los cuerpos de una
+    sola sentencia sin llaves (if (x) y(); else z();) también se reconocen.
+    Requiere código sin comentarios de bloque ni literales de string con llaves.
+    """
+
+    def __init__(self, builder: ControlFlowBuilder, on_statement: Callable[[ControlFlowBuilder, str], None]):
+        self.builder = builder
+        self.on_statement = on_statement
+        self.frames: List[_Frame] = []
+        self.depth = 0
+
+    def read(self, body: str) -> None:
+        for line in body.split('\n'):
+            self._read_segment(line.strip())
+        self._settle('')
+        while self.frames:
+            self._pop()
+
+    def _read_segment(self, text: str) -> None:
+        while text:
+            text = self._settle(text.lstrip()).lstrip()
+            if not text:
+                return
+            char = text[0]
+            if char == '}':
+                self.depth -= 1
+                self._close_blocks()
+                text = text[1:]
+            elif char == '{':
+                self.depth += 1
+                frame = self.frames[-1] if self.frames else None
+                if frame and frame.depth is None and not frame.started:
+                    frame.depth = self.depth
+                text = text[1:]
+            else:
+                text = self._read_header(text) if self._header_at(text) else self._read_statement(text)
+
+    def _header_at(self, text: str) -> bool:
+        match = HEADER_PATTERN.match(text)
+        if not match:
+            return bool(self.frames and self.frames[-1].kind == 'switch' and CASE_PATTERN.match(text))
+        keyword = match.group('keyword')
+        rest = text[match.end():]
+        # else/try/finally/do van seguidos de llave o sentencia; el resto, de paréntesis
+        return keyword in ('else', 'try', 'finally', 'do') or rest.startswith('(') or keyword == 'catch'
+
+    def _settle(self, text: str) -> str:
+        """Resuelve los bloques terminados: continúan (else, catch, finally, while de un do) o se cierran"""
+        while self.frames and self.frames[-1].complete:
+            frame = self.frames[-1]
+            match = HEADER_PATTERN.match(text)
+            keyword = re.sub(r'\s+', ' ', match.group('keyword')) if match else ''
+            if frame.kind == 'if' and keyword in ('else', 'else if', 'elseif'):
+                rest = text[match.end():]
+                if keyword == 'else':
+                    self.builder.begin_else()
+                else:
+                    condition, rest = _parenthesized(rest)
+                    self.builder.begin_branch(condition or '')
+                self._reopen(frame)
+                return rest
+            if frame.kind == 'try' and keyword in ('catch', 'finally'):
+                rest = text[match.end():]
+                label = keyword
+                if keyword == 'catch':
+                    caught, rest = _parenthesized(rest)
+                    label = f"catch ({caught.split()[0]})" if caught else 'catch'
+                self.builder.begin_branch(label)
+                self._reopen(frame)
+                return rest
+            if frame.kind == 'repeat' and keyword == 'while':
+                condition, rest = _parenthesized(text[match.end():])
+                self.frames.pop()
+                self.builder.end_repeat(condition or '')
+                self._after_pop()
+                return rest.lstrip().lstrip(';')
+            self._pop()
+        return text
+
+    def _reopen(self, frame: _Frame) -> None:
+        frame.depth = None
+        frame.single = False
+        frame.started = False
+        frame.complete = False
+
+    def _read_header(self, text: str) -> str:
+        builder = self.builder
+        case = CASE_PATTERN.match(text)
+        if case and not HEADER_PATTERN.match(text):
+            builder.begin_branch((case.group('value') or 'default').strip())
+            return text[case.end():]
+
+        match = HEADER_PATTERN.match(text)
+        keyword = re.sub(r'\s+', ' ', match.group('keyword'))
+        rest = text[match.end():]
+        header, rest = _parenthesized(rest)
+        header = header or ''
+        self._mark_started()
+        if keyword in ('if', 'else if', 'elseif'):
+            builder.begin_if(header)
+            kind = 'if'
+        elif keyword in ('for', 'foreach', 'while'):
+            if keyword == 'while' and rest.lstrip().startswith(';'):
+                # while (...); suelto: cierre de un do ya resuelto o bucle vacío
+                builder.action(f"Esperar {header}")
+                return rest.lstrip()[1:]
+            builder.begin_loop(loop_label(keyword, header))
+            kind = 'loop'
+        elif keyword == 'do':
+            builder.begin_repeat()
+            kind = 'repeat'
+        elif keyword == 'switch':
+            builder.begin_switch(header)
+            kind = 'switch'
+        elif keyword == 'try':
+            builder.begin_try()
+            kind = 'try'
+        else:
+            # else/catch/finally sin estructura que continuar (código truncado): bloque anónimo
+            return rest
+        self.frames.append(_Frame(kind))
+        return rest
+
+    def _read_statement(self, text: str) -> str:
+        """Sentencia hasta la próxima llave; el resto se procesa como segmento"""
+        brace = BRACES.search(text)
+        end = brace.start() if brace else len(text)
+        statement, rest = text[:end].strip(), text[end:]
+        self._mark_started()
+        if statement:
+            self.on_statement(self.builder, statement)
+        if statement.endswith(';'):
+            self._complete_singles()
+        return rest
+
+    def _mark_started(self) -> None:
+        """Una sentencia o estructura sin llave previa es el cuerpo único de la estructura abierta"""
+        frame = self.frames[-1] if self.frames else None
+        if frame and frame.depth is None and not frame.started:
+            frame.single = True
+            frame.started = True
+
+    def _complete_singles(self) -> None:
+        if self.frames and self.frames[-1].single and not self.frames[-1].complete:
+            self.frames[-1].complete = True
+
+    def _close_blocks(self) -> None:
+        """Una llave de cierre termina los bloques abiertos a mayor profundidad"""
+        while self.frames:
+            frame = self.frames[-1]
+            if frame.complete:
+                self._pop()
+            elif frame.depth is not None and frame.depth > self.depth:
+                frame.complete = True
+                return
+            elif frame.single and frame.started:
+                # Cuerpo de una sentencia cortado por la llave de un bloque exterior
+                self._pop()
+            else:
+                return
+
+    def _pop(self) -> None:
+        self.frames.pop()
+        self.builder.end()
+        self._after_pop()
+
+    def _after_pop(self) -> None:
+        # La estructura cerrada era el cuerpo único de la anterior
+        self._complete_singles()
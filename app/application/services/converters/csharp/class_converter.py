@@ -1,29 +1,89 @@
 
 # app/application/services/converters/csharp/class_converter.py
 import re
-from typing import Dict, List, Tuple, Set
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple, Set
+from app.application.services.converters.symbol_table import SymbolTable
+from app.application.services.converters.parallel_parser import SourceInput, parse_files, split_sources
+from app.application.services.converters.diagram_partitioner import (
+    DiagramPartitioner, DEFAULT_MAX_ELEMENTS, INDEX_DIAGRAM_NAME, Partition, PartitionEdges
+)
 
 class CSharpClassConverter:
-    def __init__(self):
+    # Acepta el código de cada archivo por separado (ver parallel_parser.source_input)
+    accepts_source_files = True
+
+    def __init__(self, symbol_table: Optional[SymbolTable] = None):
         self.classes: Dict[str, Dict] = {}
         self.relationships: List[Tuple] = []
         self.processed_relationships: Set[Tuple] = set()
         self.current_namespace = ""
+        self.symbols = symbol_table or SymbolTable()
+        self._namespace_positions: List[int] = []
+        self._namespace_names: List[str] = []
+        self._using_positions: List[int] = []
+        self._using_scopes: List[Tuple[str, ...]] = []
 
-    def convert(self, code: str) -> str:
+    def convert(self, code: SourceInput) -> str:
         """Convierte código C# a diagrama UML de clases en PlantUML"""
-        # Preprocesamiento
-        code = self._normalize_code(code)
-        
-        # Extracción de elementos
-        self._extract_namespaces(code)
-        self._extract_classes(code)
-        self._analyze_relationships()
+        self._build_model(code)
         
         # Generación UML
         plantuml = self._generate_plantuml()
         return plantuml
 
+    def iter_convert(self, code: SourceInput) -> Iterator[str]:
+        """Convierte código C# a PlantUML emitiendo el diagrama línea a línea"""
+        self._build_model(code)
+        yield from self._iter_plantuml()
+
+    def convert_partitioned(self, code: SourceInput, max_elements: int = DEFAULT_MAX_ELEMENTS) -> Dict[str, str]:
+        """
+        Convierte código C# a varios diagramas de clases acotados por max_elements,
+        particionados por namespace, más un diagrama índice que los enlaza.
+        """
+        self._build_model(code)
+
+        partitioner = DiagramPartitioner(max_elements)
+        elements = {name: info['namespace'] for name, info in self.classes.items()}
+        edges = [(rel[0], rel[1]) for rel in self.relationships]
+        partitions = partitioner.partition(elements, edges)
+
+        # Cada relación va en la partición de su clase origen; las clases de otras particiones se declaran como externas
+        assigned = partitioner.assign_edges(partitions, self.relationships, lambda rel: (rel[0], rel[1]))
+
+        diagrams = {INDEX_DIAGRAM_NAME: partitioner.render_index(partitions, edges)}
+        for partition, partition_edges in zip(partitions, assigned):
+            diagrams[partition.key] = self._generate_plantuml(
+                partition.elements, partition_edges.edges, partition_edges.external
+            )
+        return diagrams
+
+    def _build_model(self, code: SourceInput):
+        """
+        Construye el modelo de clases y relaciones a partir del código.
+        Cada archivo se parsea por separado (en paralelo si son muchos) y los
+        resultados se fusionan en el orden de entrada; las relaciones se resuelven
+        después, con la tabla de símbolos de todo el proyecto.
+        """
+        for file_classes in parse_files(parse_csharp_source, split_sources(code), self._parse_source):
+            for full_name, class_info in file_classes:
+                self.classes[full_name] = class_info
+                self.symbols.declare_type(full_name, kind=class_info['type'])
+        self._analyze_relationships()
+
+    def _parse_source(self, source: str) -> List[Tuple[str, Dict]]:
+        """Extrae las clases de un archivo (o de código concatenado) como (nombre completo, modelo)"""
+        self._namespace_positions, self._namespace_names = [], []
+        self._using_positions, self._using_scopes = [], []
+        
+        # Preprocesamiento
+        code = self._normalize_code(source)
+        
+        # Extracción de elementos
+        self._extract_namespaces(code)
+        return self._extract_classes(code)
+
     def _normalize_code(self, code: str) -> str:
         """Limpia el código removiendo comentarios y literales de string"""
         # Remove single-line comments
@@ -37,12 +97,44 @@ class CSharpClassConverter:
         return code
 
     def _extract_namespaces(self, code: str):
-        """Extrae namespaces para manejar nombres completos"""
-        namespace_matches = re.finditer(r'namespace\s+([\w.]+)\s*\{', code)
-        for match in namespace_matches:
-            self.current_namespace = match.group(1) + "."
+        """
+        Extrae namespaces y usings con su posición para que cada clase se resuelva
+        dentro de su propio namespace. Como la entrada suele ser la concatenación de
+        varios archivos, un 'using' que aparece después de una declaración de tipo
+        marca el inicio de un nuevo archivo y reinicia los usings vigentes.
+        """
+        declaration_pattern = re.compile(
+            r'\busing\s+(?:static\s+)?(?:\w+\s*=\s*)?([\w.]+)\s*;'
+            r'|\bnamespace\s+([\w.]+)\s*[{;]'
+            r'|\b(?:class|interface|struct)\s+\w+'
+        )
+        current_usings: List[str] = []
+        seen_type = False
+        for match in declaration_pattern.finditer(code):
+            using_name, namespace_name = match.group(1), match.group(2)
+            if using_name:
+                if seen_type:
+                    current_usings = []
+                    seen_type = False
+                current_usings.append(using_name)
+                self._using_positions.append(match.start())
+                self._using_scopes.append(tuple(current_usings))
+            elif namespace_name:
+                self._namespace_positions.append(match.start())
+                self._namespace_names.append(namespace_name)
+                self.current_namespace = namespace_name + "."
+            else:
+                seen_type = True
 
-    def _extract_classes(self, code: str):
+    def _scope_at(self, position: int) -> Tuple[str, Tuple[str, ...]]:
+        """Retorna el namespace y los usings vigentes en una posición del código"""
+        idx = bisect_right(self._namespace_positions, position) - 1
+        namespace = self._namespace_names[idx] if idx >= 0 else ""
+        idx = bisect_right(self._using_positions, position) - 1
+        usings = self._using_scopes[idx] if idx >= 0 else ()
+        return namespace, usings
+
+    def _extract_classes(self, code: str) -> List[Tuple[str, Dict]]:
         """Extrae clases, interfaces, structs y sus miembros"""
         class_pattern = re.compile(
             r'(?:public\s+|private\s+|protected\s+|internal\s+|abstract\s+|sealed\s+|static\s+|partial\s+)*'
@@ -50,14 +142,18 @@ class CSharpClassConverter:
             re.MULTILINE
         )
         
+        classes = []
         for match in class_pattern.finditer(code):
             class_type = match.group(1)
             class_name = match.group(2)
             base_types = [bt.strip() for bt in match.group(3).split(',')] if match.group(3) else []
             
-            full_name = f"{self.current_namespace}{class_name}"
+            namespace, usings = self._scope_at(match.start())
+            full_name = f"{namespace}.{class_name}" if namespace else class_name
             
-            self.classes[full_name] = {
+            class_info = {
+                'namespace': namespace,
+                'usings': usings,
                 'type': class_type,
                 'base_types': base_types,
                 'properties': [],
@@ -69,9 +165,11 @@ class CSharpClassConverter:
             
             start_idx = match.end()
             class_body = self._extract_balanced_content(code[start_idx:], '{', '}')
-            self._parse_class_members(full_name, class_body)
+            self._parse_class_members(class_info, class_body)
+            classes.append((full_name, class_info))
+        return classes
 
-    def _parse_class_members(self, class_name: str, class_body: str):
+    def _parse_class_members(self, class_info: Dict, class_body: str):
         """Analiza los miembros de una clase (campos, propiedades, métodos)"""
         # Propiedades (con getters/setters)
         prop_pattern = re.compile(
@@ -79,7 +177,7 @@ class CSharpClassConverter:
         )
         for match in prop_pattern.finditer(class_body):
             visibility, prop_type, prop_name = match.groups()
-            self.classes[class_name]['properties'].append({
+            class_info['properties'].append({
                 'visibility': visibility,
                 'type': prop_type.strip(),
                 'name': prop_name
@@ -91,7 +189,7 @@ class CSharpClassConverter:
         )
         for match in field_pattern.finditer(class_body):
             visibility, field_type, field_name = match.groups()
-            self.classes[class_name]['fields'].append({
+            class_info['fields'].append({
                 'visibility': visibility,
                 'type': field_type.strip(),
                 'name': field_name
@@ -109,7 +207,7 @@ class CSharpClassConverter:
                  if m in ['public', 'private', 'protected', 'internal']),
                 'private'
             )
-            self.classes[class_name]['methods'].append({
+            class_info['methods'].append({
                 'visibility': visibility,
                 'return_type': return_type.strip(),
                 'name': method_name,
@@ -153,9 +251,11 @@ class CSharpClassConverter:
     def _analyze_relationships(self):
         """Analiza relaciones entre clases (herencia, asociaciones, etc.)"""
         for class_name, class_info in self.classes.items():
+            namespace = class_info['namespace']
+            usings = class_info['usings']
             # Herencia/Implementación
             for base_type in class_info['base_types']:
-                base_type = self._resolve_type(base_type)
+                base_type = self._resolve_type(base_type, namespace, usings)
                 if base_type in self.classes:
                     rel_key = (base_type, class_name, 'inheritance')
                     if rel_key not in self.processed_relationships:
@@ -164,7 +264,7 @@ class CSharpClassConverter:
 
             # Asociaciones a través de miembros
             for member in class_info['properties'] + class_info['fields']:
-                member_type = self._resolve_type(member['type'])
+                member_type = self._resolve_type(member['type'], namespace, usings)
                 if member_type in self.classes:
                     rel_key = (class_name, member_type, 'association', member['name'])
                     if rel_key not in self.processed_relationships:
@@ -174,29 +274,39 @@ class CSharpClassConverter:
             # Dependencias a través de parámetros de métodos
             for method in class_info['methods']:
                 for param in method['parameters']:
-                    param_type = self._resolve_type(param['type'])
+                    param_type = self._resolve_type(param['type'], namespace, usings)
                     if param_type in self.classes:
                         rel_key = (class_name, param_type, 'dependency', method['name'])
                         if rel_key not in self.processed_relationships:
                             self.relationships.append(rel_key)
                             self.processed_relationships.add(rel_key)
 
-    def _resolve_type(self, type_name: str) -> str:
-        """Resuelve nombres de tipo complejos (genéricos, arrays, etc.)"""
-        # Remove generic type parameters
-        type_name = re.sub(r'<.*>', '', type_name)
-        # Remove array brackets
-        type_name = re.sub(r'\[\]', '', type_name)
-        # Remove nullable marker
-        type_name = re.sub(r'\?', '', type_name)
-        return type_name.strip()
+    def _resolve_type(self, type_name: str, namespace: str = "", usings: Tuple[str, ...] = ()) -> str:
+        """
+        Resuelve nombres de tipo complejos (genéricos, arrays, etc.) a su nombre
+        completo mediante la tabla de símbolos del proyecto
+        """
+        resolved = self.symbols.resolve_type(type_name, namespace, usings)
+        return resolved if resolved is not None else SymbolTable.clean_type_name(type_name)
+
+    def _generate_plantuml(self, class_names: Optional[List[str]] = None,
+                           relationships: Optional[List[Tuple]] = None,
+                           external: Optional[Dict[str, Optional[Partition]]] = None) -> str:
+        """
+        Genera el código PlantUML a partir de las clases y relaciones.
+        Si se indican class_names/relationships, solo emite ese subconjunto del modelo;
+        external son las clases de otras particiones a las que apuntan sus relaciones.
+        """
+        return '\n'.join(self._iter_plantuml(class_names, relationships, external))
 
-    def _generate_plantuml(self) -> str:
-        """Genera el código PlantUML a partir de las clases y relaciones"""
-        plantuml = ["@startuml"]
+    def _iter_plantuml(self, class_names: Optional[List[str]] = None,
+                       relationships: Optional[List[Tuple]] = None,
+                       external: Optional[Dict[str, Optional[Partition]]] = None) -> Iterator[str]:
+        """Emite el PlantUML línea a línea sin acumular el documento completo"""
+        yield "@startuml"
         
         # Configuración
-        plantuml.extend([
+        yield from (
             "skinparam class {",
             "  BackgroundColor White",
             "  BorderColor Black",
@@ -204,19 +314,21 @@ class CSharpClassConverter:
             "}",
             "hide empty members",
             ""
-        ])
+        )
         
         # Clases
-        for class_name, class_info in self.classes.items():
-            plantuml.append(self._generate_class_uml(class_name, class_info))
+        for class_name in (self.classes if class_names is None else class_names):
+            yield self._generate_class_uml(class_name, self.classes[class_name])
+        for class_name, partition in (external or {}).items():
+            kind = self.classes.get(class_name, {}).get('type', 'class')
+            yield f"{kind} {class_name.split('.')[-1]} {PartitionEdges.stereotype(partition)}"
         
         # Relaciones
-        plantuml.append("")
-        for rel in self.relationships:
-            plantuml.append(self._generate_relationship_uml(rel))
+        yield ""
+        for rel in (self.relationships if relationships is None else relationships):
+            yield self._generate_relationship_uml(rel)
         
-        plantuml.append("@enduml")
-        return '\n'.join(plantuml)
+        yield "@enduml"
 
     def _generate_class_uml(self, class_name: str, class_info: Dict) -> str:
         """Genera la definición UML para una clase"""
@@ -292,4 +404,9 @@ class CSharpClassConverter:
             'private': '-',
             'protected': '#',
             'internal': '~'
-        }.get(visibility.lower(), '~')
\ No newline at end of file
+        }.get(visibility.lower(), '~')
+
+
+def parse_csharp_source(source: str) -> List[Tuple[str, Dict]]:
+    """Parsea un archivo C# en un worker del pool de parseo"""
+    return CSharpClassConverter()._parse_source(source)
@@ -1,6 +1,10 @@
 # # app/application/services/converters/csharp/sequence_converter.py
 import re
+from bisect import bisect_right
 from collections import defaultdict
+from app.application.services.converters.call_graph import (
+    DEFAULT_MAX_DEPTH, DEFAULT_MAX_MESSAGES, CallGraph
+)
 
 class CSharpSequenceConverter:
     def __init__(self):
@@ -17,11 +21,17 @@ class CSharpSequenceConverter:
         }
         self.field_mappings = defaultdict(dict)
         self.current_class = None
+        self.graph = CallGraph()
+        self.entry_points = None
+        self.max_depth = DEFAULT_MAX_DEPTH
+        self.max_messages = DEFAULT_MAX_MESSAGES
 
     def convert(self, code: str) -> str:
         code = self._clean_code(code)
         self._analyze_class_structure(code)
-        interactions = self._analyze_method_calls(code)
+        self.graph = self._analyze_method_calls(code)
+        interactions = self.graph.iter_sequence(self.graph.select_entry_points(self.entry_points),
+                                                self.max_depth, self.max_messages)
         
         plantuml = ["@startuml"]
         plantuml += self._generate_participants()
@@ -50,13 +60,18 @@ class CSharpSequenceConverter:
                 self.field_mappings[class_name][field_name] = field_type
 
     def _analyze_method_calls(self, code):
-        interactions = []
+        """Grafo de llamadas agregado: las llamadas repetidas se acumulan en una sola arista"""
+        graph = CallGraph()
+        class_matches = list(re.finditer(r'public class (\w+)', code))
+        class_offsets = [class_match.start() for class_match in class_matches]
         method_pattern = r'public \w+ (\w+)\(.*?\)\s*\{([^}]*)\}'
         
         for method_match in re.finditer(method_pattern, code, re.DOTALL):
             method_name = method_match.group(1)
             method_body = method_match.group(2)
-            caller_class = self._find_class_by_position(code, method_match.start())
+            caller_class = self._find_class_by_position(class_matches, class_offsets, method_match.start())
+            function = f"{caller_class}.{method_name}"
+            graph.add_function(function, caller_class)
             
             # Llamadas a métodos
             call_pattern = r'(\w+)\.(\w+)\(([^)]*)\)'
@@ -67,24 +82,17 @@ class CSharpSequenceConverter:
                 
                 callee_class = self._resolve_instance_type(caller_class, instance)
                 if callee_class:
-                    interactions.append({
-                        'from': caller_class,
-                        'to': callee_class,
-                        'message': f"{method_called}({params})"
-                    })
+                    graph.add_call(function, callee_class, f"{method_called}({params})",
+                                   callee=f"{callee_class}.{method_called}")
             
             # Creación de objetos
             new_pattern = r'new (\w+)\(([^)]*)\)'
             for new_match in re.finditer(new_pattern, method_body):
                 class_name = new_match.group(1)
                 params = new_match.group(2)
-                interactions.append({
-                    'from': caller_class,
-                    'to': class_name,
-                    'message': f"new({params})"
-                })
+                graph.add_call(function, class_name, f"new({params})")
         
-        return interactions
+        return graph
 
     def _generate_participants(self):
         lines = ["actor Usuario"]
@@ -120,9 +128,14 @@ class CSharpSequenceConverter:
         if boundary:
             lines.append(f"Usuario -> {boundary} : [Inicia acción]")
         
-        # Agregar interacciones
-        for interaction in interactions:
-            lines.append(f"{interaction['from']} -> {interaction['to']} : {interaction['message']}")
+        # Agregar interacciones (recorrido del grafo de llamadas)
+        for step in interactions:
+            if step.kind == 'call':
+                lines.append(f"{step.edge.source} -> {step.edge.target} : {step.edge.label}")
+            elif step.kind == 'loop':
+                lines.append(f"loop {step.label}")
+            elif step.kind == 'end':
+                lines.append("end")
         
         # Finalizar con respuesta al usuario
         if boundary:
@@ -136,14 +149,10 @@ class CSharpSequenceConverter:
                 return role
         return 'entity'
 
-    def _find_class_by_position(self, code, pos):
-        classes = list(re.finditer(r'public class (\w+)', code))
-        for i, class_match in enumerate(classes):
-            start = class_match.start()
-            end = classes[i+1].start() if i+1 < len(classes) else len(code)
-            if start <= pos < end:
-                return class_match.group(1)
-        return None
+    def _find_class_by_position(self, class_matches, class_offsets, pos):
+        # Última clase declarada antes de la posición
+        index = bisect_right(class_offsets, pos) - 1
+        return class_matches[index].group(1) if index >= 0 else None
 
     def _resolve_instance_type(self, current_class, instance_name):
         # Resolver campos privados (_service -> Service)
@@ -0,0 +1,143 @@
+# app/application/services/converters/dependency_graph.py
+"""
+Grafo dirigido de dependencias con listas de adyacencia.
+
+Las aristas repetidas se colapsan en una sola con un contador, los ciclos se
+detectan con el algoritmo de Tarjan (componentes fuertemente conexas, en tiempo
+lineal) y se puede obtener la reducción transitiva: las aristas a -> c que ya
+están implicadas por un camino a -> b -> c se omiten.
+"""
+from typing import Dict, Iterator, List, Set, Tuple
+
+
+class DependencyGraph:
+    """
+    Adyacencia origen -> {destino: cantidad de aristas}, con los orígenes en orden de
+    inserción. Los nodos que solo son destino no tienen entrada propia.
+    """
+
+    def __init__(self):
+        self.adjacency: Dict[str, Dict[str, int]] = {}
+
+    def add_node(self, node: str) -> None:
+        self.adjacency.setdefault(node, {})
+
+    def add_edge(self, source: str, target: str, count: int = 1) -> None:
+        """Agrega (o acumula) la arista; los lazos se ignoran"""
+        if source == target:
+            return
+        targets = self.adjacency.setdefault(source, {})
+        targets[target] = targets.get(target, 0) + count
+
+    def nodes(self) -> Set[str]:
+        nodes = set(self.adjacency)
+        for targets in self.adjacency.values():
+            nodes.update(targets)
+        return nodes
+
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.adjacency.values())
+
+    def edges(self) -> Iterator[Tuple[str, str, int]]:
+        """(origen, destino, cantidad) con destinos ordenados para una salida estable"""
+        for source, targets in self.adjacency.items():
+            for target in sorted(targets):
+                yield source, target, targets[target]
+
+    def strongly_connected_components(self) -> List[List[str]]:
+        """
+        Tarjan iterativo (sin recursión, apto para grafos grandes).
+        Retorna las componentes en orden topológico inverso: cada una solo
+        depende de componentes que aparecen antes en la lista.
+        """
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        components: List[List[str]] = []
+        counter = 0
+
+        for root in self.adjacency:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.adjacency[root]))]
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(self.adjacency.get(successor, ()))))
+                        advanced = True
+                        break
+                    if successor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[successor])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def cycles(self) -> List[List[str]]:
+        """Grupos de nodos que dependen circularmente entre sí"""
+        return [component for component in self.strongly_connected_components() if len(component) > 1]
+
+    def transitive_reduction(self) -> 'DependencyGraph':
+        """
+        Grafo con las mismas relaciones de alcanzabilidad y el mínimo de aristas.
+        Se calcula sobre el grafo de componentes (que es acíclico): una arista entre
+        componentes se elimina si su destino es alcanzable desde otro sucesor. Las
+        aristas dentro de un ciclo se conservan todas. Los conjuntos alcanzables se
+        representan como bits de un entero.
+        """
+        components = self.strongly_connected_components()
+        component_of = {node: i for i, component in enumerate(components) for node in component}
+
+        successors: List[Set[int]] = [set() for _ in components]
+        for source, targets in self.adjacency.items():
+            for target in targets:
+                if component_of[source] != component_of[target]:
+                    successors[component_of[source]].add(component_of[target])
+
+        # Orden topológico inverso: los sucesores de una componente ya están calculados
+        reachable = [0] * len(components)
+        redundant: List[int] = [0] * len(components)
+        for i, component_successors in enumerate(successors):
+            through_others = 0
+            for successor in component_successors:
+                through_others |= reachable[successor]
+            redundant[i] = through_others
+            reach = through_others
+            for successor in component_successors:
+                reach |= 1 << successor
+            reachable[i] = reach
+
+        reduced = DependencyGraph()
+        for node in self.adjacency:
+            reduced.add_node(node)
+        for source, targets in self.adjacency.items():
+            source_component = component_of[source]
+            for target, count in targets.items():
+                target_component = component_of[target]
+                if source_component == target_component or not (redundant[source_component] >> target_component) & 1:
+                    reduced.add_edge(source, target, count)
+        return reduced
@@ -0,0 +1,182 @@
+# app/application/services/converters/diagram_partitioner.py
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+DEFAULT_MAX_ELEMENTS = 150
+INDEX_DIAGRAM_NAME = "index"
+# Estereotipo de los destinos que no pertenecen a ninguna partición
+EXTERNAL_STEREOTYPE = "externo"
+
+_KEY_PATTERN = re.compile(r'[^0-9a-z_]+')
+
+E = TypeVar("E")
+
+
+@dataclass
+class Partition:
+    """Subconjunto de elementos de un modelo que se emite como un diagrama propio"""
+    name: str
+    elements: List[str] = field(default_factory=list)
+    key: str = ""  # Nombre del diagrama en el resultado y ancla en el índice (único, sin espacios)
+
+
+@dataclass
+class PartitionEdges(Generic[E]):
+    """Aristas que se emiten en una partición y destinos que viven fuera de ella"""
+    edges: List[E] = field(default_factory=list)
+    # Destino externo -> partición que lo contiene (None si no está en ninguna)
+    external: Dict[str, Optional[Partition]] = field(default_factory=dict)
+
+    @staticmethod
+    def stereotype(partition: Optional[Partition]) -> str:
+        """Estereotipo con el que se declara un destino externo"""
+        return f"<<{partition.name if partition else EXTERNAL_STEREOTYPE}>>"
+
+
+class DiagramPartitioner:
+    """
+    Divide el modelo de un diagrama en particiones con un presupuesto máximo de
+    elementos para que el tamaño de cada diagrama y su tiempo de generación queden
+    acotados sin importar el tamaño del repositorio.
+
+    1. Agrupa los elementos por su clave (namespace o paquete).
+    2. Los grupos que exceden el presupuesto se dividen siguiendo el grafo de
+       dependencias (recorrido BFS) para mantener juntos los elementos conectados.
+    3. Los grupos pequeños consecutivos se fusionan hasta llenar el presupuesto.
+    """
+
+    def __init__(self, max_elements: int = DEFAULT_MAX_ELEMENTS):
+        if max_elements < 1:
+            raise ValueError("max_elements debe ser mayor que cero")
+        self.max_elements = max_elements
+
+    def partition(self, elements: Dict[str, str], edges: Iterable[Tuple[str, str]] = ()) -> List[Partition]:
+        """
+        elements: id del elemento -> clave de agrupación (namespace/paquete)
+        edges: pares (origen, destino) entre ids de elementos
+        """
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for element_id, group_key in elements.items():
+            groups[group_key or "root"].append(element_id)
+
+        adjacency: Dict[str, List[str]] = defaultdict(list)
+        for source, target in edges:
+            if source in elements and target in elements and source != target:
+                adjacency[source].append(target)
+                adjacency[target].append(source)
+
+        chunks: List[Partition] = []
+        for group_key in sorted(groups):
+            members = groups[group_key]
+            if len(members) <= self.max_elements:
+                chunks.append(Partition(group_key, members))
+                continue
+            ordered = self._cluster_order(members, adjacency)
+            total = (len(ordered) + self.max_elements - 1) // self.max_elements
+            for i in range(total):
+                start = i * self.max_elements
+                chunks.append(Partition(f"{group_key} ({i + 1}/{total})",
+                                        ordered[start:start + self.max_elements]))
+
+        partitions = self._merge_small(chunks)
+        self._assign_keys(partitions)
+        return partitions
+
+    def _cluster_order(self, members: List[str], adjacency: Dict[str, List[str]]) -> List[str]:
+        """Ordena los miembros de un grupo por recorrido BFS sobre sus dependencias internas"""
+        member_set = set(members)
+        visited = set()
+        ordered = []
+        for seed in members:
+            if seed in visited:
+                continue
+            visited.add(seed)
+            queue = deque([seed])
+            while queue:
+                current = queue.popleft()
+                ordered.append(current)
+                for neighbor in adjacency.get(current, ()):
+                    if neighbor in member_set and neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append(neighbor)
+        return ordered
+
+    def _merge_small(self, chunks: List[Partition]) -> List[Partition]:
+        """Fusiona particiones consecutivas mientras quepan en el presupuesto"""
+        merged: List[Partition] = []
+        names: List[List[str]] = []
+        for chunk in chunks:
+            if merged and len(merged[-1].elements) + len(chunk.elements) <= self.max_elements:
+                merged[-1].elements.extend(chunk.elements)
+                names[-1].append(chunk.name)
+            else:
+                merged.append(Partition(chunk.name, list(chunk.elements)))
+                names.append([chunk.name])
+        for partition, group_names in zip(merged, names):
+            if len(group_names) > 1:
+                partition.name = f"{group_names[0]} .. {group_names[-1]}"
+        return merged
+
+    @staticmethod
+    def _assign_keys(partitions: List[Partition]):
+        """Claves únicas en minúsculas, solo con letras, dígitos y '_', distintas del índice"""
+        used = {INDEX_DIAGRAM_NAME}
+        for partition in partitions:
+            base = _KEY_PATTERN.sub('_', partition.name.lower()).strip('_') or "partition"
+            key, suffix = base, 2
+            while key in used:
+                key, suffix = f"{base}_{suffix}", suffix + 1
+            used.add(key)
+            partition.key = key
+
+    @staticmethod
+    def assign_edges(partitions: List[Partition], edges: Iterable[E],
+                     endpoints: Callable[[E], Tuple[Optional[str], Optional[str]]]) -> List[PartitionEdges[E]]:
+        """
+        Reparte las aristas con la misma política en todos los diagramas: cada arista
+        se emite en la partición de su origen y, si su destino está en otra partición
+        (o en ninguna), la partición lo declara como elemento externo. Las aristas
+        cuyo origen no está en ninguna partición se descartan.
+        """
+        owner = {element: partition for partition in partitions for element in partition.elements}
+        assigned = {id(partition): PartitionEdges() for partition in partitions}
+        for edge in edges:
+            source, target = endpoints(edge)
+            source_partition = owner.get(source)
+            if source_partition is None or target is None:
+                continue
+            partition_edges = assigned[id(source_partition)]
+            partition_edges.edges.append(edge)
+            target_partition = owner.get(target)
+            if target_partition is not source_partition:
+                partition_edges.external.setdefault(target, target_partition)
+        return [assigned[id(partition)] for partition in partitions]
+
+    @staticmethod
+    def cross_partition_edges(partitions: List[Partition],
+                              edges: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Cuenta las aristas entre particiones distintas, por clave de partición"""
+        owner = {element: p.key for p in partitions for element in p.elements}
+        counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        for source, target in edges:
+            source_part = owner.get(source)
+            target_part = owner.get(target)
+            if source_part and target_part and source_part != target_part:
+                counts[(source_part, target_part)] += 1
+        return counts
+
+    def render_index(self, partitions: List[Partition], edges: Iterable[Tuple[str, str]]) -> str:
+        """Genera el diagrama índice que enlaza todas las particiones"""
+        plantuml = ["@startuml", f"title Índice ({len(partitions)} diagramas)"]
+        aliases = {p.key: f"P{i}" for i, p in enumerate(partitions)}
+        for partition in partitions:
+            plantuml.append(
+                f'package "{partition.name} ({len(partition.elements)})" as {aliases[partition.key]} '
+                f'[[#{partition.key}]]'
+            )
+        for (source, target), count in sorted(self.cross_partition_edges(partitions, edges).items()):
+            plantuml.append(f'{aliases[source]} ..> {aliases[target]} : {count}')
+        plantuml.append("@enduml")
+        return '\n'.join(plantuml)
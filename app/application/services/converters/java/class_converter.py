@@ -1,65 +1,158 @@
 # app/application/services/converters/java/class_converter.py
 import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from app.application.services.converters.java.declaration_scanner import (
+    CompilationUnit, JavaType, VISIBILITIES, scan_java
+)
+from app.application.services.converters.parallel_parser import SourceInput, parse_files, split_sources
+from app.application.services.converters.symbol_table import SymbolTable
+
+TYPE_NAME_PATTERN = re.compile(r'[\w$]+(?:\.[\w$]+)*')
+
+
+def scan_java_source(source: str) -> List[CompilationUnit]:
+    """Escanea un archivo en un worker del pool de parseo"""
+    return scan_java(source)
+
 
 class JavaClassConverter:
-    def convert(self, code: str) -> str:
-        plantuml = ["@startuml"]
-        
-        # Eliminar comentarios para simplificar el análisis
-        code = re.sub(r'//.*?\n', '\n', code)
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        
-        # Buscar todas las clases
-        class_matches = list(re.finditer(r'(?:public\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?\s*\{', code))
-        
-        for i, match in enumerate(class_matches):
-            class_name = match.group(1)
-            parent_class = match.group(2)
-            
-            # Obtener el contenido de la clase
-            start_pos = match.end()
-            end_pos = class_matches[i+1].start() if i+1 < len(class_matches) else len(code)
-            class_body = code[start_pos:end_pos]
-            
-            plantuml.append(f"class {class_name} {{")
-            
-            # Extraer campos
-            fields = re.finditer(r'(private|protected|public)\s+([\w<>]+)\s+(\w+)\s*;', class_body)
-            for field in fields:
-                visibility = self._get_uml_visibility(field.group(1))
-                plantuml.append(f"  {visibility}{field.group(3)} : {field.group(2)}")
-            
-            # Extraer métodos
-            methods = re.finditer(r'(private|protected|public)\s+([\w<>]+)\s+(\w+)\s*\(([^)]*)\)', class_body)
-            for method in methods:
-                visibility = self._get_uml_visibility(method.group(1))
-                return_type = method.group(2)
-                method_name = method.group(3)
-                params = self._parse_parameters(method.group(4))
-                plantuml.append(f"  {visibility}{method_name}({params}) : {return_type}")
-            
-            plantuml.append("}")
-            
-            # Agregar relación de herencia si existe
-            if parent_class:
-                plantuml.append(f"{class_name} --|> {parent_class}")
-        
-        plantuml.append("@enduml")
-        return "\n".join(plantuml)
-    
-    def _get_uml_visibility(self, modifier: str) -> str:
+    """
+    Diagrama de clases de Java sobre el escáner de declaraciones: clases,
+    interfaces, enums, records y anotaciones, con sus tipos anidados.
+    """
+    # Acepta el código de cada archivo por separado (ver parallel_parser.source_input)
+    accepts_source_files = True
+
+    def __init__(self, symbol_table: Optional[SymbolTable] = None):
+        self.types: Dict[str, Tuple[JavaType, CompilationUnit]] = {}
+        self.relationships: List[Tuple[str, str, str, str]] = []
+        self.symbols = symbol_table or SymbolTable()
+
+    def convert(self, code: SourceInput) -> str:
+        """Convierte código Java a diagrama UML de clases en PlantUML"""
+        return "\n".join(self.iter_convert(code))
+
+    def iter_convert(self, code: SourceInput) -> Iterator[str]:
+        """Convierte código Java a PlantUML emitiendo el diagrama línea a línea"""
+        self._build_model(code)
+        yield from self._iter_plantuml()
+
+    def _build_model(self, code: SourceInput):
+        """
+        Escanea cada archivo (en paralelo si son muchos), registra los tipos por su
+        nombre completo y después resuelve las relaciones con la tabla de símbolos.
+        """
+        self.types.clear()
+        self.relationships = []
+        for units in parse_files(scan_java_source, split_sources(code)):
+            for unit in units:
+                for java_type in unit.iter_types():
+                    fqn = self._full_name(unit, java_type)
+                    if fqn not in self.types:
+                        self.types[fqn] = (java_type, unit)
+                        self.symbols.declare_type(fqn, kind=java_type.kind)
+        self._analyze_relationships()
+
+    @staticmethod
+    def _full_name(unit: CompilationUnit, java_type: JavaType) -> str:
+        return f"{unit.package}.{java_type.qualified_name}" if unit.package else java_type.qualified_name
+
+    def _resolve(self, type_name: str, scope: str, imports: List[str]) -> Optional[str]:
+        """FQN de un tipo del proyecto; el ámbito es el propio tipo, así los anidados ven a sus contenedores"""
+        return self.symbols.resolve_type(type_name, scope, imports)
+
+    def _analyze_relationships(self):
+        """Herencia, implementación, anidamiento y asociaciones por campos"""
+        seen: Set[Tuple[str, str, str, str]] = set()
+
+        def add(source: str, target: str, kind: str, label: str = ''):
+            key = (source, target, kind, label)
+            if source != target and key not in seen:
+                seen.add(key)
+                self.relationships.append(key)
+
+        for fqn, (java_type, unit) in self.types.items():
+            imports = [imported[:-2] if imported.endswith('.*') else imported for imported in unit.imports]
+            for parent in java_type.extends:
+                add(fqn, self._resolve(parent, fqn, imports) or self._external_name(parent), 'extends')
+            for interface in java_type.implements:
+                add(fqn, self._resolve(interface, fqn, imports) or self._external_name(interface), 'implements')
+            for nested in java_type.types:
+                add(fqn, self._full_name(unit, nested), 'nested')
+            for java_field in java_type.fields:
+                for referenced in TYPE_NAME_PATTERN.findall(java_field.type):
+                    target = self._resolve(referenced, fqn, imports)
+                    if target:
+                        add(fqn, target, 'association', java_field.name)
+
+    @staticmethod
+    def _external_name(type_name: str) -> str:
+        """Tipo que no pertenece al proyecto: nombre simple sin genéricos"""
+        return SymbolTable.clean_type_name(type_name).rpartition('.')[2]
+
+    def _display_name(self, fqn: str) -> str:
+        entry = self.types.get(fqn)
+        return entry[0].qualified_name if entry else fqn
+
+    def _iter_plantuml(self) -> Iterator[str]:
+        yield "@startuml"
+        if any('.' in java_type.qualified_name for java_type, _ in self.types.values()):
+            # Los tipos anidados se nombran Externa.Interna, no como paquetes
+            yield "set separator none"
+
+        for java_type, _ in self.types.values():
+            yield from self._iter_type(java_type)
+
+        for source, target, kind, label in self.relationships:
+            source, target = self._display_name(source), self._display_name(target)
+            if kind == 'extends':
+                yield f"{source} --|> {target}"
+            elif kind == 'implements':
+                yield f"{source} ..|> {target}"
+            elif kind == 'nested':
+                yield f"{source} +-- {target}"
+            else:
+                yield f"{source} --> \"{label}\" {target}"
+
+        yield "@enduml"
+
+    def _iter_type(self, java_type: JavaType) -> Iterator[str]:
+        keyword = {
+            'interface': 'interface', 'enum': 'enum', 'annotation': 'annotation'
+        }.get(java_type.kind, 'class')
+        if keyword == 'class' and 'abstract' in java_type.modifiers:
+            keyword = 'abstract class'
+        stereotypes = (['record'] if java_type.kind == 'record' else []) + list(java_type.annotations)
+        header = f"{keyword} {java_type.qualified_name}{java_type.type_parameters}"
+        if stereotypes:
+            header += ' ' + ' '.join(f"<<{s}>>" for s in stereotypes)
+        yield f"{header} {{"
+
+        implicit_public = java_type.kind in ('interface', 'annotation')
+        for constant in java_type.enum_constants:
+            yield f"  {constant}"
+        for component_type, name in java_type.record_components:
+            yield f"  {name} : {component_type}"
+        for java_field in java_type.fields:
+            visibility = self._get_uml_visibility(java_field.modifiers, implicit_public)
+            static = "{static} " if 'static' in java_field.modifiers or implicit_public else ""
+            yield f"  {static}{visibility}{java_field.name} : {java_field.type}"
+        for method in java_type.methods:
+            visibility = self._get_uml_visibility(method.modifiers, implicit_public)
+            modifier = ""
+            if 'static' in method.modifiers:
+                modifier = "{static} "
+            elif 'abstract' in method.modifiers:
+                modifier = "{abstract} "
+            params = ', '.join(f"{name} : {param_type}" for param_type, name in method.parameters)
+            signature = f"  {modifier}{visibility}{method.name}({params})"
+            yield signature if method.is_constructor else f"{signature} : {method.return_type}"
+        yield "}"
+
+    def _get_uml_visibility(self, modifiers: Tuple[str, ...], implicit_public: bool = False) -> str:
+        modifier = next((m for m in modifiers if m in VISIBILITIES), 'public' if implicit_public else '')
         return {
             'private': '-',
             'protected': '#',
             'public': '+'
-        }.get(modifier.lower(), '~')
-    
-    def _parse_parameters(self, params_str: str) -> str:
-        params = []
-        for param in filter(None, map(str.strip, params_str.split(','))):
-            parts = re.split(r'\s+', param)
-            if len(parts) >= 2:
-                param_type = parts[-2]
-                param_name = parts[-1]
-                params.append(f"{param_name} : {param_type}")
-        return ', '.join(params)
\ No newline at end of file
+        }.get(modifier, '~')
@@ -0,0 +1,543 @@
+# app/application/services/converters/java/declaration_scanner.py
+"""
+Front end de Java: lexer de una sola pasada y escáner de declaraciones.
+
+Una primera pasada empareja las llaves del archivo (ignorando las que están en
+literales y comentarios). El lexer descarta espacios y comentarios y deja cada
+literal como un solo token; sobre los tokens, el escáner reconoce paquete,
+imports y tipos (class, interface, enum, record y @interface) con sus miembros,
+genéricos, anotaciones y tipos anidados. Los cuerpos de métodos e inicializadores
+se saltan con las llaves ya emparejadas, sin tokenizar su contenido, por lo que
+el costo es lineal en el tamaño del archivo.
+
+Cada declaración guarda su span (offsets de inicio y fin en el código original).
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Los espacios se consumen como prefijo de cada token (posesivo, sin retroceso)
+TOKEN_PATTERN = re.compile(r'''
+    \s*+(?:
+      (?P<skip>//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<literal>"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+    | (?P<word>(?:[^\W\d]|\$)[\w$]*)
+    | (?P<number>\.?\d(?:[\w.]|(?<=[eEpP])[+-])*)
+    | (?P<symbol>\.\.\.|.)
+    )?
+''', re.DOTALL | re.VERBOSE)
+
+MODIFIERS = frozenset((
+    'public', 'protected', 'private', 'static', 'final', 'abstract', 'native',
+    'synchronized', 'transient', 'volatile', 'strictfp', 'default', 'sealed',
+))
+VISIBILITIES = ('public', 'protected', 'private')
+TYPE_KEYWORDS = frozenset(('class', 'interface', 'enum'))
+
+
+@dataclass
+class JavaField:
+    name: str
+    type: str
+    modifiers: Tuple[str, ...] = ()
+    annotations: Tuple[str, ...] = ()
+    start: int = 0
+    end: int = 0
+
+
+@dataclass
+class JavaMethod:
+    name: str
+    return_type: Optional[str]  # None en los constructores
+    parameters: List[Tuple[str, str]] = field(default_factory=list)  # (tipo, nombre)
+    type_parameters: str = ''
+    throws: List[str] = field(default_factory=list)
+    modifiers: Tuple[str, ...] = ()
+    annotations: Tuple[str, ...] = ()
+    start: int = 0
+    end: int = 0
+
+    @property
+    def is_constructor(self) -> bool:
+        return self.return_type is None
+
+
+@dataclass
+class JavaType:
+    kind: str  # class, interface, enum, record o annotation
+    name: str
+    qualified_name: str  # Nombre dentro del archivo: Externa.Interna
+    type_parameters: str = ''
+    extends: List[str] = field(default_factory=list)
+    implements: List[str] = field(default_factory=list)
+    modifiers: Tuple[str, ...] = ()
+    annotations: Tuple[str, ...] = ()
+    fields: List[JavaField] = field(default_factory=list)
+    methods: List[JavaMethod] = field(default_factory=list)
+    enum_constants: List[str] = field(default_factory=list)
+    record_components: List[Tuple[str, str]] = field(default_factory=list)  # (tipo, nombre)
+    types: List['JavaType'] = field(default_factory=list)  # Tipos anidados
+    start: int = 0
+    end: int = 0
+
+
+@dataclass
+class CompilationUnit:
+    package: str = ''
+    imports: List[str] = field(default_factory=list)
+    types: List[JavaType] = field(default_factory=list)
+
+    def iter_types(self) -> Iterator[JavaType]:
+        """Todos los tipos del archivo en orden de declaración (los anidados tras su contenedor)"""
+        stack = list(reversed(self.types))
+        while stack:
+            java_type = stack.pop()
+            yield java_type
+            stack.extend(reversed(java_type.types))
+
+
+# Primera pasada: solo literales, comentarios y llaves
+BLOCK_PATTERN = re.compile(
+    r'"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+    r'|//[^\n]*|/\*.*?(?:\*/|\Z)|([{}])',
+    re.DOTALL
+)
+
+
+def match_braces(code: str) -> Dict[int, int]:
+    """Offset de la '}' que cierra cada '{' del código (fuera de literales y comentarios)"""
+    matches: Dict[int, int] = {}
+    stack: List[int] = []
+    for match in BLOCK_PATTERN.finditer(code):
+        brace = match.group(1)
+        if brace == '{':
+            stack.append(match.start())
+        elif brace and stack:
+            matches[stack.pop()] = match.start()
+    return matches
+
+
+def join_type_tokens(tokens: List[str]) -> str:
+    """Texto normalizado de un tipo: 'Map<String, List<Integer>>', 'T extends Comparable<T>'"""
+    parts = []
+    for token in tokens:
+        if token == ',':
+            parts.append(', ')
+        elif token in ('extends', 'super', '&'):
+            parts.append(f' {token} ')
+        elif token == '?' or not parts or parts[-1][-1:] in ('<', ' ', '.', '@') or token in '<>[].':
+            parts.append(token)
+        else:
+            parts.append(' ' + token)
+    return ''.join(parts)
+
+
+def _is_word(token: str) -> bool:
+    return token[:1].isalpha() or token[:1] in '_$'
+
+
+class DeclarationScanner:
+    """
+    Escáner recursivo sobre los tokens de un archivo; el anidamiento solo se sigue
+    en tipos. Los tokens se producen a demanda: al saltar un bloque, el lexer
+    continúa después de la '}' que lo cierra (calculada en la primera pasada), de
+    modo que el contenido de los cuerpos nunca se tokeniza.
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self.closing_braces = match_braces(code)
+        self.tokens: List[str] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.pos = 0
+        self._matches = TOKEN_PATTERN.finditer(code)
+
+    def peek(self, offset: int = 0) -> str:
+        """Token en pos + offset ('' al final del código)"""
+        index = self.pos + offset
+        while index >= len(self.tokens):
+            if not self._lex_next():
+                return ''
+        return self.tokens[index]
+
+    def _lex_next(self) -> bool:
+        for match in self._matches:
+            kind = match.lastgroup
+            if kind is not None and kind != 'skip':
+                start, end = match.span(kind)
+                self.tokens.append(match.group(kind))
+                self.starts.append(start)
+                self.ends.append(end)
+                return True
+        return False
+
+    def scan(self) -> List[CompilationUnit]:
+        """
+        Unidades de compilación del código. Si la entrada es la concatenación de
+        varios archivos, un 'package' o 'import' posterior a una declaración de
+        tipo marca el inicio de otro archivo.
+        """
+        units = [CompilationUnit()]
+        while self.peek():
+            token = self.peek()
+            if token in ('package', 'import') and units[-1].types:
+                units.append(CompilationUnit())
+            unit = units[-1]
+            if token == 'package':
+                self.pos += 1
+                unit.package = self._read_until(';')
+            elif token == 'import':
+                self.pos += 1
+                if self.peek() == 'static':
+                    self.pos += 1
+                unit.imports.append(self._read_until(';'))
+            else:
+                declaration = self._member(owner=None)
+                if isinstance(declaration, JavaType):
+                    unit.types.append(declaration)
+        return units
+
+    # Utilidades de recorrido
+
+    def _read_until(self, terminator: str) -> str:
+        begin = self.pos
+        while self.peek() and self.peek() != terminator:
+            self.pos += 1
+        text = ''.join(self.tokens[begin:self.pos])
+        self.pos += 1
+        return text
+
+    def _skip_block(self) -> None:
+        """Salta el bloque {...} que empieza en el token actual sin tokenizar su contenido"""
+        close = self.closing_braces.get(self.starts[self.pos], len(self.code) - 1)
+        del self.tokens[self.pos:], self.starts[self.pos:], self.ends[self.pos:]
+        self.tokens.append('}')
+        self.starts.append(close)
+        self.ends.append(close + 1)
+        self.pos += 1
+        self._matches = TOKEN_PATTERN.finditer(self.code, close + 1)
+
+    def _skip_parentheses(self) -> None:
+        """Salta desde el '(' actual hasta su ')' (inclusive)"""
+        depth = 0
+        while True:
+            token = self.peek()
+            if not token:
+                return
+            self.pos += 1
+            if token == '(':
+                depth += 1
+            elif token == ')':
+                depth -= 1
+                if depth <= 0:
+                    return
+
+    def _skip_statement(self) -> None:
+        """Salta hasta ';' o hasta el final de un bloque {...}, lo que llegue primero"""
+        while self.peek():
+            token = self.peek()
+            if token == ';':
+                self.pos += 1
+                return
+            if token == '{':
+                self._skip_block()
+                return
+            if token == '}':
+                return
+            self.pos += 1
+
+    def _span_end(self) -> int:
+        last = min(self.pos, len(self.ends)) - 1  # pos puede pasar del final en código truncado
+        return self.ends[last] if last >= 0 else 0
+
+    # Declaraciones
+
+    def _modifiers(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        annotations: List[str] = []
+        modifiers: List[str] = []
+        while self.peek():
+            token = self.peek()
+            if token == '@' and self.peek(1) != 'interface':
+                self.pos += 1
+                name = [self.peek()]
+                self.pos += 1
+                while self.peek() == '.' and _is_word(self.peek(1)):
+                    name.append(self.peek(1))
+                    self.pos += 2
+                annotations.append('.'.join(name))
+                if self.peek() == '(':
+                    self._skip_parentheses()
+            elif token in MODIFIERS:
+                modifiers.append(token)
+                self.pos += 1
+            elif token == 'non' and self.peek(1) == '-' and self.peek(2) == 'sealed':
+                modifiers.append('non-sealed')
+                self.pos += 3
+            else:
+                break
+        return tuple(annotations), tuple(modifiers)
+
+    def _member(self, owner: Optional[JavaType]):
+        """
+        Una declaración dentro del cuerpo de un tipo (o en el nivel superior).
+        Retorna un JavaType, una lista de JavaField, un JavaMethod o None.
+        """
+        begin = self.pos
+        annotations, modifiers = self._modifiers()
+        token = self.peek()
+
+        kind = None
+        if token in TYPE_KEYWORDS:
+            kind = token
+        elif token == '@' and self.peek(1) == 'interface':
+            kind = 'annotation'
+            self.pos += 1
+        elif token == 'record' and _is_word(self.peek(1)) and self.peek(2) in ('(', '<'):
+            kind = 'record'
+        if kind:
+            self.pos += 1
+            return self._type_declaration(kind, owner, annotations, modifiers, begin)
+
+        if token in ('{', ';') or owner is None:
+            # Inicializadores, ';' sueltos o código fuera de un tipo
+            self._skip_statement()
+            if self.pos == begin:
+                self.pos += 1
+            return None
+
+        type_parameters = self._type_parameters() if token == '<' else ''
+        if _is_word(self.peek()) and self.peek(1) == '(':
+            return_type = None  # Constructor
+        else:
+            return_type = self._type()
+        name = self.peek()
+        if return_type == '' or not _is_word(name):
+            self._skip_statement()
+            if self.pos == begin:
+                self.pos += 1
+            return None
+        self.pos += 1
+
+        if self.peek() == '(':
+            return self._method(name, return_type, type_parameters, annotations, modifiers, begin)
+        return self._fields(name, return_type, annotations, modifiers, begin)
+
+    def _type_declaration(self, kind: str, owner: Optional[JavaType], annotations, modifiers, begin: int) -> JavaType:
+        name = self.peek() if _is_word(self.peek()) else '?'
+        self.pos += 1
+        qualified_name = f"{owner.qualified_name}.{name}" if owner else name
+        java_type = JavaType(kind, name, qualified_name, annotations=annotations, modifiers=modifiers,
+                             start=self.starts[begin])
+        if self.peek() == '<':
+            java_type.type_parameters = self._type_parameters()
+        if kind == 'record' and self.peek() == '(':
+            java_type.record_components = self._parameters()
+
+        while self.peek() and self.peek() != '{':
+            token = self.peek()
+            self.pos += 1
+            if token == 'extends':
+                java_type.extends = self._type_list()
+            elif token == 'implements':
+                java_type.implements = self._type_list()
+            elif token == 'permits':
+                self._type_list()
+            elif token in (';', '}'):  # Declaración incompleta
+                java_type.end = self._span_end()
+                return java_type
+
+        self.pos += 1  # '{'
+        if kind == 'enum':
+            self._enum_constants(java_type)
+        while self.peek() and self.peek() != '}':
+            member = self._member(java_type)
+            if isinstance(member, JavaType):
+                java_type.types.append(member)
+            elif isinstance(member, JavaMethod):
+                java_type.methods.append(member)
+            elif member:
+                java_type.fields.extend(member)
+        self.pos += 1  # '}'
+        java_type.end = self._span_end()
+        return java_type
+
+    def _enum_constants(self, java_type: JavaType) -> None:
+        while self.peek():
+            self._modifiers()  # Anotaciones de la constante
+            token = self.peek()
+            if token == ';':
+                self.pos += 1
+                return
+            if token == '}':
+                return
+            if _is_word(token):
+                java_type.enum_constants.append(token)
+                self.pos += 1
+                if self.peek() == '(':
+                    self._skip_parentheses()
+                if self.peek() == '{':
+                    self._skip_block()
+            if self.peek() == ',':
+                self.pos += 1
+            elif self.peek() not in (';', '}'):
+                self.pos += 1  # Token inesperado: se avanza para no ciclar
+
+    def _type_parameters(self) -> str:
+        """'<T extends Comparable<T>>' (el texto incluye los delimitadores)"""
+        begin = self.pos
+        depth = 0
+        while self.peek():
+            token = self.tokens[self.pos]
+            self.pos += 1
+            if token == '<':
+                depth += 1
+            elif token == '>':
+                depth -= 1
+                if depth == 0:
+                    break
+            elif token in ('{', ';', '('):
+                self.pos -= 1
+                break
+        return join_type_tokens([t for t in self.tokens[begin:self.pos] if t != '@'])
+
+    def _type(self) -> str:
+        """Tipo con genéricos, arreglos y varargs; '' si no hay un tipo en la posición actual"""
+        parts: List[str] = []
+        while self.peek():
+            token = self.peek()
+            if token == '@' and self.peek(1) != 'interface':  # Anotaciones de tipo (@NonNull String)
+                self._modifiers()
+                continue
+            if not _is_word(token):
+                break
+            parts.append(token)
+            self.pos += 1
+            if self.peek() == '<':
+                parts.append(self._type_parameters())
+            if self.peek() == '.' and _is_word(self.peek(1)):
+                parts.append('.')
+                self.pos += 1
+                continue
+            break
+        while self.peek() == '[' and self.peek(1) == ']':
+            parts.append('[]')
+            self.pos += 2
+        if self.peek() == '...':
+            parts.append('...')
+            self.pos += 1
+        return ''.join(parts)
+
+    def _type_list(self) -> List[str]:
+        types = []
+        while self.peek():
+            java_type = self._type()
+            if java_type:
+                types.append(java_type)
+            if self.peek() != ',':
+                break
+            self.pos += 1
+        return types
+
+    def _parameters(self) -> List[Tuple[str, str]]:
+        """Parámetros entre paréntesis como (tipo, nombre); se omite el receptor 'this'"""
+        self.pos += 1  # '('
+        parameters = []
+        while self.peek() and self.peek() != ')':
+            self._modifiers()  # final y anotaciones
+            param_type = self._type()
+            name = self.peek()
+            if param_type and _is_word(name):
+                self.pos += 1
+                while self.peek() == '[' and self.peek(1) == ']':
+                    param_type += '[]'
+                    self.pos += 2
+                if name != 'this':
+                    parameters.append((param_type, name))
+            # Avanzar hasta el siguiente parámetro respetando el anidamiento
+            depth = 0
+            while self.peek():
+                token = self.peek()
+                if token in ('(', '<', '['):
+                    depth += 1
+                elif token in (')', '>', ']'):
+                    if depth == 0 and token == ')':
+                        break
+                    depth = max(depth - 1, 0)
+                elif token == ',' and depth == 0:
+                    self.pos += 1
+                    break
+                elif token in ('{', ';'):
+                    return parameters
+                self.pos += 1
+        self.pos += 1  # ')'
+        return parameters
+
+    def _method(self, name: str, return_type: Optional[str], type_parameters: str,
+                annotations, modifiers, begin: int) -> JavaMethod:
+        method = JavaMethod(name, return_type or None, type_parameters=type_parameters,
+                            annotations=annotations, modifiers=modifiers, start=self.starts[begin])
+        method.parameters = self._parameters()
+        while self.peek() == '[' and self.peek(1) == ']':  # int metodo()[] (sintaxis antigua)
+            method.return_type = (method.return_type or '') + '[]'
+            self.pos += 2
+        if self.peek() == 'throws':
+            self.pos += 1
+            method.throws = self._type_list()
+        if self.peek() == '{':
+            self._skip_block()
+        else:
+            self._skip_statement()  # ';' de métodos abstractos o 'default valor;' de anotaciones
+        method.end = self._span_end()
+        return method
+
+    def _fields(self, name: str, field_type: str, annotations, modifiers, begin: int) -> List[JavaField]:
+        """Uno o más declaradores ('int a = 1, b;') hasta el ';'"""
+        fields = []
+        start = self.starts[begin]
+        while True:
+            declarator_type = field_type
+            while self.peek() == '[' and self.peek(1) == ']':
+                declarator_type += '[]'
+                self.pos += 2
+            fields.append(JavaField(name, declarator_type, modifiers, annotations, start))
+            if not self._skip_initializer():
+                break
+            name = self.peek()
+            self.pos += 1
+        end = self._span_end()
+        for java_field in fields:
+            java_field.end = end
+        return fields
+
+    def _skip_initializer(self) -> bool:
+        """
+        Salta el inicializador hasta ',' o ';'. Retorna True si sigue otro declarador:
+        una coma que no va seguida de 'nombre =' / 'nombre,' / 'nombre;' pertenece a la
+        expresión (por ejemplo, new HashMap<A, B>()).
+        """
+        depth = 0
+        while self.peek():
+            token = self.tokens[self.pos]
+            if token == '{':  # Inicializador de arreglo, lambda o clase anónima
+                self._skip_block()
+                continue
+            if token in ('(', '['):
+                depth += 1
+            elif token in (')', ']', '}'):
+                if depth == 0:
+                    return False  # Declaración sin ';' (código incompleto)
+                depth -= 1
+            elif depth == 0 and token == ';':
+                self.pos += 1
+                return False
+            elif depth == 0 and token == ',' and _is_word(self.peek(1)) and self.peek(2) in ('=', ',', ';', '['):
+                self.pos += 1
+                return True
+            self.pos += 1
+        return False
+
+
+def scan_java(code: str) -> List[CompilationUnit]:
+    """Paquete, imports y declaraciones de tipos de cada archivo Java del código"""
+    return DeclarationScanner(code).scan()
@@ -1,15 +1,24 @@
 import re
-from typing import Dict, List, Set, Optional
+from typing import Dict, Iterator, List, Set, Optional
+from app.application.services.converters.call_graph import (
+    DEFAULT_MAX_DEPTH, DEFAULT_MAX_MESSAGES, CallGraph
+)
 
 class JavaSequenceConverter:
     def __init__(self):
         self.participants: Set[str] = set()
-        self.interactions: List[Dict] = []
+        self.graph = CallGraph()
         self.current_class = ""
         self.stack: List[Dict] = []
+        self.entry_points: Optional[List[str]] = None
+        self.max_depth = DEFAULT_MAX_DEPTH
+        self.max_messages = DEFAULT_MAX_MESSAGES
 
     def convert(self, code: str) -> str:
         """Convierte código Java a diagrama UML de secuencia en PlantUML"""
+        self.participants = set()
+        self.graph = CallGraph()
+        
         # Preprocesamiento
         code = self._normalize_code(code)
         
@@ -38,7 +47,6 @@ class JavaSequenceConverter:
         class_match = re.search(r'class\s+(\w+)', code)
         if class_match:
             self.current_class = class_match.group(1)
-            self.participants.add(self.current_class)
         
         # Extraer métodos públicos (asumimos que son puntos de entrada)
         method_pattern = re.compile(
@@ -55,16 +63,12 @@ class JavaSequenceConverter:
 
     def _analyze_method_interactions(self, method_name: str, method_body: str):
         """Analiza las interacciones dentro de un método"""
-        # Agregar al usuario como participante inicial
-        self.participants.add("Client")
+        function = f"{self.current_class}.{method_name}"
+        self.graph.add_function("Client", "Client")
+        self.graph.add_function(function, self.current_class)
         
-        # Primera interacción: el cliente llama al método
-        self.interactions.append({
-            'from': "Client",
-            'to': self.current_class,
-            'message': method_name,
-            'type': 'sync'
-        })
+        # Primera interacción: el cliente llama al método (su respuesta se emite al recorrer el grafo)
+        self.graph.add_call("Client", self.current_class, method_name, callee=function)
         
         # Buscar llamadas a métodos de otros objetos
         method_call_pattern = re.compile(
@@ -82,31 +86,8 @@ class JavaSequenceConverter:
             # Determinar el tipo de participante
             participant_type = self._determine_participant_type(object_name, called_method)
             
-            self.participants.add(participant_type)
-            
             # Agregar interacción
-            self.interactions.append({
-                'from': self.current_class,
-                'to': participant_type,
-                'message': called_method,
-                'type': 'sync'
-            })
-            
-            # Agregar respuesta implícita
-            self.interactions.append({
-                'from': participant_type,
-                'to': self.current_class,
-                'message': f"{called_method}Result",
-                'type': 'return'
-            })
-
-        # Respuesta final al cliente
-        self.interactions.append({
-            'from': self.current_class,
-            'to': "Client",
-            'message': f"{method_name}Result",
-            'type': 'return'
-        })
+            self.graph.add_call(function, participant_type, called_method)
 
     def _determine_participant_type(self, object_name: str, method_name: str) -> str:
         """Determina el tipo de participante basado en convenciones Java"""
@@ -127,8 +108,30 @@ class JavaSequenceConverter:
         else:
             return object_name
 
+    def _iter_interactions(self) -> Iterator[str]:
+        """Interacciones del grafo de llamadas desde los puntos de entrada"""
+        steps = self.graph.iter_sequence(self.graph.select_entry_points(self.entry_points),
+                                         self.max_depth, self.max_messages)
+        for step in steps:
+            edge = step.edge
+            if step.kind in ('call', 'return'):
+                self.participants.update((edge.source, edge.target))
+                if step.kind == 'call':
+                    from_part, to_part, arrow, color = edge.source, edge.target, "->", "#000000"
+                    message = edge.label
+                else:
+                    # Respuesta implícita de cada llamada
+                    from_part, to_part, arrow, color = edge.target, edge.source, "-->", "#777777"
+                    message = f"{edge.message}Result"
+                yield f"{from_part.replace(' ', '')} {arrow} {to_part.replace(' ', '')} : <color:{color}>{message}"
+            elif step.kind == 'loop':
+                yield f"loop {step.label}"
+            elif step.kind == 'end':
+                yield "end"
+
     def _generate_plantuml(self) -> str:
         """Genera el código PlantUML para el diagrama de secuencia"""
+        interactions = list(self._iter_interactions())
         plantuml = ["@startuml"]
         
         # Configuración básica
@@ -152,18 +155,7 @@ class JavaSequenceConverter:
         plantuml.append("")
         
         # Interacciones
-        for interaction in self.interactions:
-            from_part = interaction['from'].replace(' ', '')
-            to_part = interaction['to'].replace(' ', '')
-            
-            if interaction['type'] == 'return':
-                arrow = "-->"
-                color = "#777777"
-            else:
-                arrow = "->"
-                color = "#000000"
-            
-            plantuml.append(f"{from_part} {arrow} {to_part} : <color:{color}>{interaction['message']}")
+        plantuml.extend(interactions)
 
         plantuml.append("@enduml")
         return '\n'.join(plantuml)
\ No newline at end of file
@@ -0,0 +1,111 @@
+# app/application/services/converters/javascript/route_scanner.py
+"""
+Escáner de rutas de JavaScript/TypeScript para la tabla de rutas.
+
+Una única expresión regular con una alternativa por tipo de declaración recorre
+el archivo una vez: rutas de Express, handlers de Next.js, clases controlador y
+servicio, funciones de casos de uso, resolvers de GraphQL, eventos de Socket.IO,
+llamadas a servicios y usos de autenticación/validación. Las llaves también son
+una alternativa, así el escáner sabe a qué clase pertenece cada método sin
+volver a recorrer su cuerpo.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from app.application.services.converters.route_table import RouteEntry, RouteTable
+
+AUTH_PATTERN = (r'requireAuth|authenticate|verifyToken|checkAuth|passport\.(?:authenticate|use)'
+                r'|jwt\.verify|verifyJWT|authMiddleware')
+VALIDATION_PATTERN = re.compile(r'validate|check|verify', re.IGNORECASE)
+
+# El orden de las alternativas decide cuál gana cuando varias empiezan en la misma posición
+ROUTE_PATTERN = re.compile(r'''
+      (?:export\s+)?class\s+(?P<class_name>\w+(?:Controller|Service))\b[^{;]*\{
+    | (?i:(?:app|router)\.(?P<express_method>get|post|put|delete|patch)\s*\(\s*['"](?P<express_path>[^'"]+)['"]
+        \s*,?\s*(?:async\s+)?\(?(?:\w+\s*,\s*)*(?:req|request)\s*,\s*(?:res|response)\)?)
+    | (?P<next>export\s+(?:default\s+)?(?:async\s+)?function\s+(?P<next_handler>\w+)?\s*\(\s*req\s*,\s*res\s*\))
+    | (?:export\s+)?(?:async\s+)?function\s+(?P<use_case>\w*[Uu]se[Cc]ase\w*)\s*\(
+    | req\.method\s*===?\s*['"](?P<next_method>\w+)['"]
+    | socket\.on\s*\(\s*['"](?P<event>[^'"]+)['"]\s*,\s*(?:async\s+)?\(
+    | (?P<called_service>\w+Service)\.(?P<called_method>\w+)\s*\(
+    | (?=(?P<auth>(?i:''' + AUTH_PATTERN + r''')))
+    | (?=(?i:validate|check|verify))(?P<validation>)
+    | (?P<resolver>\w+):\s*(?:async\s+)?\(\s*(?:parent|root)?\s*,?\s*(?:args|arguments)?\s*,?\s*
+        (?:context|ctx)?\s*,?\s*(?:info)?\s*\)\s*=>
+    | (?:async\s+)?(?P<handler>\w+)\s*\(\s*(?:req|request)\s*,\s*(?:res|response)\s*\)
+    | (?:async\s+)?(?P<member>\w+)\s*\(
+    | (?P<brace>[{}])
+''', re.VERBOSE)
+
+USE_CASE_NAME = re.compile(r'[Uu]se[Cc]ase')
+# Palabras seguidas de paréntesis que no son métodos
+JS_KEYWORDS = frozenset((
+    'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'async', 'await',
+    'typeof', 'new', 'super', 'constructor',
+))
+
+
+def scan_routes(source: str) -> RouteTable:
+    """Tabla de rutas de un archivo en una sola pasada"""
+    entries: List[RouteEntry] = []
+    calls: List[str] = []
+    next_handlers: List[str] = []
+    next_methods: List[str] = []
+    classes: List[Tuple[str, int]] = []  # (clase, profundidad de su cuerpo)
+    depth = 0
+    auth = validation = False
+
+    def current_class() -> Optional[str]:
+        return classes[-1][0] if classes else None
+
+    for match in ROUTE_PATTERN.finditer(source):
+        kind = match.lastgroup
+        if kind == 'brace' or kind == 'class_name':
+            if match.group('brace') == '}':
+                depth -= 1
+                while classes and classes[-1][1] > depth:
+                    classes.pop()
+                continue
+            depth += 1
+            if kind == 'class_name':
+                classes.append((match.group('class_name'), depth))
+        elif kind == 'express_path':
+            entries.append(RouteEntry('express', '', match.group('express_method').upper(), match.group('express_path')))
+        elif kind == 'next':
+            name = match.group('next_handler') or 'handler'
+            next_handlers.append(name)
+            if USE_CASE_NAME.search(name):
+                entries.append(RouteEntry('usecase', name))
+        elif kind == 'use_case':
+            entries.append(RouteEntry('usecase', match.group('use_case')))
+        elif kind == 'next_method':
+            next_methods.append(match.group('next_method'))
+        elif kind == 'event':
+            entries.append(RouteEntry('socketio', match.group('event')))
+        elif kind == 'called_method':
+            calls.append(match.group('called_method'))
+        elif kind == 'auth':
+            auth = True
+            validation = validation or bool(VALIDATION_PATTERN.search(match.group('auth')))
+        elif kind == 'validation':
+            validation = True
+        elif kind == 'resolver':
+            entries.append(RouteEntry('graphql', match.group('resolver')))
+        elif kind == 'handler':
+            owner = current_class()
+            if owner and owner.endswith('Controller'):
+                entries.append(RouteEntry('controller', match.group('handler'), owner=owner))
+            elif owner and owner.endswith('Service'):
+                entries.append(RouteEntry('service', match.group('handler'), owner=owner))
+        elif kind == 'member':
+            owner = current_class()
+            name = match.group('member')
+            if owner and owner.endswith('Service') and name not in JS_KEYWORDS and not name.startswith('_'):
+                entries.append(RouteEntry('service', name, owner=owner))
+
+    # Next.js: cada handler atiende los métodos que compara en req.method (GET por defecto)
+    for name in next_handlers:
+        for method in next_methods or ['GET']:
+            entries.append(RouteEntry('nextjs', name, method))
+
+    return RouteTable(tuple(entries), tuple(calls), auth=auth, validation=validation)
@@ -1,5 +1,26 @@
 import re
-from typing import List, Dict, Set, Tuple
+from bisect import bisect_right
+from typing import List, Dict, Optional, Set, Tuple
+
+from app.application.services.converters.call_graph import (
+    DEFAULT_MAX_DEPTH, DEFAULT_MAX_MESSAGES, CallGraph
+)
+
+# Encabezados de funciones fuera de clases, para atribuir cada llamada a su función
+FUNCTION_HEADER_PATTERNS = [
+    re.compile(r'(?:async\s+)?function\s+(\w+)\s*\('),
+    re.compile(r'(\w+)\s*:\s*(?:async\s+)?function\s*\('),
+    re.compile(r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?(?:\([^)]*\)|\w+)\s*=>'),
+]
+# Métodos al comienzo de una línea; se atribuyen a la última clase declarada antes
+CLASS_HEADER_PATTERN = re.compile(r'\bclass\s+(\w+)')
+METHOD_HEADER_PATTERN = re.compile(
+    r'^[ \t]*(?:(?:public|private|protected|static|async|get|set)\s+)*(\w+)\s*\([^)]*\)\s*(?::\s*[\w<>\[\]., |]+)?\s*\{',
+    re.MULTILINE
+)
+CONTROL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'with'}
+# Inicio de bucles: la llamada dentro de su bloque se marca como repetida
+LOOP_PATTERN = re.compile(r'\b(?:for|while)\s*\(|\.(?:forEach|map|flatMap|filter|reduce)\s*\(')
 
 
 class JavaScriptSequenceConverter:
@@ -10,9 +31,17 @@ class JavaScriptSequenceConverter:
     
     def __init__(self):
         self.participants = set()
-        self.interactions = []
+        self.graph = CallGraph()
         self.current_method = None
         self.call_stack = []
+        self.entry_points: Optional[List[str]] = None
+        self.max_depth = DEFAULT_MAX_DEPTH
+        self.max_messages = DEFAULT_MAX_MESSAGES
+        self._seen_calls: Set[int] = set()
+        self._caller_offsets: List[int] = []
+        self._caller_names: List[str] = []
+        self._loop_starts: List[int] = []
+        self._loop_ends: List[int] = []
         
     def convert_to_plantuml(self, code: str) -> str:
         """
@@ -39,15 +68,22 @@ class JavaScriptSequenceConverter:
     def _reset(self):
         """Reinicia el estado del convertidor."""
         self.participants = set()
-        self.interactions = []
+        self.graph = CallGraph()
         self.current_method = None
         self.call_stack = []
+        self._seen_calls = set()
+        self._caller_offsets, self._caller_names = [], []
+        self._loop_starts, self._loop_ends = [], []
     
     def _extract_sequence_info(self, code: str):
         """Extrae información de secuencia del código."""
         # Normalizar código
         normalized_code = self._normalize_code(code)
         
+        # Índices de funciones y bucles por posición (una pasada cada uno)
+        self._index_callers(normalized_code)
+        self._index_loops(normalized_code)
+        
         # Extraer clases y sus métodos
         self._extract_classes_and_methods(normalized_code)
         
@@ -89,21 +125,22 @@ class JavaScriptSequenceConverter:
         for match in re.finditer(class_pattern, code, re.DOTALL):
             class_name = match.group(1)
             class_body = match.group(2)
-            
-            self.participants.add(class_name)
+            body_offset = match.start(2)
             
             # Extraer métodos de la clase
             method_pattern = r'(?:async\s+)?(\w+)\s*\([^)]*\)\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
             
             for method_match in re.finditer(method_pattern, class_body, re.DOTALL):
                 method_name = method_match.group(1)
-                method_body = method_match.group(2)
                 
-                if method_name == 'constructor':
+                if method_name in ('constructor', 'if', 'for', 'while', 'switch', 'catch'):
                     continue
                 
                 self.current_method = f"{class_name}.{method_name}"
-                self._analyze_method_calls(method_body, class_name)
+                self.graph.add_function(self.current_method, class_name)
+                self._add_caller(body_offset + method_match.start(), self.current_method)
+                self._analyze_method_calls(method_match.group(2), self.current_method,
+                                           body_offset + method_match.start(2))
     
     def _extract_routes_and_controllers(self, code: str):
         """Extrae rutas HTTP y controladores."""
@@ -112,38 +149,27 @@ class JavaScriptSequenceConverter:
         
         for match in re.finditer(route_pattern, code, re.DOTALL):
             method = match.group(1).upper()
-            route_body = match.group(2)
-            
-            self.participants.add("Client")
-            self.participants.add("Router")
             
-            self.interactions.append({
-                'from': 'Client',
-                'to': 'Router',
-                'message': f'{method} Request',
-                'type': 'sync'
-            })
+            # Las rutas de un mismo verbo se agregan en un solo manejador
+            handler = f"Router.{method}"
+            self.graph.add_function("Client", "Client")
+            self.graph.add_function(handler, "Router")
+            self.graph.add_call("Client", "Router", f'{method} Request', callee=handler)
             
-            self._analyze_method_calls(route_body, "Router")
+            self._analyze_method_calls(match.group(2), handler, match.start(2))
         
         # Next.js API routes
         nextjs_pattern = r'export\s+(?:default\s+)?(?:async\s+)?function\s+(\w+)?\s*\(\s*req\s*,\s*res\s*\)\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
         
         for match in re.finditer(nextjs_pattern, code, re.DOTALL):
             handler_name = match.group(1) or 'handler'
-            handler_body = match.group(2)
             
-            self.participants.add("Client")
-            self.participants.add("API")
+            handler = f"API.{handler_name}"
+            self.graph.add_function("Client", "Client")
+            self.graph.add_function(handler, "API")
+            self.graph.add_call("Client", "API", 'API Request', callee=handler)
             
-            self.interactions.append({
-                'from': 'Client',
-                'to': 'API',
-                'message': 'API Request',
-                'type': 'sync'
-            })
-            
-            self._analyze_method_calls(handler_body, "API")
+            self._analyze_method_calls(match.group(2), handler, match.start(2))
     
     def _extract_service_calls(self, code: str):
         """Extrae llamadas a servicios."""
@@ -154,17 +180,12 @@ class JavaScriptSequenceConverter:
             service_name = match.group(1)
             method_name = match.group(2)
             
-            self.participants.add(service_name)
-            
             # Determinar el llamador actual
             caller = self._determine_current_caller(code, match.start())
             
-            self.interactions.append({
-                'from': caller,
-                'to': service_name,
-                'message': method_name,
-                'type': 'async' if 'await' in match.group(0) else 'sync'
-            })
+            self._add_call(match.start(1), caller, service_name, method_name,
+                           'async' if 'await' in match.group(0) else 'sync',
+                           f"{service_name[0].upper()}{service_name[1:]}.{method_name}")
     
     def _extract_http_calls(self, code: str):
         """Extrae llamadas HTTP y API."""
@@ -172,16 +193,10 @@ class JavaScriptSequenceConverter:
         fetch_pattern = r'(?:await\s+)?fetch\s*\([^)]+\)'
         
         for match in re.finditer(fetch_pattern, code):
-            self.participants.add("External API")
-            
             caller = self._determine_current_caller(code, match.start())
             
-            self.interactions.append({
-                'from': caller,
-                'to': 'External API',
-                'message': 'HTTP Request',
-                'type': 'async' if 'await' in match.group(0) else 'sync'
-            })
+            self._add_call(match.end() - 1, caller, 'External API', 'HTTP Request',
+                           'async' if 'await' in match.group(0) else 'sync')
         
         # Axios
         axios_patterns = [
@@ -191,16 +206,11 @@ class JavaScriptSequenceConverter:
         
         for pattern in axios_patterns:
             for match in re.finditer(pattern, code):
-                self.participants.add("External API")
-                
                 caller = self._determine_current_caller(code, match.start())
                 
-                self.interactions.append({
-                    'from': caller,
-                    'to': 'External API',
-                    'message': 'HTTP Request',
-                    'type': 'async' if 'await' in match.group(0) else 'sync'
-                })
+                # Misma posición que la llamada axios.metodo() vista dentro de un método
+                self._add_call(match.start() + match.group(0).index('axios'), caller, 'External API',
+                               'HTTP Request', 'async' if 'await' in match.group(0) else 'sync')
     
     def _extract_database_calls(self, code: str):
         """Extrae llamadas a base de datos."""
@@ -210,16 +220,9 @@ class JavaScriptSequenceConverter:
         for match in re.finditer(mongoose_pattern, code):
             model_name = match.group(1)
             
-            self.participants.add("Database")
-            
             caller = self._determine_current_caller(code, match.start())
             
-            self.interactions.append({
-                'from': caller,
-                'to': 'Database',
-                'message': f'{model_name} Query',
-                'type': 'sync'
-            })
+            self._add_call(match.start(1), caller, 'Database', f'{model_name} Query')
         
         # Prisma
         prisma_pattern = r'prisma\.(\w+)\.(?:findMany|findUnique|create|update|delete|upsert)\s*\([^)]*\)'
@@ -227,25 +230,12 @@ class JavaScriptSequenceConverter:
         for match in re.finditer(prisma_pattern, code):
             model_name = match.group(1)
             
-            self.participants.add("Prisma")
-            self.participants.add("Database")
-            
             caller = self._determine_current_caller(code, match.start())
             
-            self.interactions.extend([
-                {
-                    'from': caller,
-                    'to': 'Prisma',
-                    'message': f'{model_name} Operation',
-                    'type': 'sync'
-                },
-                {
-                    'from': 'Prisma',
-                    'to': 'Database',
-                    'message': 'SQL Query',
-                    'type': 'sync'
-                }
-            ])
+            # Prisma atiende la operación con una consulta SQL (se expande bajo la llamada)
+            self.graph.add_function("Prisma", "Prisma")
+            self.graph.add_call("Prisma", 'Database', 'SQL Query')
+            self._add_call(match.start(), caller, 'Prisma', f'{model_name} Operation', callee="Prisma")
     
     def _extract_middleware_calls(self, code: str):
         """Extrae llamadas de middleware."""
@@ -255,14 +245,8 @@ class JavaScriptSequenceConverter:
         for match in re.finditer(middleware_pattern, code):
             middleware_name = match.group(1)
             
-            self.participants.add(middleware_name)
-            
-            self.interactions.append({
-                'from': 'Router',
-                'to': middleware_name,
-                'message': 'Process Request',
-                'type': 'sync'
-            })
+            self.graph.add_function("Router", "Router")
+            self._add_call(match.start(1), "Router", middleware_name, 'Process Request')
         
         # Autenticación middleware
         auth_patterns = [
@@ -273,19 +257,14 @@ class JavaScriptSequenceConverter:
         
         for pattern in auth_patterns:
             for match in re.finditer(pattern, code):
-                self.participants.add("Auth Middleware")
-                
                 caller = self._determine_current_caller(code, match.start())
                 
-                self.interactions.append({
-                    'from': caller,
-                    'to': 'Auth Middleware',
-                    'message': 'Verify Authentication',
-                    'type': 'sync'
-                })
+                self._add_call(match.start(), caller, 'Auth Middleware', 'Verify Authentication')
     
-    def _analyze_method_calls(self, method_body: str, caller: str):
-        """Analiza las llamadas dentro de un método."""
+    def _analyze_method_calls(self, method_body: str, caller: str, offset: int):
+        """Analiza las llamadas dentro de un método (offset: posición del cuerpo en el código)."""
+        owner = caller.rpartition('.')[0] or caller
+        
         # Llamadas a métodos de otros objetos
         method_call_pattern = r'(?:await\s+)?(\w+)\.(\w+)\s*\([^)]*\)'
         
@@ -297,14 +276,14 @@ class JavaScriptSequenceConverter:
             if object_name in ['console', 'Math', 'Date', 'JSON', 'Object', 'Array']:
                 continue
             
-            self.participants.add(object_name)
+            # this.metodo() se atiende en la propia clase; objeto.metodo() en su clase si existe
+            if object_name == 'this':
+                target, callee = owner, f"{owner}.{method_name}"
+            else:
+                target, callee = object_name, f"{object_name[0].upper()}{object_name[1:]}.{method_name}"
             
-            self.interactions.append({
-                'from': caller,
-                'to': object_name,
-                'message': method_name,
-                'type': 'async' if 'await' in match.group(0) else 'sync'
-            })
+            self._add_call(offset + match.start(1), caller, target, method_name,
+                           'async' if 'await' in match.group(0) else 'sync', callee)
         
         # Llamadas a funciones
         function_call_pattern = r'(?:await\s+)?(\w+)\s*\([^)]*\)'
@@ -318,40 +297,104 @@ class JavaScriptSequenceConverter:
             
             # Solo agregar si parece ser una función importante
             if function_name[0].isupper() or function_name.endswith('Service') or function_name.endswith('Controller'):
-                self.participants.add(function_name)
-                
-                self.interactions.append({
-                    'from': caller,
-                    'to': function_name,
-                    'message': 'execute',
-                    'type': 'async' if 'await' in match.group(0) else 'sync'
-                })
+                self._add_call(offset + match.start(1), caller, function_name, 'execute',
+                               'async' if 'await' in match.group(0) else 'sync', function_name)
     
-    def _determine_current_caller(self, code: str, position: int) -> str:
-        """Determina el objeto/clase que está haciendo la llamada."""
-        # Buscar hacia atrás para encontrar el contexto
-        before_code = code[:position]
-        
-        # Buscar la función/método más cercano
-        function_patterns = [
-            r'class\s+(\w+).*?(?:async\s+)?(\w+)\s*\([^)]*\)\s*\{[^}]*$',
-            r'(?:async\s+)?function\s+(\w+)\s*\([^)]*\)\s*\{[^}]*$',
-            r'(\w+)\s*:\s*(?:async\s+)?function\s*\([^)]*\)\s*\{[^}]*$'
+    def _add_call(self, position: int, caller: str, target: str, message: str,
+                  kind: str = 'sync', callee: Optional[str] = None):
+        """
+        Registra una llamada en el grafo. Cada posición del código se registra una
+        sola vez, así las pasadas que reconocen la misma llamada no la duplican.
+        """
+        if position in self._seen_calls:
+            return
+        self._seen_calls.add(position)
+        self.graph.add_function(caller, caller.rpartition('.')[0] or caller)
+        self.graph.add_call(caller, target, message, kind, looped=self._in_loop(position), callee=callee)
+    
+    def _add_caller(self, position: int, name: str):
+        """Agrega una función al índice de llamadores manteniéndolo ordenado."""
+        index = bisect_right(self._caller_offsets, position)
+        self._caller_offsets.insert(index, position)
+        self._caller_names.insert(index, name)
+    
+    def _index_callers(self, code: str):
+        """Posiciones de los encabezados de funciones (los métodos se agregan al extraer clases)."""
+        headers = [
+            (match.start(), match.group(1))
+            for pattern in FUNCTION_HEADER_PATTERNS
+            for match in pattern.finditer(code)
         ]
-        
-        for pattern in function_patterns:
-            matches = list(re.finditer(pattern, before_code, re.DOTALL))
-            if matches:
-                last_match = matches[-1]
-                if len(last_match.groups()) == 2:
-                    return f"{last_match.group(1)}.{last_match.group(2)}"
-                else:
-                    return last_match.group(1)
-        
-        return "Unknown"
+        classes = [(match.start(), match.group(1)) for match in CLASS_HEADER_PATTERN.finditer(code)]
+        class_offsets = [position for position, _ in classes]
+        for match in METHOD_HEADER_PATTERN.finditer(code):
+            name = match.group(1)
+            if name in CONTROL_KEYWORDS:
+                continue
+            index = bisect_right(class_offsets, match.start()) - 1
+            headers.append((match.start(1), f"{classes[index][1]}.{name}" if index >= 0 else name))
+        headers.sort()
+        self._caller_offsets = [position for position, _ in headers]
+        self._caller_names = [name for _, name in headers]
+    
+    def _index_loops(self, code: str):
+        """
+        Rangos de los bloques de bucles. Los bloques están anidados o son disjuntos,
+        así que basta el máximo acumulado de los finales para saber si una posición
+        está dentro de alguno.
+        """
+        closing: Dict[int, int] = {}
+        stack = []
+        for brace in re.finditer(r'[{}]', code):
+            if brace.group() == '{':
+                stack.append(brace.start())
+            elif stack:
+                closing[stack.pop()] = brace.start()
+        
+        spans = []
+        for match in LOOP_PATTERN.finditer(code):
+            brace = code.find('{', match.end())
+            if brace != -1 and brace in closing:
+                spans.append((match.start(), closing[brace]))
+        spans.sort()
+        
+        self._loop_starts = [start for start, _ in spans]
+        self._loop_ends = []
+        furthest = -1
+        for _, end in spans:
+            furthest = max(furthest, end)
+            self._loop_ends.append(furthest)
+    
+    def _in_loop(self, position: int) -> bool:
+        index = bisect_right(self._loop_starts, position) - 1
+        return index >= 0 and self._loop_ends[index] > position
+    
+    def _determine_current_caller(self, code: str, position: int) -> str:
+        """Determina la función o método que está haciendo la llamada (el encabezado más cercano)."""
+        index = bisect_right(self._caller_offsets, position) - 1
+        return self._caller_names[index] if index >= 0 else "Unknown"
+    
+    def _iter_interactions(self):
+        """Recorre el grafo de llamadas desde los puntos de entrada."""
+        steps = self.graph.iter_sequence(self.graph.select_entry_points(self.entry_points),
+                                         self.max_depth, self.max_messages)
+        for step in steps:
+            edge = step.edge
+            if step.kind == 'entry':
+                yield f'== {step.function} =='
+            elif step.kind == 'call':
+                self.participants.update((edge.source, edge.target))
+                # Tipo de flecha según el tipo de interacción
+                arrow = '->>>' if edge.kind == 'async' else '->>'
+                yield f'{edge.source} {arrow} {edge.target}: {edge.label}'
+            elif step.kind == 'loop':
+                yield f'loop {step.label}'
+            elif step.kind == 'end':
+                yield 'end'
     
     def _generate_plantuml(self) -> str:
         """Genera el código PlantUML."""
+        interactions = list(self._iter_interactions())
         uml_lines = ['@startuml', '']
         
         # Configuración
@@ -377,19 +420,7 @@ class JavaScriptSequenceConverter:
         uml_lines.append('')
         
         # Interacciones
-        for interaction in self.interactions:
-            from_participant = interaction['from']
-            to_participant = interaction['to']
-            message = interaction['message']
-            interaction_type = interaction['type']
-            
-            # Tipo de flecha según el tipo de interacción
-            if interaction_type == 'async':
-                arrow = '->>>'
-            else:
-                arrow = '->>'
-            
-            uml_lines.append(f'{from_participant} {arrow} {to_participant}: {message}')
+        uml_lines.extend(interactions)
         
         uml_lines.extend(['', '@enduml'])
         
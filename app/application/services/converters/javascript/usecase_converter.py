@@ -1,13 +1,20 @@
 import re
 from typing import List, Dict, Set
 
+from app.application.services.converters.javascript.route_scanner import scan_routes
+from app.application.services.converters.parallel_parser import SourceInput, split_sources
+from app.application.services.converters.route_table import RouteIndex, build_route_index
+
 
 class JavaScriptUseCaseConverter:
     """
     Convertidor de código JavaScript/TypeScript a diagramas de casos de uso UML PlantUML.
     Detecta actores, casos de uso y relaciones basándose en rutas, controladores,
-    servicios, middlewares y patrones comunes de frameworks web.
+    servicios, middlewares y patrones comunes de frameworks web. Las declaraciones
+    salen de la tabla de rutas de cada archivo (ver route_table).
     """
+    # Acepta el código de cada archivo por separado (ver parallel_parser.source_input)
+    accepts_source_files = True
     
     def __init__(self):
         self.actors = set()
@@ -16,23 +23,24 @@ class JavaScriptUseCaseConverter:
         self.includes = []
         self.extends = []
         
-    def convert_to_plantuml(self, code: str) -> str:
+    def convert_to_plantuml(self, code: SourceInput) -> str:
         """
         Convierte código JavaScript/TypeScript a diagrama de casos de uso PlantUML.
         
         Args:
-            code: Código fuente de JavaScript/TypeScript
+            code: Código fuente de JavaScript/TypeScript (o el de cada archivo)
             
         Returns:
             Diagrama PlantUML como string
         """
         self._reset()
-        self._extract_actors_and_use_cases(code)
-        self._extract_relationships(code)
+        index = build_route_index(scan_routes, split_sources(code))
+        self._extract_actors_and_use_cases(index)
+        self._extract_relationships(index)
         
         return self._generate_plantuml()
     
-    def convert(self, code: str) -> str:
+    def convert(self, code: SourceInput) -> str:
         """
         Método de compatibilidad para el protocolo BaseConverter.
         Delega a convert_to_plantuml.
@@ -47,258 +55,94 @@ class JavaScriptUseCaseConverter:
         self.includes = []
         self.extends = []
     
-    def _extract_actors_and_use_cases(self, code: str):
-        """Extrae actores y casos de uso del código."""
-        # Detectar rutas Express.js
-        self._extract_express_routes(code)
-        
-        # Detectar rutas Next.js API
-        self._extract_nextjs_api_routes(code)
-        
-        # Detectar controladores
-        self._extract_controllers(code)
-        
-        # Detectar servicios y casos de uso
-        self._extract_services_and_use_cases(code)
-        
-        # Detectar middlewares de autenticación
-        self._extract_auth_middleware(code)
-        
-        # Detectar GraphQL resolvers
-        self._extract_graphql_resolvers(code)
-        
-        # Detectar Socket.IO eventos
-        self._extract_socket_events(code)
-    
-    def _extract_express_routes(self, code: str):
-        """Extrae rutas de Express.js."""
-        # Rutas HTTP (GET, POST, PUT, DELETE, PATCH)
-        route_pattern = r'(?:app|router)\.(get|post|put|delete|patch)\s*\(\s*[\'"]([^\'"]+)[\'"]\s*,?\s*(?:async\s+)?\(?(?:\w+\s*,\s*)*(?:req|request)\s*,\s*(?:res|response)\)?'
-        
-        for match in re.finditer(route_pattern, code, re.IGNORECASE):
-            method = match.group(1).upper()
-            path = match.group(2)
-            
-            # Extraer el caso de uso del path
-            use_case = self._extract_use_case_from_path(method, path)
-            self.use_cases.add(use_case)
-            
-            # Detectar actor basado en el path
-            actor = self._detect_actor_from_path(path)
-            self.actors.add(actor)
-            
-            # Agregar relación
-            self.relationships.append({
-                'actor': actor,
-                'use_case': use_case,
-                'type': 'uses'
-            })
+    def _extract_actors_and_use_cases(self, index: RouteIndex):
+        """Extrae actores y casos de uso del índice de rutas."""
+        # Rutas Express.js
+        for entry in index.entries('express'):
+            # Caso de uso desde el path y actor según el path
+            self._add_use_case(
+                self._extract_use_case_from_path(entry.http_method, entry.path),
+                self._detect_actor_from_path(entry.path)
+            )
+        
+        # Rutas Next.js API
+        for entry in index.entries('nextjs'):
+            use_case = f"{entry.http_method} API Handler"
+            if entry.name != 'handler':
+                use_case = f"{entry.http_method} {entry.name}"
+            self._add_use_case(use_case, "API Client")
+        
+        # Controladores
+        for entry in index.entries('controller'):
+            self._add_use_case(
+                self._method_to_use_case(entry.name),
+                self._detect_actor_from_controller(entry.owner)
+            )
+        
+        # Servicios (los usa el sistema) y funciones de casos de uso
+        for entry in index.entries('service'):
+            self._add_use_case(self._method_to_use_case(entry.name), "System")
+        for entry in index.entries('usecase'):
+            self._add_use_case(self._function_to_use_case(entry.name), "User")
+        
+        # Middlewares de autenticación
+        if index.auth:
+            self._add_authentication()
+        
+        # GraphQL resolvers
+        for entry in index.entries('graphql'):
+            self._add_use_case(self._resolver_to_use_case(entry.name), "GraphQL Client")
+        
+        # Socket.IO eventos
+        for entry in index.entries('socketio'):
+            self._add_use_case(f"Handle {entry.name.replace('_', ' ').title()}", "WebSocket Client")
     
-    def _extract_nextjs_api_routes(self, code: str):
-        """Extrae rutas de Next.js API."""
-        # Handler functions en Next.js API routes
-        handler_pattern = r'export\s+(?:default\s+)?(?:async\s+)?function\s+(\w+)?\s*\(\s*req\s*,\s*res\s*\)'
-        
-        for match in re.finditer(handler_pattern, code):
-            handler_name = match.group(1) or 'handler'
-            
-            # Buscar el método HTTP en el cuerpo de la función
-            method_pattern = r'req\.method\s*===?\s*[\'"](\w+)[\'"]'
-            methods = re.findall(method_pattern, code)
-            
-            if not methods:
-                methods = ['GET']  # Default para Next.js
-            
-            for method in methods:
-                use_case = f"{method} API Handler"
-                if handler_name != 'handler':
-                    use_case = f"{method} {handler_name}"
-                
-                self.use_cases.add(use_case)
-                self.actors.add("API Client")
-                
-                self.relationships.append({
-                    'actor': "API Client",
-                    'use_case': use_case,
-                    'type': 'uses'
-                })
+    def _add_use_case(self, use_case: str, actor: str):
+        """Registra un caso de uso, su actor y la relación entre ambos."""
+        self.use_cases.add(use_case)
+        self.actors.add(actor)
+        self.relationships.append({
+            'actor': actor,
+            'use_case': use_case,
+            'type': 'uses'
+        })
     
-    def _extract_controllers(self, code: str):
-        """Extrae controladores y sus métodos."""
-        # Controladores de clase
-        controller_pattern = r'(?:export\s+)?class\s+(\w+Controller)\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-        
-        for match in re.finditer(controller_pattern, code, re.DOTALL):
-            controller_name = match.group(1)
-            controller_body = match.group(2)
-            
-            # Extraer métodos del controlador
-            method_pattern = r'(?:async\s+)?(\w+)\s*\(\s*(?:req|request)\s*,\s*(?:res|response)\s*\)'
-            
-            for method_match in re.finditer(method_pattern, controller_body):
-                method_name = method_match.group(1)
-                
-                # Convertir nombre del método a caso de uso
-                use_case = self._method_to_use_case(method_name)
-                self.use_cases.add(use_case)
-                
-                # Detectar actor basado en el controlador
-                actor = self._detect_actor_from_controller(controller_name)
-                self.actors.add(actor)
-                
-                self.relationships.append({
-                    'actor': actor,
-                    'use_case': use_case,
-                    'type': 'uses'
+    def _add_authentication(self):
+        """Agrega el caso de uso de autenticación."""
+        self.actors.add("Authentication System")
+        self._add_use_case("Authenticate User", "User")
+        
+        # Relación include con otros casos de uso que requieren autenticación
+        for use_case in list(self.use_cases):
+            if use_case != "Authenticate User" and any(keyword in use_case.lower() for keyword in ['create', 'update', 'delete', 'manage']):
+                self.includes.append({
+                    'from': use_case,
+                    'to': "Authenticate User"
                 })
     
-    def _extract_services_and_use_cases(self, code: str):
-        """Extrae servicios y casos de uso."""
-        # Servicios de clase
-        service_pattern = r'(?:export\s+)?class\s+(\w+Service)\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-        
-        for match in re.finditer(service_pattern, code, re.DOTALL):
-            service_name = match.group(1)
-            service_body = match.group(2)
-            
-            # Extraer métodos del servicio
-            method_pattern = r'(?:async\s+)?(\w+)\s*\('
-            
-            for method_match in re.finditer(method_pattern, service_body):
-                method_name = method_match.group(1)
-                
-                # Saltar constructores y métodos privados
-                if method_name in ['constructor'] or method_name.startswith('_'):
-                    continue
-                
-                # Convertir método a caso de uso
-                use_case = self._method_to_use_case(method_name)
-                self.use_cases.add(use_case)
-                
-                # Los servicios suelen ser usados por el sistema
-                self.actors.add("System")
-                
-                self.relationships.append({
-                    'actor': "System",
-                    'use_case': use_case,
-                    'type': 'uses'
-                })
-        
-        # Funciones de casos de uso
-        use_case_function_pattern = r'(?:export\s+)?(?:async\s+)?function\s+(\w*[Uu]se[Cc]ase\w*)\s*\('
-        for match in re.finditer(use_case_function_pattern, code):
-            function_name = match.group(1)
-            use_case = self._function_to_use_case(function_name)
-            self.use_cases.add(use_case)
-            
-            self.actors.add("User")
-            self.relationships.append({
-                'actor': "User",
-                'use_case': use_case,
-                'type': 'uses'
-            })
-    
-    def _extract_auth_middleware(self, code: str):
-        """Extrae middleware de autenticación."""
-        # Middleware de autenticación
-        auth_patterns = [
-            r'(?:requireAuth|authenticate|verifyToken|checkAuth)',
-            r'passport\.(authenticate|use)',
-            r'jwt\.verify',
-            r'verifyJWT',
-            r'authMiddleware'
-        ]
-        
-        for pattern in auth_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                self.use_cases.add("Authenticate User")
-                self.actors.add("User")
-                self.actors.add("Authentication System")
-                
-                self.relationships.append({
-                    'actor': "User",
-                    'use_case': "Authenticate User",
-                    'type': 'uses'
-                })
-                
-                # Relación include con otros casos de uso que requieren autenticación
-                for use_case in list(self.use_cases):
-                    if use_case != "Authenticate User" and any(keyword in use_case.lower() for keyword in ['create', 'update', 'delete', 'manage']):
-                        self.includes.append({
-                            'from': use_case,
-                            'to': "Authenticate User"
-                        })
-                break
-    
-    def _extract_graphql_resolvers(self, code: str):
-        """Extrae resolvers de GraphQL."""
-        # Resolvers de GraphQL
-        resolver_pattern = r'(\w+):\s*(?:async\s+)?\(\s*(?:parent|root)?\s*,?\s*(?:args|arguments)?\s*,?\s*(?:context|ctx)?\s*,?\s*(?:info)?\s*\)\s*=>'
-        
-        for match in re.finditer(resolver_pattern, code):
-            resolver_name = match.group(1)
-            use_case = self._resolver_to_use_case(resolver_name)
-            self.use_cases.add(use_case)
-            
-            self.actors.add("GraphQL Client")
-            self.relationships.append({
-                'actor': "GraphQL Client",
-                'use_case': use_case,
-                'type': 'uses'
-            })
-    
-    def _extract_socket_events(self, code: str):
-        """Extrae eventos de Socket.IO."""
-        # Eventos de Socket.IO
-        socket_pattern = r'socket\.on\s*\(\s*[\'"]([^\'"]+)[\'"]\s*,\s*(?:async\s+)?\('
-        
-        for match in re.finditer(socket_pattern, code):
-            event_name = match.group(1)
-            use_case = f"Handle {event_name.replace('_', ' ').title()}"
-            self.use_cases.add(use_case)
-            
-            self.actors.add("WebSocket Client")
-            self.relationships.append({
-                'actor': "WebSocket Client",
-                'use_case': use_case,
-                'type': 'uses'
-            })
-    
-    def _extract_relationships(self, code: str):
+    def _extract_relationships(self, index: RouteIndex):
         """Extrae relaciones include y extend."""
-        # Buscar llamadas a otros servicios (include)
+        # Llamadas a servicios (include)
+        called_use_cases = [self._method_to_use_case(method_name) for method_name in index.calls]
         for use_case in self.use_cases:
-            # Buscar llamadas a servicios dentro de métodos
-            service_call_pattern = r'(?:await\s+)?(\w+Service)\.(\w+)\s*\('
-            for match in re.finditer(service_call_pattern, code):
-                service_name = match.group(1)
-                method_name = match.group(2)
-                
-                included_use_case = self._method_to_use_case(method_name)
+            for included_use_case in called_use_cases:
                 if included_use_case in self.use_cases and included_use_case != use_case:
                     self.includes.append({
                         'from': use_case,
                         'to': included_use_case
                     })
         
-        # Buscar validaciones (extend)
-        validation_patterns = [
-            r'validate\w*',
-            r'check\w*',
-            r'verify\w*'
-        ]
-        
-        for pattern in validation_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                validation_use_case = "Validate Input"
-                self.use_cases.add(validation_use_case)
-                
-                for use_case in list(self.use_cases):
-                    if use_case != validation_use_case and any(keyword in use_case.lower() for keyword in ['create', 'update', 'submit']):
-                        self.extends.append({
-                            'from': validation_use_case,
-                            'to': use_case
-                        })
+        # Validaciones (extend)
+        if index.validation:
+            validation_use_case = "Validate Input"
+            self.use_cases.add(validation_use_case)
+            
+            for use_case in list(self.use_cases):
+                if use_case != validation_use_case and any(keyword in use_case.lower() for keyword in ['create', 'update', 'submit']):
+                    self.extends.append({
+                        'from': validation_use_case,
+                        'to': use_case
+                    })
     
     def _extract_use_case_from_path(self, method: str, path: str) -> str:
         """Extrae caso de uso de una ruta HTTP."""
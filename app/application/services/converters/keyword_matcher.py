@@ -0,0 +1,96 @@
+# app/application/services/converters/keyword_matcher.py
+"""
+Búsqueda de múltiples palabras clave con un autómata de Aho-Corasick.
+
+Responde "¿el texto contiene alguna de las palabras clave?" en una sola pasada
+sobre el texto, sin importar cuántas palabras haya en el conjunto. El autómata se
+compila una vez por conjunto de palabras (compile_keywords lo cachea) y los
+resultados se memorizan por texto, así un nombre repetido cuesta una búsqueda en
+un diccionario.
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List
+
+MAX_MEMOIZED = 100_000  # Al superarlo se vacía la memoria de resultados
+
+
+class KeywordMatcher:
+    """Autómata de Aho-Corasick determinista sobre el alfabeto de las palabras clave"""
+
+    def __init__(self, keywords: Iterable[str], max_memoized: int = MAX_MEMOIZED):
+        self.keywords = frozenset(k for k in keywords if k)
+        self.max_memoized = max_memoized
+        self._memo: Dict[str, bool] = {}
+        self._transitions, self._terminal = self._compile(self.keywords)
+
+    @staticmethod
+    def _compile(keywords: FrozenSet[str]):
+        # Trie de las palabras clave
+        goto: List[Dict[str, int]] = [{}]
+        terminal: List[bool] = [False]
+        for keyword in sorted(keywords):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    terminal.append(False)
+                state = next_state
+            terminal[state] = True
+
+        # Enlaces de fallo en anchura; las transiciones ausentes se completan con las
+        # del estado de fallo, de modo que la búsqueda nunca retrocede
+        alphabet = {char for keyword in keywords for char in keyword}
+        transitions: List[Dict[str, int]] = [dict() for _ in goto]
+        fail = [0] * len(goto)
+        transitions[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            terminal[state] = terminal[state] or terminal[fail[state]]
+            for char in alphabet:
+                child = goto[state].get(char)
+                if child is None:
+                    target = transitions[fail[state]].get(char, 0)
+                    if target:
+                        transitions[state][char] = target
+                else:
+                    transitions[state][char] = child
+                    fail[child] = transitions[fail[state]].get(char, 0)
+                    queue.append(child)
+        return transitions, terminal
+
+    def _search(self, text: str) -> bool:
+        transitions = self._transitions
+        terminal = self._terminal
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+    def matches(self, text: str) -> bool:
+        """True si el texto contiene alguna palabra clave (resultado memorizado)"""
+        result = self._memo.get(text)
+        if result is None:
+            result = self._search(text)
+            if len(self._memo) >= self.max_memoized:
+                self._memo.clear()
+            self._memo[text] = result
+        return result
+
+    __call__ = matches
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(keywords: FrozenSet[str]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def compile_keywords(keywords: Iterable[str]) -> KeywordMatcher:
+    """Matcher compartido para un conjunto de palabras clave (se compila una sola vez)"""
+    return _compile_cached(frozenset(keywords))
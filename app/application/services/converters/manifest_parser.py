@@ -0,0 +1,445 @@
+# app/application/services/converters/manifest_parser.py
+"""
+Ingesta de manifiestos y lockfiles de dependencias.
+
+Cada manifiesto se parsea por separado con el parser de su formato (json,
+tomllib, xml.etree.iterparse) en lugar de buscar bloques con expresiones
+regulares sobre el texto concatenado. El resultado se cachea por el hash del
+contenido, así los diagramas de componentes y de paquetes del mismo proyecto
+comparten un único parseo.
+
+Los lockfiles no agregan dependencias transitivas: fijan la versión de las
+dependencias declaradas y, si el proyecto no trae el manifiesto, aportan las
+dependencias directas cuando el formato permite distinguirlas.
+"""
+import hashlib
+import io
+import json
+import logging
+import re
+import threading
+import tomllib
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.application.services.converters.project_model import Manifest
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_MANIFESTS = 256
+
+
+@dataclass(frozen=True)
+class Dependency:
+    name: str
+    version: Optional[str] = None  # Especificación declarada o versión fijada por el lockfile
+    dev: bool = False  # Solo de desarrollo/test
+    direct: bool = True  # False para entradas de lockfile que pueden ser transitivas
+
+
+@dataclass(frozen=True)
+class ParsedManifest:
+    path: str
+    ecosystem: str  # npm, pypi, maven, packagist, cargo, go, nuget
+    dependencies: Tuple[Dependency, ...]
+    lockfile: bool = False
+
+
+# Parsers por formato: contenido -> dependencias
+def _json_object(content: str) -> Dict:
+    data = json.loads(content)
+    if not isinstance(data, dict):
+        raise ValueError("se esperaba un objeto JSON")
+    return data
+
+
+def _version_of(spec) -> Optional[str]:
+    """Versión de una entrada que puede ser un string o una tabla con 'version'"""
+    if isinstance(spec, str):
+        return spec
+    if isinstance(spec, dict) and isinstance(spec.get('version'), str):
+        return spec['version']
+    return None
+
+
+def _from_tables(tables: List[Tuple[object, bool]], skip: Tuple[str, ...] = ()) -> Iterator[Dependency]:
+    """Dependencias de tablas nombre -> especificación (package.json, Pipfile, Cargo.toml, ...)"""
+    for table, dev in tables:
+        if not isinstance(table, dict):
+            continue
+        for name, spec in table.items():
+            if name not in skip:
+                yield Dependency(name, _version_of(spec), dev)
+
+
+def _parse_package_json(content: str) -> Iterator[Dependency]:
+    data = _json_object(content)
+    return _from_tables([
+        (data.get('dependencies'), False),
+        (data.get('optionalDependencies'), False),
+        (data.get('devDependencies'), True),
+    ])
+
+
+def _parse_package_lock(content: str) -> Iterator[Dependency]:
+    data = _json_object(content)
+    packages = data.get('packages')
+    if isinstance(packages, dict) and isinstance(packages.get(''), dict):
+        # lockfileVersion 2/3: la entrada raíz lista las dependencias directas
+        root = packages['']
+        for table, dev in ((root.get('dependencies'), False), (root.get('devDependencies'), True)):
+            for name in table or {}:
+                locked = packages.get(f'node_modules/{name}') or {}
+                yield Dependency(name, locked.get('version'), dev)
+        return
+    # lockfileVersion 1: árbol aplanado sin distinción de directas
+    for name, entry in (data.get('dependencies') or {}).items():
+        if isinstance(entry, dict):
+            yield Dependency(name, entry.get('version'), bool(entry.get('dev')), direct=False)
+
+
+YARN_ENTRY = re.compile(r'^"?((?:@[^@/"]+/)?[^@"\s]+)@')
+YARN_VERSION = re.compile(r'^\s+version:?\s+"?([^"\s]+)"?')
+
+
+def _parse_yarn_lock(content: str) -> Iterator[Dependency]:
+    """yarn.lock clásico y berry: cabeceras 'nombre@rango:' seguidas de 'version'"""
+    name = None
+    for line in content.split('\n'):
+        if line and not line[0].isspace() and not line.startswith('#'):
+            match = YARN_ENTRY.match(line)
+            name = match.group(1) if match else None
+            continue
+        if name:
+            match = YARN_VERSION.match(line)
+            if match:
+                yield Dependency(name, match.group(1), direct=False)
+                name = None
+
+
+REQUIREMENT = re.compile(r'^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(.*)$')
+EGG_FRAGMENT = re.compile(r'#egg=([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def parse_requirement(line: str, dev: bool = False) -> Optional[Dependency]:
+    """Una especificación PEP 508 ('requests[security]>=2.0; python_version>"3"')"""
+    egg = EGG_FRAGMENT.search(line)
+    if egg:
+        return Dependency(egg.group(1), dev=dev)
+    line = line.split(';', 1)[0].split(' #', 1)[0].strip()
+    match = REQUIREMENT.match(line)
+    if not match:
+        return None
+    spec = match.group(2).strip()
+    if spec.startswith('@'):  # Referencia directa 'nombre @ url'
+        spec = ''
+    return Dependency(match.group(1), spec or None, dev)
+
+
+def _parse_requirements(content: str) -> Iterator[Dependency]:
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line or line.startswith(('#', '-')):  # Comentarios y opciones (-r, -e, --index-url)
+            continue
+        dependency = parse_requirement(line)
+        if dependency:
+            yield dependency
+
+
+def _parse_pyproject(content: str) -> Iterator[Dependency]:
+    data = tomllib.loads(content)
+    for line in data.get('project', {}).get('dependencies', []):
+        dependency = parse_requirement(line)
+        if dependency:
+            yield dependency
+    poetry = data.get('tool', {}).get('poetry', {})
+    tables = [(poetry.get('dependencies'), False), (poetry.get('dev-dependencies'), True)]
+    tables += [(group.get('dependencies'), True) for group in poetry.get('group', {}).values()]
+    yield from _from_tables(tables, skip=('python',))
+
+
+def _parse_pipfile(content: str) -> Iterator[Dependency]:
+    data = tomllib.loads(content)
+    return _from_tables([(data.get('packages'), False), (data.get('dev-packages'), True)])
+
+
+def _parse_pipfile_lock(content: str) -> Iterator[Dependency]:
+    data = _json_object(content)
+    for section, dev in (('default', False), ('develop', True)):
+        for name, entry in (data.get(section) or {}).items():
+            version = _version_of(entry)
+            yield Dependency(name, version.lstrip('=') if version else None, dev, direct=False)
+
+
+def _parse_poetry_lock(content: str) -> Iterator[Dependency]:
+    for package in tomllib.loads(content).get('package', []):
+        yield Dependency(package['name'], package.get('version'), package.get('category') == 'dev', direct=False)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _iter_xml(content: str) -> Iterator[Tuple[str, List[str], ET.Element]]:
+    """(evento, ruta de etiquetas sin namespace, elemento) con iterparse"""
+    path: List[str] = []
+    for event, element in ET.iterparse(io.BytesIO(content.encode('utf-8')), events=('start', 'end')):
+        if event == 'start':
+            path.append(_local_name(element.tag))
+        yield event, path, element
+        if event == 'end':
+            path.pop()
+
+
+def _parse_pom(content: str) -> Iterator[Dependency]:
+    """Solo project/dependencies: se ignoran el artefacto propio, el parent y los plugins"""
+    fields: Dict[str, str] = {}
+    for event, path, element in _iter_xml(content):
+        if event != 'end':
+            continue
+        if len(path) == 4 and path[:3] == ['project', 'dependencies', 'dependency']:
+            fields[path[3]] = (element.text or '').strip()
+        elif path == ['project', 'dependencies', 'dependency']:
+            if fields.get('artifactId'):
+                yield Dependency(fields['artifactId'], fields.get('version') or None, fields.get('scope') == 'test')
+            fields = {}
+            element.clear()
+
+
+def _parse_dotnet_project(content: str) -> Iterator[Dependency]:
+    """PackageReference de .csproj/.fsproj/.vbproj y package de packages.config"""
+    for event, path, element in _iter_xml(content):
+        if event != 'end':
+            continue
+        if path[-1] == 'PackageReference':
+            name = element.get('Include') or element.get('Update')
+            version = element.get('Version') or (element.findtext('{*}Version') or '').strip() or None
+            if name:
+                yield Dependency(name, version, element.get('PrivateAssets', '').lower() == 'all')
+        elif path[-1] == 'package' and element.get('id'):
+            yield Dependency(element.get('id'), element.get('version'),
+                             element.get('developmentDependency', '').lower() == 'true')
+
+
+GRADLE_DEPENDENCY = re.compile(
+    r'^\s*(implementation|api|compile|runtimeOnly|compileOnly|kapt|annotationProcessor|'
+    r'testImplementation|testCompile|testRuntimeOnly)\s*\(?\s*["\']([^:"\']+):([^:"\']+)(?::([^"\'@:]+))?',
+    re.MULTILINE
+)
+
+
+def _parse_gradle(content: str) -> Iterator[Dependency]:
+    """Groovy/Kotlin no tienen parser en la biblioteca estándar: notación 'grupo:artefacto:versión'"""
+    for configuration, _, artifact, version in GRADLE_DEPENDENCY.findall(content):
+        yield Dependency(artifact, version or None, configuration.startswith('test'))
+
+
+def _parse_composer_json(content: str) -> Iterator[Dependency]:
+    data = _json_object(content)
+    for dependency in _from_tables([(data.get('require'), False), (data.get('require-dev'), True)]):
+        if '/' in dependency.name:  # Se omiten php y las extensiones (ext-*, lib-*)
+            yield dependency
+
+
+def _parse_composer_lock(content: str) -> Iterator[Dependency]:
+    data = _json_object(content)
+    for section, dev in (('packages', False), ('packages-dev', True)):
+        for package in data.get(section) or []:
+            yield Dependency(package['name'], package.get('version'), dev, direct=False)
+
+
+def _parse_cargo_toml(content: str) -> Iterator[Dependency]:
+    data = tomllib.loads(content)
+    return _from_tables([
+        (data.get('dependencies'), False),
+        (data.get('build-dependencies'), False),
+        (data.get('dev-dependencies'), True),
+    ])
+
+
+def _parse_cargo_lock(content: str) -> Iterator[Dependency]:
+    """Los crates sin 'source' son los del propio workspace: sus dependencias son las directas"""
+    packages = tomllib.loads(content).get('package', [])
+    local = {package['name'] for package in packages if 'source' not in package}
+    direct = {
+        dependency.split(' ', 1)[0]
+        for package in packages if package['name'] in local
+        for dependency in package.get('dependencies', [])
+    }
+    for package in packages:
+        if package['name'] not in local:
+            yield Dependency(package['name'], package.get('version'), direct=package['name'] in direct)
+
+
+GO_REQUIRE = re.compile(r'^\s*(?:require\s+)?([^\s()]+)\s+(v[^\s]+)(\s*//\s*indirect)?\s*$')
+
+
+def _parse_go_mod(content: str) -> Iterator[Dependency]:
+    in_block = False
+    for line in content.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('require ('):
+            in_block = True
+            continue
+        if in_block and stripped == ')':
+            in_block = False
+            continue
+        if in_block or stripped.startswith('require '):
+            match = GO_REQUIRE.match(stripped)
+            if match:
+                yield Dependency(match.group(1), match.group(2), direct=not match.group(3))
+
+
+# Nombre de archivo -> (ecosistema, parser, es lockfile)
+MANIFEST_PARSERS: Dict[str, Tuple[str, Callable[[str], Iterator[Dependency]], bool]] = {
+    'package.json': ('npm', _parse_package_json, False),
+    'package-lock.json': ('npm', _parse_package_lock, True),
+    'npm-shrinkwrap.json': ('npm', _parse_package_lock, True),
+    'yarn.lock': ('npm', _parse_yarn_lock, True),
+    'requirements.txt': ('pypi', _parse_requirements, False),
+    'pyproject.toml': ('pypi', _parse_pyproject, False),
+    'Pipfile': ('pypi', _parse_pipfile, False),
+    'Pipfile.lock': ('pypi', _parse_pipfile_lock, True),
+    'poetry.lock': ('pypi', _parse_poetry_lock, True),
+    'pom.xml': ('maven', _parse_pom, False),
+    'build.gradle': ('maven', _parse_gradle, False),
+    'build.gradle.kts': ('maven', _parse_gradle, False),
+    'composer.json': ('packagist', _parse_composer_json, False),
+    'composer.lock': ('packagist', _parse_composer_lock, True),
+    'Cargo.toml': ('cargo', _parse_cargo_toml, False),
+    'Cargo.lock': ('cargo', _parse_cargo_lock, True),
+    'go.mod': ('go', _parse_go_mod, False),
+    'packages.config': ('nuget', _parse_dotnet_project, False),
+}
+MANIFEST_SUFFIX_PARSERS = {
+    '.csproj': ('nuget', _parse_dotnet_project, False),
+    '.fsproj': ('nuget', _parse_dotnet_project, False),
+    '.vbproj': ('nuget', _parse_dotnet_project, False),
+}
+
+_cache: 'OrderedDict[Tuple[str, str], ParsedManifest]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _parser_for(name: str):
+    spec = MANIFEST_PARSERS.get(name)
+    if spec is None:
+        spec = next((s for suffix, s in MANIFEST_SUFFIX_PARSERS.items() if name.endswith(suffix)), None)
+    return spec
+
+
+def clear_cache() -> None:
+    """Vacía la caché de manifiestos parseados (benchmarks y pruebas en frío)"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def parse_manifest(manifest: Manifest) -> Optional[ParsedManifest]:
+    """
+    Dependencias de un manifiesto o lockfile; None si el formato no es conocido.
+    Un manifiesto mal formado se registra y retorna sin dependencias.
+    """
+    spec = _parser_for(manifest.name)
+    if spec is None:
+        return None
+    ecosystem, parser, lockfile = spec
+
+    key = (manifest.name, hashlib.sha256(manifest.content.encode('utf-8', 'surrogatepass')).hexdigest())
+    with _cache_lock:
+        parsed = _cache.get(key)
+        if parsed is not None:
+            _cache.move_to_end(key)
+            return replace(parsed, path=manifest.path)
+
+    try:
+        dependencies = tuple(parser(manifest.content))
+    except (ValueError, KeyError, TypeError, AttributeError, ET.ParseError) as e:
+        # tomllib.TOMLDecodeError y json.JSONDecodeError son ValueError
+        logger.warning(f"No se pudo parsear {manifest.path}: {e}")
+        dependencies = ()
+    parsed = ParsedManifest(manifest.path, ecosystem, dependencies, lockfile)
+
+    with _cache_lock:
+        _cache[key] = parsed
+        if len(_cache) > MAX_CACHED_MANIFESTS:
+            _cache.popitem(last=False)
+    return parsed
+
+
+def resolve_dependencies(manifests: List[Manifest]) -> Dict[str, List[Dependency]]:
+    """
+    Dependencias directas por ecosistema (en orden de aparición, sin duplicados).
+    Las declaradas toman la versión fijada por el lockfile del mismo ecosistema; si
+    no hay manifiesto, se usan las entradas directas del lockfile.
+    """
+    declared: Dict[str, Dict[str, Dependency]] = {}
+    locked: Dict[str, Dict[str, Dependency]] = {}
+    order: List[str] = []
+    for manifest in manifests:
+        parsed = parse_manifest(manifest)
+        if parsed is None:
+            continue
+        if parsed.ecosystem not in order:
+            order.append(parsed.ecosystem)
+        bucket = (locked if parsed.lockfile else declared).setdefault(parsed.ecosystem, {})
+        for dependency in parsed.dependencies:
+            bucket.setdefault(dependency.name, dependency)
+
+    resolved: Dict[str, List[Dependency]] = {}
+    for ecosystem in order:
+        pinned = locked.get(ecosystem, {})
+        if ecosystem in declared:
+            dependencies = [
+                replace(dep, version=pinned[dep.name].version) if dep.name in pinned and pinned[dep.name].version else dep
+                for dep in declared[ecosystem].values() if dep.direct
+            ]
+        else:
+            dependencies = [dep for dep in pinned.values() if dep.direct]
+        if dependencies:
+            # Primero las de ejecución y luego las de desarrollo
+            resolved[ecosystem] = sorted(dependencies, key=lambda dep: dep.dev)
+    return resolved
+
+
+REQUIREMENT_LINE = re.compile(r'^[A-Za-z][\w.-]*\s*(?:\[[^\]]*\])?\s*(?:[=<>!~]=?.*)?$')
+GRADLE_HINT = re.compile(r'^\s*(?:implementation|api|testImplementation|compile)\b', re.MULTILINE)
+
+
+def guess_manifest(content: str) -> Optional[Manifest]:
+    """
+    Manifiesto más probable para un texto pegado sin nombre de archivo (entrada de
+    texto de los convertidores). None si no se reconoce ningún formato.
+    """
+    stripped = content.strip()
+    start, end = stripped.find('{'), stripped.rfind('}')
+    if start != -1 and end > start and (start == 0 or stripped[0] not in '<['):
+        try:
+            data = _json_object(stripped[start:end + 1])
+        except ValueError:
+            data = None
+        if data is not None:
+            if 'lockfileVersion' in data:
+                name = 'package-lock.json'
+            elif 'require' in data or 'require-dev' in data:
+                name = 'composer.json'
+            else:
+                name = 'package.json'
+            return Manifest(name, stripped[start:end + 1])
+    if stripped.startswith('<'):
+        name = 'project.csproj' if 'PackageReference' in stripped else 'pom.xml'
+        return Manifest(name, stripped)
+    if '[tool.poetry' in stripped or '[project]' in stripped:
+        return Manifest('pyproject.toml', stripped)
+    if '[package]' in stripped and 'dependencies]' in stripped:
+        return Manifest('Cargo.toml', stripped)
+    if re.match(r'module\s+\S+', stripped) and 'require' in stripped:
+        return Manifest('go.mod', stripped)
+    if GRADLE_HINT.search(stripped):
+        return Manifest('build.gradle', stripped)
+
+    lines = [line.strip() for line in stripped.split('\n') if line.strip() and not line.strip().startswith(('#', '-'))]
+    if lines and sum(1 for line in lines if REQUIREMENT_LINE.match(line)) > len(lines) * 0.6:
+        return Manifest('requirements.txt', stripped)
+    return None
@@ -1,8 +1,23 @@
 # app/application/services/converters/package_diagram_converter.py
 import re
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import os
 from collections import defaultdict
+from app.application.services.converters.dependency_graph import DependencyGraph
+from app.application.services.converters.symbol_table import SymbolTable
+from app.application.services.converters.manifest_parser import guess_manifest, resolve_dependencies
+from app.application.services.converters.parallel_parser import parse_files
+from app.application.services.converters.project_model import Manifest, ProjectModel
+from app.application.services.converters.diagram_partitioner import (
+    DiagramPartitioner, DEFAULT_MAX_ELEMENTS, INDEX_DIAGRAM_NAME, Partition, PartitionEdges
+)
+
+# Paquete external.<registro> de cada ecosistema y cuántas dependencias se muestran
+EXTERNAL_REGISTRIES = {
+    'npm': 'npm', 'pypi': 'pypi', 'maven': 'maven', 'packagist': 'packagist',
+    'cargo': 'crates', 'go': 'go', 'nuget': 'nuget'
+}
+MAX_EXTERNAL_PACKAGES = 10
 
 class PackageDiagramConverter:
     """
@@ -10,28 +25,69 @@ class PackageDiagramConverter:
     Analiza estructura de directorios y dependencias para generar diagramas de paquetes.
     """
     
-    def __init__(self):
+    def __init__(self, transitive_reduction: bool = False):
         self.packages: Dict[str, Dict] = {}
         self.dependencies: List[Dict] = []
         self.hierarchies: Dict[str, List[str]] = defaultdict(list)
-        self.imports_map: Dict[str, Set[str]] = defaultdict(set)
+        self.graph = DependencyGraph()
+        self.cycles: List[List[str]] = []
+        self.symbols = SymbolTable()
+        # Omitir las dependencias implicadas por otras (a -> c si ya existe a -> b -> c)
+        self.transitive_reduction = transitive_reduction
         
-    def convert(self, code: str) -> str:
+    def convert(self, code: Union[str, ProjectModel]) -> str:
         """
         Convierte estructura de proyecto/código a diagrama UML de paquetes en PlantUML.
         El 'code' puede ser:
+        - Un ProjectModel (imports por archivo o árbol del proyecto, más manifiestos)
         - Estructura de directorios (separada por líneas)
         - Múltiples archivos con imports (separados por ---FILE--- markers)
         - Configuración de proyecto con dependencias
         """
+        self._build_model(code)
+        return self._generate_plantuml()
+    
+    def iter_convert(self, code: Union[str, ProjectModel]) -> Iterator[str]:
+        """Igual que convert, pero emite el PlantUML línea a línea"""
+        self._build_model(code)
+        yield from self._iter_plantuml()
+    
+    def convert_partitioned(self, code: Union[str, ProjectModel], max_elements: int = DEFAULT_MAX_ELEMENTS) -> Dict[str, str]:
+        """
+        Convierte la estructura del proyecto a varios diagramas de paquetes,
+        agrupados por paquete raíz y acotados por max_elements, más un diagrama índice.
+        """
+        self._build_model(code)
+        
+        partitioner = DiagramPartitioner(max_elements)
+        elements = {name: name.split('.')[0] for name in self.packages}
+        edges = [(dep['from'], dep['to']) for dep in self.dependencies]
+        partitions = partitioner.partition(elements, edges)
+        
+        # Cada dependencia va en la partición de su paquete origen; los paquetes de otras particiones se declaran como externos
+        assigned = partitioner.assign_edges(partitions, self.dependencies, lambda dep: (dep['from'], dep['to']))
+        
+        diagrams = {INDEX_DIAGRAM_NAME: partitioner.render_index(partitions, edges)}
+        for partition, partition_edges in zip(partitions, assigned):
+            diagrams[partition.key] = self._generate_plantuml(
+                partition.elements, partition_edges.edges, partition_edges.external
+            )
+        return diagrams
+    
+    def _build_model(self, code: Union[str, ProjectModel]):
+        """Construye paquetes y dependencias a partir de la entrada"""
         # Limpiar estado anterior
         self.packages.clear()
         self.dependencies.clear()
         self.hierarchies.clear()
-        self.imports_map.clear()
+        self.graph = DependencyGraph()
+        self.cycles = []
+        self.symbols = SymbolTable()
         
         # Detectar tipo de entrada y procesar
-        if '---FILE---' in code:
+        if isinstance(code, ProjectModel):
+            self._analyze_project_model(code)
+        elif '---FILE---' in code:
             self._analyze_multiple_files(code)
         elif self._is_directory_structure(code):
             self._analyze_directory_structure(code)
@@ -42,8 +98,6 @@ class PackageDiagramConverter:
             
         # Generar dependencias entre paquetes
         self._generate_package_dependencies()
-        
-        return self._generate_plantuml()
     
     def _is_directory_structure(self, content: str) -> bool:
         """Detecta si el contenido es una estructura de directorios"""
@@ -73,20 +127,77 @@ class PackageDiagramConverter:
                 self._add_package_from_path(path_info)
     
     def _analyze_multiple_files(self, content: str):
-        """Analiza múltiples archivos separados por markers"""
-        files = content.split('---FILE---')
-        
-        for file_content in files:
+        """Analiza múltiples archivos separados por markers ---FILE---"""
+        files = []
+        for file_content in content.split('---FILE---'):
             file_content = file_content.strip()
             if not file_content:
                 continue
                 
             # Extraer nombre del archivo (primera línea después del marker)
-            lines = file_content.split('\n')
-            if lines:
-                filename = lines[0].strip()
-                file_code = '\n'.join(lines[1:]) if len(lines) > 1 else ''
-                self._analyze_file_imports(filename, file_code)
+            filename, _, file_code = file_content.partition('\n')
+            files.append((filename.strip(), file_code))
+        self._analyze_files(files)
+    
+    def _analyze_project_model(self, project: ProjectModel):
+        """
+        Usa los imports por archivo si los hay y, si no, la jerarquía del árbol del
+        proyecto. Los manifiestos aportan los paquetes externos.
+        """
+        if project.sources:
+            self._analyze_files([(source.path, source.code) for source in project.sources])
+        else:
+            for entry in project.tree:
+                parts = entry.parts
+                if parts:
+                    self._add_package_from_path(('/'.join(parts), parts, not entry.is_directory))
+        
+        self._analyze_dependencies(project.manifests)
+    
+    def _analyze_dependencies(self, manifests: List[Manifest]):
+        """Agrega un paquete por registro y las primeras dependencias de cada uno"""
+        for ecosystem, dependencies in resolve_dependencies(manifests).items():
+            self._add_external_package(f'external.{EXTERNAL_REGISTRIES.get(ecosystem, ecosystem)}', 'external')
+            for dependency in dependencies[:MAX_EXTERNAL_PACKAGES]:  # Limitar para claridad
+                name = dependency.name
+                if ecosystem in ('packagist', 'go'):  # vendor/paquete y rutas de módulo
+                    name = name.rsplit('/', 1)[-1]
+                self._add_external_package(f'external.{name}', 'external')
+    
+    def _analyze_files(self, files: List[Tuple[str, str]]):
+        """
+        Cada archivo se escanea por separado (en paralelo si son muchos): paquete,
+        módulos que declara e imports. Luego se registran en la tabla de símbolos los
+        módulos de todos los archivos y se resuelven los imports contra esa tabla, de
+        modo que un import interno apunta al paquete real que lo declara.
+        """
+        scanned = parse_files(scan_package_file, files, self._scan_file)
+        for filename, file_package, declared, _ in scanned:
+            self._register_file_symbols(filename, file_package, declared)
+        
+        for filename, file_package, _, imports in scanned:
+            self._add_file_imports(filename, file_package, imports)
+    
+    def _scan_file(self, file: Tuple[str, str]) -> Tuple[str, str, List[str], List[str]]:
+        """Retorna (archivo, paquete, módulos declarados, imports) de un archivo"""
+        filename, code = file
+        # Java: package a.b; C#: namespace A.B
+        declared = re.findall(r'^\s*(?:package|namespace)\s+([\w.]+)', code, re.MULTILINE)
+        return filename, self._get_package_from_filename(filename), declared, self._extract_all_imports(code)
+    
+    def _register_file_symbols(self, filename: str, file_package: str, declared: List[str]):
+        """Registra el módulo de un archivo y los namespaces/packages que declara"""
+        module_path = os.path.splitext(filename)[0]
+        self.symbols.declare_module(module_path, file_package)
+        
+        # Cada prefijo del paquete también es un módulo interno (p.ej. 'app', 'app.domain')
+        parts = file_package.split('.')
+        for i in range(1, len(parts) + 1):
+            prefix = '.'.join(parts[:i])
+            self.symbols.declare_module(prefix, prefix)
+        
+        for module in declared:
+            self.symbols.declare_module(module, file_package)
     
     def _analyze_single_file(self, code: str):
         """Analiza un solo archivo para extraer imports"""
@@ -94,14 +205,9 @@ class PackageDiagramConverter:
     
     def _analyze_project_dependencies(self, config: str):
         """Analiza configuración de proyecto para extraer dependencias externas"""
-        if 'package.json' in config.lower() or ('{' in config and 'dependencies' in config):
-            self._extract_npm_packages(config)
-        elif 'requirements.txt' in config.lower() or self._looks_like_requirements(config):
-            self._extract_python_packages(config)
-        elif any(keyword in config.lower() for keyword in ['maven', 'gradle', 'pom.xml']):
-            self._extract_java_packages(config)
-        elif 'composer.json' in config.lower():
-            self._extract_php_packages(config)
+        manifest = guess_manifest(config)
+        if manifest:
+            self._analyze_dependencies([manifest])
     
     def _parse_directory_path(self, path: str) -> Tuple[str, List[str], bool]:
         """
@@ -164,17 +270,20 @@ class PackageDiagramConverter:
     
     def _analyze_file_imports(self, filename: str, code: str):
         """Analiza imports de un archivo específico"""
-        # Determinar paquete del archivo
-        file_package = self._get_package_from_filename(filename)
-        
-        # Extraer imports
-        imports = self._extract_all_imports(code)
-        
-        # Mapear imports a paquetes
+        self._add_file_imports(filename, self._get_package_from_filename(filename), self._extract_all_imports(code))
+    
+    def _add_file_imports(self, filename: str, file_package: str, imports: List[str]):
+        """Agrega el paquete del archivo y sus dependencias hacia los paquetes importados"""
+        # Mapear imports a paquetes (primero contra la tabla de símbolos del proyecto)
+        importer = os.path.splitext(filename)[0]
         for imp in imports:
-            target_package = self._get_package_from_import(imp)
+            if imp.startswith('.'):
+                # Un import relativo solo se resuelve contra el módulo que importa
+                target_package = self.symbols.resolve_module(imp, importer)
+            else:
+                target_package = self.symbols.resolve_module(imp) or self._get_package_from_import(imp)
             if target_package and target_package != file_package:
-                self.imports_map[file_package].add(target_package)
+                self.graph.add_edge(file_package, target_package)
         
         # Agregar paquete si no existe
         if file_package not in self.packages:
@@ -259,10 +368,10 @@ class PackageDiagramConverter:
             for match in matches:
                 # Limpiar y normalizar
                 cleaned = match.strip().split()[0]  # Tomar solo la primera parte
-                if cleaned and not cleaned.startswith('.'):  # Evitar imports relativos
+                if cleaned:  # Los relativos se resuelven después contra el archivo que importa
                     imports.append(cleaned)
         
-        return list(set(imports))  # Remover duplicados
+        return list(dict.fromkeys(imports))  # Remover duplicados conservando el orden
     
     def _get_package_from_import(self, import_path: str) -> str:
         """Convierte un import a nombre de paquete"""
@@ -350,76 +459,20 @@ class PackageDiagramConverter:
         return 'module'
     
     def _generate_package_dependencies(self):
-        """Genera dependencias entre paquetes basado en imports"""
-        for source_pkg, target_packages in self.imports_map.items():
-            for target_pkg in target_packages:
-                # Evitar auto-dependencias
-                if source_pkg != target_pkg:
-                    self.dependencies.append({
-                        'from': source_pkg,
-                        'to': target_pkg,
-                        'type': 'depends'
-                    })
-    
-    def _extract_npm_packages(self, config: str):
-        """Extrae paquetes de package.json"""
-        self._add_external_package('external.npm', 'external')
-        
-        # Buscar dependencias
-        dep_patterns = [
-            r'"dependencies"\s*:\s*{([^}]+)}',
-            r'"devDependencies"\s*:\s*{([^}]+)}'
-        ]
-        
-        for pattern in dep_patterns:
-            matches = re.findall(pattern, config)
-            for deps_block in matches:
-                pkg_pattern = r'"([^"]+)"\s*:'
-                packages = re.findall(pkg_pattern, deps_block)
-                for pkg in packages[:5]:  # Limitar para claridad
-                    self._add_external_package(f'external.{pkg}', 'external')
-    
-    def _extract_python_packages(self, config: str):
-        """Extrae paquetes de requirements.txt"""
-        self._add_external_package('external.pypi', 'external')
-        
-        lines = config.split('\n')
-        for line in lines[:10]:  # Limitar para claridad
-            line = line.strip()
-            if line and not line.startswith('#'):
-                pkg_name = re.split(r'[>=<!=]', line)[0].strip()
-                if pkg_name:
-                    self._add_external_package(f'external.{pkg_name}', 'external')
-    
-    def _extract_java_packages(self, config: str):
-        """Extrae paquetes de Maven/Gradle"""
-        self._add_external_package('external.maven', 'external')
-        
-        # Maven
-        maven_pattern = r'<artifactId>([^<]+)</artifactId>'
-        maven_deps = re.findall(maven_pattern, config)
-        
-        # Gradle
-        gradle_pattern = r'implementation\s+["\']([^:"\']+):'
-        gradle_deps = re.findall(gradle_pattern, config)
-        
-        all_deps = (maven_deps + gradle_deps)[:10]  # Limitar
-        for dep in all_deps:
-            self._add_external_package(f'external.{dep}', 'external')
-    
-    def _extract_php_packages(self, config: str):
-        """Extrae paquetes de composer.json"""
-        self._add_external_package('external.packagist', 'external')
-        
-        dep_pattern = r'"require"\s*:\s*{([^}]+)}'
-        matches = re.findall(dep_pattern, config)
-        
-        for deps_block in matches:
-            pkg_pattern = r'"([^"]+)"\s*:'
-            packages = re.findall(pkg_pattern, deps_block)
-            for pkg in packages[:5]:  # Limitar
-                if '/' in pkg:  # Formato vendor/package
-                    self._add_external_package(f'external.{pkg.split("/")[1]}', 'external')
+        """
+        Genera dependencias entre paquetes a partir del grafo de imports: una por par
+        de paquetes, con la cantidad de imports que la originan. Registra los ciclos
+        y, si se pidió, emite solo la reducción transitiva.
+        """
+        self.cycles = self.graph.cycles()
+        graph = self.graph.transitive_reduction() if self.transitive_reduction else self.graph
+        for source_pkg, target_pkg, count in graph.edges():
+            self.dependencies.append({
+                'from': source_pkg,
+                'to': target_pkg,
+                'type': 'depends',
+                'count': count
+            })
     
     def _add_external_package(self, package_name: str, package_type: str):
         """Agrega un paquete externo"""
@@ -433,27 +486,34 @@ class PackageDiagramConverter:
                 'type': package_type
             }
     
-    def _looks_like_requirements(self, content: str) -> bool:
-        """Verifica si parece un archivo requirements.txt"""
-        lines = content.strip().split('\n')
-        dep_lines = sum(1 for line in lines 
-                       if line.strip() and not line.strip().startswith('#') 
-                       and ('==' in line or '>=' in line or re.match(r'^[a-zA-Z][\w-]*$', line.strip())))
-        return dep_lines > len(lines) * 0.6
-    
-    def _generate_plantuml(self) -> str:
-        """Genera el código PlantUML para el diagrama de paquetes"""
-        plantuml = ["@startuml"]
+    def _generate_plantuml(self, package_names: Optional[List[str]] = None,
+                           dependencies: Optional[List[Dict]] = None,
+                           external: Optional[Dict[str, Optional[Partition]]] = None) -> str:
+        """
+        Genera el código PlantUML para el diagrama de paquetes.
+        Si se indican package_names/dependencies, solo emite ese subconjunto;
+        external son los paquetes de otras particiones a los que apuntan sus dependencias.
+        """
+        return '\n'.join(self._iter_plantuml(package_names, dependencies, external))
+
+    def _iter_plantuml(self, package_names: Optional[List[str]] = None,
+                       dependencies: Optional[List[Dict]] = None,
+                       external: Optional[Dict[str, Optional[Partition]]] = None) -> Iterator[str]:
+        """Emite el diagrama de paquetes línea a línea"""
+        yield "@startuml"
 
         # Generar paquetes agrupados por tipo (sin temas ni colores)
-        for pkg_name, pkg_info in self.packages.items():
-            short_name = pkg_info.get('short_name', pkg_name)
-            plantuml.append(f'package "{short_name}"')
+        for pkg_name in (self.packages if package_names is None else package_names):
+            short_name = self.packages[pkg_name].get('short_name', pkg_name)
+            yield f'package "{short_name}"'
+        for pkg_name, partition in (external or {}).items():
+            short_name = self.packages.get(pkg_name, {}).get('short_name', pkg_name)
+            yield f'package "{short_name}" {PartitionEdges.stereotype(partition)}'
 
         # Generar dependencias
         generated_deps = set()  # Evitar duplicados
 
-        for dependency in self.dependencies:
+        for dependency in (self.dependencies if dependencies is None else dependencies):
             from_pkg = dependency['from']
             to_pkg = dependency['to']
 
@@ -472,7 +532,11 @@ class PackageDiagramConverter:
             if to_pkg.startswith('external.'):
                 arrow = '..>'
 
-            plantuml.append(f'"{from_short}" {arrow} "{to_short}"')
+            yield f'"{from_short}" {arrow} "{to_short}"'
+
+        yield "@enduml"
+
 
-        plantuml.append("@enduml")
-        return '\n'.join(plantuml)
+def scan_package_file(file: Tuple[str, str]) -> Tuple[str, str, List[str], List[str]]:
+    """Escanea un archivo en un worker del pool de parseo"""
+    return PackageDiagramConverter()._scan_file(file)
@@ -0,0 +1,94 @@
+# app/application/services/converters/parallel_parser.py
+"""
+Front end de parseo en paralelo para los convertidores.
+
+Reparte el análisis por archivo entre procesos de un ProcessPoolExecutor compartido.
+A los workers solo viajan el texto de cada archivo y una función de nivel de módulo;
+retornan modelos compactos (dicts/tuplas) que el convertidor fusiona en el orden
+original de los archivos, así el resultado es idéntico al del parseo en serie.
+
+Con pocos archivos (menos de PARALLEL_PARSE_MIN_FILES) se parsea en serie: el costo
+de enviar los archivos a otro proceso supera la ganancia.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Sequence, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0")) or (os.cpu_count() or 1)
+PARALLEL_PARSE_MIN_FILES = int(os.getenv("PARALLEL_PARSE_MIN_FILES", "64"))
+# spawn evita heredar hilos del servidor (uvicorn, pools de E/S) al crear los workers
+PARSE_START_METHOD = os.getenv("PARSE_START_METHOD", "spawn")
+
+# Entrada de un convertidor: el código concatenado o el código de cada archivo
+SourceInput = Union[str, Sequence[str]]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def split_sources(code: SourceInput) -> List[str]:
+    """Normaliza la entrada a una lista con el código de cada archivo"""
+    if isinstance(code, str):
+        return [code]
+    return list(code)
+
+
+def source_input(converter, code_parts: List[str]) -> SourceInput:
+    """
+    Entrada para el convertidor: la lista de archivos si sabe parsearlos por
+    separado (accepts_source_files) o el código concatenado en caso contrario.
+    """
+    if getattr(converter, "accepts_source_files", False):
+        return code_parts
+    return "".join(code_parts)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(PARSE_START_METHOD)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _pool
+
+
+def _discard_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def parse_files(parse: Callable[[T], R], items: Sequence[T], local_parse: Optional[Callable[[T], R]] = None,
+                workers: int = PARSE_WORKERS, min_files: int = PARALLEL_PARSE_MIN_FILES) -> List[R]:
+    """
+    Aplica parse a cada elemento y retorna los resultados en el mismo orden.
+    parse debe ser una función de nivel de módulo (se envía por pickle a los workers);
+    local_parse, si se indica, se usa en su lugar cuando se parsea en serie.
+    Si el pool no está disponible o se rompe, se parsea en serie.
+    """
+    local_parse = local_parse or parse
+    if workers <= 1 or len(items) < max(min_files, 2):
+        return [local_parse(item) for item in items]
+
+    chunksize = max(1, len(items) // (workers * 4))
+    try:
+        return list(_get_pool(workers).map(parse, items, chunksize=chunksize))
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"Pool de parseo no disponible, se parsea en serie: {e}")
+        _discard_pool()
+        return [local_parse(item) for item in items]
+
+
+def shutdown() -> None:
+    _discard_pool()
@@ -1,6 +1,9 @@
 # app/application/services/converters/php/activity_converter.py
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List
+from app.application.services.converters.control_flow import (
+    ActivityFlow, BraceFlowReader, ControlFlowBuilder, iter_activity_plantuml
+)
 
 class PHPActivityConverter:
     def __init__(self):
@@ -8,10 +11,12 @@ class PHPActivityConverter:
         self.decision_points: List[Dict] = []
         self.swimlanes: List[str] = ["Usuario", "Sistema"]
         self.current_method = ""
-        self.activity_flow: List[Dict] = []
+        self.flows: List[ActivityFlow] = []
 
     def convert(self, code: str) -> str:
         """Convierte código PHP de métodos a diagrama UML de actividades en PlantUML"""
+        self.flows = []
+        
         # Preprocesamiento
         code = self._normalize_code(code)
         
@@ -81,125 +86,73 @@ class PHPActivityConverter:
             self._analyze_method_flow(activity_name, method_body)
 
     def _analyze_method_flow(self, activity_name: str, method_body: str):
-        """Analiza el flujo de control dentro de un método"""
-        self.activity_flow = []
-        self.activity_flow.append({
-            'type': 'start',
-            'actor': 'Usuario',
-            'description': f'Inicia {activity_name}'
-        })
+        """Analiza el flujo de control dentro de un método (un flujo por método)"""
+        builder = ControlFlowBuilder(self.current_method, f'Inicia {activity_name}')
+        BraceFlowReader(builder, self._analyze_statement).read(method_body)
+        self.flows.append(builder.finish())
+
+    def _analyze_statement(self, builder: ControlFlowBuilder, line: str):
+        """Analiza una sentencia; las estructuras de control las resuelve BraceFlowReader"""
+        # Detectar cambios de actor por comentarios
+        actor_match = re.match(r'(?://|#)\s*@(User|System):\s*(.*)', line)
+        if actor_match:
+            builder.actor = "Usuario" if actor_match.group(1) == "User" else "Sistema"
+            builder.action(actor_match.group(2).strip())
+            return
         
-        # Analizar líneas del método
-        lines = method_body.split('\n')
-        current_actor = 'Sistema'  # Por defecto
+        # Detectar returns con respuestas (interacción con usuario)
+        return_patterns = [
+            r'return\s+(?:response\(|redirect\(|view\(|json\()',
+            r'return\s+back\(\)',
+            r'return\s+\$this->render'
+        ]
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Detectar cambios de actor por comentarios
-            actor_match = re.match(r'(?://|#)\s*@(User|System):\s*(.*)', line)
-            if actor_match:
-                current_actor = "Usuario" if actor_match.group(1) == "User" else "Sistema"
-                description = actor_match.group(2).strip()
-                self.activity_flow.append({
-                    'type': 'activity',
-                    'actor': current_actor,
-                    'description': description
-                })
-                continue
-            
-            # Detectar estructuras de control
-            if_match = re.match(r'if\s*\(\s*([^)]+)\s*\)', line)
-            if if_match:
-                condition = if_match.group(1)
-                self._add_decision_point(condition, current_actor)
-                continue
-            
-            # Detectar returns con respuestas (interacción con usuario)
-            return_patterns = [
-                r'return\s+(?:response\(|redirect\(|view\(|json\()',
-                r'return\s+back\(\)',
-                r'return\s+\$this->render'
-            ]
-            
-            for pattern in return_patterns:
-                if re.search(pattern, line):
-                    self.activity_flow.append({
-                        'type': 'activity',
-                        'actor': 'Usuario',
-                        'description': 'Recibe respuesta'
-                    })
-                    break
-            
-            # Detectar llamadas a servicios (actividades del sistema)
-            service_call_patterns = [
-                r'\$(\w+Service|\w+Repository)->(\w+)',
-                r'\$this->(\w+Service|\w+Repository)->(\w+)',
-                r'(\w+)::(\w+)\s*\('
-            ]
-            
-            for pattern in service_call_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    if len(match.groups()) == 2:
-                        service = match.group(1)
-                        method = match.group(2)
-                    else:
-                        continue
-                    
-                    self.activity_flow.append({
-                        'type': 'activity',
-                        'actor': 'Sistema',
-                        'description': f'{self._humanize_method_name(method)}'
-                    })
-                    break
-            
-            # Detectar validaciones
-            validation_patterns = [
-                r'validate\(',
-                r'Validator::',
-                r'->fails\(\)',
-                r'->passes\(\)'
-            ]
-            
-            for pattern in validation_patterns:
-                if re.search(pattern, line):
-                    self._add_decision_point('Datos válidos', current_actor)
-                    break
-            
-            # Detectar excepciones y errores
-            error_patterns = [
-                r'throw\s+new\s+\w+Exception',
-                r'abort\(',
-                r'->error\('
-            ]
-            
-            for pattern in error_patterns:
-                if re.search(pattern, line):
-                    self.activity_flow.append({
-                        'type': 'activity',
-                        'actor': 'Usuario',
-                        'description': 'Ve mensaje de error'
-                    })
-                    break
-
-        # Agregar fin
-        self.activity_flow.append({
-            'type': 'end',
-            'actor': current_actor,
-            'description': 'Fin del proceso'
-        })
+        for pattern in return_patterns:
+            if re.search(pattern, line):
+                builder.action('Recibe respuesta', 'Usuario')
+                break
+        
+        # Detectar llamadas a servicios (actividades del sistema)
+        service_call_patterns = [
+            r'\$(\w+Service|\w+Repository)->(\w+)',
+            r'\$this->(\w+Service|\w+Repository)->(\w+)',
+            r'(\w+)::(\w+)\s*\('
+        ]
+        
+        for pattern in service_call_patterns:
+            match = re.search(pattern, line)
+            if match:
+                builder.action(self._humanize_method_name(match.group(2)), 'Sistema')
+                break
+        
+        # Detectar validaciones
+        validation_patterns = [
+            r'validate\(',
+            r'Validator::',
+            r'->fails\(\)',
+            r'->passes\(\)'
+        ]
+        
+        for pattern in validation_patterns:
+            if re.search(pattern, line):
+                self._add_decision_point(builder, 'Datos válidos')
+                break
+        
+        # Detectar excepciones y errores
+        error_patterns = [
+            r'throw\s+new\s+\w+Exception',
+            r'abort\(',
+            r'->error\('
+        ]
+        
+        for pattern in error_patterns:
+            if re.search(pattern, line):
+                builder.action('Ve mensaje de error', 'Usuario')
+                break
 
-    def _add_decision_point(self, condition: str, actor: str):
-        """Agrega un punto de decisión al flujo"""
-        self.activity_flow.append({
-            'type': 'decision',
-            'actor': actor,
-            'description': condition,
-            'condition': condition
-        })
+    def _add_decision_point(self, builder: ControlFlowBuilder, condition: str):
+        """Agrega un punto de decisión que abarca el resto del bloque actual"""
+        builder.guard(condition)
 
     def _humanize_method_name(self, method_name: str) -> str:
         """Convierte nombres de métodos PHP a descripciones legibles"""
@@ -265,53 +218,8 @@ class PHPActivityConverter:
             ""
         ])
         
-        # Generar swimlanes
-        current_actor = None
-        pending_else = []
-        
-        for i, flow_item in enumerate(self.activity_flow):
-            # Cambiar de swimlane si es necesario
-            if flow_item['actor'] != current_actor:
-                if current_actor is not None:
-                    plantuml.append("")
-                plantuml.append(f"|{flow_item['actor']}|")
-                current_actor = flow_item['actor']
-            
-            # Generar elementos según el tipo
-            if flow_item['type'] == 'start':
-                plantuml.append("start")
-                plantuml.append(f":{flow_item['description']};")
-            
-            elif flow_item['type'] == 'activity':
-                plantuml.append(f":{flow_item['description']};")
-            
-            elif flow_item['type'] == 'decision':
-                condition = flow_item['condition']
-                plantuml.append(f"if ({condition}?) then (sí)")
-                
-                # Buscar el próximo elemento que no sea de decisión para el flujo "sí"
-                next_item = self._find_next_non_decision(i + 1)
-                if next_item and next_item['actor'] != current_actor:
-                    plantuml.append(f"|{next_item['actor']}|")
-                    current_actor = next_item['actor']
-                
-                # Marcar que necesitamos manejar el "else" más tarde
-                pending_else.append(i)
-            
-            elif flow_item['type'] == 'end':
-                # Cerrar cualquier if pendiente
-                for _ in pending_else:
-                    plantuml.append("endif")
-                pending_else.clear()
-                
-                plantuml.append("stop")
+        # Flujos de los métodos con swimlanes
+        plantuml.extend(iter_activity_plantuml(self.flows))
         
         plantuml.append("@enduml")
         return '\n'.join(plantuml)
-
-    def _find_next_non_decision(self, start_index: int) -> Optional[Dict]:
-        """Encuentra el próximo elemento que no sea una decisión"""
-        for i in range(start_index, len(self.activity_flow)):
-            if self.activity_flow[i]['type'] != 'decision':
-                return self.activity_flow[i]
-        return None
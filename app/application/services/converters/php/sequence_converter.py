@@ -1,15 +1,24 @@
 # app/application/services/converters/php/sequence_converter.py
 import re
-from typing import Dict, List, Set
+from typing import Iterator, List, Optional, Set
+from app.application.services.converters.call_graph import (
+    DEFAULT_MAX_DEPTH, DEFAULT_MAX_MESSAGES, CallGraph
+)
 
 class PHPSequenceConverter:
     def __init__(self):
         self.participants: Set[str] = set()
-        self.interactions: List[Dict] = []
+        self.graph = CallGraph()
         self.current_class = ""
+        self.entry_points: Optional[List[str]] = None
+        self.max_depth = DEFAULT_MAX_DEPTH
+        self.max_messages = DEFAULT_MAX_MESSAGES
 
     def convert(self, code: str) -> str:
         """Convierte código PHP a diagrama UML de secuencia en PlantUML"""
+        self.participants = set()
+        self.graph = CallGraph()
+        
         # Preprocesamiento
         code = self._normalize_code(code)
         
@@ -55,8 +64,8 @@ class PHPSequenceConverter:
 
     def _analyze_method_interactions(self, method_name: str, method_body: str):
         """Analiza las interacciones dentro de un método"""
-        # Agregar participante principal (el controlador)
-        self.participants.add("Controller")
+        # Participante principal (el controlador)
+        self.graph.add_function(method_name, "Controller")
         
         # Buscar llamadas a métodos de otros objetos
         method_call_patterns = [
@@ -74,33 +83,12 @@ class PHPSequenceConverter:
                     # Determinar el tipo de participante basado en convenciones
                     participant_type = self._determine_participant_type(object_name, called_method)
                     
-                    self.participants.add(participant_type)
-                    
-                    # Agregar interacción
-                    self.interactions.append({
-                        'from': 'Controller',
-                        'to': participant_type,
-                        'message': called_method,
-                        'type': 'sync'
-                    })
-                    
-                    # Agregar respuesta implícita
-                    self.interactions.append({
-                        'from': participant_type,
-                        'to': 'Controller',
-                        'message': 'resultado',
-                        'type': 'return'
-                    })
+                    # Agregar interacción (la respuesta implícita se emite al recorrer el grafo)
+                    self.graph.add_call(method_name, participant_type, called_method)
 
         # Buscar returns que indican respuesta al usuario
         if re.search(r'return\s+(?:response\(|redirect\(|view\(|json\()', method_body):
-            self.participants.add("Usuario")
-            self.interactions.append({
-                'from': 'Controller',
-                'to': 'Usuario',
-                'message': 'respuesta',
-                'type': 'return'
-            })
+            self.graph.add_call(method_name, 'Usuario', 'respuesta', kind='return')
 
     def _determine_participant_type(self, object_name: str, method_name: str) -> str:
         """Determina el tipo de participante basado en convenciones PHP"""
@@ -141,6 +129,27 @@ class PHPSequenceConverter:
             result.append(char)
         return ''.join(result)
 
+    def _iter_interactions(self) -> Iterator[str]:
+        """Interacciones del grafo de llamadas desde los puntos de entrada"""
+        steps = self.graph.iter_sequence(self.graph.select_entry_points(self.entry_points),
+                                         self.max_depth, self.max_messages)
+        for step in steps:
+            edge = step.edge
+            if step.kind == 'entry':
+                yield f"== {step.function} =="
+            elif step.kind == 'call':
+                self.participants.update((edge.source, edge.target))
+                arrow = "-->" if edge.kind == 'return' else "->"
+                yield f"{edge.source} {arrow} {edge.target} : {edge.label}"
+            elif step.kind == 'return':
+                # Respuesta implícita de cada llamada
+                if edge.kind != 'return':
+                    yield f"{edge.target} --> {edge.source} : resultado"
+            elif step.kind == 'loop':
+                yield f"loop {step.label}"
+            else:
+                yield "end"
+
     def _generate_plantuml(self) -> str:
         """Genera el código PlantUML para el diagrama de secuencia"""
         plantuml = ["@startuml"]
@@ -158,14 +167,16 @@ class PHPSequenceConverter:
             ""
         ])
         
+        interactions = list(self._iter_interactions())
+        
         # Participantes
         for participant in sorted(self.participants):
             plantuml.append(f"participant {participant}")
         
         plantuml.append("")
         
-        # Si no hay interacciones, crear un ejemplo básico
-        if not self.interactions:
+        # Si no hay interacciones, crear un ejemplo básico (salvo que se pidieran puntos de entrada)
+        if not interactions and not self.entry_points:
             plantuml.extend([
                 "Usuario -> Controller : solicitud",
                 "Controller -> Service : procesar",
@@ -176,9 +187,7 @@ class PHPSequenceConverter:
             ])
         else:
             # Interacciones extraídas
-            for interaction in self.interactions:
-                arrow = "-->" if interaction['type'] == 'return' else "->"
-                plantuml.append(f"{interaction['from']} {arrow} {interaction['to']} : {interaction['message']}")
+            plantuml.extend(interactions)
         
         plantuml.append("@enduml")
         return '\n'.join(plantuml)
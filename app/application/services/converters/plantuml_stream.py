@@ -0,0 +1,39 @@
+# app/application/services/converters/plantuml_stream.py
+from typing import Iterable, Iterator
+
+STREAM_CHUNK_SIZE = 64 * 1024  # Tamaño aproximado de cada bloque emitido (caracteres)
+
+
+def iter_chunks(lines: Iterable[str], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Agrupa las líneas emitidas por un convertidor en bloques de texto de tamaño
+    acotado. El resultado concatenado es idéntico a '\\n'.join(lines).
+    """
+    buffer = []
+    size = 0
+    first = True
+    for line in lines:
+        if not first:
+            buffer.append('\n')
+            size += 1
+        first = False
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_convert(converter, code: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Emite el diagrama generado por el convertidor en bloques.
+    Los convertidores que implementan iter_convert() producen el PlantUML línea a
+    línea sin acumular el documento completo; el resto se emite en un solo bloque.
+    """
+    if hasattr(converter, 'iter_convert'):
+        yield from iter_chunks(converter.iter_convert(code), chunk_size)
+    else:
+        yield converter.convert(code)
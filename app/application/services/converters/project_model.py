@@ -0,0 +1,58 @@
+# app/application/services/converters/project_model.py
+"""
+Modelo estructurado de un proyecto para los diagramas de componentes y de paquetes.
+
+Sustituye al texto intermedio (estructura de directorios, bloques ---FILE--- y
+---CONFIG-...---) que los convertidores tenían que volver a clasificar y parsear
+línea a línea: aquí cada entrada ya sabe si es un directorio o un archivo, los
+imports vienen separados por archivo y los manifiestos por nombre.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class TreeEntry:
+    path: str  # Ruta relativa con '/' como separador
+    is_directory: bool = False
+
+    @property
+    def parts(self) -> List[str]:
+        return [part for part in self.path.split('/') if part and part != '.']
+
+
+@dataclass(frozen=True)
+class SourceImports:
+    path: str  # Ruta relativa del archivo
+    import_lines: Tuple[str, ...]  # Líneas de import/using/package de la cabecera
+
+    @property
+    def code(self) -> str:
+        return '\n'.join(self.import_lines)
+
+
+@dataclass(frozen=True)
+class Manifest:
+    path: str  # Ruta relativa (package.json, pom.xml, src/App.csproj, ...)
+    content: str
+
+    @property
+    def name(self) -> str:
+        return self.path.replace('\\', '/').rsplit('/', 1)[-1]
+
+
+@dataclass
+class ProjectModel:
+    """
+    Árbol del proyecto (en orden de recorrido), imports por archivo y manifiestos.
+    Cada endpoint llena solo las partes que su diagrama necesita.
+    """
+    tree: List[TreeEntry] = field(default_factory=list)
+    sources: List[SourceImports] = field(default_factory=list)
+    manifests: List[Manifest] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.tree or self.sources or self.manifests)
+
+    def manifest(self, name: str) -> Optional[Manifest]:
+        return next((m for m in self.manifests if m.name == name), None)
@@ -1,25 +1,37 @@
 # app/application/services/converters/python/activity_converter.py
 import ast
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+from app.application.services.converters.control_flow import (
+    ActivityFlow, ControlFlowBuilder, iter_activity_plantuml
+)
+from app.application.services.converters.parallel_parser import SourceInput
+from app.application.services.converters.python.resilient_parser import parse_python
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
 
 class PythonActivityConverter:
+    # Acepta el código de cada archivo por separado (ver parallel_parser.source_input)
+    accepts_source_files = True
+
     def __init__(self):
         self.activities: List[Dict] = []
         self.decision_points: List[Dict] = []
         self.swimlanes: List[str] = ["Usuario", "Sistema"]
         self.current_function = ""
-        self.activity_flow: List[Dict] = []
+        self.flows: List[ActivityFlow] = []
 
-    def convert(self, code: str) -> str:
+    def convert(self, code: SourceInput) -> str:
         """Convierte código Python de funciones a diagrama UML de actividades en PlantUML"""
-        try:
-            # Intentar usar AST para análisis preciso
-            tree = ast.parse(code)
+        self.flows = []
+        
+        # AST por archivo; solo los bloques con errores de sintaxis van por regex
+        parsed = parse_python(code)
+        for tree in parsed.modules:
             self._extract_from_ast(tree)
-        except SyntaxError:
-            # Fallback a análisis por regex
-            self._extract_from_regex(code)
+        if parsed.broken:
+            self._extract_from_regex(parsed.fallback_code)
         
         # Generación UML
         plantuml = self._generate_plantuml()
@@ -28,14 +40,14 @@ class PythonActivityConverter:
     def _extract_from_ast(self, tree: ast.AST):
         """Extrae actividades usando AST"""
         for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 # Buscar funciones marcadas con @Activity en docstring o comentarios
                 activity_name = self._extract_activity_name(node)
                 if activity_name:
                     self.current_function = node.name
                     self._analyze_function_flow(activity_name, node)
 
-    def _extract_activity_name(self, func_node: ast.FunctionDef) -> Optional[str]:
+    def _extract_activity_name(self, func_node: FunctionNode) -> Optional[str]:
         """Extrae el nombre de la actividad desde docstring o comentarios"""
         # Verificar docstring
         if (func_node.body and 
@@ -49,67 +61,97 @@ class PythonActivityConverter:
         # Si no se encuentra en docstring, buscar en comentarios antes de la función
         return None
 
-    def _analyze_function_flow(self, activity_name: str, func_node: ast.FunctionDef):
-        """Analiza el flujo de una función"""
-        self.activity_flow = []
-        self.activity_flow.append({
-            'type': 'start',
-            'actor': 'Usuario',
-            'description': f'Inicia {activity_name}'
-        })
-        
-        # Analizar el cuerpo de la función
-        self._analyze_statements(func_node.body, 'Sistema')
-        
-        # Agregar fin
-        self.activity_flow.append({
-            'type': 'end',
-            'actor': 'Sistema',
-            'description': 'Fin del proceso'
-        })
+    def _analyze_function_flow(self, activity_name: str, func_node: FunctionNode):
+        """Analiza el flujo de una función (un flujo por función)"""
+        builder = ControlFlowBuilder(self.current_function, f'Inicia {activity_name}')
+        self._analyze_statements(builder, func_node.body)
+        self.flows.append(builder.finish('Sistema'))
 
-    def _analyze_statements(self, statements: List[ast.stmt], current_actor: str):
+    def _analyze_statements(self, builder: ControlFlowBuilder, statements: List[ast.stmt]):
         """Analiza una lista de statements"""
         for stmt in statements:
-            self._analyze_statement(stmt, current_actor)
+            self._analyze_statement(builder, stmt)
 
-    def _analyze_statement(self, stmt: ast.stmt, current_actor: str):
+    def _analyze_statement(self, builder: ControlFlowBuilder, stmt: ast.stmt):
         """Analiza un statement individual"""
         if isinstance(stmt, ast.If):
-            # Punto de decisión
-            condition = self._extract_condition(stmt.test)
-            self._add_decision_point(condition, current_actor)
-            
-            # Analizar rama then
-            self._analyze_statements(stmt.body, current_actor)
-            
-            # Analizar rama else si existe
+            # Punto de decisión; la cadena elif/else queda como ramas del mismo if
+            builder.begin_if(self._extract_condition(stmt.test))
+            self._analyze_statements(builder, stmt.body)
+            orelse = stmt.orelse
+            while len(orelse) == 1 and isinstance(orelse[0], ast.If):
+                builder.begin_branch(self._extract_condition(orelse[0].test))
+                self._analyze_statements(builder, orelse[0].body)
+                orelse = orelse[0].orelse
+            if orelse:
+                builder.begin_else()
+                self._analyze_statements(builder, orelse)
+            builder.end()
+        
+        elif isinstance(stmt, (ast.For, ast.AsyncFor)):
+            builder.begin_loop(f"para cada {ast.unparse(stmt.target)} in {ast.unparse(stmt.iter)}")
+            self._analyze_statements(builder, stmt.body)
+            builder.end()
+            self._analyze_statements(builder, stmt.orelse)
+        
+        elif isinstance(stmt, ast.While):
+            builder.begin_loop(self._extract_condition(stmt.test))
+            self._analyze_statements(builder, stmt.body)
+            builder.end()
+            self._analyze_statements(builder, stmt.orelse)
+        
+        elif isinstance(stmt, ast.Try):
+            builder.begin_try()
+            self._analyze_statements(builder, stmt.body)
+            for handler in stmt.handlers:
+                builder.begin_branch(f"catch ({ast.unparse(handler.type)})" if handler.type else 'catch')
+                self._analyze_statements(builder, handler.body)
             if stmt.orelse:
-                self._analyze_statements(stmt.orelse, current_actor)
+                builder.begin_branch('else')
+                self._analyze_statements(builder, stmt.orelse)
+            if stmt.finalbody:
+                builder.begin_branch('finally')
+                self._analyze_statements(builder, stmt.finalbody)
+            builder.end()
+        
+        elif isinstance(stmt, ast.Match):
+            builder.begin_switch(ast.unparse(stmt.subject))
+            for case in stmt.cases:
+                builder.begin_branch(ast.unparse(case.pattern))
+                self._analyze_statements(builder, case.body)
+            builder.end()
+        
+        elif isinstance(stmt, (ast.With, ast.AsyncWith)):
+            self._analyze_statements(builder, stmt.body)
         
         elif isinstance(stmt, ast.Return):
             # Return puede indicar respuesta al usuario
             if isinstance(stmt.value, ast.Call):
                 func_name = self._extract_function_name(stmt.value.func)
                 if any(keyword in func_name.lower() for keyword in ['jsonify', 'render', 'redirect']):
-                    self.activity_flow.append({
-                        'type': 'activity',
-                        'actor': 'Usuario',
-                        'description': 'Recibe respuesta'
-                    })
+                    builder.action('Recibe respuesta', 'Usuario')
         
-        elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
-            # Llamada a función
-            func_name = self._extract_function_name(stmt.value.func)
+        elif isinstance(stmt, (ast.Expr, ast.Assign)):
+            call = stmt.value.value if isinstance(stmt.value, ast.Await) else stmt.value
+            if not isinstance(call, ast.Call):
+                return
+            func_name = self._extract_function_name(call.func)
+            
+            # Tareas en paralelo (fork/join)
+            if func_name == 'gather' and len(call.args) > 1:
+                builder.fork([self._describe_call(arg) for arg in call.args], 'Sistema')
             
             # Determinar si es actividad del sistema
+            elif isinstance(stmt, ast.Expr) and self._is_system_activity(func_name):
+                builder.action(self._humanize_function_name(func_name), 'Sistema')
+
+    def _describe_call(self, node: ast.expr) -> str:
+        """Etiqueta de una rama de un fork"""
+        if isinstance(node, ast.Call):
+            func_name = self._extract_function_name(node.func)
             if self._is_system_activity(func_name):
-                description = self._humanize_function_name(func_name)
-                self.activity_flow.append({
-                    'type': 'activity',
-                    'actor': 'Sistema',
-                    'description': description
-                })
+                return self._humanize_function_name(func_name)
+        return ast.unparse(node)
 
     def _extract_from_regex(self, code: str):
         """Extrae actividades usando regex como fallback"""
@@ -132,17 +174,9 @@ class PythonActivityConverter:
 
     def _analyze_function_body_regex(self, activity_name: str, func_body: str):
         """Analiza el cuerpo de una función usando regex"""
-        self.activity_flow = []
-        self.activity_flow.append({
-            'type': 'start',
-            'actor': 'Usuario',
-            'description': f'Inicia {activity_name}'
-        })
+        builder = ControlFlowBuilder(self.current_function, f'Inicia {activity_name}')
         
-        lines = func_body.split('\n')
-        current_actor = 'Sistema'
-        
-        for line in lines:
+        for line in func_body.split('\n'):
             line = line.strip()
             if not line:
                 continue
@@ -150,30 +184,21 @@ class PythonActivityConverter:
             # Detectar cambios de actor por comentarios
             actor_match = re.match(r'#\s*@(User|System):\s*(.*)', line)
             if actor_match:
-                current_actor = "Usuario" if actor_match.group(1) == "User" else "Sistema"
-                description = actor_match.group(2).strip()
-                self.activity_flow.append({
-                    'type': 'activity',
-                    'actor': current_actor,
-                    'description': description
-                })
+                builder.actor = "Usuario" if actor_match.group(1) == "User" else "Sistema"
+                builder.action(actor_match.group(2).strip())
                 continue
             
-            # Detectar if statements
+            # Detectar if statements (sin indentación confiable, abarcan el resto de la función)
             if re.match(r'if\s+.*:', line):
                 condition = re.search(r'if\s+(.*?):', line)
                 if condition:
-                    self._add_decision_point(condition.group(1), current_actor)
+                    self._add_decision_point(builder, condition.group(1))
                 continue
             
             # Detectar returns
             if line.startswith('return'):
                 if any(keyword in line for keyword in ['jsonify', 'render', 'redirect']):
-                    self.activity_flow.append({
-                        'type': 'activity',
-                        'actor': 'Usuario',
-                        'description': 'Recibe respuesta'
-                    })
+                    builder.action('Recibe respuesta', 'Usuario')
                 continue
             
             # Detectar llamadas a funciones/métodos
@@ -185,19 +210,9 @@ class PythonActivityConverter:
                     func_name = func_call_match.group(3)
                 
                 if self._is_system_activity(func_name):
-                    description = self._humanize_function_name(func_name)
-                    self.activity_flow.append({
-                        'type': 'activity',
-                        'actor': 'Sistema',
-                        'description': description
-                    })
+                    builder.action(self._humanize_function_name(func_name), 'Sistema')
         
-        # Agregar fin
-        self.activity_flow.append({
-            'type': 'end',
-            'actor': current_actor,
-            'description': 'Fin del proceso'
-        })
+        self.flows.append(builder.finish())
 
     def _extract_condition(self, test_node: ast.expr) -> str:
         """Extrae la condición de un nodo de test"""
@@ -228,14 +243,9 @@ class PythonActivityConverter:
         ]
         return any(keyword in func_name.lower() for keyword in system_keywords)
 
-    def _add_decision_point(self, condition: str, actor: str):
-        """Agrega un punto de decisión al flujo"""
-        self.activity_flow.append({
-            'type': 'decision',
-            'actor': actor,
-            'description': condition,
-            'condition': condition
-        })
+    def _add_decision_point(self, builder: ControlFlowBuilder, condition: str):
+        """Agrega un punto de decisión que abarca el resto del bloque actual"""
+        builder.guard(condition)
 
     def _humanize_function_name(self, func_name: str) -> str:
         """Convierte nombres de función a descripciones legibles"""
@@ -296,53 +306,8 @@ class PythonActivityConverter:
             ""
         ])
         
-        # Generar swimlanes
-        current_actor = None
-        pending_else = []
-        
-        for i, flow_item in enumerate(self.activity_flow):
-            # Cambiar de swimlane si es necesario
-            if flow_item['actor'] != current_actor:
-                if current_actor is not None:
-                    plantuml.append("")
-                plantuml.append(f"|{flow_item['actor']}|")
-                current_actor = flow_item['actor']
-            
-            # Generar elementos según el tipo
-            if flow_item['type'] == 'start':
-                plantuml.append("start")
-                plantuml.append(f":{flow_item['description']};")
-            
-            elif flow_item['type'] == 'activity':
-                plantuml.append(f":{flow_item['description']};")
-            
-            elif flow_item['type'] == 'decision':
-                condition = flow_item['condition']
-                plantuml.append(f"if ({condition}?) then (sí)")
-                
-                # Buscar el próximo elemento que no sea de decisión para el flujo "sí"
-                next_item = self._find_next_non_decision(i + 1)
-                if next_item and next_item['actor'] != current_actor:
-                    plantuml.append(f"|{next_item['actor']}|")
-                    current_actor = next_item['actor']
-                
-                # Marcar que necesitamos manejar el "else" más tarde
-                pending_else.append(i)
-            
-            elif flow_item['type'] == 'end':
-                # Cerrar cualquier if pendiente
-                for _ in pending_else:
-                    plantuml.append("endif")
-                pending_else.clear()
-                
-                plantuml.append("stop")
+        # Flujos de las funciones con swimlanes
+        plantuml.extend(iter_activity_plantuml(self.flows))
         
         plantuml.append("@enduml")
         return '\n'.join(plantuml)
-
-    def _find_next_non_decision(self, start_index: int) -> Optional[Dict]:
-        """Encuentra el próximo elemento que no sea una decisión"""
-        for i in range(start_index, len(self.activity_flow)):
-            if self.activity_flow[i]['type'] != 'decision':
-                return self.activity_flow[i]
-        return None
@@ -1,22 +1,28 @@
 # app/application/services/converters/python/class_converter.py
 
 import ast
-from typing import List
+from typing import List, Tuple
 
 class PythonClassConverter:
     def convert(self, code: str) -> str:
         tree = ast.parse(code)
-        class_defs = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+        classes = self._extract_classes(tree)
+        return self._generate_plantuml(classes)
 
+    def _extract_classes(self, tree: ast.Module) -> List[Tuple[str, List[str], List[str], List[str]]]:
+        """Retorna (nombre, bases, atributos, métodos) de cada clase de primer nivel"""
+        classes = []
+        for cls in tree.body:
+            if isinstance(cls, ast.ClassDef):
+                bases = [self._get_base_name(base) for base in cls.bases]
+                classes.append((cls.name, bases, self._extract_attributes(cls), self._extract_methods(cls)))
+        return classes
+
+    def _generate_plantuml(self, classes: List[Tuple[str, List[str], List[str], List[str]]]) -> str:
         plantuml_lines = ["@startuml"]
         inheritance_links = []
 
-        for cls in class_defs:
-            class_name = cls.name
-            bases = [self._get_base_name(base) for base in cls.bases]
-            attributes = self._extract_attributes(cls)
-            methods = self._extract_methods(cls)
-
+        for class_name, bases, attributes, methods in classes:
             plantuml_lines.append(f"class {class_name} {{")
             for attr in attributes:
                 plantuml_lines.append(f"  - {attr}")
@@ -0,0 +1,138 @@
+# app/application/services/converters/python/resilient_parser.py
+"""
+Front end de parseo de Python tolerante a errores.
+
+Cada archivo se parsea por separado con ast. Si un archivo no compila (por
+ejemplo código Python 2), se divide en bloques de nivel superior (una sentencia
+en la columna 0 junto con los comentarios y decoradores que la preceden) y se
+aísla el bloque donde se reporta el error: el tramo anterior y el posterior se
+vuelven a parsear como una unidad, así el costo crece con la cantidad de errores
+y no con la de bloques. Solo los bloques que no compilan ni por sí solos quedan
+para el análisis por regex de cada convertidor.
+"""
+import ast
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from app.application.services.converters.parallel_parser import SourceInput, split_sources
+
+logger = logging.getLogger(__name__)
+
+# Sentencias en la columna 0 que continúan el bloque anterior
+CONTINUATION_KEYWORDS = ('else', 'elif', 'except', 'finally', 'case')
+CLOSING_BRACKETS = (')', ']', '}')
+
+
+@dataclass
+class ParsedPython:
+    """Módulos parseados (uno por archivo) y fragmentos que no compilan"""
+    modules: List[ast.Module] = field(default_factory=list)
+    broken: List[str] = field(default_factory=list)
+
+    def walk(self) -> Iterator[ast.AST]:
+        """Todos los nodos de todos los módulos, como ast.walk"""
+        for module in self.modules:
+            yield from ast.walk(module)
+
+    @property
+    def fallback_code(self) -> str:
+        """Código de los fragmentos rotos, para el análisis por regex"""
+        return "\n".join(self.broken)
+
+
+def _starts_block(stripped: str) -> bool:
+    """True si una línea en la columna 0 inicia una sentencia nueva"""
+    if stripped.startswith(CLOSING_BRACKETS):
+        return False
+    word = stripped.split(None, 1)[0].rstrip(':')
+    return word not in CONTINUATION_KEYWORDS
+
+
+def block_starts(lines: List[str]) -> List[int]:
+    """
+    Índices de las líneas donde empieza cada bloque de nivel superior. Los
+    comentarios y decoradores en la columna 0 se unen a la sentencia que sigue.
+    """
+    starts = [0]
+    pending: Optional[int] = None  # Primera línea de comentarios/decoradores sueltos
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if line[0].isspace():
+            pending = None
+            continue
+        if stripped.startswith(('#', '@')):
+            if pending is None:
+                pending = i
+            continue
+        if _starts_block(stripped):
+            start = i if pending is None else pending
+            if start > starts[-1]:
+                starts.append(start)
+        pending = None
+    return starts
+
+
+def _parse_lines(lines: List[str], first_line: int, last_line: int) -> ast.Module:
+    """Parsea un tramo de líneas conservando los números de línea del archivo"""
+    module = ast.parse("".join(lines[first_line:last_line]))
+    if first_line:
+        ast.increment_lineno(module, first_line)
+    return module
+
+
+def _parse_by_blocks(source: str) -> Tuple[List[ast.stmt], List[str]]:
+    """Parsea un archivo con errores aislando los bloques que no compilan"""
+    lines = source.splitlines(keepends=True)
+    starts = block_starts(lines)
+    body: List[ast.stmt] = []
+    broken: List[str] = []
+
+    def line_of(block: int) -> int:
+        return starts[block] if block < len(starts) else len(lines)
+
+    # Pila de rangos de bloques [primero, último) pendientes, en orden de aparición
+    pending = [(0, len(starts))]
+    while pending:
+        first, last = pending.pop()
+        if first >= last:
+            continue
+        try:
+            body.extend(_parse_lines(lines, line_of(first), line_of(last)).body)
+            continue
+        except (SyntaxError, ValueError) as e:
+            error_line = getattr(e, 'lineno', None)
+        if last - first == 1:
+            broken.append("".join(lines[line_of(first):line_of(last)]))
+            continue
+        # Bloque donde se reporta el error: se aísla y se reintenta el resto
+        failing = first
+        if error_line:
+            failing = min(max(bisect_right(starts, line_of(first) + error_line - 1) - 1, first), last - 1)
+        pending.extend(((failing + 1, last), (failing, failing + 1), (first, failing)))
+    return body, broken
+
+
+def parse_source(source: str) -> Tuple[ast.Module, List[str]]:
+    """Parsea un archivo; retorna el módulo con los bloques válidos y los fragmentos rotos"""
+    try:
+        return ast.parse(source), []
+    except (SyntaxError, ValueError):
+        pass
+    body, broken = _parse_by_blocks(source)
+    return ast.Module(body=body, type_ignores=[]), broken
+
+
+def parse_python(code: SourceInput) -> ParsedPython:
+    """Parsea cada archivo de la entrada; un archivo roto no afecta a los demás"""
+    parsed = ParsedPython()
+    for source in split_sources(code):
+        module, broken = parse_source(source)
+        parsed.modules.append(module)
+        parsed.broken.extend(broken)
+    if parsed.broken:
+        logger.debug(f"{len(parsed.broken)} bloques de Python no compilan, se analizan por regex")
+    return parsed
@@ -0,0 +1,106 @@
+# app/application/services/converters/python/route_scanner.py
+"""
+Escáner de rutas de Python para la tabla de rutas.
+
+Un recorrido del AST de cada archivo junta las funciones y métodos decorados como
+rutas HTTP: @app.get/@router.post (fastapi), @app.route(..., methods=[...])
+(flask) y @get/@post sueltos (decorator), tanto en el módulo como en clases que
+parecen controladores. Los bloques que no compilan se analizan por regex y las
+anotaciones '# @Actor: Actor -> funcion' se leen del texto del archivo.
+"""
+import ast
+import re
+from typing import List, Optional, Tuple
+
+from app.application.services.converters.python.resilient_parser import parse_source
+from app.application.services.converters.route_table import RouteEntry, RouteTable
+
+HTTP_METHODS = ('get', 'post', 'put', 'delete', 'patch')
+# Clases que agrupan rutas
+CONTROLLER_KEYWORDS = ('router', 'controller', 'api', 'view')
+
+ACTOR_PATTERN = re.compile(r'#\s*@Actor:\s*(\w+)\s*->\s*(\w+)')
+FALLBACK_ROUTE_PATTERN = re.compile(
+    r'@(?:app\.|router\.)?(\w+)(?:\(["\']([^"\']*)["\'].*?\))?\s*\n\s*(?:async\s+)?def\s+(\w+)',
+    re.MULTILINE
+)
+
+FunctionNode = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def _literal_string(node: Optional[ast.expr]) -> str:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return ""
+
+
+def route_of(decorator: ast.expr) -> Optional[Tuple[str, str, str]]:
+    """(framework, método HTTP, path) si el decorador declara una ruta"""
+    call = decorator if isinstance(decorator, ast.Call) else None
+    func = call.func if call else decorator
+    if isinstance(func, ast.Name):
+        name, framework = func.id.lower(), 'decorator'
+    elif isinstance(func, ast.Attribute):
+        name, framework = func.attr.lower(), 'fastapi'
+    else:
+        return None
+    path = _literal_string(call.args[0]) if call and call.args else ""
+    if name in HTTP_METHODS:
+        return framework, name.upper(), path
+    if name == 'route' and call:
+        methods = next((keyword.value for keyword in call.keywords if keyword.arg == 'methods'), None)
+        first = methods.elts[0] if isinstance(methods, (ast.List, ast.Tuple)) and methods.elts else None
+        return 'flask', (_literal_string(first) or 'GET').upper(), path
+    return None
+
+
+def _function_routes(function: ast.AST, owner: str) -> List[RouteEntry]:
+    for decorator in function.decorator_list:
+        route = route_of(decorator)
+        if route:
+            framework, http_method, path = route
+            return [RouteEntry(framework, function.name, http_method, path, owner)]
+    return []
+
+
+def _is_controller(class_node: ast.ClassDef) -> bool:
+    return any(keyword in class_node.name.lower() for keyword in CONTROLLER_KEYWORDS)
+
+
+def scan_module(tree: ast.Module) -> List[RouteEntry]:
+    """Rutas de las funciones del módulo y de los métodos de clases controlador"""
+    entries: List[RouteEntry] = []
+    for node in tree.body:
+        if isinstance(node, FunctionNode):
+            entries.extend(_function_routes(node, ''))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef) and _is_controller(node):
+            owner = node.name.replace('Router', '').replace('Controller', '').replace('API', '')
+            for member in node.body:
+                if isinstance(member, FunctionNode):
+                    entries.extend(_function_routes(member, owner))
+    return entries
+
+
+def _scan_fallback(code: str) -> List[RouteEntry]:
+    """Rutas de fragmentos que no compilan"""
+    # Sin comentarios ni docstrings
+    code = re.sub(r'#.*', '', code)
+    code = re.sub(r'""".*?"""', '', code, flags=re.DOTALL)
+    code = re.sub(r"'''.*?'''", '', code, flags=re.DOTALL)
+    entries: List[RouteEntry] = []
+    for match in FALLBACK_ROUTE_PATTERN.finditer(code):
+        decorator_name = match.group(1).lower()
+        if decorator_name in HTTP_METHODS:
+            entries.append(RouteEntry('decorator', match.group(3), decorator_name.upper(), match.group(2) or ""))
+    return entries
+
+
+def scan_routes(source: str) -> RouteTable:
+    """Tabla de rutas de un archivo"""
+    module, broken = parse_source(source)
+    entries = scan_module(module)
+    for fragment in broken:
+        entries.extend(_scan_fallback(fragment))
+    actors = tuple(ACTOR_PATTERN.findall(source)) if '@Actor' in source else ()
+    return RouteTable(tuple(entries), actors=actors)
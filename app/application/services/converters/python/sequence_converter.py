@@ -1,68 +1,128 @@
 # app/application/services/converters/python/sequence_converter.py
 import ast
 import re
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from app.application.services.converters.call_graph import (
+    DEFAULT_MAX_DEPTH, DEFAULT_MAX_ENTRY_POINTS, DEFAULT_MAX_MESSAGES, CallGraph
+)
+from app.application.services.converters.parallel_parser import SourceInput
+from app.application.services.converters.python.resilient_parser import parse_python
+
+# Función sintética que agrupa las llamadas halladas por regex en código que no compila
+FALLBACK_FUNCTION = "fragmentos"
+LOOP_NODES = (ast.For, ast.AsyncFor, ast.While, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+CONTROLLER_KEYWORDS = ('controller', 'router', 'view', 'handler')
 
 class PythonSequenceConverter:
+    """
+    Diagrama de secuencia sobre un grafo de llamadas agregado: las llamadas
+    repetidas se emiten una vez dentro de un fragmento loop y el recorrido parte
+    de los puntos de entrada (entry_points, o las funciones públicas que nadie
+    llama) hasta max_depth niveles.
+    """
+    # Acepta el código de cada archivo por separado (ver parallel_parser.source_input)
+    accepts_source_files = True
+
     def __init__(self):
         self.participants: Set[str] = set()
-        self.interactions: List[Dict] = []
+        self.graph = CallGraph()
         self.current_class = ""
+        self.entry_points: Optional[List[str]] = None
+        self.max_depth = DEFAULT_MAX_DEPTH
+        self.max_messages = DEFAULT_MAX_MESSAGES
 
-    def convert(self, code: str) -> str:
+    def convert(self, code: SourceInput) -> str:
         """Convierte código Python a diagrama UML de secuencia en PlantUML"""
-        try:
-            # Intentar usar AST para análisis preciso
-            tree = ast.parse(code)
-            self._extract_sequence_from_ast(tree)
-        except SyntaxError:
-            # Fallback a análisis por regex si hay errores de sintaxis
-            self._extract_sequence_from_regex(code)
+        self.participants = set()
+        self.graph = CallGraph()
+        # AST por archivo; solo los bloques con errores de sintaxis van por regex
+        parsed = parse_python(code)
+        self._extract_sequence_from_ast(parsed.modules)
+        if parsed.broken:
+            self._extract_sequence_from_regex(parsed.fallback_code)
         
         # Generación UML
         plantuml = self._generate_plantuml()
         return plantuml
 
-    def _extract_sequence_from_ast(self, tree: ast.AST):
-        """Extrae información de secuencia usando AST"""
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                # Analizar métodos que pueden representar interacciones
-                if not node.name.startswith('_'):  # Métodos públicos
-                    self._analyze_function_interactions(node)
-
-    def _analyze_function_interactions(self, func_node: ast.FunctionDef):
-        """Analiza las interacciones dentro de una función"""
-        self.participants.add("Controller")
-        
-        for node in ast.walk(func_node):
+    def _extract_sequence_from_ast(self, trees: List[ast.Module]):
+        """
+        Dos pasadas: primero se registran todas las funciones (para poder resolver
+        a qué función del proyecto va cada llamada) y después sus llamadas.
+        """
+        functions: List[Tuple[str, ast.AST]] = []
+        methods: Dict[Tuple[str, str], List[str]] = {}  # (participante, método) -> funciones
+        for tree in trees:
+            for function, class_name, node in self._iter_functions(tree.body, ""):
+                participant = self._class_participant(class_name)
+                self.graph.add_function(function, participant)
+                methods.setdefault((participant, node.name), []).append(function)
+                functions.append((function, node))
+
+        for function, node in functions:
+            class_name = function.rpartition('.')[0]
+            for call, looped in self._iter_calls(node.body, False):
+                self._add_call(function, class_name, call, looped, methods)
+
+    def _iter_functions(self, body: List[ast.stmt], class_name: str) -> Iterator[Tuple[str, str, ast.AST]]:
+        """(función, clase, nodo) de cada función o método, incluidos los anidados"""
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                yield from self._iter_functions(node.body, node.name)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                yield (f"{class_name}.{node.name}" if class_name else node.name), class_name, node
+                yield from self._iter_functions(node.body, class_name)
+            else:
+                # Definiciones dentro de if/try (p. ej. según la versión de Python)
+                for field in ('body', 'orelse', 'handlers', 'finalbody'):
+                    nested = getattr(node, field, None)
+                    if isinstance(nested, list):
+                        yield from self._iter_functions(nested, class_name)
+
+    def _iter_calls(self, nodes: List[ast.AST], looped: bool) -> Iterator[Tuple[ast.Call, bool]]:
+        """Llamadas en orden de aparición, indicando si están dentro de un bucle"""
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue  # Se analizan como funciones propias
             if isinstance(node, ast.Call):
-                # Analizar llamadas a métodos
-                if isinstance(node.func, ast.Attribute):
-                    if isinstance(node.func.value, ast.Name):
-                        object_name = node.func.value.id
-                        method_name = node.func.attr
-                        
-                        # Determinar el tipo de participante
-                        participant_type = self._determine_participant_type(object_name, method_name)
-                        
-                        self.participants.add(participant_type)
-                        
-                        # Agregar interacción
-                        self.interactions.append({
-                            'from': 'Controller',
-                            'to': participant_type,
-                            'message': method_name,
-                            'type': 'sync'
-                        })
-                        
-                        # Agregar respuesta implícita
-                        self.interactions.append({
-                            'from': participant_type,
-                            'to': 'Controller',
-                            'message': 'resultado',
-                            'type': 'return'
-                        })
+                yield node, looped
+            yield from self._iter_calls(list(ast.iter_child_nodes(node)), looped or isinstance(node, LOOP_NODES))
+
+    def _add_call(self, function: str, class_name: str, call: ast.Call, looped: bool,
+                  methods: Dict[Tuple[str, str], List[str]]):
+        """Registra la llamada si es a un método de un objeto, a self o a una función del proyecto"""
+        func = call.func
+        if isinstance(func, ast.Name):
+            # Función del proyecto: solo si está definida (las built-in se ignoran)
+            if func.id in self.graph.participants:
+                self.graph.add_call(function, "Controller", func.id, looped=looped, callee=func.id)
+            return
+        if not isinstance(func, ast.Attribute) or func.attr.startswith('__'):
+            return
+        method_name = func.attr
+        value = func.value
+        if isinstance(value, ast.Name) and value.id in ('self', 'cls') and class_name:
+            participant = self._class_participant(class_name)
+            callee = f"{class_name}.{method_name}"
+            self.graph.add_call(function, participant, method_name, looped=looped,
+                                callee=callee if callee in self.graph.participants else None)
+            return
+        if isinstance(value, ast.Attribute) and isinstance(value.value, ast.Name) and value.value.id == 'self':
+            object_name = value.attr  # self.repo.save()
+        elif isinstance(value, ast.Name):
+            object_name = value.id
+        else:
+            return
+        participant = self._determine_participant_type(object_name, method_name)
+        candidates = methods.get((participant, method_name), [])
+        self.graph.add_call(function, participant, method_name, looped=looped,
+                            callee=candidates[0] if len(candidates) == 1 else None)
+
+    def _class_participant(self, class_name: str) -> str:
+        """Participante de las funciones de una clase; las de módulo son el Controller"""
+        if not class_name or any(keyword in class_name.lower() for keyword in CONTROLLER_KEYWORDS):
+            return "Controller"
+        return self._determine_participant_type(class_name, '')
 
     def _extract_sequence_from_regex(self, code: str):
         """Extrae información de secuencia usando regex como fallback"""
@@ -75,7 +135,7 @@ class PythonSequenceConverter:
             re.MULTILINE
         )
         
-        self.participants.add("Controller")
+        self.graph.add_function(FALLBACK_FUNCTION, "Controller")
         
         for match in method_call_pattern.finditer(code):
             object_name = match.group(1)
@@ -87,16 +147,7 @@ class PythonSequenceConverter:
             
             # Determinar el tipo de participante
             participant_type = self._determine_participant_type(object_name, method_name)
-            
-            self.participants.add(participant_type)
-            
-            # Agregar interacción
-            self.interactions.append({
-                'from': 'Controller',
-                'to': participant_type,
-                'message': method_name,
-                'type': 'sync'
-            })
+            self.graph.add_call(FALLBACK_FUNCTION, participant_type, method_name)
 
     def _normalize_code(self, code: str) -> str:
         """Limpia el código removiendo comentarios y strings"""
@@ -133,8 +184,34 @@ class PythonSequenceConverter:
         else:
             return f"{object_name.capitalize()}Service"
 
+    def _entry_points(self) -> List[str]:
+        """Puntos de entrada elegidos o, por defecto, las primeras funciones públicas que nadie llama"""
+        if self.entry_points:
+            return self.graph.select_entry_points(self.entry_points)
+        public = [function for function in self.graph.default_entry_points()
+                  if not function.rpartition('.')[2].startswith('_')]
+        return public[:DEFAULT_MAX_ENTRY_POINTS]
+
+    def _iter_interactions(self) -> Iterator[str]:
+        """Interacciones del recorrido del grafo de llamadas, registrando los participantes"""
+        steps = self.graph.iter_sequence(self._entry_points(), self.max_depth, self.max_messages)
+        for step in steps:
+            edge = step.edge
+            if step.kind == 'entry':
+                yield f"== {step.function} =="
+            elif step.kind == 'call':
+                self.participants.update((edge.source, edge.target))
+                yield f"{edge.source} -> {edge.target} : {edge.label}"
+            elif step.kind == 'return':
+                yield f"{edge.target} --> {edge.source} : resultado"
+            elif step.kind == 'loop':
+                yield f"loop {step.label}"
+            else:
+                yield "end"
+
     def _generate_plantuml(self) -> str:
         """Genera el código PlantUML para el diagrama de secuencia"""
+        interactions = list(self._iter_interactions())
         plantuml = ["@startuml"]
         
         # Configuración
@@ -156,8 +233,8 @@ class PythonSequenceConverter:
         
         plantuml.append("")
         
-        # Si no hay interacciones, crear un ejemplo básico
-        if not self.interactions:
+        # Si no hay interacciones, crear un ejemplo básico (salvo que se pidieran puntos de entrada)
+        if not interactions and not self.entry_points:
             plantuml.extend([
                 "Usuario -> Controller : solicitud",
                 "Controller -> Service : procesar",
@@ -168,9 +245,7 @@ class PythonSequenceConverter:
             ])
         else:
             # Interacciones extraídas
-            for interaction in self.interactions:
-                arrow = "-->" if interaction['type'] == 'return' else "->"
-                plantuml.append(f"{interaction['from']} {arrow} {interaction['to']} : {interaction['message']}")
+            plantuml.extend(interactions)
         
         plantuml.append("@enduml")
         return '\n'.join(plantuml)
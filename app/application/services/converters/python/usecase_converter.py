@@ -1,24 +1,25 @@
 # app/application/services/converters/python/usecase_converter.py
-import ast
 import re
 from typing import Dict, List, Set
+from app.application.services.converters.parallel_parser import SourceInput, split_sources
+from app.application.services.converters.python.route_scanner import scan_routes
+from app.application.services.converters.route_table import RouteIndex, build_route_index
 
 class PythonUseCaseConverter:
+    # Acepta el código de cada archivo por separado (ver parallel_parser.source_input)
+    accepts_source_files = True
+
     def __init__(self):
         self.actors: Set[str] = set()
         self.use_cases: List[Dict] = []
         self.relationships: List[Dict] = []
         self.current_class = ""
 
-    def convert(self, code: str) -> str:
+    def convert(self, code: SourceInput) -> str:
         """Convierte código Python de APIs a diagrama UML de casos de uso en PlantUML"""
-        try:
-            # Intentar usar AST para análisis preciso
-            tree = ast.parse(code)
-            self._extract_from_ast(tree)
-        except SyntaxError:
-            # Fallback a análisis por regex
-            self._extract_from_regex(code)
+        # Tabla de rutas por archivo (AST; regex solo en bloques con errores de sintaxis)
+        index = build_route_index(scan_routes, split_sources(code))
+        self._extract_use_cases(index)
         
         # Analizar relaciones
         self._analyze_actor_relationships()
@@ -27,128 +28,25 @@ class PythonUseCaseConverter:
         plantuml = self._generate_plantuml()
         return plantuml
 
-    def _extract_from_ast(self, tree: ast.AST):
-        """Extrae casos de uso usando AST"""
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                # Buscar clases que parezcan controladores/routers
-                if any(keyword in node.name.lower() for keyword in ['router', 'controller', 'api', 'view']):
-                    self.current_class = node.name.replace('Router', '').replace('Controller', '').replace('API', '')
-                    self._analyze_class_methods(node)
-
-    def _analyze_class_methods(self, class_node: ast.ClassDef):
-        """Analiza métodos de una clase para extraer casos de uso"""
-        for node in class_node.body:
-            if isinstance(node, ast.FunctionDef):
-                # Analizar decoradores para encontrar rutas HTTP
-                http_method, path = self._extract_route_info(node)
-                
-                if http_method:
-                    # Generar caso de uso
-                    use_case_name = self._generate_use_case_name(http_method, node.name, path)
-                    actor = self._determine_default_actor(http_method, node.name)
-                    
-                    self.use_cases.append({
-                        'name': use_case_name,
-                        'method_name': node.name,
-                        'http_method': http_method,
-                        'path': path,
-                        'class': self.current_class,
-                        'actor': actor
-                    })
-
-    def _extract_route_info(self, func_node: ast.FunctionDef) -> tuple:
-        """Extrae información de rutas desde decoradores"""
-        for decorator in func_node.decorator_list:
-            if isinstance(decorator, ast.Name):
-                # Decoradores simples como @get, @post
-                decorator_name = decorator.id.lower()
-                if decorator_name in ['get', 'post', 'put', 'delete', 'patch']:
-                    return decorator_name.upper(), ""
-            
-            elif isinstance(decorator, ast.Call):
-                if isinstance(decorator.func, ast.Name):
-                    # Decoradores con argumentos como @app.get("/path")
-                    decorator_name = decorator.func.id.lower()
-                    if decorator_name in ['get', 'post', 'put', 'delete', 'patch']:
-                        path = self._extract_path_from_args(decorator.args)
-                        return decorator_name.upper(), path
-                
-                elif isinstance(decorator.func, ast.Attribute):
-                    # Decoradores como @app.get(), @router.post()
-                    method_name = decorator.func.attr.lower()
-                    if method_name in ['get', 'post', 'put', 'delete', 'patch']:
-                        path = self._extract_path_from_args(decorator.args)
-                        return method_name.upper(), path
-        
-        return None, None
-
-    def _extract_path_from_args(self, args: List[ast.expr]) -> str:
-        """Extrae el path desde los argumentos del decorador"""
-        if args and isinstance(args[0], ast.Str):
-            return args[0].s
-        elif args and isinstance(args[0], ast.Constant) and isinstance(args[0].value, str):
-            return args[0].value
-        return ""
-
-    def _extract_from_regex(self, code: str):
-        """Extrae casos de uso usando regex como fallback"""
-        code = self._normalize_code(code)
-        
-        # Buscar decoradores de rutas
-        route_pattern = re.compile(
-            r'@(?:app\.|router\.)?(\w+)(?:\(["\']([^"\']*)["\'].*?\))?\s*\n\s*def\s+(\w+)',
-            re.MULTILINE
-        )
-        
-        for match in route_pattern.finditer(code):
-            decorator_name = match.group(1).lower()
-            path = match.group(2) or ""
-            method_name = match.group(3)
-            
-            if decorator_name in ['get', 'post', 'put', 'delete', 'patch']:
-                http_method = decorator_name.upper()
-                use_case_name = self._generate_use_case_name(http_method, method_name, path)
-                actor = self._determine_default_actor(http_method, method_name)
+    def _extract_use_cases(self, index: RouteIndex):
+        """Genera los casos de uso de las rutas de todos los frameworks"""
+        for entries in index.frameworks.values():
+            for entry in entries:
+                if entry.owner:
+                    self.current_class = entry.owner
+                use_case_name = self._generate_use_case_name(entry.http_method, entry.name, entry.path)
+                # Las anotaciones @Actor tienen prioridad sobre el actor por defecto
+                actor = index.actors.get(entry.name) or self._determine_default_actor(entry.http_method, entry.name)
                 
                 self.use_cases.append({
                     'name': use_case_name,
-                    'method_name': method_name,
-                    'http_method': http_method,
-                    'path': path,
-                    'class': 'API',
+                    'method_name': entry.name,
+                    'http_method': entry.http_method,
+                    'path': entry.path,
+                    'class': entry.owner or 'API',
                     'actor': actor
                 })
 
-        # Buscar comentarios @Actor
-        self._extract_actor_comments(code)
-
-    def _extract_actor_comments(self, code: str):
-        """Extrae comentarios especiales @Actor"""
-        actor_pattern = re.compile(
-            r'#\s*@Actor:\s*(\w+)\s*->\s*(\w+)',
-            re.MULTILINE
-        )
-        
-        for match in actor_pattern.finditer(code):
-            actor_name = match.group(1)
-            method_name = match.group(2)
-            
-            # Actualizar el actor para el caso de uso correspondiente
-            for use_case in self.use_cases:
-                if use_case['method_name'] == method_name:
-                    use_case['actor'] = actor_name
-                    break
-
-    def _normalize_code(self, code: str) -> str:
-        """Normaliza el código para análisis"""
-        # Remove comments except @Actor
-        code = re.sub(r'#(?!\s*@Actor).*', '', code)
-        # Remove docstrings
-        code = re.sub(r'""".*?"""', '', code, flags=re.DOTALL)
-        code = re.sub(r"'''.*?'''", '', code, flags=re.DOTALL)
-        return code
-
     def _generate_use_case_name(self, http_method: str, method_name: str, path: str) -> str:
         """Genera nombres descriptivos para casos de uso"""
         # Mapeo de verbos HTTP a acciones
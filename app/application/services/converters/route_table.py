@@ -0,0 +1,120 @@
+# app/application/services/converters/route_table.py
+"""
+Tabla de rutas para los diagramas de casos de uso.
+
+El escáner de cada lenguaje recorre un archivo una sola vez y junta todas las
+declaraciones de rutas, controladores y handlers en una RouteTable. Las tablas se
+cachean por el hash del contenido de cada archivo, así volver a generar el
+diagrama de una API grande solo escanea los archivos que cambiaron. RouteIndex
+fusiona las tablas de todos los archivos agrupando las entradas por framework,
+y los convertidores construyen el diagrama desde ese índice.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from app.application.services.converters.parallel_parser import parse_files
+from app.core import metrics
+
+MAX_CACHED_ROUTE_TABLES = 4096
+
+
+@dataclass(frozen=True)
+class RouteEntry:
+    """Declaración encontrada en un archivo (ruta, handler, método de controlador...)"""
+    framework: str  # express, nextjs, fastapi, flask, controller, service, graphql, socketio...
+    name: str  # Función, método, resolver o evento
+    http_method: str = ''
+    path: str = ''
+    owner: str = ''  # Clase que contiene la declaración
+
+
+@dataclass(frozen=True)
+class RouteTable:
+    """Resultado del escaneo de un archivo"""
+    entries: Tuple[RouteEntry, ...] = ()
+    calls: Tuple[str, ...] = ()  # Métodos de servicios invocados
+    actors: Tuple[Tuple[str, str], ...] = ()  # Anotaciones (actor, función)
+    auth: bool = False  # Usa autenticación
+    validation: bool = False  # Valida datos de entrada
+
+
+@dataclass
+class RouteIndex:
+    """Tablas de todos los archivos fusionadas en orden de aparición"""
+    frameworks: Dict[str, List[RouteEntry]] = field(default_factory=dict)
+    calls: List[str] = field(default_factory=list)
+    actors: Dict[str, str] = field(default_factory=dict)  # función -> actor
+    auth: bool = False
+    validation: bool = False
+
+    @classmethod
+    def from_tables(cls, tables: Iterable[RouteTable]) -> 'RouteIndex':
+        index = cls()
+        calls = set()
+        for table in tables:
+            for entry in table.entries:
+                index.frameworks.setdefault(entry.framework, []).append(entry)
+            for call in table.calls:
+                if call not in calls:
+                    calls.add(call)
+                    index.calls.append(call)
+            for actor, function in table.actors:
+                index.actors.setdefault(function, actor)
+            index.auth = index.auth or table.auth
+            index.validation = index.validation or table.validation
+        return index
+
+    def entries(self, *frameworks: str) -> List[RouteEntry]:
+        """Entradas de los frameworks indicados, en ese orden"""
+        return [entry for framework in frameworks for entry in self.frameworks.get(framework, ())]
+
+
+_cache: 'OrderedDict[Tuple[str, str], RouteTable]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def clear_cache() -> None:
+    """Vacía la caché de tablas de rutas (benchmarks y pruebas en frío)"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cache_key(scanner: Callable[[str], RouteTable], source: str) -> Tuple[str, str]:
+    digest = hashlib.sha256(source.encode('utf-8', 'surrogatepass')).hexdigest()
+    return f"{scanner.__module__}.{scanner.__qualname__}", digest
+
+
+def scan_route_tables(scanner: Callable[[str], RouteTable], sources: Sequence[str]) -> List[RouteTable]:
+    """
+    Tabla de cada archivo, en el mismo orden. Solo se escanean (en paralelo si son
+    muchos) los archivos cuyo contenido no está en la caché. scanner debe ser una
+    función de nivel de módulo.
+    """
+    keys = [_cache_key(scanner, source) for source in sources]
+    tables: List[RouteTable] = [None] * len(sources)
+    missing: List[int] = []
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            table = _cache.get(key)
+            if table is None:
+                missing.append(i)
+            else:
+                _cache.move_to_end(key)
+                tables[i] = table
+
+    scanned = parse_files(scanner, [sources[i] for i in missing])
+    with _cache_lock:
+        for i, table in zip(missing, scanned):
+            tables[i] = table
+            _cache[keys[i]] = table
+        while len(_cache) > MAX_CACHED_ROUTE_TABLES:
+            _cache.popitem(last=False)
+    return tables
+
+
+@metrics.timed("extract", step="routes")
+def build_route_index(scanner: Callable[[str], RouteTable], sources: Sequence[str]) -> RouteIndex:
+    return RouteIndex.from_tables(scan_route_tables(scanner, sources))
@@ -0,0 +1,149 @@
+# app/application/services/converters/symbol_table.py
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class SymbolTable:
+    """
+    Tabla de símbolos a nivel de proyecto.
+    Indexa cada tipo declarado por su nombre completamente calificado (FQN) y cada
+    módulo/namespace por su ruta, de modo que resolver un tipo o un import se
+    reduce a unas pocas búsquedas en diccionarios en lugar de recorrer todas las clases.
+    Cada conversión construye la suya; los convertidores de clases aceptan una ya
+    construida en el constructor para compartirla.
+    """
+
+    _GENERIC_PATTERN = re.compile(r'<.*>')
+    _ARRAY_PATTERN = re.compile(r'\[\]')
+
+    def __init__(self):
+        self.types: Dict[str, Dict] = {}
+        self.modules: Dict[str, str] = {}
+        self._by_simple_name: Dict[str, List[str]] = defaultdict(list)
+        self._namespaces: Set[str] = set()
+
+    def declare_type(self, fqn: str, **info) -> None:
+        """Registra un tipo declarado con su nombre completamente calificado"""
+        if fqn in self.types:
+            self.types[fqn].update(info)
+            return
+        self.types[fqn] = info
+        namespace, _, simple_name = fqn.rpartition('.')
+        self._by_simple_name[simple_name].append(fqn)
+        while namespace:
+            self._namespaces.add(namespace)
+            namespace = namespace.rpartition('.')[0]
+
+    def declare_module(self, module_path: str, package: str) -> None:
+        """Registra un módulo (o namespace) y el paquete que lo contiene"""
+        module_path = self._normalize_module(module_path)
+        if module_path and module_path not in self.modules:
+            self.modules[module_path] = package
+
+    def __contains__(self, fqn: str) -> bool:
+        return fqn in self.types
+
+    def lookup(self, fqn: str) -> Optional[Dict]:
+        return self.types.get(fqn)
+
+    def is_namespace(self, name: str) -> bool:
+        return name in self._namespaces
+
+    def resolve_type(self, type_name: str, namespace: str = "", imports: Iterable[str] = ()) -> Optional[str]:
+        """
+        Resuelve un nombre de tipo tal como aparece en el código a su FQN.
+        Orden de búsqueda: nombre calificado, namespace actual y sus padres,
+        imports/usings y, por último, nombre simple si es único en el proyecto.
+        """
+        name = self.clean_type_name(type_name)
+        if not name:
+            return None
+
+        if name in self.types:
+            return name
+
+        scope = namespace.strip('.')
+        while scope:
+            candidate = f"{scope}.{name}"
+            if candidate in self.types:
+                return candidate
+            scope = scope.rpartition('.')[0]
+
+        simple_name = name.rpartition('.')[2]
+        for imported in imports:
+            # import de tipo concreto (Java: import a.b.Tipo; C#: using Alias = a.b.Tipo)
+            if imported.rpartition('.')[2] == simple_name and imported in self.types:
+                return imported
+            # import de namespace/paquete completo
+            candidate = f"{imported}.{name}"
+            if candidate in self.types:
+                return candidate
+
+        candidates = self._by_simple_name.get(simple_name)
+        if candidates and len(candidates) == 1:
+            return candidates[0]
+        return None
+
+    def resolve_module(self, import_path: str, importer: str = "") -> Optional[str]:
+        """
+        Resuelve un import al paquete interno que lo declara usando el prefijo
+        registrado más largo. Los imports relativos ('./x', '../x', '.x', '..x') se
+        resuelven contra importer, el módulo del archivo que importa. Retorna None
+        si el import es externo al proyecto.
+        """
+        module_path = self.absolute_module(import_path, importer)
+        while module_path:
+            package = self.modules.get(module_path)
+            if package is not None:
+                return package
+            module_path = module_path.rpartition('.')[0]
+        return None
+
+    @classmethod
+    def clean_type_name(cls, type_name: str) -> str:
+        """Elimina parámetros genéricos, arreglos y marcadores nullable"""
+        type_name = cls._GENERIC_PATTERN.sub('', type_name)
+        type_name = cls._ARRAY_PATTERN.sub('', type_name)
+        return type_name.replace('?', '').strip()
+
+    @classmethod
+    def absolute_module(cls, import_path: str, importer: str = "") -> str:
+        """
+        Ruta absoluta del módulo importado. Un import relativo sin importer, o que
+        sube más allá de la raíz del proyecto, no se resuelve y retorna ''.
+        """
+        path = import_path.strip().strip('"\'').replace('\\', '/')
+        if not path.startswith('.'):
+            return cls._normalize_module(path)
+        if not importer:
+            return ""
+
+        # Paquete del archivo que importa
+        parts = cls._normalize_module(importer).split('.')[:-1]
+        if path in ('.', '..') or path.startswith(('./', '../')):
+            # JavaScript, PHP, C/C++: segmentos de ruta relativos al directorio del archivo
+            for segment in path.split('/'):
+                if segment == '..':
+                    if not parts:
+                        return ""
+                    parts.pop()
+                elif segment and segment != '.':
+                    parts.append(segment)
+        else:
+            # Python: el primer punto es el paquete actual y cada punto extra sube un nivel
+            name = path.lstrip('.')
+            levels = len(path) - len(name) - 1
+            if levels > len(parts):
+                return ""
+            parts = parts[:len(parts) - levels]
+            if name:
+                parts.append(name)
+        return cls._normalize_module('/'.join(parts))
+
+    @staticmethod
+    def _normalize_module(module_path: str) -> str:
+        module_path = module_path.strip().strip('"\'').replace('\\', '/')
+        if module_path.endswith('.*'):
+            module_path = module_path[:-2]
+        return module_path.replace('/', '.').strip('.')
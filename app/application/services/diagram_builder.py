@@ -1,10 +1,12 @@
 # app/application/services/diagram_builder.py
 from typing import Dict, List
+from app.core.profiler import profiled
 
 class DiagramBuilder:
     def __init__(self, factory):
         self.factory = factory
     
+    @profiled("DiagramBuilder.build_diagrams")
     def build_diagrams(self, code: str, language: str, diagram_types: List[str]) -> Dict[str, str]:
         results = {}
         for diagram_type in diagram_types:
@@ -0,0 +1,151 @@
+# app/application/services/language_dispatcher.py
+"""
+Despacho por lenguaje para los diagramas automáticos de proyectos políglotas.
+
+Cada archivo va al front end de su lenguaje según la extensión, así ningún
+convertidor analiza código de otro lenguaje. Solo cuentan los lenguajes con
+código propio suficiente (sin node_modules, vendor y similares, y con los mismos
+umbrales de archivos y participación que la detección del lenguaje principal).
+El resultado es el diagrama del lenguaje principal más uno por lenguaje; los
+lenguajes cuyo diagrama queda vacío se omiten.
+"""
+import functools
+import logging
+import os
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from app.application.services.diagram_factory import CONVERTER_REGISTRY, DiagramFactory
+
+logger = logging.getLogger(__name__)
+
+# Extensión -> front end (TypeScript comparte los convertidores de JavaScript)
+EXTENSION_TO_FRONTEND = {
+    '.cs': 'csharp',
+    '.java': 'java',
+    '.php': 'php',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.mjs': 'javascript',
+    '.ts': 'javascript',
+    '.tsx': 'javascript',
+    '.py': 'python',
+}
+
+# Directorios de código de terceros que no cuentan como lenguaje del proyecto
+VENDOR_DIRECTORIES = frozenset((
+    'node_modules', 'bower_components', 'jspm_packages', 'vendor', 'third_party', 'thirdparty',
+    'site-packages', '.venv', 'venv', 'dist', 'build',
+))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Resultado de un lenguaje: (valor, None) o (None, error)
+Outcome = Tuple[Optional[R], Optional[Exception]]
+
+
+def language_of(path: str) -> Optional[str]:
+    """Front end que analiza el archivo; None si ningún convertidor lo soporta"""
+    return EXTENSION_TO_FRONTEND.get(os.path.splitext(path)[1].lower())
+
+
+def is_vendored(path: str) -> bool:
+    """True si el archivo está dentro de un directorio de dependencias de terceros"""
+    return any(part.lower() in VENDOR_DIRECTORIES for part in path.replace('\\', '/').split('/')[:-1])
+
+
+def is_language_specific(diagram_type: str) -> bool:
+    """False para los diagramas genéricos (componentes, paquetes), que no se despachan por lenguaje"""
+    return ('any', diagram_type.lower()) not in CONVERTER_REGISTRY
+
+
+def group_by_language(items: Iterable[T], path_of: Callable[[T], str],
+                      weight_of: Callable[[T], int] = lambda item: 1,
+                      min_files: int = 1, min_share: float = 0.0) -> Dict[str, List[T]]:
+    """
+    Agrupa los elementos por lenguaje, del de mayor peso al de menor, sin el código
+    de terceros. Se descartan los lenguajes con menos de min_files archivos o con
+    menos de min_share del peso total, así un archivo suelto no agrega un lenguaje.
+    """
+    groups: Dict[str, List[T]] = {}
+    weights: Dict[str, int] = {}
+    for item in items:
+        path = path_of(item)
+        language = language_of(path)
+        if language and not is_vendored(path):
+            groups.setdefault(language, []).append(item)
+            weights[language] = weights.get(language, 0) + weight_of(item)
+
+    total = sum(weights.values())
+    significant = [
+        language for language in groups
+        if len(groups[language]) >= min_files and weights[language] >= total * min_share
+    ]
+    significant.sort(key=lambda language: -weights[language])
+    return {language: groups[language] for language in significant}
+
+
+def create_language_converters(languages: Iterable[str], diagram_type: str) -> Dict[str, object]:
+    """Un convertidor por lenguaje; los lenguajes sin convertidor para el tipo se omiten"""
+    converters = {}
+    for language in languages:
+        try:
+            converters[language] = DiagramFactory.create_converter(language, diagram_type)
+        except ValueError as e:
+            logger.warning(f"Sin convertidor {diagram_type} para {language}, se omiten sus archivos: {e}")
+    return converters
+
+
+def attempt_language(language: str, job: Callable[[], R]) -> Outcome:
+    """Ejecuta el trabajo de un lenguaje registrando su error en lugar de propagarlo"""
+    try:
+        return job(), None
+    except Exception as e:
+        logger.warning(f"Fallo al generar el diagrama de {language}: {e}")
+        return None, e
+
+
+def collect_language_results(outcomes: Dict[str, Outcome]) -> Dict[str, R]:
+    """
+    Resultados de los lenguajes que terminaron bien, en el orden de outcomes.
+    Si fallaron todos se propaga el primer error.
+    """
+    results = {language: result for language, (result, error) in outcomes.items() if error is None}
+    errors = [error for _, error in outcomes.values() if error is not None]
+    if errors and not results:
+        raise errors[0]
+    return results
+
+
+def run_by_language(jobs: Dict[str, Callable[[], R]],
+                    submit: Optional[Callable[..., Future]] = None) -> Dict[str, R]:
+    """
+    Ejecuta el trabajo de cada lenguaje y retorna los resultados en el orden de
+    jobs. Con submit (el de un pool compartido) los lenguajes corren en paralelo;
+    sin él, uno tras otro. Un lenguaje que falla se registra y se omite.
+    """
+    if submit is None or len(jobs) <= 1:
+        outcomes = {language: attempt_language(language, job) for language, job in jobs.items()}
+    else:
+        futures = {language: submit(attempt_language, language, job) for language, job in jobs.items()}
+        outcomes = {language: future.result() for language, future in futures.items()}
+    return collect_language_results(outcomes)
+
+
+@functools.lru_cache(maxsize=None)
+def empty_diagram(language: str, diagram_type: str) -> Optional[str]:
+    """PlantUML que genera el convertidor sin código, para reconocer los diagramas vacíos"""
+    try:
+        converter = DiagramFactory.create_converter(language, diagram_type)
+        return converter.convert([] if getattr(converter, 'accepts_source_files', False) else "")
+    except Exception:
+        return None
+
+
+def is_empty_diagram(language: str, diagram_type: str, diagram: str,
+                     partitions: Optional[Dict[str, str]] = None) -> bool:
+    """True si el diagrama no tiene elementos (o si el particionado no produjo particiones además del índice)"""
+    if partitions is not None:
+        return len(partitions) <= 1
+    return diagram.strip() == (empty_diagram(language, diagram_type) or "").strip()
@@ -0,0 +1,139 @@
+# app/core/loop_monitor.py
+"""
+Detector de bloqueos del event loop.
+
+Una tarea de latido duerme a intervalos fijos y mide cuánto se retrasa al despertar
+(lag del event loop). Un hilo vigilante comprueba que el latido avance; si se detiene
+más del umbral, toma una muestra de la pila del hilo del loop con sys._current_frames
+para identificar el handler que lo está bloqueando. Al terminar el bloqueo se registra
+en el log con esa muestra y se exporta en los histogramas de app/core/metrics.
+
+Se activa con LOOP_MONITOR_ENABLED=1. Umbral: LOOP_BLOCK_THRESHOLD_MS (100 por defecto).
+Con LOOP_MONITOR_DEBUG=1 además se activa el modo debug de asyncio, que registra cada
+callback más lento que el umbral.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from app.core import metrics
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "").lower() in ("1", "true", "yes")
+LOOP_MONITOR_DEBUG = os.getenv("LOOP_MONITOR_DEBUG", "").lower() in ("1", "true", "yes")
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000
+LOOP_HEARTBEAT_INTERVAL = 0.05
+
+LAG_METRIC = "uml_event_loop_lag_seconds"
+BLOCK_METRIC = "uml_event_loop_block_seconds"
+MAX_STACK_FRAMES = 30
+
+logger = logging.getLogger(__name__)
+
+metrics.registry.describe(LAG_METRIC, "Retraso del latido del event loop")
+metrics.registry.describe(BLOCK_METRIC, "Duración de los bloqueos del event loop por handler")
+
+
+def handler_from_frame(frame) -> str:
+    """El frame más externo del código de la aplicación (excluyendo main y core) es el handler"""
+    handler = "unknown"
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and module != "app.main" and not module.startswith("app.core."):
+            handler = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return handler
+
+
+class LoopMonitor:
+    def __init__(self, threshold: float = LOOP_BLOCK_THRESHOLD, interval: float = LOOP_HEARTBEAT_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Muestra tomada por el vigilante durante el bloqueo en curso: latido -> (handler, pila, peticiones)
+        self._sample: Optional[tuple] = None
+        self._inflight: Dict[int, str] = {}
+        self.blocks = 0
+
+    def start(self) -> None:
+        """Arranca el latido en el loop actual y el hilo vigilante"""
+        loop = asyncio.get_running_loop()
+        if LOOP_MONITOR_DEBUG:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def request_started(self, request_id: int, name: str) -> None:
+        with self._lock:
+            self._inflight[request_id] = name
+
+    def request_finished(self, request_id: int) -> None:
+        with self._lock:
+            self._inflight.pop(request_id, None)
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            beat = time.monotonic()
+            with self._lock:
+                self._last_beat = beat
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            if metrics.METRICS_ENABLED:
+                metrics.registry.observe(LAG_METRIC, lag)
+            if lag >= self.threshold:
+                self._report_block(beat, lag)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                beat = self._last_beat
+                already_sampled = self._sample is not None and self._sample[0] == beat
+            if already_sampled or time.monotonic() - beat - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame, limit=MAX_STACK_FRAMES) if frame is not None else []
+            handler = handler_from_frame(frame)
+            del frame
+            with self._lock:
+                self._sample = (beat, handler, stack, sorted(self._inflight.values()))
+
+    def _report_block(self, beat: float, lag: float) -> None:
+        with self._lock:
+            sample = self._sample if self._sample and self._sample[0] == beat else None
+            self._sample = None
+            inflight = sorted(self._inflight.values())
+        handler, stack = "unknown", []
+        if sample:
+            _, handler, stack, inflight = sample
+        self.blocks += 1
+        if metrics.METRICS_ENABLED:
+            metrics.registry.observe(BLOCK_METRIC, lag, handler=handler)
+        logger.warning(
+            f"Event loop bloqueado {lag * 1000:.0f} ms por {handler} "
+            f"(peticiones en curso: {', '.join(inflight) or 'ninguna'})\n{''.join(stack)}"
+        )
+
+
+monitor = LoopMonitor()
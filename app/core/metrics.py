@@ -0,0 +1,319 @@
+# app/core/metrics.py
+"""
+Instrumentación ligera del pipeline de diagramas: contadores e histogramas de
+tiempo por etapa, exportados en formato de texto de Prometheus y, opcionalmente,
+como cabecera Server-Timing de cada respuesta.
+
+Se activa con METRICS_ENABLED=1 (y METRICS_SERVER_TIMING=1 para la cabecera).
+Desactivada, cada punto instrumentado cuesta una comprobación de un booleano.
+"""
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = METRICS_ENABLED and os.getenv("METRICS_SERVER_TIMING", "").lower() in ("1", "true", "yes")
+
+# Límites de los buckets de los histogramas (segundos)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_METRIC = "uml_stage_seconds"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Tiempos por etapa de la petición en curso (para Server-Timing)
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+# Marca de fin de los generadores instrumentados
+_EXHAUSTED = object()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """Registro de métricas en memoria, seguro entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def render(self) -> str:
+        """Exporta todas las series en formato de texto de Prometheus"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in key)
+    return "{" + ",".join(escaped) + "}"
+
+
+registry = MetricsRegistry()
+registry.describe(STAGE_METRIC, "Duración de cada etapa del pipeline de diagramas")
+registry.describe("uml_files_read_total", "Archivos de código leídos")
+registry.describe("uml_bytes_read_total", "Bytes de código leídos")
+registry.describe("uml_db_queries_total", "Consultas ejecutadas contra la base de datos")
+registry.describe("uml_files_analyzed_total", "Archivos medidos por el motor de estadísticas")
+registry.describe("uml_http_request_seconds", "Duración de las peticiones HTTP")
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    if METRICS_ENABLED:
+        registry.inc(name, value, **labels)
+
+
+def record_stage(stage: str, seconds: float, **labels) -> None:
+    """Registra la duración de una etapa y la acumula para Server-Timing"""
+    registry.observe(STAGE_METRIC, seconds, stage=stage, **labels)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+@contextmanager
+def _stage_timer(stage: str, labels: Dict[str, str]):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, **labels)
+
+
+def timer(stage: str, **labels):
+    """Context manager que mide una etapa (no-op si las métricas están desactivadas)"""
+    if not METRICS_ENABLED:
+        return _NOOP_TIMER
+    return _stage_timer(stage, labels)
+
+
+def timed(stage: str, **labels):
+    """Decorador que mide cada llamada a la función como una etapa"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED:
+                return func(*args, **kwargs)
+            with _stage_timer(stage, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Fases de los convertidores: nombre del método -> etapa. Incluye los generadores
+# de la emisión en streaming (iter_convert) y los constructores del modelo.
+CONVERTER_PHASES = {
+    "_normalize_code": "normalize",
+    "_clean_code": "normalize",
+    "_build_model": "extract",
+    "_generate_plantuml": "emit",
+    "_generate_plantuml_tree": "emit",
+    "_generate_participants": "emit",
+    "_generate_sequence": "emit",
+    "_iter_plantuml": "emit",
+    "_iter_plantuml_tree": "emit",
+    "_iter_interactions": "emit",
+}
+
+# Prefijos de los métodos de extracción (_extract_*, y _analyze_* de los grafos de llamadas)
+EXTRACT_PREFIXES = ("_extract", "_analyze")
+
+
+def _converter_stage(attr: str) -> Optional[str]:
+    if attr in CONVERTER_PHASES:
+        return CONVERTER_PHASES[attr]
+    return "extract" if attr.startswith(EXTRACT_PREFIXES) else None
+
+
+def instrument_converter(converter, language: str, diagram_type: str):
+    """
+    Envuelve en la instancia los métodos de fase del convertidor (CONVERTER_PHASES,
+    _extract_*, _analyze_*). Solo se llama con métricas activas.
+    Las llamadas anidadas de una misma fase (un _extract_* que llama a otro) se
+    miden una sola vez, en la llamada externa, y el tiempo de una fase anidada en
+    otra (un _normalize_code dentro de _build_model) se descuenta de la externa.
+    En los generadores se mide solo el tiempo dentro de cada paso, no el que el
+    consumidor tarda en pedir el siguiente.
+    """
+    labels = {"converter": type(converter).__name__, "language": language, "diagram_type": diagram_type}
+    # Fases en curso: [etapa, segundos de las fases anidadas en ella]
+    stack: List[List] = []
+    for attr in dir(type(converter)):
+        stage = _converter_stage(attr)
+        if stage is None:
+            continue
+        method = getattr(converter, attr, None)
+        if not callable(method):
+            continue
+        wrap = _wrap_generator_phase if inspect.isgeneratorfunction(method) else _wrap_phase
+        setattr(converter, attr, wrap(method, stage, labels, stack))
+    return converter
+
+
+@contextmanager
+def _phase(stage: str, stack: List[List], report: Callable[[float], None]):
+    """Mide una fase y reporta sus segundos propios (sin los de las fases anidadas)"""
+    frame = [stage, 0.0]
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+        report(elapsed - frame[1])
+
+
+def _in_phase(stage: str, stack: List[List]) -> bool:
+    return any(frame[0] == stage for frame in stack)
+
+
+def _wrap_phase(method, stage: str, labels: Dict[str, str], stack: List[List]):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _in_phase(stage, stack):
+            return method(*args, **kwargs)
+        with _phase(stage, stack, lambda seconds: record_stage(stage, seconds, **labels)):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _wrap_generator_phase(method, stage: str, labels: Dict[str, str], stack: List[List]):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        inner = method(*args, **kwargs)
+        steps: List[float] = []
+        try:
+            while True:
+                if _in_phase(stage, stack):
+                    item = next(inner, _EXHAUSTED)
+                else:
+                    with _phase(stage, stack, steps.append):
+                        item = next(inner, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    return
+                yield item
+        finally:
+            inner.close()
+            if steps:
+                record_stage(stage, sum(steps), **labels)
+    return wrapper
+
+
+def instrument_engine(sync_engine) -> None:
+    """Mide las consultas SQL mediante los eventos de cursor de SQLAlchemy"""
+    if not METRICS_ENABLED:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        operation = statement.lstrip().split(" ", 1)[0].upper() if statement else "UNKNOWN"
+        record_stage("db", time.perf_counter() - starts.pop(), operation=operation)
+        registry.inc("uml_db_queries_total", operation=operation)
+
+
+def begin_request() -> Optional[object]:
+    """Abre el registro de tiempos por etapa de la petición en curso"""
+    if not SERVER_TIMING_ENABLED:
+        return None
+    return _request_timings.set([])
+
+
+def end_request(token) -> Optional[str]:
+    """Cierra el registro de la petición y retorna el valor de la cabecera Server-Timing"""
+    if token is None:
+        return None
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    totals: Dict[str, List[float]] = {}
+    for stage, seconds in timings:
+        entry = totals.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    return ", ".join(
+        f'{stage};dur={total * 1000:.1f};desc="{count}x"' for stage, (total, count) in totals.items()
+    )
+
+
+def render() -> str:
+    return registry.render()
@@ -0,0 +1,287 @@
+# app/core/profiler.py
+"""
+Perfilado bajo demanda de workers en producción.
+
+Solo está disponible si se define PROFILER_ADMIN_TOKEN. Un administrador puede:
+- armar el perfilador para las próximas N peticiones de diagramas, o
+- perfilar una petición concreta enviando la cabecera X-Profile-Request con el token.
+
+Cada perfil se guarda como .pstats (para pstats/snakeviz) y como .collapsed
+(formato de pilas colapsadas de flamegraph.pl / speedscope).
+
+cProfile solo mide el hilo que lo activa, y el trabajo de las peticiones corre en
+los pools de E/S y de CPU. Por eso una captura no perfila el event loop: abre una
+sesión que viaja en el contexto (contextvars) y cada tarea de los pools la graba
+con su propio perfil (record); al terminar, los perfiles de la sesión se fusionan.
+"""
+import asyncio
+import cProfile
+import functools
+import hmac
+import os
+import pstats
+import tempfile
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+PROFILER_ADMIN_TOKEN = os.getenv("PROFILER_ADMIN_TOKEN", "")
+PROFILER_ENABLED = bool(PROFILER_ADMIN_TOKEN)
+PROFILER_OUTPUT_DIR = os.getenv("PROFILER_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "uml-profiles"))
+PROFILER_MAX_PROFILES = int(os.getenv("PROFILER_MAX_PROFILES", "50"))
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+PROFILE_REQUEST_HEADER = "X-Profile-Request"
+
+T = TypeVar("T")
+
+# La petición en curso pidió ser perfilada (cabecera con el token)
+_request_requested: ContextVar[bool] = ContextVar("profile_requested", default=False)
+# Ya se está grabando un perfil en este hilo y contexto (evita perfiles anidados)
+_recording: ContextVar[bool] = ContextVar("profile_recording", default=False)
+
+
+@dataclass
+class ProfileRecord:
+    id: str
+    target: str
+    started_at: float
+    duration_ms: float
+    pstats_path: str
+    collapsed_path: str
+
+
+class ProfileSession:
+    """Captura de una llamada instrumentada: junta los perfiles de cada hilo que ejecuta su trabajo"""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """Estadísticas fusionadas; None si ninguna tarea llegó a grabarse"""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+# Captura en curso de la petición o trabajo; viaja a los pools con copy_context
+_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+class Profiler:
+    """
+    Estado del perfilador del proceso. Python solo admite un perfilador activo a
+    la vez, así que las capturas se serializan: si ya hay una en curso, la
+    llamada se ejecuta sin perfilar.
+    """
+
+    def __init__(self, output_dir: str = PROFILER_OUTPUT_DIR, max_profiles: int = PROFILER_MAX_PROFILES):
+        self.output_dir = output_dir
+        self.max_profiles = max_profiles
+        self._armed = 0
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._records: Dict[str, ProfileRecord] = {}
+
+    def arm(self, count: int) -> int:
+        """Perfila las próximas `count` llamadas instrumentadas"""
+        with self._lock:
+            self._armed = max(0, count)
+            return self._armed
+
+    @property
+    def armed(self) -> int:
+        return self._armed
+
+    def list_profiles(self) -> List[ProfileRecord]:
+        return sorted(self._records.values(), key=lambda r: r.started_at, reverse=True)
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        return self._records.get(profile_id)
+
+    def _begin(self, target: str) -> Optional[ProfileSession]:
+        """
+        Abre una sesión si la petición lo pidió o si quedan llamadas armadas. Una
+        llamada armada solo se consume cuando la sesión realmente se abrió.
+        """
+        if _session.get() is not None:
+            return None
+        requested = _request_requested.get()
+        if not requested and self._armed <= 0:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        if requested:
+            return ProfileSession(target)
+        with self._lock:
+            if self._armed > 0:
+                self._armed -= 1
+                return ProfileSession(target)
+        # Se desarmó mientras se abría la sesión
+        self._busy.release()
+        return None
+
+    def record(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Ejecuta func grabando este hilo en la sesión del contexto, si hay una. Los
+        pools de E/S y de CPU ejecutan todas sus tareas a través de este método.
+        """
+        session = _session.get()
+        if session is None or _recording.get():
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Otra herramienta de perfilado ya está activa en el hilo
+            return func(*args, **kwargs)
+        token = _recording.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            _recording.reset(token)
+            session.add(profile)
+
+    def _finish(self, session: ProfileSession, started_at: float, elapsed: float) -> None:
+        self._busy.release()
+        stats = session.stats()
+        if stats is None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        profile_id = uuid.uuid4().hex[:12]
+        pstats_path = os.path.join(self.output_dir, f"{profile_id}.pstats")
+        collapsed_path = os.path.join(self.output_dir, f"{profile_id}.collapsed")
+        stats.dump_stats(pstats_path)
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            f.write(collapse_stats(stats))
+        with self._lock:
+            self._records[profile_id] = ProfileRecord(
+                profile_id, session.target, started_at, round(elapsed * 1000, 2), pstats_path, collapsed_path
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._records) > self.max_profiles:
+            oldest = min(self._records.values(), key=lambda r: r.started_at)
+            del self._records[oldest.id]
+            for path in (oldest.pstats_path, oldest.collapsed_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def profiled(self, target: str):
+        """
+        Decorador para funciones síncronas y async. Sin token configurado retorna
+        la función original, así que no añade ningún costo.
+        En handlers async el perfil no incluye el event loop (que ejecuta también
+        otras peticiones) sino las tareas que el handler envía a los pools. En
+        funciones síncronas se graba además el propio hilo; si ya hay una captura
+        en curso, la función se graba como parte de ella.
+        Los archivos del perfil se escriben en un hilo, fuera del event loop.
+        """
+        def decorator(func):
+            if not PROFILER_ENABLED:
+                return func
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    session = self._begin(target)
+                    if session is None:
+                        return await func(*args, **kwargs)
+                    token = _session.set(session)
+                    started_at, start = time.time(), time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        _session.reset(token)
+                        await asyncio.to_thread(self._finish, session, started_at, time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                session = self._begin(target)
+                if session is None:
+                    return self.record(func, *args, **kwargs)
+                token = _session.set(session)
+                started_at, start = time.time(), time.perf_counter()
+                try:
+                    return self.record(func, *args, **kwargs)
+                finally:
+                    _session.reset(token)
+                    self._finish(session, started_at, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+
+def request_profiling(header_value: Optional[str]):
+    """Marca la petición en curso para perfilarla si la cabecera trae el token de admin"""
+    requested = bool(PROFILER_ENABLED and header_value) and hmac.compare_digest(
+        header_value.encode(), PROFILER_ADMIN_TOKEN.encode()
+    )
+    return _request_requested.set(requested)
+
+
+def reset_request_profiling(token) -> None:
+    _request_requested.reset(token)
+
+
+def _frame_name(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name.strip("<>").replace(";", ",")
+    return f"{os.path.basename(filename)}:{line}:{name}".replace(";", ",")
+
+
+def collapse_stats(stats: pstats.Stats, max_depth: int = 64) -> str:
+    """
+    Convierte un perfil de cProfile al formato de pilas colapsadas.
+    cProfile solo guarda aristas llamador->llamado, no pilas completas; cada función
+    se ubica bajo su cadena de llamadores de mayor tiempo acumulado y aporta su
+    tiempo propio (microsegundos). Es una aproximación suficiente para flamegraphs.
+    """
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    heaviest_caller: Dict[tuple, Optional[tuple]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        best = None
+        best_time = -1.0
+        for caller, caller_stats in callers.items():
+            caller_time = caller_stats[3] if isinstance(caller_stats, tuple) else 0
+            if caller != func and caller_time > best_time:
+                best, best_time = caller, caller_time
+        heaviest_caller[func] = best
+
+    lines = []
+    for func, (_, _, tottime, _, _) in raw.items():
+        micros = int(tottime * 1_000_000)
+        if micros <= 0:
+            continue
+        stack = [func]
+        seen = {func}
+        current = heaviest_caller.get(func)
+        while current is not None and current not in seen and len(stack) < max_depth:
+            stack.append(current)
+            seen.add(current)
+            current = heaviest_caller.get(current)
+        lines.append(f"{';'.join(_frame_name(f) for f in reversed(stack))} {micros}")
+    return "\n".join(sorted(lines)) + "\n"
+
+
+profiler = Profiler()
+profiled = profiler.profiled
@@ -0,0 +1,85 @@
+# app/domain/entities/diagram_job.py
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+import uuid
+
+
+class EstadoJob(Enum):
+    """Estados del ciclo de vida de un trabajo de generación de diagramas."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @classmethod
+    def estados_finales(cls):
+        return [cls.COMPLETED, cls.FAILED, cls.CANCELLED]
+
+
+@dataclass
+class DiagramJob:
+    source: str  # 'github' o 'zip'
+    source_id: str  # repo_id o project_id
+    base_path: str  # Ruta del proyecto en disco (permite reanudar tras un reinicio)
+    diagram_type: str = "class"
+    auto_detect_language: bool = True
+    max_elements: Optional[int] = None
+    entry_points: Optional[List[str]] = None  # Secuencia: funciones desde las que recorrer las llamadas
+    call_depth: Optional[int] = None  # Secuencia: niveles de llamadas a expandir
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    estado: EstadoJob = EstadoJob.QUEUED
+    fase: str = "queued"
+    archivos_procesados: int = 0
+    archivos_totales: int = 0
+    resultado: Optional[Dict] = None  # {'diagram': str, 'diagrams': Optional[Dict[str, str]]}
+    error: Optional[str] = None
+    fecha_creacion: datetime = field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = field(default_factory=datetime.now)
+
+    def __post_init__(self):
+        self.validar()
+
+    def validar(self):
+        if self.source not in ("github", "zip"):
+            raise ValueError("El origen del trabajo debe ser 'github' o 'zip'")
+        if not self.source_id:
+            raise ValueError("El trabajo debe indicar el repositorio o proyecto de origen")
+        if self.call_depth is not None and self.call_depth < 1:
+            raise ValueError("call_depth debe ser mayor o igual a 1")
+
+    def esta_finalizado(self) -> bool:
+        return self.estado in EstadoJob.estados_finales()
+
+    def iniciar(self) -> None:
+        self.estado = EstadoJob.RUNNING
+        self.error = None
+        self.actualizar_fecha()
+
+    def reportar_progreso(self, fase: str, procesados: int = 0, totales: int = 0) -> None:
+        self.fase = fase
+        self.archivos_procesados = procesados
+        self.archivos_totales = totales
+        self.actualizar_fecha()
+
+    def completar(self, resultado: Dict) -> None:
+        self.estado = EstadoJob.COMPLETED
+        self.fase = "completed"
+        self.resultado = resultado
+        self.actualizar_fecha()
+
+    def fallar(self, error: str) -> None:
+        self.estado = EstadoJob.FAILED
+        self.fase = "failed"
+        self.error = error
+        self.actualizar_fecha()
+
+    def cancelar(self) -> None:
+        self.estado = EstadoJob.CANCELLED
+        self.fase = "cancelled"
+        self.actualizar_fecha()
+
+    def actualizar_fecha(self):
+        self.fecha_actualizacion = datetime.now()
@@ -0,0 +1,30 @@
+# app/domain/repositories/diagram_job_repository.py
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable, List, Optional
+from app.domain.entities.diagram_job import DiagramJob, EstadoJob
+
+class DiagramJobRepository(ABC):
+    @abstractmethod
+    def save(self, job: DiagramJob) -> None: ...
+
+    @abstractmethod
+    def get_by_id(self, job_id: str) -> Optional[DiagramJob]: ...
+
+    @abstractmethod
+    def update(self, job: DiagramJob) -> None: ...
+
+    @abstractmethod
+    def list_by_status(self, *estados: EstadoJob) -> List[DiagramJob]: ...
+
+    # Actualiza solo si el estado guardado es uno de estados; retorna si lo actualizó
+    @abstractmethod
+    def update_if(self, job: DiagramJob, *estados: EstadoJob) -> bool: ...
+
+    # Renueva la fecha de actualización de los trabajos en curso indicados
+    @abstractmethod
+    def touch(self, job_ids: Iterable[str]) -> None: ...
+
+    # Reencola los trabajos en curso sin actualizar desde before; retorna cuántos
+    @abstractmethod
+    def requeue_stale(self, before: datetime) -> int: ...
@@ -0,0 +1,223 @@
+# app/infrastructure/api/diagram_generation.py
+"""
+Generación de diagramas común a las rutas de repositorios de GitHub y de
+proyectos ZIP. Cada ruta conserva solo lo que depende del origen (clonado o
+extracción, índice de archivos, lectura del código); la conversión, las
+respuestas, la validación de las opciones y el diagrama automático por
+lenguaje viven aquí.
+"""
+import asyncio
+import functools
+import itertools
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.application.services.converters.diagram_partitioner import INDEX_DIAGRAM_NAME
+from app.application.services.converters.parallel_parser import source_input
+from app.application.services.converters.plantuml_stream import stream_convert
+from app.application.services.language_dispatcher import (
+    attempt_language, collect_language_results, create_language_converters, group_by_language,
+    is_empty_diagram, is_language_specific, run_by_language
+)
+from app.infrastructure.services import cpu_pool
+from app.infrastructure.services.cpu_pool import run_cpu
+from app.infrastructure.services.file_index import FileIndex
+from app.infrastructure.services.io_pool import run_io
+from app.infrastructure.services.language_detector import LanguageDetector
+
+logger = logging.getLogger(__name__)
+
+
+class DiagramResponse(BaseModel):
+    diagram: str
+    diagrams: Optional[Dict[str, str]] = None  # Particiones cuando se usa max_elements
+
+
+def build_diagram_response(converter, code, max_elements: Optional[int] = None) -> DiagramResponse:
+    """
+    Convierte el código con el convertidor dado. Si se indica un presupuesto de
+    elementos y el convertidor soporta particionado, retorna el índice en 'diagram'
+    y todas las particiones en 'diagrams'.
+    """
+    if max_elements and hasattr(converter, 'convert_partitioned'):
+        diagrams = converter.convert_partitioned(code, max_elements)
+        return DiagramResponse(diagram=diagrams[INDEX_DIAGRAM_NAME], diagrams=diagrams)
+    return DiagramResponse(diagram=converter.convert(code))
+
+
+def apply_sequence_options(converter, entry_points: Optional[List[str]], call_depth: Optional[int]):
+    """Opciones del recorrido del grafo de llamadas en los convertidores de secuencia"""
+    if entry_points and hasattr(converter, 'entry_points'):
+        converter.entry_points = entry_points
+    if call_depth is not None and hasattr(converter, 'max_depth'):
+        converter.max_depth = call_depth
+
+
+def validate_sequence_options(call_depth: Optional[int]) -> None:
+    """Rechaza con 400 una profundidad de llamadas menor a 1"""
+    if call_depth is not None and call_depth < 1:
+        raise HTTPException(status_code=400, detail="call_depth debe ser mayor o igual a 1")
+
+
+def validate_stream_options(stream: bool, max_elements: Optional[int]) -> None:
+    """Rechaza con 400 el streaming con max_elements: el streaming emite un solo diagrama sin particionar"""
+    if stream and max_elements:
+        raise HTTPException(status_code=400, detail="stream y max_elements no se pueden combinar")
+
+
+async def build_streaming_response(converter, code) -> StreamingResponse:
+    """
+    Emite el diagrama como text/plain en bloques mientras se genera.
+    El primer bloque (que incluye el análisis completo) se produce en el pool de
+    CPU antes de responder, así los errores de análisis siguen devolviéndose como
+    HTTP 500 sin bloquear el event loop; StreamingResponse consume el resto del
+    generador en un hilo, también fuera del loop.
+    """
+    chunks = stream_convert(converter, code)
+    first_chunk = await run_cpu(next, chunks, "")
+    return StreamingResponse(itertools.chain([first_chunk], chunks), media_type="text/plain")
+
+
+def merge_language_responses(responses: Dict[str, DiagramResponse], diagram_type: str) -> DiagramResponse:
+    """
+    Combina las respuestas por lenguaje, ordenadas del lenguaje principal al de
+    menos código. Se omiten los lenguajes cuyo diagrama quedó vacío. 'diagram' es
+    el del lenguaje principal y, con varios lenguajes, 'diagrams' tiene el de cada
+    uno (o sus particiones, como 'lenguaje/partición').
+    """
+    non_empty = {
+        language: response for language, response in responses.items()
+        if not is_empty_diagram(language, diagram_type, response.diagram, response.diagrams)
+    }
+    if len(non_empty) <= 1:
+        return next(iter((non_empty or responses).values()))
+    diagrams = {}
+    for language, response in non_empty.items():
+        if response.diagrams:
+            diagrams.update({f"{language}/{name}": diagram for name, diagram in response.diagrams.items()})
+        else:
+            diagrams[language] = response.diagram
+    primary = next(iter(non_empty.values()))
+    return DiagramResponse(diagram=primary.diagram, diagrams=diagrams)
+
+
+def language_jobs(languages: Dict[str, Tuple], max_elements: Optional[int] = None,
+                  entry_points: Optional[List[str]] = None, call_depth: Optional[int] = None) -> Dict[str, Callable]:
+    """Aplica las opciones a cada convertidor y retorna la conversión de cada lenguaje"""
+    jobs = {}
+    for language, (converter, code) in languages.items():
+        apply_sequence_options(converter, entry_points, call_depth)
+        jobs[language] = functools.partial(build_diagram_response, converter, code, max_elements)
+    return jobs
+
+
+class AutoDiagramGenerator:
+    """
+    Diagrama automático de un proyecto: cada archivo con el convertidor de su
+    lenguaje o, si ninguno aplica, el del lenguaje principal. Cada ruta aporta lo
+    que depende del origen: el índice de archivos, la lectura del código, la
+    preparación con el lenguaje principal, sus extensiones de código y su detector.
+    """
+
+    def __init__(self, get_file_index: Callable[[Dict], FileIndex], read_source_files: Callable[..., List[str]],
+                 prepare_auto_diagram: Callable[..., Tuple], source_extensions: Tuple[str, ...],
+                 language_detector: LanguageDetector):
+        self.get_file_index = get_file_index
+        self.read_source_files = read_source_files
+        self.prepare_auto_diagram = prepare_auto_diagram
+        self.source_extensions = source_extensions
+        self.language_detector = language_detector
+
+    def read_sources_by_language(self, file_index: FileIndex,
+                                 progress: Optional[Callable] = None) -> Dict[str, List[str]]:
+        """
+        Lee los archivos de código agrupados por el lenguaje de su extensión. Solo se
+        leen los lenguajes que superan los umbrales del detector, sin contar las
+        dependencias de terceros (node_modules, vendor...).
+        """
+        groups = group_by_language(
+            file_index.files_with_extensions(self.source_extensions), lambda entry: entry.path,
+            weight_of=lambda entry: entry.size + 1,
+            min_files=self.language_detector.min_files, min_share=self.language_detector.min_share
+        )
+        return {
+            language: self.read_source_files(file_index, progress, entries)
+            for language, entries in groups.items()
+        }
+
+    def prepare_language_diagrams(self, info: Dict, diagram_type: str,
+                                  progress: Optional[Callable] = None) -> Dict[str, Tuple]:
+        """
+        Prepara la generación por lenguaje: cada archivo va al convertidor del lenguaje
+        de su extensión. Retorna {lenguaje: (convertidor, código)}, vacío si ningún
+        archivo tiene convertidor para el tipo de diagrama.
+        """
+        if progress:
+            progress("indexing")
+        file_index = self.get_file_index(info)
+        sources = self.read_sources_by_language(file_index, progress)
+        logger.info(f"📖 Archivos por lenguaje: { {language: len(parts) for language, parts in sources.items()} }")
+
+        converters = create_language_converters(sources, diagram_type)
+        if progress:
+            total = sum(len(sources[language]) for language in converters)
+            progress("converting", total, total)
+        return {
+            language: (converter, source_input(converter, sources[language]))
+            for language, converter in converters.items()
+        }
+
+    def build_auto_diagram(self, info: Dict, diagram_type: str, auto_detect_language: bool = True,
+                           max_elements: Optional[int] = None, progress: Optional[Callable] = None,
+                           entry_points: Optional[List[str]] = None,
+                           call_depth: Optional[int] = None) -> DiagramResponse:
+        """
+        Genera el diagrama automático de forma síncrona (trabajos asíncronos). Los
+        lenguajes se convierten en paralelo en el pool de CPU.
+        """
+        if auto_detect_language and is_language_specific(diagram_type):
+            languages = self.prepare_language_diagrams(info, diagram_type, progress)
+            if languages:
+                jobs = language_jobs(languages, max_elements, entry_points, call_depth)
+                return merge_language_responses(run_by_language(jobs, cpu_pool.submit), diagram_type)
+        converter, code = self.prepare_auto_diagram(info, diagram_type, auto_detect_language, progress)
+        apply_sequence_options(converter, entry_points, call_depth)
+        return build_diagram_response(converter, code, max_elements)
+
+    async def build_auto_response(self, info: Dict, diagram_type: str, auto_detect_language: bool = True,
+                                  max_elements: Optional[int] = None, entry_points: Optional[List[str]] = None,
+                                  call_depth: Optional[int] = None) -> DiagramResponse:
+        """
+        Versión asíncrona de build_auto_diagram para los endpoints: la lectura corre
+        en el pool de E/S y la conversión de cada lenguaje en el pool de CPU.
+        """
+        if auto_detect_language and is_language_specific(diagram_type):
+            languages = await run_io(self.prepare_language_diagrams, info, diagram_type)
+            if languages:
+                jobs = language_jobs(languages, max_elements, entry_points, call_depth)
+                outcomes = await asyncio.gather(
+                    *(run_cpu(attempt_language, language, job) for language, job in jobs.items())
+                )
+                return merge_language_responses(collect_language_results(dict(zip(jobs, outcomes))), diagram_type)
+        converter, code = await run_io(self.prepare_auto_diagram, info, diagram_type, auto_detect_language)
+        apply_sequence_options(converter, entry_points, call_depth)
+        return await run_cpu(build_diagram_response, converter, code, max_elements)
+
+    async def build_auto_streaming_response(self, info: Dict, diagram_type: str,
+                                            auto_detect_language: bool = True,
+                                            entry_points: Optional[List[str]] = None,
+                                            call_depth: Optional[int] = None) -> StreamingResponse:
+        """Diagrama automático en streaming; con varios lenguajes se emite el del lenguaje principal"""
+        languages = {}
+        if auto_detect_language and is_language_specific(diagram_type):
+            languages = await run_io(self.prepare_language_diagrams, info, diagram_type)
+        if languages:
+            converter, code = next(iter(languages.values()))
+        else:
+            converter, code = await run_io(self.prepare_auto_diagram, info, diagram_type, auto_detect_language)
+        apply_sequence_options(converter, entry_points, call_depth)
+        return await build_streaming_response(converter, code)
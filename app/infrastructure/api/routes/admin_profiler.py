@@ -0,0 +1,73 @@
+# app/infrastructure/api/routes/admin_profiler.py
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from typing import List, Optional
+import hmac
+import os
+from app.core.profiler import PROFILER_ADMIN_TOKEN, PROFILER_ENABLED, profiler
+
+router = APIRouter(prefix="/admin/profiler", tags=["admin-profiler"])
+
+class ArmProfilerRequest(BaseModel):
+    count: int = 1  # Número de próximas peticiones de diagramas a perfilar
+
+class ProfilerStatusResponse(BaseModel):
+    armed: int
+    output_dir: str
+
+class ProfileResponse(BaseModel):
+    id: str
+    target: str
+    started_at: float
+    duration_ms: float
+    pstats_url: str
+    collapsed_url: str
+
+def verify_admin(token: Optional[str]) -> None:
+    """El perfilador solo existe con PROFILER_ADMIN_TOKEN y exige ese token en X-Admin-Token"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Perfilador desactivado")
+    if not token or not hmac.compare_digest(token, PROFILER_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administrador inválido")
+
+@router.post("/arm", response_model=ProfilerStatusResponse)
+async def arm_profiler(request: ArmProfilerRequest, x_admin_token: Optional[str] = Header(None)):
+    """Perfila las próximas N peticiones de diagramas (0 desarma)"""
+    verify_admin(x_admin_token)
+    if request.count < 0 or request.count > 100:
+        raise HTTPException(status_code=400, detail="count debe estar entre 0 y 100")
+    return ProfilerStatusResponse(armed=profiler.arm(request.count), output_dir=profiler.output_dir)
+
+@router.get("/profiles", response_model=List[ProfileResponse])
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Perfiles capturados, del más reciente al más antiguo"""
+    verify_admin(x_admin_token)
+    return [
+        ProfileResponse(
+            id=record.id,
+            target=record.target,
+            started_at=record.started_at,
+            duration_ms=record.duration_ms,
+            pstats_url=f"/api/admin/profiler/profiles/{record.id}/pstats",
+            collapsed_url=f"/api/admin/profiler/profiles/{record.id}/collapsed"
+        )
+        for record in profiler.list_profiles()
+    ]
+
+@router.get("/profiles/{profile_id}/{kind}")
+async def download_profile(profile_id: str, kind: str, x_admin_token: Optional[str] = Header(None)):
+    """Descarga un perfil en formato pstats o de pilas colapsadas (flamegraph)"""
+    verify_admin(x_admin_token)
+    record = profiler.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    if kind == "pstats":
+        path = record.pstats_path
+    elif kind == "collapsed":
+        path = record.collapsed_path
+    else:
+        raise HTTPException(status_code=400, detail="Formato no soportado (pstats o collapsed)")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="El archivo del perfil ya no existe")
+    return FileResponse(path, filename=os.path.basename(path), media_type="application/octet-stream")
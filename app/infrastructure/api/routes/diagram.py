@@ -9,6 +9,7 @@ from app.application.use_cases.diagram.list_diagrams_by_project import ListDiagr
 from app.domain.entities.diagram import Diagrama, TipoDiagrama
 from app.domain.repositories.diagram_repository import DiagramRepository
 from app.infrastructure.dependencies import get_diagram_repository
+from app.infrastructure.services.cpu_pool import run_cpu
 
 router = APIRouter(prefix="/diagramas", tags=["diagramas"])  # Cambiado a /api/diagramas
 
@@ -45,8 +46,9 @@ async def generar_diagrama(
         # Instancia del caso de uso
         use_case = GenerarDiagramaDesdeCodigoUseCase()
 
-        # Ejecutar el caso de uso
-        resultados = use_case.ejecutar(
+        # Ejecutar el caso de uso en el pool de CPU, fuera del event loop
+        resultados = await run_cpu(
+            use_case.ejecutar,
             codigo_fuente=request.codigo,
             lenguaje=request.lenguaje,
             diagramas_solicitados=request.diagramas,
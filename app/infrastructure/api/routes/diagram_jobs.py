@@ -0,0 +1,169 @@
+# app/infrastructure/api/routes/diagram_jobs.py
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+import logging
+import os
+from app.core.profiler import profiled
+from app.domain.entities.diagram_job import DiagramJob, EstadoJob
+from app.infrastructure.api.diagram_generation import DiagramResponse
+from app.infrastructure.api.routes import github_repository, zip_upload
+from app.infrastructure.repositories.diagram_job_repository_impl import JOBS_DB_PATH, DiagramJobRepositorySQLite
+from app.infrastructure.services.job_runner import DiagramJobRunner
+
+router = APIRouter(prefix="/diagram-jobs", tags=["diagram-jobs"])
+logger = logging.getLogger(__name__)
+
+class DiagramJobRequest(BaseModel):
+    source: str  # 'github' o 'zip'
+    source_id: str  # repo_id o project_id
+    diagram_type: str = "class"
+    auto_detect_language: bool = True
+    max_elements: Optional[int] = None
+    entry_points: Optional[List[str]] = None  # Secuencia: funciones desde las que recorrer las llamadas
+    call_depth: Optional[int] = None  # Secuencia: niveles de llamadas a expandir
+
+class DiagramJobResponse(BaseModel):
+    job_id: str
+    source: str
+    source_id: str
+    diagram_type: str
+    status: str
+    phase: str
+    files_parsed: int
+    files_total: int
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+@profiled("jobs.github")
+def run_github_job(job: DiagramJob, progress) -> Dict:
+    """Genera el diagrama de un repositorio clonado"""
+    if not os.path.isdir(job.base_path):
+        raise FileNotFoundError("El repositorio ya no está disponible en disco")
+    repo_info = github_repository.cloned_repositories.get(job.source_id) or {"temp_path": job.base_path}
+    response = github_repository.auto_diagrams.build_auto_diagram(
+        repo_info, job.diagram_type, job.auto_detect_language, job.max_elements, progress,
+        entry_points=job.entry_points, call_depth=job.call_depth
+    )
+    return response.model_dump()
+
+@profiled("jobs.zip")
+def run_zip_job(job: DiagramJob, progress) -> Dict:
+    """Genera el diagrama de un proyecto extraído de un ZIP"""
+    if not os.path.isdir(job.base_path):
+        raise FileNotFoundError("El proyecto ya no está disponible en disco")
+    project_info = zip_upload.uploaded_projects.get(job.source_id) or {"temp_path": job.base_path}
+    response = zip_upload.auto_diagrams.build_auto_diagram(
+        project_info, job.diagram_type, job.auto_detect_language, job.max_elements, progress,
+        entry_points=job.entry_points, call_depth=job.call_depth
+    )
+    return response.model_dump()
+
+# Se crea en el arranque de la aplicación (start_job_runner), no al importar el módulo
+job_runner: Optional[DiagramJobRunner] = None
+
+def start_job_runner(db_path: str = JOBS_DB_PATH) -> DiagramJobRunner:
+    """Abre la tabla de trabajos, crea el runner y encola los trabajos pendientes"""
+    global job_runner
+    if job_runner is None:
+        job_runner = DiagramJobRunner(
+            DiagramJobRepositorySQLite(db_path), {"github": run_github_job, "zip": run_zip_job}
+        )
+        job_runner.recover()
+    return job_runner
+
+def stop_job_runner() -> None:
+    global job_runner
+    if job_runner is not None:
+        job_runner.shutdown()
+        job_runner = None
+
+def get_job_runner() -> DiagramJobRunner:
+    if job_runner is None:
+        raise HTTPException(status_code=503, detail="El servicio de trabajos no está iniciado")
+    return job_runner
+
+def to_response(job: DiagramJob) -> DiagramJobResponse:
+    return DiagramJobResponse(
+        job_id=job.id,
+        source=job.source,
+        source_id=job.source_id,
+        diagram_type=job.diagram_type,
+        status=job.estado.value,
+        phase=job.fase,
+        files_parsed=job.archivos_procesados,
+        files_total=job.archivos_totales,
+        error=job.error,
+        created_at=job.fecha_creacion.isoformat(),
+        updated_at=job.fecha_actualizacion.isoformat()
+    )
+
+def resolve_base_path(source: str, source_id: str) -> str:
+    """Obtiene la ruta en disco del repositorio o proyecto de origen"""
+    if source == "github":
+        info = github_repository.cloned_repositories.get(source_id)
+        if info is None:
+            raise HTTPException(status_code=404, detail="Repositorio no encontrado")
+    elif source == "zip":
+        info = zip_upload.uploaded_projects.get(source_id)
+        if info is None:
+            raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    else:
+        raise HTTPException(status_code=400, detail="El origen debe ser 'github' o 'zip'")
+    return info["temp_path"]
+
+@router.post("", response_model=DiagramJobResponse, status_code=202)
+async def create_diagram_job(request: DiagramJobRequest):
+    """
+    Encola la generación automática de un diagrama y retorna el id del trabajo
+    sin esperar a que termine.
+    """
+    runner = get_job_runner()
+    base_path = resolve_base_path(request.source, request.source_id)
+    try:
+        job = DiagramJob(
+            source=request.source,
+            source_id=request.source_id,
+            base_path=base_path,
+            diagram_type=request.diagram_type,
+            auto_detect_language=request.auto_detect_language,
+            max_elements=request.max_elements,
+            entry_points=request.entry_points,
+            call_depth=request.call_depth
+        )
+        runner.submit(job)
+        return to_response(job)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error al encolar trabajo: {e}")
+        raise HTTPException(status_code=500, detail=f"Fallo al encolar el trabajo: {str(e)}")
+
+@router.get("/{job_id}", response_model=DiagramJobResponse)
+async def get_diagram_job(job_id: str):
+    """Estado y progreso (fase, archivos procesados) de un trabajo"""
+    job = get_job_runner().repository.get_by_id(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return to_response(job)
+
+@router.get("/{job_id}/result", response_model=DiagramResponse)
+async def get_diagram_job_result(job_id: str):
+    """Resultado de un trabajo completado"""
+    job = get_job_runner().repository.get_by_id(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if job.estado == EstadoJob.FAILED:
+        raise HTTPException(status_code=500, detail=f"El trabajo falló: {job.error}")
+    if job.estado != EstadoJob.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"El trabajo no ha terminado (estado: {job.estado.value})")
+    return job.resultado
+
+@router.delete("/{job_id}", response_model=DiagramJobResponse)
+async def cancel_diagram_job(job_id: str):
+    """Cancela un trabajo encolado o en ejecución"""
+    job = get_job_runner().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return to_response(job)
@@ -1,14 +1,30 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 from uuid import uuid4
 from tempfile import mkdtemp
 from git import Repo, GitCommandError
 import logging
-import os
 import re
-from pathlib import Path
 from app.application.services.diagram_factory import DiagramFactory
+from app.core import metrics
+from app.core.profiler import profiled
+from app.application.services.converters.parallel_parser import source_input
+from app.application.services.converters.project_model import Manifest, ProjectModel, TreeEntry
+from app.infrastructure.api.diagram_generation import (
+    AutoDiagramGenerator, DiagramResponse, apply_sequence_options, build_diagram_response,
+    build_streaming_response, validate_sequence_options, validate_stream_options
+)
+from app.infrastructure.services.cpu_pool import run_cpu
+from app.infrastructure.services.file_index import FileEntry, FileIndex
+from app.infrastructure.services.gitignore_matcher import GitignoreMatcher
+from app.infrastructure.services.io_pool import run_io
+from app.infrastructure.services.language_detector import LanguageDetector
+from app.infrastructure.services.repository_stats import (
+    GROUP_KEYS, METRIC_COLUMNS, StatsProfile, collect_statistics, comment_line_pattern
+)
+from app.infrastructure.services.project_model_builder import build_tree, collect_imports, collect_manifests
+from app.infrastructure.services.source_reader import read_source_text
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -33,6 +49,17 @@ class FileStat(BaseModel):
     loc: int
     is_test: bool
 
+class StatGroup(BaseModel):
+    key: str  # Extensión o directorio
+    files: int
+    test_files: int
+    lines: int
+    classes: int
+    functions: int
+    comments: int
+    loc: int
+    size: int  # Bytes
+
 class RepoAnalysisResponse(BaseModel):
     total_files: int
     code_files: int
@@ -41,31 +68,44 @@ class RepoAnalysisResponse(BaseModel):
     total_functions: int
     total_comments: int
     total_loc: int
-    files: List[FileStat]
+    files: List[FileStat]  # Todos los archivos, o la página pedida con offset/limit
+    groups: Optional[List[StatGroup]] = None  # Solo si se pide group_by
+    top_files: Optional[List[FileStat]] = None  # Solo si se pide top
 
 class DiagramRequest(BaseModel):
     repo_id: str
     diagram_type: str
     language: str
-
-class DiagramResponse(BaseModel):
-    diagram: str
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
+    entry_points: Optional[List[str]] = None  # Secuencia: funciones desde las que recorrer las llamadas
+    call_depth: Optional[int] = None  # Secuencia: niveles de llamadas a expandir
 
 class ComponentDiagramRequest(BaseModel):
     repo_id: str
     include_external_deps: bool = True
     max_depth: int = None  # Profundidad máxima de directorios a analizar
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
 
 class PackageDiagramRequest(BaseModel):
     repo_id: str
     include_external_deps: bool = True
     group_by_layer: bool = True  # Agrupar por capas de arquitectura
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    transitive_reduction: bool = False  # Omitir dependencias implicadas por otras (a -> c si a -> b -> c)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
 
 class AutoDiagramRequest(BaseModel):
     repo_id: str
     diagram_type: str = "class"  # Tipo por defecto, pero se puede cambiar
     auto_detect_language: bool = True  # Detectar lenguaje automáticamente
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
+    entry_points: Optional[List[str]] = None  # Secuencia: funciones desde las que recorrer las llamadas
+    call_depth: Optional[int] = None  # Secuencia: niveles de llamadas a expandir
 
+@metrics.timed("clone")
 def clone_github_repository(url: str) -> Dict:
     try:
         temp_path = mkdtemp(prefix="repo_")
@@ -81,335 +121,223 @@ def clone_github_repository(url: str) -> Dict:
     except Exception as e:
         raise RuntimeError(f"Fallo al clonar el repositorio: {e}")
 
-def parse_gitignore(path: str) -> List[str]:
-    ignore_path = os.path.join(path, ".gitignore")
-    patterns = []
-    if os.path.exists(ignore_path):
-        with open(ignore_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    patterns.append(line)
-    return patterns
-
-def is_ignored(path: str, patterns: List[str]) -> bool:
-    for pattern in patterns:
-        if Path(path).match(pattern):
-            return True
-    return False
-
-def analyze_repository(temp_path: str) -> RepoAnalysisResponse:
-    valid_extensions = (".ts", ".tsx", ".js", ".py", ".java", ".cs")
-    ignore_patterns = parse_gitignore(temp_path)
-    files = []
-    total_lines = 0
-    total_classes = 0
-    total_functions = 0
-    total_comments = 0
-    total_loc = 0
-
-    for root, _, filenames in os.walk(temp_path):
-        for fname in filenames:
-            full_path = os.path.join(root, fname)
-            rel_path = os.path.relpath(full_path, temp_path)
-            if is_ignored(rel_path, ignore_patterns):
-                continue
-
-            if fname.endswith(valid_extensions):
-                try:
-                    with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                        lines = content.splitlines()
-                        classes = len(re.findall(r'\bclass\s+\w+', content))
-                        functions = len(re.findall(r'\b(def|function|void|public\s+\w+\s+\w+)\b', content))
-                        comments = len([l for l in lines if l.strip().startswith(("#", "//", "/*", "*"))])
-                        loc = len([l for l in lines if l.strip() and not l.strip().startswith(("#", "//", "/*", "*"))])
-                        is_test = bool(re.search(r'test_|\.spec\.', fname.lower())) or "test" in rel_path.lower()
-
-                        files.append(FileStat(
-                            path=rel_path,
-                            size_kb=round(os.path.getsize(full_path) / 1024, 2),
-                            classes=classes,
-                            functions=functions,
-                            extension=os.path.splitext(fname)[1],
-                            comments=comments,
-                            loc=loc,
-                            is_test=is_test
-                        ))
-
-                        total_lines += len(lines)
-                        total_classes += classes
-                        total_functions += functions
-                        total_comments += comments
-                        total_loc += loc
-                except Exception as e:
-                    logger.warning(f"No se pudo analizar {full_path}: {e}")
+def load_gitignore(path: str) -> GitignoreMatcher:
+    """Compila los .gitignore del repositorio (raíz y anidados)"""
+    return GitignoreMatcher(path)
+
+# Qué mide /analyze-repo; los patrones de bytes se escanean sin decodificar los archivos
+ANALYSIS_PROFILE = StatsProfile(
+    extensions=(".ts", ".tsx", ".js", ".py", ".java", ".cs"),
+    class_pattern=re.compile(rb'\bclass\s+\w+'),
+    function_pattern=re.compile(rb'\b(def|function|void|public\s+\w+\s+\w+)\b'),
+    line_pattern=comment_line_pattern((b"#", b"//", b"/*", b"*")),
+    test_pattern=re.compile(r'test_|\.spec\.')
+)
+
+def validate_analysis_options(offset: int, limit: Optional[int], group_by: Optional[str],
+                              top: Optional[int], top_by: str) -> None:
+    """Rechaza con 400 los parámetros de análisis inválidos"""
+    if offset < 0 or (limit is not None and limit < 0) or (top is not None and top < 0):
+        raise HTTPException(status_code=400, detail="offset, limit y top no pueden ser negativos")
+    if group_by and group_by not in GROUP_KEYS:
+        raise HTTPException(status_code=400, detail=f"group_by debe ser uno de: {', '.join(GROUP_KEYS)}")
+    if top_by not in METRIC_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"top_by debe ser uno de: {', '.join(METRIC_COLUMNS)}")
+
+def analyze_repository(temp_path: str, offset: int = 0, limit: Optional[int] = None,
+                       include_files: bool = True, group_by: Optional[str] = None,
+                       directory_depth: Optional[int] = None, top: Optional[int] = None,
+                       top_by: str = "loc") -> RepoAnalysisResponse:
+    """
+    Mide el repositorio con el motor de estadísticas. Sin parámetros opcionales la
+    respuesta es la de siempre (todos los archivos); los FileStat solo se construyen
+    para la página pedida y el top-N.
+    """
+    stats = collect_statistics(temp_path, load_gitignore(temp_path).walk(), ANALYSIS_PROFILE)
+    totals = stats.totals()
+    files = [FileStat(**stats.row(i)) for i in stats.page(offset, limit)] if include_files else []
 
     return RepoAnalysisResponse(
-        total_files=len(files),
-        code_files=len(files),
-        total_lines=total_lines,
-        total_classes=total_classes,
-        total_functions=total_functions,
-        total_comments=total_comments,
-        total_loc=total_loc,
-        files=files
+        total_files=totals["files"],
+        code_files=totals["files"],
+        total_lines=totals["lines"],
+        total_classes=totals["classes"],
+        total_functions=totals["functions"],
+        total_comments=totals["comments"],
+        total_loc=totals["loc"],
+        files=files,
+        groups=[StatGroup(**group) for group in stats.group_by(group_by, directory_depth)] if group_by else None,
+        top_files=[FileStat(**stats.row(i)) for i in stats.top(top, top_by)] if top else None
     )
 
-def generate_directory_structure(base_path: str, max_depth: int = None) -> str:
-    """Genera una representación optimizada de la estructura de directorios"""
-    structure_lines = []
-    ignore_patterns = parse_gitignore(base_path)
-    
-    # Optimización: usar max_depth por defecto si no se especifica
-    if max_depth is None:
-        max_depth = 4  # Limitar a 4 niveles por defecto para mejorar rendimiento
-    
-    # Contador para limitar archivos procesados (optimización de rendimiento)
-    max_files = 500  # Máximo 500 archivos para evitar timeouts
-    files_processed = 0
-    
+# Árbol de los diagramas de componentes/paquetes (acotado para repositorios grandes)
+TREE_EXTENSIONS = ('.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cs', '.php', '.go', '.rs', '.cpp', '.h')
+TREE_SKIP_DIRS = ('node_modules', '.git', '__pycache__', 'bin', 'obj', 'dist', 'build')
+TREE_UNLISTED_DIRS = ('test', 'tests', 'spec')  # Se omite el directorio, no sus archivos
+TREE_MAX_DEPTH = 4
+TREE_MAX_FILES = 500
+IMPORT_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.cs', '.php', '.go', '.rs')
+MANIFEST_NAMES = (
+    'package.json', 'requirements.txt', 'pyproject.toml', 'pom.xml', 'build.gradle', 'build.gradle.kts',
+    'composer.json', 'Cargo.toml', 'go.mod',
+    # Lockfiles: fijan versiones y aportan las dependencias directas si falta el manifiesto
+    'package-lock.json', 'yarn.lock', 'poetry.lock', 'Pipfile.lock', 'composer.lock', 'Cargo.lock'
+)
+MANIFEST_MAX_SIZE = 5 * 1024 * 1024  # Los manifiestos más grandes se omiten (se parsean completos)
+
+@metrics.timed("walk", step="directory_structure")
+def build_project_tree(file_index: FileIndex, max_depth: Optional[int] = None) -> List[TreeEntry]:
+    """Árbol de directorios y archivos de código principales del repositorio"""
+    return build_tree(
+        file_index, TREE_EXTENSIONS, max_depth or TREE_MAX_DEPTH, TREE_MAX_FILES,
+        TREE_SKIP_DIRS, TREE_UNLISTED_DIRS
+    )
+
+def collect_project_manifests(file_index: FileIndex) -> List[Manifest]:
+    """Manifiestos de la raíz del repositorio (acotados en tamaño)"""
     try:
-        for root, dirs, files in os.walk(base_path):
-            # Verificar límite de archivos procesados
-            if files_processed >= max_files:
-                break
-                
-            # Calcular profundidad actual
-            level = root.replace(base_path, '').count(os.sep)
-            if level > max_depth:
-                # Podar directorios que exceden la profundidad máxima
-                dirs[:] = []
-                continue
-                
-            rel_path = os.path.relpath(root, base_path)
-            if rel_path == '.':
-                rel_path = ''
-                
-            # Filtrar directorios ignorados y comunes que no aportan valor
-            if rel_path and (is_ignored(rel_path, ignore_patterns) or 
-                           any(skip_dir in rel_path.lower() for skip_dir in 
-                               ['node_modules', '.git', '__pycache__', 'bin', 'obj', 'dist', 'build'])):
-                dirs[:] = []  # No procesar subdirectorios
-                continue
-                
-            # Agregar directorio actual (solo si es relevante)
-            if rel_path and not any(skip_dir in rel_path.lower() for skip_dir in ['test', 'tests', 'spec']):
-                structure_lines.append(f"{rel_path}/")
-                
-            # Filtrar y agregar solo archivos relevantes
-            relevant_files = []
-            for file in files:
-                if files_processed >= max_files:
-                    break
-                    
-                file_path = os.path.join(rel_path, file) if rel_path else file
-                if is_ignored(file_path, ignore_patterns):
-                    continue
-                    
-                # Solo incluir archivos de código fuente principales
-                if file.endswith(('.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cs', '.php', '.go', '.rs', '.cpp', '.h')):
-                    relevant_files.append(file_path)
-                    files_processed += 1
-                    
-            structure_lines.extend(relevant_files)
-            
+        return collect_manifests(file_index, MANIFEST_NAMES, max_size=MANIFEST_MAX_SIZE)
     except Exception as e:
-        logger.warning(f"Error durante la generación de estructura: {e}")
-        # Continuar con lo que se ha procesado hasta ahora
-    
-    return '\n'.join(structure_lines)
-
-def analyze_project_dependencies(base_path: str) -> str:
-    """Analiza dependencias del proyecto de forma optimizada"""
-    config_content = []
-    
-    # Archivos de configuración común (limitados para mejor rendimiento)
-    config_files = [
-        'package.json', 'requirements.txt', 'pom.xml', 'Cargo.toml', 'go.mod'
-    ]
-    
-    # Límite de tamaño de archivo para evitar leer archivos gigantes
-    max_file_size = 50 * 1024  # 50KB máximo
-    
-    for config_file in config_files:
-        config_path = os.path.join(base_path, config_file)
-        if os.path.exists(config_path):
-            try:
-                # Verificar tamaño del archivo
-                if os.path.getsize(config_path) > max_file_size:
-                    config_content.append(f"---CONFIG-{config_file}--- (archivo muy grande, omitido)")
-                    continue
-                    
-                with open(config_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    # Limitar contenido si es muy largo
-                    if len(content) > 2000:
-                        content = content[:2000] + "...(truncado)"
-                    config_content.append(f"---CONFIG-{config_file}---")
-                    config_content.append(content)
-            except Exception as e:
-                logger.warning(f"Error al leer {config_file}: {e}")
-    
-    return '\n'.join(config_content) if config_content else ""
-
-def collect_files_with_imports(base_path: str, max_files: int = 50) -> str:
-    """Recolecta archivos con sus imports para análisis de dependencias"""
-    files_content = []
-    ignore_patterns = parse_gitignore(base_path)
-    file_count = 0
-    
-    for root, _, files in os.walk(base_path):
-        if file_count >= max_files:
-            break
-            
-        for file in files:
-            if file_count >= max_files:
-                break
-                
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, base_path)
-            
-            if is_ignored(rel_path, ignore_patterns):
-                continue
-                
-            if file.endswith(('.py', '.js', '.ts', '.java', '.cs', '.php', '.go', '.rs')):
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        # Solo incluir las primeras líneas que usualmente contienen imports
-                        lines = content.split('\n')
-                        import_lines = []
-                        
-                        for line in lines[:50]:  # Primeras 50 líneas
-                            if any(keyword in line for keyword in [
-                                'import ', 'from ', 'include ', 'require', 'using ', 'package '
-                            ]):
-                                import_lines.append(line)
-                        
-                        if import_lines:
-                            files_content.append(f"---FILE---{rel_path}")
-                            files_content.append('\n'.join(import_lines))
-                            file_count += 1
-                            
-                except Exception as e:
-                    logger.warning(f"Error al leer {file}: {e}")
-    
-    return '\n'.join(files_content)
-
-def detect_primary_language(base_path: str) -> str:
+        logger.warning(f"Error al analizar dependencias, continuando sin ellas: {e}")
+        return []
+
+def build_component_model(repo_info: Dict, max_depth: Optional[int], include_external_deps: bool) -> ProjectModel:
+    """Modelo del diagrama de componentes: árbol del repositorio y, opcionalmente, manifiestos"""
+    file_index = get_file_index(repo_info)
+    project = ProjectModel(tree=build_project_tree(file_index, max_depth))
+    if include_external_deps:
+        project.manifests = collect_project_manifests(file_index)
+    return project
+
+def build_package_model(repo_info: Dict, include_external_deps: bool) -> ProjectModel:
     """
-    Detecta automáticamente el lenguaje principal del repositorio
-    basándose en la cantidad de archivos de cada tipo.
+    Modelo del diagrama de paquetes: imports por archivo o, si ningún archivo
+    tiene imports, el árbol del repositorio; opcionalmente, manifiestos.
     """
-    # Mapeo de extensiones a lenguajes
-    extension_to_language = {
-        '.cs': 'csharp',
-        '.java': 'java', 
-        '.php': 'php',
-        '.js': 'javascript',
-        '.ts': 'typescript',
-        '.py': 'python'
-    }
-    
-    # Contador de archivos por lenguaje
-    language_counts = {
-        'csharp': 0,
-        'java': 0,
-        'php': 0,
-        'javascript': 0,
-        'typescript': 0, 
-        'python': 0
-    }
-    
-    ignore_patterns = parse_gitignore(base_path)
-    
-    # Recorrer todos los archivos y contar por extensión
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, base_path)
-            
-            # Saltar archivos ignorados
-            if is_ignored(rel_path, ignore_patterns):
-                continue
-            
-            # Obtener extensión del archivo
-            _, ext = os.path.splitext(file)
-            ext = ext.lower()
-            
-            # Contar archivo si la extensión está en nuestro mapeo
-            if ext in extension_to_language:
-                language = extension_to_language[ext]
-                language_counts[language] += 1
-    
-    # Encontrar el lenguaje con más archivos
-    if sum(language_counts.values()) == 0:
-        # Si no hay archivos de código, usar 'any' como genérico
-        return 'any'
-    
-    # Obtener el lenguaje predominante
-    primary_language = max(language_counts, key=language_counts.get)
-    
-    # Si hay empate o muy pocos archivos, considerar combinaciones comunes
-    total_files = sum(language_counts.values())
-    max_count = language_counts[primary_language]
-    
-    # Si JavaScript y TypeScript están juntos, considerarlo como JavaScript
-    if language_counts['javascript'] > 0 and language_counts['typescript'] > 0:
-        combined_js = language_counts['javascript'] + language_counts['typescript']
-        if combined_js > max_count:
-            return 'javascript'  # Usar JavaScript como representante
-    
-    # Si hay muy pocos archivos (menos de 3), usar genérico
-    if total_files < 3:
-        return 'any'
-    
-    # Si el lenguaje predominante representa menos del 40% del total, usar genérico
-    if max_count / total_files < 0.4:
-        return 'any'
-    
-    logger.info(f"Lenguaje detectado: {primary_language} ({max_count}/{total_files} archivos)")
+    file_index = get_file_index(repo_info)
+    project = ProjectModel(sources=collect_imports(file_index, IMPORT_EXTENSIONS))
+    if not project.sources:
+        project.tree = build_project_tree(file_index)
+    if include_external_deps:
+        project.manifests = collect_project_manifests(file_index)
+    return project
+
+# Mapeo de extensiones a lenguajes (detección) y a etiquetas legibles (estadísticas)
+EXTENSION_TO_LANGUAGE = {
+    '.cs': 'csharp',
+    '.java': 'java',
+    '.php': 'php',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.py': 'python'
+}
+EXTENSION_TO_LABEL = {
+    '.cs': 'C#',
+    '.java': 'Java',
+    '.php': 'PHP',
+    '.js': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.py': 'Python'
+}
+SOURCE_EXTENSIONS = (".cs", ".js", ".ts", ".py", ".java", ".php")
+
+language_detector = LanguageDetector(EXTENSION_TO_LANGUAGE)
+
+def get_file_index(repo_info: Dict) -> FileIndex:
+    """
+    Retorna el índice de archivos del repositorio. Se construye con un único
+    recorrido la primera vez y queda cacheado en la información del repositorio.
+    """
+    file_index = repo_info.get("file_index")
+    if file_index is None:
+        base_path = repo_info["temp_path"]
+        file_index = FileIndex.build(base_path, load_gitignore(base_path))
+        repo_info["file_index"] = file_index
+    return file_index
+
+@metrics.timed("read")
+def read_source_files(file_index: FileIndex, progress: Optional[Callable] = None,
+                      entries: Optional[List[FileEntry]] = None) -> List[str]:
+    """Lee los archivos de código del índice (cada uno terminado en salto de línea)"""
+    code_parts = []
+    if entries is None:
+        entries = file_index.files_with_extensions(SOURCE_EXTENSIONS)
+    for i, entry in enumerate(entries):
+        if progress:
+            progress("reading", i, len(entries))
+        try:
+            code_parts.append(read_source_text(file_index.absolute_path(entry)) + "\n")
+        except Exception as e:
+            logger.warning(f"Error al leer archivo {entry.path}: {e}")
+    metrics.inc("uml_files_read_total", len(code_parts))
+    metrics.inc("uml_bytes_read_total", sum(len(part) for part in code_parts))
+    return code_parts
+
+def prepare_auto_diagram(repo_info: Dict, diagram_type: str, auto_detect_language: bool = True,
+                         progress: Optional[Callable] = None):
+    """
+    Prepara la generación automática: detecta el lenguaje, lee el código fuente y
+    crea el convertidor. Retorna (convertidor, código) donde el código es la lista
+    de archivos si el convertidor los parsea por separado o el código combinado.
+    """
+    # Índice de archivos cacheado: un solo recorrido del árbol por repositorio
+    if progress:
+        progress("indexing")
+    file_index = get_file_index(repo_info)
+    
+    # 🎯 DETECCIÓN AUTOMÁTICA DE LENGUAJE
+    if auto_detect_language:
+        detected_language = detect_primary_language(file_index)
+        logger.info(f"🔍 Lenguaje detectado automáticamente: {detected_language}")
+    else:
+        detected_language = 'any'  # Usar genérico si no se quiere detección
+    
+    # 📊 Obtener estadísticas detalladas
+    stats = get_language_stats(file_index)
+    logger.info(f"📊 Estadísticas del repositorio: {stats}")
+    
+    # 📁 Leer código fuente
+    code_parts = read_source_files(file_index, progress)
+    logger.info(f"📖 Archivos procesados: {len(code_parts)}")
+    
+    # 🔧 Crear convertidor con lenguaje detectado
+    try:
+        converter = DiagramFactory.create_converter(detected_language, diagram_type)
+        logger.info(f"✅ Convertidor creado: {detected_language} + {diagram_type}")
+    except ValueError as ve:
+        # Si falla con el lenguaje detectado, usar genérico
+        logger.warning(f"⚠️ Fallo con {detected_language}, usando genérico: {ve}")
+        converter = DiagramFactory.create_converter('any', diagram_type)
+    
+    if progress:
+        progress("converting", len(code_parts), len(code_parts))
+    return converter, source_input(converter, code_parts)
+
+def detect_primary_language(file_index: FileIndex) -> str:
+    """
+    Detecta automáticamente el lenguaje principal del repositorio a partir del
+    índice de archivos (bytes por extensión, shebangs y manifiestos).
+    """
+    primary_language = language_detector.detect(file_index)
+    logger.info(f"Lenguaje detectado: {primary_language}")
     return primary_language
 
-def get_language_stats(base_path: str) -> Dict[str, int]:
+def get_language_stats(file_index: FileIndex) -> Dict[str, int]:
     """
     Obtiene estadísticas detalladas de archivos por lenguaje.
     Útil para debugging y logging.
     """
-    extension_to_language = {
-        '.cs': 'C#',
-        '.java': 'Java', 
-        '.php': 'PHP',
-        '.js': 'JavaScript',
-        '.ts': 'TypeScript',
-        '.py': 'Python'
-    }
-    
-    language_counts = {}
-    ignore_patterns = parse_gitignore(base_path)
-    
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, base_path)
-            
-            if is_ignored(rel_path, ignore_patterns):
-                continue
-            
-            _, ext = os.path.splitext(file)
-            ext = ext.lower()
-            
-            if ext in extension_to_language:
-                language = extension_to_language[ext]
-                language_counts[language] = language_counts.get(language, 0) + 1
-    
-    return language_counts
+    return language_detector.language_stats(file_index, EXTENSION_TO_LABEL)
+
+auto_diagrams = AutoDiagramGenerator(
+    get_file_index, read_source_files, prepare_auto_diagram, SOURCE_EXTENSIONS, language_detector
+)
 
 @router.post("/fetch-repo", response_model=RepositoryResponse)
+@profiled("github.fetch_repository")
 async def fetch_repository(request: RepositoryRequest):
     try:
-        repo_info = clone_github_repository(request.github_url)
+        repo_info = await run_io(clone_github_repository, request.github_url)
         cloned_repositories[repo_info["repo_id"]] = repo_info
 
         return RepositoryResponse(
@@ -422,56 +350,67 @@ async def fetch_repository(request: RepositoryRequest):
         raise HTTPException(status_code=500, detail=f"Fallo al clonar repositorio: {str(e)}")
 
 @router.post("/analyze-repo", response_model=RepoAnalysisResponse)
-async def analyze_repo(repo_id: str):
+@profiled("github.analyze_repo")
+async def analyze_repo(repo_id: str, offset: int = 0, limit: Optional[int] = None,
+                       include_files: bool = True, group_by: Optional[str] = None,
+                       directory_depth: Optional[int] = None, top: Optional[int] = None,
+                       top_by: str = "loc"):
+    """
+    Estadísticas del repositorio. Opcionalmente pagina el listado de archivos
+    (offset/limit, include_files=false para omitirlo), agrupa por 'extension' o
+    'directory' y retorna los `top` archivos según `top_by`.
+    """
     if repo_id not in cloned_repositories:
         raise HTTPException(status_code=404, detail="Repositorio no encontrado")
+    validate_analysis_options(offset, limit, group_by, top, top_by)
 
     temp_path = cloned_repositories[repo_id]["temp_path"]
 
     try:
-        return analyze_repository(temp_path)
+        return await run_io(
+            analyze_repository, temp_path, offset, limit, include_files,
+            group_by, directory_depth, top, top_by
+        )
     except Exception as e:
         logger.error(f"Error al analizar repositorio: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al analizar el repositorio: {str(e)}")
 
 @router.post("/generate-diagram", response_model=DiagramResponse)
+@profiled("github.generate_diagram")
 async def generate_diagram(request: DiagramRequest):
     if request.repo_id not in cloned_repositories:
         raise HTTPException(status_code=404, detail="Repositorio no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
+    validate_sequence_options(request.call_depth)
 
     repo_info = cloned_repositories[request.repo_id]
-    base_path = repo_info["temp_path"]
+    file_index = await run_io(get_file_index, repo_info)
     
     # Detectar lenguaje automáticamente si no se especifica o se pasa 'auto'
     language = request.language
     if language.lower() in ['auto', 'detect', '']:
-        language = detect_primary_language(base_path)
+        language = detect_primary_language(file_index)
         logger.info(f"Lenguaje detectado automáticamente: {language}")
     
     # Obtener estadísticas para logging
-    stats = get_language_stats(base_path)
+    stats = get_language_stats(file_index)
     logger.info(f"Estadísticas del repositorio: {stats}")
     
-    combined_code = ""
-    
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.endswith((".cs", ".js", ".ts", ".py", ".java", ".php")):
-                try:
-                    with open(os.path.join(root, file), "r", encoding="utf-8", errors="ignore") as f:
-                        combined_code += f.read() + "\n"
-                except Exception as e:
-                    logger.warning(f"Error al leer archivo {file}: {e}")
+    code_parts = await run_io(read_source_files, file_index)
 
     try:
         converter = DiagramFactory.create_converter(language, request.diagram_type)
-        diagram = converter.convert(combined_code)
-        return DiagramResponse(diagram=diagram)
+        apply_sequence_options(converter, request.entry_points, request.call_depth)
+        code = source_input(converter, code_parts)
+        if request.stream:
+            return await build_streaming_response(converter, code)
+        return await run_cpu(build_diagram_response, converter, code, request.max_elements)
     except Exception as e:
         logger.error(f"Error al generar diagrama: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama: {str(e)}")
 
 @router.post("/generate-component-diagram", response_model=DiagramResponse)
+@profiled("github.generate_component_diagram")
 async def generate_component_diagram(request: ComponentDiagramRequest):
     """
     Genera un diagrama UML de componentes optimizado basado en la estructura del repositorio.
@@ -479,9 +418,9 @@ async def generate_component_diagram(request: ComponentDiagramRequest):
     """
     if request.repo_id not in cloned_repositories:
         raise HTTPException(status_code=404, detail="Repositorio no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
 
     repo_info = cloned_repositories[request.repo_id]
-    base_path = repo_info["temp_path"]
     
     try:
         logger.info(f"Generando diagrama de componentes para repo: {request.repo_id}")
@@ -489,37 +428,21 @@ async def generate_component_diagram(request: ComponentDiagramRequest):
         # Aplicar límites por defecto más conservadores para mejor rendimiento
         max_depth = min(request.max_depth or 3, 4)  # Máximo 4 niveles
         
-        # Generar estructura de directorios (optimizada)
-        directory_structure = generate_directory_structure(base_path, max_depth)
-        
-        # Limitar el análisis de dependencias solo si es realmente necesario
-        project_deps = ""
-        if request.include_external_deps:
-            try:
-                project_deps = analyze_project_dependencies(base_path)
-            except Exception as e:
-                logger.warning(f"Error al analizar dependencias, continuando sin ellas: {e}")
-                project_deps = ""
-        
-        # Combinar información para el análisis (con límite de tamaño)
-        analysis_input = directory_structure
-        if project_deps:
-            # Limitar el tamaño total del input
-            total_length = len(analysis_input) + len(project_deps)
-            if total_length > 50000:  # 50KB máximo
-                project_deps = project_deps[:25000] + "...(truncado para mejor rendimiento)"
-            analysis_input += f"\n\n{project_deps}"
+        # Árbol del repositorio y manifiestos, tomados del índice de archivos cacheado
+        project = await run_io(build_component_model, repo_info, max_depth, request.include_external_deps)
         
         # Verificar que tenemos datos para procesar
-        if not analysis_input.strip():
+        if project.is_empty():
             raise HTTPException(status_code=400, detail="No se encontraron archivos relevantes en el repositorio")
         
         # Crear converter genérico para componentes
         converter = DiagramFactory.create_converter('any', 'component')
-        diagram = converter.convert(analysis_input)
+        if request.stream:
+            return await build_streaming_response(converter, project)
+        response = await run_cpu(build_diagram_response, converter, project, request.max_elements)
         
         logger.info(f"Diagrama de componentes generado exitosamente para repo: {request.repo_id}")
-        return DiagramResponse(diagram=diagram)
+        return response
         
     except HTTPException:
         raise
@@ -528,6 +451,7 @@ async def generate_component_diagram(request: ComponentDiagramRequest):
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama de componentes: {str(e)}")
 
 @router.post("/generate-package-diagram", response_model=DiagramResponse)
+@profiled("github.generate_package_diagram")
 async def generate_package_diagram(request: PackageDiagramRequest):
     """
     Genera un diagrama UML de paquetes basado en la estructura y dependencias del repositorio.
@@ -535,106 +459,66 @@ async def generate_package_diagram(request: PackageDiagramRequest):
     """
     if request.repo_id not in cloned_repositories:
         raise HTTPException(status_code=404, detail="Repositorio no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
 
     repo_info = cloned_repositories[request.repo_id]
-    base_path = repo_info["temp_path"]
     
     try:
-        # Recolectar archivos con imports para análisis de dependencias
-        files_with_imports = collect_files_with_imports(base_path)
-        
-        # Analizar dependencias externas del proyecto si se solicita
-        external_deps = ""
-        if request.include_external_deps:
-            external_deps = analyze_project_dependencies(base_path)
-        
-        # Combinar información para el análisis
-        analysis_input = files_with_imports
-        if external_deps:
-            analysis_input += f"\n\n{external_deps}"
-        
-        # Si no hay suficiente información de imports, usar estructura de directorios
-        if not files_with_imports.strip():
-            directory_structure = generate_directory_structure(base_path)
-            analysis_input = directory_structure
-            if external_deps:
-                analysis_input += f"\n\n{external_deps}"
+        # Imports por archivo (o el árbol si no hay imports) y manifiestos del proyecto
+        project = await run_io(build_package_model, repo_info, request.include_external_deps)
         
         # Crear converter genérico para paquetes
         converter = DiagramFactory.create_converter('any', 'package')
-        diagram = converter.convert(analysis_input)
+        converter.transitive_reduction = request.transitive_reduction
+        if request.stream:
+            return await build_streaming_response(converter, project)
+        response = await run_cpu(build_diagram_response, converter, project, request.max_elements)
         
-        return DiagramResponse(diagram=diagram)
+        return response
         
     except Exception as e:
         logger.error(f"Error al generar diagrama de paquetes: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama de paquetes: {str(e)}")
 
 @router.post("/generate-auto-diagram", response_model=DiagramResponse)
+@profiled("github.generate_auto_diagram")
 async def generate_auto_diagram(request: AutoDiagramRequest):
     """
     🚀 Endpoint INTELIGENTE que detecta automáticamente el lenguaje principal del repositorio
     y genera el diagrama UML correspondiente sin necesidad de especificar el lenguaje manualmente.
     
-    - Analiza todos los archivos (.cs, .java, .php, .js, .ts, .py)
-    - Detecta el lenguaje predominante automáticamente
-    - Genera el diagrama con el convertidor apropiado
+    - Envía cada archivo (.cs, .java, .php, .js, .ts, .py) al convertidor de su lenguaje
+    - Convierte los lenguajes en paralelo
+    - Con varios lenguajes, 'diagram' es el del lenguaje principal y 'diagrams' tiene uno por lenguaje
     - Incluye estadísticas detalladas en los logs
     """
     if request.repo_id not in cloned_repositories:
         raise HTTPException(status_code=404, detail="Repositorio no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
+    validate_sequence_options(request.call_depth)
 
     repo_info = cloned_repositories[request.repo_id]
-    base_path = repo_info["temp_path"]
     
     try:
-        # 🎯 DETECCIÓN AUTOMÁTICA DE LENGUAJE
-        if request.auto_detect_language:
-            detected_language = detect_primary_language(base_path)
-            logger.info(f"🔍 Lenguaje detectado automáticamente: {detected_language}")
-        else:
-            detected_language = 'any'  # Usar genérico si no se quiere detección
-        
-        # 📊 Obtener estadísticas detalladas
-        stats = get_language_stats(base_path)
-        logger.info(f"📊 Estadísticas del repositorio: {stats}")
-        
-        # 📁 Leer código fuente
-        combined_code = ""
-        file_count = 0
-        
-        for root, _, files in os.walk(base_path):
-            for file in files:
-                if file.endswith((".cs", ".js", ".ts", ".py", ".java", ".php")):
-                    try:
-                        with open(os.path.join(root, file), "r", encoding="utf-8", errors="ignore") as f:
-                            combined_code += f.read() + "\n"
-                            file_count += 1
-                    except Exception as e:
-                        logger.warning(f"⚠️ Error al leer archivo {file}: {e}")
-        
-        logger.info(f"📖 Archivos procesados: {file_count}")
-        
-        # 🔧 Crear convertidor con lenguaje detectado
-        try:
-            converter = DiagramFactory.create_converter(detected_language, request.diagram_type)
-            logger.info(f"✅ Convertidor creado: {detected_language} + {request.diagram_type}")
-        except ValueError as ve:
-            # Si falla con el lenguaje detectado, usar genérico
-            logger.warning(f"⚠️ Fallo con {detected_language}, usando genérico: {ve}")
-            converter = DiagramFactory.create_converter('any', request.diagram_type)
-        
-        # 🎨 Generar diagrama
-        diagram = converter.convert(combined_code)
+        if request.stream:
+            return await auto_diagrams.build_auto_streaming_response(
+                repo_info, request.diagram_type, request.auto_detect_language,
+                entry_points=request.entry_points, call_depth=request.call_depth
+            )
+        response = await auto_diagrams.build_auto_response(
+            repo_info, request.diagram_type, request.auto_detect_language, request.max_elements,
+            entry_points=request.entry_points, call_depth=request.call_depth
+        )
         
-        logger.info(f"🎉 Diagrama generado exitosamente ({len(diagram)} caracteres)")
-        return DiagramResponse(diagram=diagram)
+        logger.info(f"🎉 Diagrama generado exitosamente ({len(response.diagram)} caracteres)")
+        return response
         
     except Exception as e:
         logger.error(f"❌ Error al generar diagrama automático: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama automático: {str(e)}")
 
 @router.get("/repo-language-stats/{repo_id}")
+@profiled("github.get_repo_language_stats")
 async def get_repo_language_stats(repo_id: str):
     """
     📊 Endpoint para obtener estadísticas detalladas de lenguajes en el repositorio.
@@ -644,12 +528,12 @@ async def get_repo_language_stats(repo_id: str):
         raise HTTPException(status_code=404, detail="Repositorio no encontrado")
 
     repo_info = cloned_repositories[repo_id]
-    base_path = repo_info["temp_path"]
     
     try:
         # Obtener estadísticas
-        stats = get_language_stats(base_path)
-        detected_language = detect_primary_language(base_path)
+        file_index = await run_io(get_file_index, repo_info)
+        stats = get_language_stats(file_index)
+        detected_language = detect_primary_language(file_index)
         
         return {
             "repo_id": repo_id,
@@ -0,0 +1,25 @@
+# app/infrastructure/api/routes/monitoring.py
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core import metrics
+
+router = APIRouter(tags=["monitoring"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas del pipeline de diagramas en formato de texto de Prometheus"""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desactivadas (METRICS_ENABLED)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/health")
+async def health():
+    """
+    Sonda de salud. Reporta cuánto tardó el event loop en volver a ejecutar el
+    handler tras cederle el control (lag de planificación, en milisegundos).
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.sleep(0)
+    return {"status": "ok", "loop_lag_ms": round((loop.time() - start) * 1000, 3)}
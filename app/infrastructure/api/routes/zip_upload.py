@@ -1,7 +1,7 @@
 # app/infrastructure/api/routes/zip_upload.py
 from fastapi import APIRouter, HTTPException, File, UploadFile
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from uuid import uuid4
 from tempfile import mkdtemp
 import logging
@@ -9,8 +9,25 @@ import os
 import re
 import zipfile
 import shutil
-from pathlib import Path
 from app.application.services.diagram_factory import DiagramFactory
+from app.core import metrics
+from app.core.profiler import profiled
+from app.application.services.converters.parallel_parser import source_input
+from app.application.services.converters.project_model import ProjectModel, TreeEntry
+from app.infrastructure.api.diagram_generation import (
+    AutoDiagramGenerator, DiagramResponse, apply_sequence_options, build_diagram_response,
+    build_streaming_response, validate_sequence_options, validate_stream_options
+)
+from app.infrastructure.services.cpu_pool import run_cpu
+from app.infrastructure.services.file_index import FileEntry, FileIndex
+from app.infrastructure.services.gitignore_matcher import DEFAULT_IGNORE_PATTERNS, GitignoreMatcher
+from app.infrastructure.services.io_pool import MAX_UPLOAD_BYTES, UploadTooLargeError, run_io, spool_upload
+from app.infrastructure.services.language_detector import LanguageDetector
+from app.infrastructure.services.repository_stats import (
+    GROUP_KEYS, METRIC_COLUMNS, StatsProfile, collect_statistics, comment_line_pattern
+)
+from app.infrastructure.services.project_model_builder import build_tree, collect_imports, collect_manifests
+from app.infrastructure.services.source_reader import read_source_text
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -34,6 +51,17 @@ class FileStat(BaseModel):
     loc: int
     is_test: bool
 
+class StatGroup(BaseModel):
+    key: str  # Extensión o directorio
+    files: int
+    test_files: int
+    lines: int
+    classes: int
+    functions: int
+    comments: int
+    loc: int
+    size: int  # Bytes
+
 class ProjectAnalysisResponse(BaseModel):
     total_files: int
     code_files: int
@@ -42,47 +70,49 @@ class ProjectAnalysisResponse(BaseModel):
     total_functions: int
     total_comments: int
     total_loc: int
-    files: List[FileStat]
+    files: List[FileStat]  # Todos los archivos, o la página pedida con offset/limit
+    groups: Optional[List[StatGroup]] = None  # Solo si se pide group_by
+    top_files: Optional[List[FileStat]] = None  # Solo si se pide top
 
 class ZipDiagramRequest(BaseModel):
     project_id: str
     diagram_type: str
     language: str
-
-class DiagramResponse(BaseModel):
-    diagram: str
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
+    entry_points: Optional[List[str]] = None  # Secuencia: funciones desde las que recorrer las llamadas
+    call_depth: Optional[int] = None  # Secuencia: niveles de llamadas a expandir
 
 class ZipComponentDiagramRequest(BaseModel):
     project_id: str
     include_external_deps: bool = True
     max_depth: int = None
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
 
 class ZipPackageDiagramRequest(BaseModel):
     project_id: str
     include_external_deps: bool = True
     group_by_layer: bool = True
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    transitive_reduction: bool = False  # Omitir dependencias implicadas por otras (a -> c si a -> b -> c)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
 
 class ZipAutoDiagramRequest(BaseModel):
     project_id: str
     diagram_type: str = "class"
     auto_detect_language: bool = True
-
-def extract_zip_file(uploaded_file: UploadFile) -> Dict:
-    """Extrae un archivo ZIP subido a un directorio temporal"""
+    max_elements: Optional[int] = None  # Presupuesto de elementos por diagrama (particiona si se indica)
+    stream: bool = False  # Emitir el PlantUML como text/plain en streaming (sin max_elements)
+    entry_points: Optional[List[str]] = None  # Secuencia: funciones desde las que recorrer las llamadas
+    call_depth: Optional[int] = None  # Secuencia: niveles de llamadas a expandir
+
+@metrics.timed("extract")
+def extract_zip_archive(zip_path: str, temp_path: str) -> int:
+    """Extrae un ZIP ya guardado en disco y retorna la cantidad de archivos extraídos"""
     try:
-        # Crear directorio temporal
-        temp_path = mkdtemp(prefix="zip_project_")
-        project_id = str(uuid4())
-        
-        # Guardar archivo ZIP temporalmente
-        zip_temp_path = os.path.join(temp_path, uploaded_file.filename)
-        
-        with open(zip_temp_path, "wb") as buffer:
-            shutil.copyfileobj(uploaded_file.file, buffer)
-        
-        # Extraer ZIP
         extracted_files = 0
-        with zipfile.ZipFile(zip_temp_path, 'r') as zip_ref:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
             # Filtrar archivos peligrosos
             safe_members = []
             for member in zip_ref.infolist():
@@ -99,317 +129,217 @@ def extract_zip_file(uploaded_file: UploadFile) -> Dict:
                     logger.warning(f"No se pudo extraer {member.filename}: {e}")
         
         # Eliminar archivo ZIP temporal
-        os.remove(zip_temp_path)
-        
-        return {
-            "project_id": project_id,
-            "temp_path": temp_path,
-            "original_filename": uploaded_file.filename,
-            "extracted_files": extracted_files
-        }
+        os.remove(zip_path)
+        return extracted_files
         
     except zipfile.BadZipFile:
         raise RuntimeError("El archivo no es un ZIP válido")
     except Exception as e:
         raise RuntimeError(f"Error al extraer el archivo ZIP: {e}")
 
-def parse_gitignore(path: str) -> List[str]:
-    """Parsea archivo .gitignore si existe"""
-    ignore_path = os.path.join(path, ".gitignore")
-    patterns = []
-    if os.path.exists(ignore_path):
-        try:
-            with open(ignore_path, "r", encoding="utf-8", errors="ignore") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        patterns.append(line)
-        except Exception as e:
-            logger.warning(f"Error al leer .gitignore: {e}")
-    
-    # Agregar patrones por defecto para proyectos
-    default_patterns = [
-        "node_modules", "__pycache__", "*.pyc", ".git", 
-        "bin", "obj", "target", "build", "dist", ".DS_Store"
-    ]
-    patterns.extend(default_patterns)
-    
-    return patterns
-
-def is_ignored(path: str, patterns: List[str]) -> bool:
-    """Verifica si un path debe ser ignorado"""
-    for pattern in patterns:
-        if Path(path).match(pattern) or pattern in path:
-            return True
-    return False
-
-def analyze_zip_project(temp_path: str) -> ProjectAnalysisResponse:
-    """Analiza el proyecto extraído del ZIP"""
-    valid_extensions = (".ts", ".tsx", ".js", ".py", ".java", ".cs", ".php", ".go", ".rs", ".cpp", ".h")
-    ignore_patterns = parse_gitignore(temp_path)
-    files = []
-    total_lines = 0
-    total_classes = 0
-    total_functions = 0
-    total_comments = 0
-    total_loc = 0
-
-    for root, _, filenames in os.walk(temp_path):
-        for fname in filenames:
-            full_path = os.path.join(root, fname)
-            rel_path = os.path.relpath(full_path, temp_path)
-            
-            if is_ignored(rel_path, ignore_patterns):
-                continue
+async def extract_zip_file(uploaded_file: UploadFile) -> Dict:
+    """
+    Guarda el ZIP subido por bloques (cortando si supera MAX_UPLOAD_BYTES) y lo
+    extrae a un directorio temporal; todo el trabajo de disco va al pool de E/S.
+    """
+    temp_path = await run_io(mkdtemp, prefix="zip_project_")
+    project_id = str(uuid4())
+    zip_temp_path = os.path.join(temp_path, os.path.basename(uploaded_file.filename))
+    try:
+        await spool_upload(uploaded_file, zip_temp_path)
+        extracted_files = await run_io(extract_zip_archive, zip_temp_path, temp_path)
+    except BaseException:
+        await run_io(shutil.rmtree, temp_path, True)
+        raise
+
+    return {
+        "project_id": project_id,
+        "temp_path": temp_path,
+        "original_filename": uploaded_file.filename,
+        "extracted_files": extracted_files
+    }
 
-            if fname.endswith(valid_extensions):
-                try:
-                    with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                        lines = content.splitlines()
-                        
-                        # Contar clases y funciones
-                        classes = len(re.findall(r'\b(class|interface|struct)\s+\w+', content, re.IGNORECASE))
-                        functions = len(re.findall(r'\b(def|function|public\s+\w+\s+\w+|private\s+\w+\s+\w+|protected\s+\w+\s+\w+)\b', content))
-                        
-                        # Contar comentarios
-                        comments = len([l for l in lines if l.strip().startswith(("#", "//", "/*", "*", "<!--"))])
-                        
-                        # Líneas de código (sin comentarios ni líneas vacías)
-                        loc = len([l for l in lines if l.strip() and not l.strip().startswith(("#", "//", "/*", "*", "<!--"))])
-                        
-                        # Detectar archivos de test
-                        is_test = bool(re.search(r'(test_|\.spec\.|\.test\.|_test\.|Test\.)', fname.lower())) or "test" in rel_path.lower()
-
-                        files.append(FileStat(
-                            path=rel_path,
-                            size_kb=round(os.path.getsize(full_path) / 1024, 2),
-                            classes=classes,
-                            functions=functions,
-                            extension=os.path.splitext(fname)[1],
-                            comments=comments,
-                            loc=loc,
-                            is_test=is_test
-                        ))
-
-                        total_lines += len(lines)
-                        total_classes += classes
-                        total_functions += functions
-                        total_comments += comments
-                        total_loc += loc
-                        
-                except Exception as e:
-                    logger.warning(f"No se pudo analizar {full_path}: {e}")
+def load_gitignore(path: str) -> GitignoreMatcher:
+    """Compila los .gitignore del proyecto (raíz y anidados) más los patrones por defecto"""
+    return GitignoreMatcher(path, DEFAULT_IGNORE_PATTERNS)
+
+# Qué mide /analyze-zip; los patrones de bytes se escanean sin decodificar los archivos
+ANALYSIS_PROFILE = StatsProfile(
+    extensions=(".ts", ".tsx", ".js", ".py", ".java", ".cs", ".php", ".go", ".rs", ".cpp", ".h"),
+    class_pattern=re.compile(rb'\b(class|interface|struct)\s+\w+', re.IGNORECASE),
+    function_pattern=re.compile(rb'\b(def|function|public\s+\w+\s+\w+|private\s+\w+\s+\w+|protected\s+\w+\s+\w+)\b'),
+    line_pattern=comment_line_pattern((b"#", b"//", b"/*", b"*", b"<!--")),
+    test_pattern=re.compile(r'(test_|\.spec\.|\.test\.|_test\.|Test\.)')
+)
+
+def validate_analysis_options(offset: int, limit: Optional[int], group_by: Optional[str],
+                              top: Optional[int], top_by: str) -> None:
+    """Rechaza con 400 los parámetros de análisis inválidos"""
+    if offset < 0 or (limit is not None and limit < 0) or (top is not None and top < 0):
+        raise HTTPException(status_code=400, detail="offset, limit y top no pueden ser negativos")
+    if group_by and group_by not in GROUP_KEYS:
+        raise HTTPException(status_code=400, detail=f"group_by debe ser uno de: {', '.join(GROUP_KEYS)}")
+    if top_by not in METRIC_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"top_by debe ser uno de: {', '.join(METRIC_COLUMNS)}")
+
+def analyze_zip_project(temp_path: str, offset: int = 0, limit: Optional[int] = None,
+                        include_files: bool = True, group_by: Optional[str] = None,
+                        directory_depth: Optional[int] = None, top: Optional[int] = None,
+                        top_by: str = "loc") -> ProjectAnalysisResponse:
+    """Analiza el proyecto extraído del ZIP con el motor de estadísticas"""
+    stats = collect_statistics(temp_path, load_gitignore(temp_path).walk(), ANALYSIS_PROFILE)
+    totals = stats.totals()
+    files = [FileStat(**stats.row(i)) for i in stats.page(offset, limit)] if include_files else []
 
     return ProjectAnalysisResponse(
-        total_files=len(files),
-        code_files=len(files),
-        total_lines=total_lines,
-        total_classes=total_classes,
-        total_functions=total_functions,
-        total_comments=total_comments,
-        total_loc=total_loc,
-        files=files
+        total_files=totals["files"],
+        code_files=totals["files"],
+        total_lines=totals["lines"],
+        total_classes=totals["classes"],
+        total_functions=totals["functions"],
+        total_comments=totals["comments"],
+        total_loc=totals["loc"],
+        files=files,
+        groups=[StatGroup(**group) for group in stats.group_by(group_by, directory_depth)] if group_by else None,
+        top_files=[FileStat(**stats.row(i)) for i in stats.top(top, top_by)] if top else None
     )
 
-def generate_directory_structure(base_path: str, max_depth: int = None) -> str:
-    """Genera representación de la estructura de directorios"""
-    structure_lines = []
-    ignore_patterns = parse_gitignore(base_path)
-    
-    for root, dirs, files in os.walk(base_path):
-        level = root.replace(base_path, '').count(os.sep)
-        if max_depth and level > max_depth:
-            continue
-            
-        rel_path = os.path.relpath(root, base_path)
-        if rel_path == '.':
-            rel_path = ''
-            
-        if rel_path and is_ignored(rel_path, ignore_patterns):
-            continue
-            
-        if rel_path:
-            structure_lines.append(f"{rel_path}/")
-            
-        for file in files:
-            file_path = os.path.join(rel_path, file) if rel_path else file
-            if is_ignored(file_path, ignore_patterns):
-                continue
-                
-            if file.endswith(('.py', '.js', '.ts', '.java', '.cs', '.php', '.go', '.rs', '.cpp', '.h',
-                           '.json', '.xml', '.yml', '.yaml', '.toml', '.cfg', '.ini')):
-                structure_lines.append(file_path)
+# Árbol de los diagramas de componentes/paquetes
+TREE_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.cs', '.php', '.go', '.rs', '.cpp', '.h',
+                   '.json', '.xml', '.yml', '.yaml', '.toml', '.cfg', '.ini')
+IMPORT_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.cs', '.php', '.go', '.rs')
+MANIFEST_NAMES = (
+    'package.json', 'requirements.txt', 'pom.xml', 'build.gradle', 'build.gradle.kts',
+    'composer.json', 'Cargo.toml', 'go.mod', 'setup.py', 'pyproject.toml', 'Pipfile', 'packages.config',
+    # Lockfiles: fijan versiones y aportan las dependencias directas si falta el manifiesto
+    'package-lock.json', 'yarn.lock', 'poetry.lock', 'Pipfile.lock', 'composer.lock', 'Cargo.lock'
+)
+MANIFEST_SUFFIXES = ('.csproj', '.sln')  # En cualquier nivel del proyecto
+MANIFEST_MAX_SIZE = 5 * 1024 * 1024  # Los manifiestos más grandes se omiten
+
+@metrics.timed("walk", step="directory_structure")
+def build_project_tree(file_index: FileIndex, max_depth: Optional[int] = None) -> List[TreeEntry]:
+    """Árbol de directorios y archivos relevantes del proyecto"""
+    return build_tree(file_index, TREE_EXTENSIONS, max_depth or None)
+
+def build_component_model(project_info: Dict, max_depth: Optional[int], include_external_deps: bool) -> ProjectModel:
+    """Modelo del diagrama de componentes: árbol del proyecto y, opcionalmente, manifiestos"""
+    file_index = get_file_index(project_info)
+    project = ProjectModel(tree=build_project_tree(file_index, max_depth))
+    if include_external_deps:
+        project.manifests = collect_manifests(file_index, MANIFEST_NAMES, MANIFEST_SUFFIXES, max_size=MANIFEST_MAX_SIZE)
+    return project
+
+def build_package_model(project_info: Dict, include_external_deps: bool) -> ProjectModel:
+    """
+    Modelo del diagrama de paquetes: imports por archivo o, si ningún archivo
+    tiene imports, el árbol del proyecto; opcionalmente, manifiestos.
+    """
+    file_index = get_file_index(project_info)
+    project = ProjectModel(sources=collect_imports(file_index, IMPORT_EXTENSIONS))
+    if not project.sources:
+        project.tree = build_project_tree(file_index)
+    if include_external_deps:
+        project.manifests = collect_manifests(file_index, MANIFEST_NAMES, MANIFEST_SUFFIXES, max_size=MANIFEST_MAX_SIZE)
+    return project
+
+# Mapeo de extensiones a lenguajes (detección) y a etiquetas legibles (estadísticas)
+EXTENSION_TO_LANGUAGE = {
+    '.cs': 'csharp',
+    '.java': 'java',
+    '.php': 'php',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.py': 'python',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.cpp': 'cpp',
+    '.c': 'c'
+}
+EXTENSION_TO_LABEL = {
+    '.cs': 'C#', '.java': 'Java', '.php': 'PHP',
+    '.js': 'JavaScript', '.ts': 'TypeScript', '.py': 'Python',
+    '.go': 'Go', '.rs': 'Rust', '.cpp': 'C++', '.c': 'C'
+}
+SOURCE_EXTENSIONS = (".cs", ".js", ".ts", ".py", ".java", ".php", ".go", ".rs")
+
+language_detector = LanguageDetector(EXTENSION_TO_LANGUAGE)
+
+def get_file_index(project_info: Dict) -> FileIndex:
+    """Retorna el índice de archivos del proyecto, construido una sola vez y cacheado"""
+    file_index = project_info.get("file_index")
+    if file_index is None:
+        base_path = project_info["temp_path"]
+        file_index = FileIndex.build(base_path, load_gitignore(base_path))
+        project_info["file_index"] = file_index
+    return file_index
+
+@metrics.timed("read")
+def read_source_files(file_index: FileIndex, progress: Optional[Callable] = None,
+                      entries: Optional[List[FileEntry]] = None) -> List[str]:
+    """Lee los archivos de código del índice"""
+    code_parts = []
+    if entries is None:
+        entries = file_index.files_with_extensions(SOURCE_EXTENSIONS)
+    for i, entry in enumerate(entries):
+        if progress:
+            progress("reading", i, len(entries))
+        try:
+            code_parts.append(read_source_text(file_index.absolute_path(entry)) + "\n")
+        except Exception as e:
+            logger.warning(f"Error al leer archivo {entry.path}: {e}")
+    metrics.inc("uml_files_read_total", len(code_parts))
+    metrics.inc("uml_bytes_read_total", sum(len(part) for part in code_parts))
+    return code_parts
+
+def prepare_auto_diagram(project_info: Dict, diagram_type: str, auto_detect_language: bool = True,
+                         progress: Optional[Callable] = None):
+    """Detecta el lenguaje, lee el código y crea el convertidor. Retorna (convertidor, código)"""
+    if progress:
+        progress("indexing")
+    file_index = get_file_index(project_info)
     
-    return '\n'.join(structure_lines)
-
-def analyze_project_dependencies(base_path: str) -> str:
-    """Analiza dependencias del proyecto"""
-    config_content = []
-    config_files = [
-        'package.json', 'requirements.txt', 'pom.xml', 'build.gradle', 
-        'composer.json', 'Cargo.toml', 'go.mod', 'setup.py', 'pyproject.toml',
-        '*.csproj', '*.sln'
-    ]
+    if auto_detect_language:
+        detected_language = detect_primary_language(file_index)
+        logger.info(f"🔍 Lenguaje detectado automáticamente: {detected_language}")
+    else:
+        detected_language = 'any'
     
-    for config_file in config_files:
-        if '*' in config_file:
-            # Manejar patrones con wildcard
-            pattern = config_file.replace('*', '')
-            for root, _, files in os.walk(base_path):
-                for file in files:
-                    if file.endswith(pattern):
-                        config_path = os.path.join(root, file)
-                        try:
-                            with open(config_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                                config_content.append(f"---CONFIG-{file}---")
-                                config_content.append(content)
-                        except Exception as e:
-                            logger.warning(f"Error al leer {file}: {e}")
-        else:
-            config_path = os.path.join(base_path, config_file)
-            if os.path.exists(config_path):
-                try:
-                    with open(config_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        config_content.append(f"---CONFIG-{config_file}---")
-                        config_content.append(content)
-                except Exception as e:
-                    logger.warning(f"Error al leer {config_file}: {e}")
+    stats = get_language_stats(file_index)
+    logger.info(f"📊 Estadísticas del proyecto: {stats}")
     
-    return '\n'.join(config_content) if config_content else ""
-
-def collect_files_with_imports(base_path: str, max_files: int = 50) -> str:
-    """Recolecta archivos con sus imports"""
-    files_content = []
-    ignore_patterns = parse_gitignore(base_path)
-    file_count = 0
+    code_parts = read_source_files(file_index, progress)
+    logger.info(f"📖 Archivos procesados: {len(code_parts)}")
     
-    for root, _, files in os.walk(base_path):
-        if file_count >= max_files:
-            break
-            
-        for file in files:
-            if file_count >= max_files:
-                break
-                
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, base_path)
-            
-            if is_ignored(rel_path, ignore_patterns):
-                continue
-                
-            if file.endswith(('.py', '.js', '.ts', '.java', '.cs', '.php', '.go', '.rs')):
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        lines = content.split('\n')
-                        import_lines = []
-                        
-                        for line in lines[:50]:
-                            if any(keyword in line for keyword in [
-                                'import ', 'from ', 'include ', 'require', 'using ', 'package '
-                            ]):
-                                import_lines.append(line)
-                        
-                        if import_lines:
-                            files_content.append(f"---FILE---{rel_path}")
-                            files_content.append('\n'.join(import_lines))
-                            file_count += 1
-                            
-                except Exception as e:
-                    logger.warning(f"Error al leer {file}: {e}")
+    try:
+        converter = DiagramFactory.create_converter(detected_language, diagram_type)
+        logger.info(f"✅ Convertidor creado: {detected_language} + {diagram_type}")
+    except ValueError as ve:
+        logger.warning(f"⚠️ Fallo con {detected_language}, usando genérico: {ve}")
+        converter = DiagramFactory.create_converter('any', diagram_type)
     
-    return '\n'.join(files_content)
+    if progress:
+        progress("converting", len(code_parts), len(code_parts))
+    return converter, source_input(converter, code_parts)
 
-def detect_primary_language(base_path: str) -> str:
+def detect_primary_language(file_index: FileIndex) -> str:
     """Detecta automáticamente el lenguaje principal"""
-    extension_to_language = {
-        '.cs': 'csharp',
-        '.java': 'java', 
-        '.php': 'php',
-        '.js': 'javascript',
-        '.ts': 'typescript',
-        '.py': 'python',
-        '.go': 'go',
-        '.rs': 'rust',
-        '.cpp': 'cpp',
-        '.c': 'c'
-    }
-    
-    language_counts = {
-        'csharp': 0, 'java': 0, 'php': 0, 'javascript': 0, 
-        'typescript': 0, 'python': 0, 'go': 0, 'rust': 0, 'cpp': 0, 'c': 0
-    }
-    
-    ignore_patterns = parse_gitignore(base_path)
-    
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, base_path)
-            
-            if is_ignored(rel_path, ignore_patterns):
-                continue
-            
-            _, ext = os.path.splitext(file)
-            ext = ext.lower()
-            
-            if ext in extension_to_language:
-                language = extension_to_language[ext]
-                language_counts[language] += 1
-    
-    if sum(language_counts.values()) == 0:
-        return 'any'
-    
-    primary_language = max(language_counts, key=language_counts.get)
-    total_files = sum(language_counts.values())
-    max_count = language_counts[primary_language]
-    
-    # Combinar JS y TS
-    if language_counts['javascript'] > 0 and language_counts['typescript'] > 0:
-        combined_js = language_counts['javascript'] + language_counts['typescript']
-        if combined_js > max_count:
-            return 'javascript'
-    
-    if total_files < 3 or max_count / total_files < 0.4:
-        return 'any'
-    
-    logger.info(f"Lenguaje detectado: {primary_language} ({max_count}/{total_files} archivos)")
+    primary_language = language_detector.detect(file_index)
+    logger.info(f"Lenguaje detectado: {primary_language}")
     return primary_language
 
-def get_language_stats(base_path: str) -> Dict[str, int]:
+def get_language_stats(file_index: FileIndex) -> Dict[str, int]:
     """Obtiene estadísticas de lenguajes"""
-    extension_to_language = {
-        '.cs': 'C#', '.java': 'Java', '.php': 'PHP',
-        '.js': 'JavaScript', '.ts': 'TypeScript', '.py': 'Python',
-        '.go': 'Go', '.rs': 'Rust', '.cpp': 'C++', '.c': 'C'
-    }
-    
-    language_counts = {}
-    ignore_patterns = parse_gitignore(base_path)
-    
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, base_path)
-            
-            if is_ignored(rel_path, ignore_patterns):
-                continue
-            
-            _, ext = os.path.splitext(file)
-            ext = ext.lower()
-            
-            if ext in extension_to_language:
-                language = extension_to_language[ext]
-                language_counts[language] = language_counts.get(language, 0) + 1
-    
-    return language_counts
+    return language_detector.language_stats(file_index, EXTENSION_TO_LABEL)
 
 # ENDPOINTS
 
+auto_diagrams = AutoDiagramGenerator(
+    get_file_index, read_source_files, prepare_auto_diagram, SOURCE_EXTENSIONS, language_detector
+)
+
 @router.post("/upload-zip", response_model=ZipUploadResponse)
+@profiled("zip.upload_zip_project")
 async def upload_zip_project(file: UploadFile = File(...)):
     """
     📁 Sube y extrae un proyecto desde un archivo ZIP
@@ -417,11 +347,12 @@ async def upload_zip_project(file: UploadFile = File(...)):
     if not file.filename.endswith('.zip'):
         raise HTTPException(status_code=400, detail="Solo se permiten archivos ZIP")
     
-    if file.size > 50 * 1024 * 1024:  # 50MB limit
-        raise HTTPException(status_code=400, detail="El archivo es demasiado grande (máximo 50MB)")
+    max_mb = MAX_UPLOAD_BYTES // (1024 * 1024)
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"El archivo es demasiado grande (máximo {max_mb}MB)")
     
     try:
-        project_info = extract_zip_file(file)
+        project_info = await extract_zip_file(file)
         uploaded_projects[project_info["project_id"]] = project_info
 
         return ZipUploadResponse(
@@ -431,189 +362,165 @@ async def upload_zip_project(file: UploadFile = File(...)):
             original_filename=project_info["original_filename"],
             extracted_files=project_info["extracted_files"]
         )
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail=f"El archivo es demasiado grande (máximo {max_mb}MB)")
     except Exception as e:
         logger.error(f"Error al subir proyecto ZIP: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al procesar archivo ZIP: {str(e)}")
 
 class ZipAnalysisRequest(BaseModel):
     project_id: str
+    offset: int = 0
+    limit: Optional[int] = None  # Tamaño de página del listado de archivos (todos si no se indica)
+    include_files: bool = True  # False omite el listado por archivo
+    group_by: Optional[str] = None  # 'extension' o 'directory'
+    directory_depth: Optional[int] = None  # Niveles de directorio al agrupar por 'directory'
+    top: Optional[int] = None  # Cantidad de archivos del top-N
+    top_by: str = "loc"  # Métrica del top-N
 
 @router.post("/analyze-zip", response_model=ProjectAnalysisResponse)
+@profiled("zip.analyze_zip_project_endpoint")
 async def analyze_zip_project_endpoint(request: ZipAnalysisRequest):
     """
     📊 Analiza un proyecto extraído de ZIP
     """
     if request.project_id not in uploaded_projects:
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    validate_analysis_options(request.offset, request.limit, request.group_by, request.top, request.top_by)
 
     temp_path = uploaded_projects[request.project_id]["temp_path"]
 
     try:
-        return analyze_zip_project(temp_path)
+        return await run_io(
+            analyze_zip_project, temp_path, request.offset, request.limit, request.include_files,
+            request.group_by, request.directory_depth, request.top, request.top_by
+        )
     except Exception as e:
         logger.error(f"Error al analizar proyecto: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al analizar el proyecto: {str(e)}")
 
 @router.post("/generate-zip-diagram", response_model=DiagramResponse)
+@profiled("zip.generate_zip_diagram")
 async def generate_zip_diagram(request: ZipDiagramRequest):
     """
     🎨 Genera diagrama UML desde proyecto ZIP
     """
     if request.project_id not in uploaded_projects:
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
+    validate_sequence_options(request.call_depth)
 
     project_info = uploaded_projects[request.project_id]
-    base_path = project_info["temp_path"]
+    file_index = await run_io(get_file_index, project_info)
     
     # Detección automática de lenguaje
     language = request.language
     if language.lower() in ['auto', 'detect', '']:
-        language = detect_primary_language(base_path)
+        language = detect_primary_language(file_index)
         logger.info(f"Lenguaje detectado automáticamente: {language}")
     
-    stats = get_language_stats(base_path)
+    stats = get_language_stats(file_index)
     logger.info(f"Estadísticas del proyecto: {stats}")
     
-    combined_code = ""
-    
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.endswith((".cs", ".js", ".ts", ".py", ".java", ".php", ".go", ".rs")):
-                try:
-                    with open(os.path.join(root, file), "r", encoding="utf-8", errors="ignore") as f:
-                        combined_code += f.read() + "\n"
-                except Exception as e:
-                    logger.warning(f"Error al leer archivo {file}: {e}")
+    code_parts = await run_io(read_source_files, file_index)
 
     try:
         converter = DiagramFactory.create_converter(language, request.diagram_type)
-        diagram = converter.convert(combined_code)
-        return DiagramResponse(diagram=diagram)
+        apply_sequence_options(converter, request.entry_points, request.call_depth)
+        code = source_input(converter, code_parts)
+        if request.stream:
+            return await build_streaming_response(converter, code)
+        return await run_cpu(build_diagram_response, converter, code, request.max_elements)
     except Exception as e:
         logger.error(f"Error al generar diagrama: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama: {str(e)}")
 
 @router.post("/generate-zip-component-diagram", response_model=DiagramResponse)
+@profiled("zip.generate_zip_component_diagram")
 async def generate_zip_component_diagram(request: ZipComponentDiagramRequest):
     """
     🏗️ Genera diagrama de componentes desde proyecto ZIP
     """
     if request.project_id not in uploaded_projects:
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
 
     project_info = uploaded_projects[request.project_id]
-    base_path = project_info["temp_path"]
     
     try:
-        directory_structure = generate_directory_structure(base_path, request.max_depth)
-        
-        project_deps = ""
-        if request.include_external_deps:
-            project_deps = analyze_project_dependencies(base_path)
-        
-        analysis_input = directory_structure
-        if project_deps:
-            analysis_input += f"\n\n{project_deps}"
+        project = await run_io(build_component_model, project_info, request.max_depth, request.include_external_deps)
         
         converter = DiagramFactory.create_converter('any', 'component')
-        diagram = converter.convert(analysis_input)
+        if request.stream:
+            return await build_streaming_response(converter, project)
+        response = await run_cpu(build_diagram_response, converter, project, request.max_elements)
         
-        return DiagramResponse(diagram=diagram)
+        return response
         
     except Exception as e:
         logger.error(f"Error al generar diagrama de componentes: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama de componentes: {str(e)}")
 
 @router.post("/generate-zip-package-diagram", response_model=DiagramResponse)
+@profiled("zip.generate_zip_package_diagram")
 async def generate_zip_package_diagram(request: ZipPackageDiagramRequest):
     """
     📦 Genera diagrama de paquetes desde proyecto ZIP
     """
     if request.project_id not in uploaded_projects:
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
 
     project_info = uploaded_projects[request.project_id]
-    base_path = project_info["temp_path"]
     
     try:
-        files_with_imports = collect_files_with_imports(base_path)
-        
-        external_deps = ""
-        if request.include_external_deps:
-            external_deps = analyze_project_dependencies(base_path)
-        
-        analysis_input = files_with_imports
-        if external_deps:
-            analysis_input += f"\n\n{external_deps}"
-        
-        if not files_with_imports.strip():
-            directory_structure = generate_directory_structure(base_path)
-            analysis_input = directory_structure
-            if external_deps:
-                analysis_input += f"\n\n{external_deps}"
+        project = await run_io(build_package_model, project_info, request.include_external_deps)
         
         converter = DiagramFactory.create_converter('any', 'package')
-        diagram = converter.convert(analysis_input)
+        converter.transitive_reduction = request.transitive_reduction
+        if request.stream:
+            return await build_streaming_response(converter, project)
+        response = await run_cpu(build_diagram_response, converter, project, request.max_elements)
         
-        return DiagramResponse(diagram=diagram)
+        return response
         
     except Exception as e:
         logger.error(f"Error al generar diagrama de paquetes: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama de paquetes: {str(e)}")
 
 @router.post("/generate-zip-auto-diagram", response_model=DiagramResponse)
+@profiled("zip.generate_zip_auto_diagram")
 async def generate_zip_auto_diagram(request: ZipAutoDiagramRequest):
     """
     🚀 Genera diagrama automático desde proyecto ZIP con detección de lenguaje
     """
     if request.project_id not in uploaded_projects:
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    validate_stream_options(request.stream, request.max_elements)
+    validate_sequence_options(request.call_depth)
 
     project_info = uploaded_projects[request.project_id]
-    base_path = project_info["temp_path"]
     
     try:
-        if request.auto_detect_language:
-            detected_language = detect_primary_language(base_path)
-            logger.info(f"🔍 Lenguaje detectado automáticamente: {detected_language}")
-        else:
-            detected_language = 'any'
-        
-        stats = get_language_stats(base_path)
-        logger.info(f"📊 Estadísticas del proyecto: {stats}")
-        
-        combined_code = ""
-        file_count = 0
-        
-        for root, _, files in os.walk(base_path):
-            for file in files:
-                if file.endswith((".cs", ".js", ".ts", ".py", ".java", ".php", ".go", ".rs")):
-                    try:
-                        with open(os.path.join(root, file), "r", encoding="utf-8", errors="ignore") as f:
-                            combined_code += f.read() + "\n"
-                            file_count += 1
-                    except Exception as e:
-                        logger.warning(f"⚠️ Error al leer archivo {file}: {e}")
-        
-        logger.info(f"📖 Archivos procesados: {file_count}")
-        
-        try:
-            converter = DiagramFactory.create_converter(detected_language, request.diagram_type)
-            logger.info(f"✅ Convertidor creado: {detected_language} + {request.diagram_type}")
-        except ValueError as ve:
-            logger.warning(f"⚠️ Fallo con {detected_language}, usando genérico: {ve}")
-            converter = DiagramFactory.create_converter('any', request.diagram_type)
-        
-        diagram = converter.convert(combined_code)
+        if request.stream:
+            return await auto_diagrams.build_auto_streaming_response(
+                project_info, request.diagram_type, request.auto_detect_language,
+                entry_points=request.entry_points, call_depth=request.call_depth
+            )
+        response = await auto_diagrams.build_auto_response(
+            project_info, request.diagram_type, request.auto_detect_language, request.max_elements,
+            entry_points=request.entry_points, call_depth=request.call_depth
+        )
         
-        logger.info(f"🎉 Diagrama generado exitosamente ({len(diagram)} caracteres)")
-        return DiagramResponse(diagram=diagram)
+        logger.info(f"🎉 Diagrama generado exitosamente ({len(response.diagram)} caracteres)")
+        return response
         
     except Exception as e:
         logger.error(f"❌ Error al generar diagrama automático: {e}")
         raise HTTPException(status_code=500, detail=f"Fallo al generar diagrama automático: {str(e)}")
 
 @router.get("/zip-language-stats/{project_id}")
+@profiled("zip.get_zip_language_stats")
 async def get_zip_language_stats(project_id: str):
     """
     📊 Obtiene estadísticas de lenguajes del proyecto ZIP
@@ -622,11 +529,11 @@ async def get_zip_language_stats(project_id: str):
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
 
     project_info = uploaded_projects[project_id]
-    base_path = project_info["temp_path"]
     
     try:
-        stats = get_language_stats(base_path)
-        detected_language = detect_primary_language(base_path)
+        file_index = await run_io(get_file_index, project_info)
+        stats = get_language_stats(file_index)
+        detected_language = detect_primary_language(file_index)
         
         return {
             "project_id": project_id,
@@ -656,7 +563,7 @@ async def cleanup_zip_project(project_id: str):
         
         # Eliminar directorio temporal
         if os.path.exists(temp_path):
-            shutil.rmtree(temp_path)
+            await run_io(shutil.rmtree, temp_path)
         
         # Remover del diccionario
         del uploaded_projects[project_id]
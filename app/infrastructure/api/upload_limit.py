@@ -0,0 +1,63 @@
+# app/infrastructure/api/upload_limit.py
+from fastapi.responses import JSONResponse
+from app.infrastructure.services.io_pool import MAX_UPLOAD_BYTES, UploadTooLargeError
+
+
+class UploadLimitMiddleware:
+    """
+    Middleware ASGI que limita el cuerpo de las subidas de ZIP en el stream de
+    recepción. Rechaza con 413 las que declaran un Content-Length mayor al máximo
+    sin leer el cuerpo, y corta las que no lo declaran (chunked) en cuanto los
+    bytes recibidos lo superan, antes de que el parser multipart termine de
+    volcar el archivo a disco.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES, path_suffix: str = "/upload-zip"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = rejected = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLargeError(f"El cuerpo supera el máximo de {self.max_bytes} bytes")
+            return message
+
+        async def guarded_send(message):
+            nonlocal rejected
+            if not exceeded:
+                await send(message)
+            elif not rejected:
+                # La aplicación convirtió el corte en su propia respuesta de error: se reemplaza por el 413
+                rejected = True
+                await self._reject(scope, receive, send)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            if not rejected:
+                await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"El archivo es demasiado grande (máximo {self.max_bytes // (1024 * 1024)}MB)"}
+        )
+        await response(scope, receive, send)
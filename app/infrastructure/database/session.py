@@ -3,6 +3,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from .base import Base
+from app.core import metrics
 from dotenv import load_dotenv
 import os
 
@@ -14,10 +15,14 @@ SQLALCHEMY_DATABASE_URL = (
     f"{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
 )
 
+# Modo SSL de asyncpg (require, prefer, disable...). Un Postgres local suele usar "disable"
+DB_SSL = os.getenv("DB_SSL", "require")
+DB_ECHO = os.getenv("DB_ECHO", "true").lower() in ("1", "true", "yes")
+
 
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
-    echo=True,
+    echo=DB_ECHO,
     pool_size=5,         # Reducir el tamaño del pool
     max_overflow=10,      # Reducir el overflow máximo
     pool_timeout=60,     # Aumentar el tiempo de espera
@@ -25,7 +30,7 @@ engine = create_async_engine(
     pool_recycle=1800,   # Reciclar conexiones cada 30 minutos
     # ✅ Configuración para manejar cambios de schema
     connect_args={
-        "ssl": "require", 
+        "ssl": DB_SSL, 
         "timeout": 60.0, 
         "command_timeout": 60.0,
         "server_settings": {
@@ -35,6 +40,8 @@ engine = create_async_engine(
     }
 )
 
+# Tiempos y conteo de consultas SQL (solo con METRICS_ENABLED)
+metrics.instrument_engine(engine.sync_engine)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
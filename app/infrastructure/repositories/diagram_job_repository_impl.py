@@ -0,0 +1,165 @@
+# app/infrastructure/repositories/diagram_job_repository_impl.py
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from app.domain.entities.diagram_job import DiagramJob, EstadoJob
+from app.domain.repositories.diagram_job_repository import DiagramJobRepository
+
+# Debe apuntar al mismo archivo en todos los workers que comparten los trabajos
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(tempfile.gettempdir(), "uml-jobs", "diagram_jobs.db"))
+
+_COLUMNS = (
+    "id", "source", "source_id", "base_path", "diagram_type", "auto_detect_language",
+    "max_elements", "estado", "fase", "archivos_procesados", "archivos_totales",
+    "resultado", "error", "fecha_creacion", "fecha_actualizacion", "entry_points", "call_depth",
+)
+
+
+class DiagramJobRepositorySQLite(DiagramJobRepository):
+    """
+    Tabla persistente de trabajos en SQLite (módulo sqlite3 de la biblioteca estándar).
+    La conexión se comparte entre el event loop y los hilos del pool de trabajos,
+    por lo que todas las operaciones se serializan con un lock. Entre procesos, las
+    transiciones de estado son actualizaciones condicionales (update_if), así dos
+    workers nunca reclaman el mismo trabajo.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS diagram_jobs (
+                id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                source_id TEXT NOT NULL,
+                base_path TEXT NOT NULL,
+                diagram_type TEXT NOT NULL,
+                auto_detect_language INTEGER NOT NULL,
+                max_elements INTEGER,
+                estado TEXT NOT NULL,
+                fase TEXT NOT NULL,
+                archivos_procesados INTEGER NOT NULL DEFAULT 0,
+                archivos_totales INTEGER NOT NULL DEFAULT 0,
+                resultado TEXT,
+                error TEXT,
+                fecha_creacion TEXT NOT NULL,
+                fecha_actualizacion TEXT NOT NULL,
+                entry_points TEXT,
+                call_depth INTEGER
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_diagram_jobs_estado ON diagram_jobs (estado)")
+        self._conn.commit()
+
+    def save(self, job: DiagramJob) -> None:
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO diagram_jobs ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                self._to_row(job),
+            )
+            self._conn.commit()
+
+    def get_by_id(self, job_id: str) -> Optional[DiagramJob]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM diagram_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_entity(row) if row else None
+
+    def update(self, job: DiagramJob) -> None:
+        assignments = ", ".join(f"{column} = ?" for column in _COLUMNS[1:])
+        row = self._to_row(job)
+        with self._lock:
+            self._conn.execute(f"UPDATE diagram_jobs SET {assignments} WHERE id = ?", row[1:] + (row[0],))
+            self._conn.commit()
+
+    def update_if(self, job: DiagramJob, *estados: EstadoJob) -> bool:
+        assignments = ", ".join(f"{column} = ?" for column in _COLUMNS[1:])
+        placeholders = ", ".join("?" for _ in estados)
+        row = self._to_row(job)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE diagram_jobs SET {assignments} WHERE id = ? AND estado IN ({placeholders})",
+                row[1:] + (row[0],) + tuple(estado.value for estado in estados),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def touch(self, job_ids: Iterable[str]) -> None:
+        job_ids = tuple(job_ids)
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE diagram_jobs SET fecha_actualizacion = ? WHERE estado = ? AND id IN ({placeholders})",
+                (datetime.now().isoformat(), EstadoJob.RUNNING.value) + job_ids,
+            )
+            self._conn.commit()
+
+    def requeue_stale(self, before: datetime) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE diagram_jobs SET estado = ?, fase = ?, fecha_actualizacion = ? "
+                "WHERE estado = ? AND fecha_actualizacion < ?",
+                (EstadoJob.QUEUED.value, "requeued", datetime.now().isoformat(),
+                 EstadoJob.RUNNING.value, before.isoformat()),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def list_by_status(self, *estados: EstadoJob) -> List[DiagramJob]:
+        if not estados:
+            return []
+        placeholders = ", ".join("?" for _ in estados)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM diagram_jobs WHERE estado IN ({placeholders}) "
+                f"ORDER BY fecha_creacion",
+                tuple(estado.value for estado in estados),
+            ).fetchall()
+        return [self._to_entity(row) for row in rows]
+
+    @staticmethod
+    def _to_row(job: DiagramJob) -> tuple:
+        return (
+            job.id, job.source, job.source_id, job.base_path, job.diagram_type,
+            int(job.auto_detect_language), job.max_elements, job.estado.value, job.fase,
+            job.archivos_procesados, job.archivos_totales,
+            json.dumps(job.resultado) if job.resultado is not None else None,
+            job.error, job.fecha_creacion.isoformat(), job.fecha_actualizacion.isoformat(),
+            json.dumps(job.entry_points) if job.entry_points is not None else None, job.call_depth,
+        )
+
+    @staticmethod
+    def _to_entity(row: tuple) -> DiagramJob:
+        data = dict(zip(_COLUMNS, row))
+        return DiagramJob(
+            id=data["id"],
+            source=data["source"],
+            source_id=data["source_id"],
+            base_path=data["base_path"],
+            diagram_type=data["diagram_type"],
+            auto_detect_language=bool(data["auto_detect_language"]),
+            max_elements=data["max_elements"],
+            entry_points=json.loads(data["entry_points"]) if data["entry_points"] else None,
+            call_depth=data["call_depth"],
+            estado=EstadoJob(data["estado"]),
+            fase=data["fase"],
+            archivos_procesados=data["archivos_procesados"],
+            archivos_totales=data["archivos_totales"],
+            resultado=json.loads(data["resultado"]) if data["resultado"] else None,
+            error=data["error"],
+            fecha_creacion=datetime.fromisoformat(data["fecha_creacion"]),
+            fecha_actualizacion=datetime.fromisoformat(data["fecha_actualizacion"]),
+        )
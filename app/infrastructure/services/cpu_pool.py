@@ -0,0 +1,45 @@
+# app/infrastructure/services/cpu_pool.py
+"""
+Pool acotado de hilos para la conversión de diagramas (parseo, modelo y
+generación de PlantUML), separado del pool de E/S para que unas pocas
+conversiones largas no dejen sin hilos a las subidas, extracciones y recorridos.
+El parseo por archivo de cada conversión se reparte además en el pool de
+procesos de parallel_parser.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.core.profiler import profiler
+
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "4"))
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(max_workers=CPU_POOL_WORKERS, thread_name_prefix="cpu-pool")
+
+
+async def run_cpu(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Ejecuta una conversión en el pool de CPU. Propaga el contexto (contextvars)
+    para que las métricas y el perfil de la petición sigan asociados a la petición original.
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, profiler.record, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+def submit(func: Callable[..., T], *args, **kwargs) -> "Future[T]":
+    """
+    Versión síncrona de run_cpu para código que corre fuera del event loop (los
+    trabajos en segundo plano). No debe llamarse desde un hilo del propio pool.
+    """
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, profiler.record, func, *args, **kwargs)
+
+
+def shutdown() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
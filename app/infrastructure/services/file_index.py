@@ -0,0 +1,113 @@
+# app/infrastructure/services/file_index.py
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core import metrics
+from app.infrastructure.services.gitignore_matcher import GitignoreMatcher
+
+logger = logging.getLogger(__name__)
+
+# Archivos de manifiesto que delatan el lenguaje/ecosistema de un proyecto
+MANIFEST_FILES = {
+    'package.json', 'tsconfig.json', 'pom.xml', 'build.gradle', 'build.gradle.kts',
+    'composer.json', 'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt',
+    'Pipfile', 'go.mod', 'Cargo.toml',
+}
+MANIFEST_EXTENSIONS = ('.csproj', '.sln')
+
+MAX_INDEXED_FILES = 200_000  # Límite de seguridad para árboles patológicos
+SHEBANG_MAX_SIZE = 1024 * 1024  # Solo se inspecciona el shebang de archivos pequeños
+
+
+@dataclass
+class FileEntry:
+    path: str  # Ruta relativa a la raíz del proyecto
+    size: int
+    extension: str
+    interpreter: Optional[str] = None  # Intérprete del shebang para archivos sin extensión
+
+
+@dataclass
+class FileIndex:
+    """
+    Índice de archivos de un proyecto construido con un único recorrido del árbol.
+    Guarda metadatos (ruta, tamaño, extensión, shebang) y un histograma por extensión
+    para que la detección de lenguaje y la selección de archivos no vuelvan a recorrer
+    el disco. Se construye una vez por proyecto y se reutiliza entre peticiones.
+    """
+    base_path: str
+    entries: List[FileEntry] = field(default_factory=list)
+    manifests: List[str] = field(default_factory=list)
+    extension_stats: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # ext -> (archivos, bytes)
+    truncated: bool = False
+
+    @classmethod
+    @metrics.timed("walk")
+    def build(cls, base_path: str, ignore: Optional[GitignoreMatcher] = None,
+              max_files: int = MAX_INDEXED_FILES) -> 'FileIndex':
+        """Recorre el proyecto una sola vez (podando lo ignorado) y construye el índice"""
+        index = cls(base_path=base_path)
+        counts: Dict[str, List[int]] = {}
+        ignore = ignore or GitignoreMatcher(base_path)
+
+        for root, _, files in ignore.walk():
+            for fname in files:
+                full_path = os.path.join(root, fname)
+                rel_path = os.path.relpath(full_path, base_path)
+                try:
+                    size = os.path.getsize(full_path)
+                except OSError:
+                    continue
+
+                extension = os.path.splitext(fname)[1].lower()
+                interpreter = None
+                if not extension and size <= SHEBANG_MAX_SIZE:
+                    interpreter = cls._read_shebang(full_path)
+                    if interpreter:
+                        extension = f"#!{interpreter}"
+
+                index.entries.append(FileEntry(rel_path, size, extension, interpreter))
+                stats = counts.setdefault(extension, [0, 0])
+                stats[0] += 1
+                stats[1] += size
+
+                if fname in MANIFEST_FILES or fname.endswith(MANIFEST_EXTENSIONS):
+                    index.manifests.append(rel_path)
+
+                if len(index.entries) >= max_files:
+                    index.truncated = True
+                    logger.warning(f"Índice truncado a {max_files} archivos en {base_path}")
+                    break
+            if index.truncated:
+                break
+
+        index.extension_stats = {ext: (c, b) for ext, (c, b) in counts.items()}
+        return index
+
+    def files_with_extensions(self, extensions: Iterable[str]) -> List[FileEntry]:
+        """Retorna las entradas cuya extensión está en la lista (en orden de recorrido)"""
+        extensions = {ext.lower() for ext in extensions}
+        return [entry for entry in self.entries if entry.extension in extensions]
+
+    def absolute_path(self, entry: FileEntry) -> str:
+        return os.path.join(self.base_path, entry.path)
+
+    @staticmethod
+    def _read_shebang(full_path: str) -> Optional[str]:
+        """Lee la primera línea de un archivo y extrae el intérprete del shebang"""
+        try:
+            with open(full_path, 'rb') as f:
+                head = f.read(128)
+        except OSError:
+            return None
+        if not head.startswith(b'#!'):
+            return None
+        parts = head[2:].split(b'\n', 1)[0].decode('utf-8', errors='ignore').split()
+        if not parts:
+            return None
+        interpreter = os.path.basename(parts[0])
+        if interpreter == 'env' and len(parts) > 1:
+            interpreter = parts[1]
+        return interpreter.rstrip('0123456789.') or None
@@ -0,0 +1,173 @@
+# app/infrastructure/services/gitignore_matcher.py
+import logging
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GITIGNORE_FILE = ".gitignore"
+
+# Directorios y archivos que nunca aportan al análisis de un proyecto subido
+DEFAULT_IGNORE_PATTERNS = (
+    "node_modules/", "__pycache__/", "*.pyc", ".git/",
+    "bin/", "obj/", "target/", "build/", "dist/", ".DS_Store",
+)
+
+
+class _RuleSet:
+    """
+    Reglas de un único .gitignore compiladas en una sola expresión regular.
+    Las reglas se concatenan en orden inverso para que la primera alternativa que
+    coincide sea la última regla del archivo (la que gana según git); el grupo
+    capturado indica si esa regla era una negación.
+    """
+
+    def __init__(self, rules: List[Tuple[str, bool, bool]]):
+        self.file_regex, self.file_negations = self._compile([r for r in rules if not r[2]])
+        self.dir_regex, self.dir_negations = self._compile(rules)
+
+    @staticmethod
+    def _compile(rules: List[Tuple[str, bool, bool]]) -> Tuple[Optional[re.Pattern], List[bool]]:
+        if not rules:
+            return None, []
+        ordered = list(reversed(rules))
+        regex = re.compile('|'.join(f'({body})' for body, _, _ in ordered), re.DOTALL)
+        return regex, [negated for _, negated, _ in ordered]
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """True si se ignora, False si una negación lo re-incluye, None si ninguna regla aplica"""
+        regex, negations = (self.dir_regex, self.dir_negations) if is_dir else (self.file_regex, self.file_negations)
+        if regex is None:
+            return None
+        m = regex.fullmatch(path)
+        if m is None:
+            return None
+        return not negations[m.lastindex - 1]
+
+
+class GitignoreMatcher:
+    """
+    Motor de .gitignore para un árbol de proyecto.
+    Compila cada .gitignore (el raíz y los anidados, cargados bajo demanda) en una
+    expresión regular por nivel de directorio. Soporta negaciones (!), reglas solo
+    para directorios (/ final), patrones anclados y comodines '**'.
+    walk() poda los directorios ignorados durante el recorrido, de modo que árboles
+    como node_modules no llegan a listarse.
+    """
+
+    def __init__(self, base_path: str, default_patterns: Iterable[str] = (".git/",)):
+        self.base_path = base_path
+        self._default_rules = [rule for rule in map(self.translate, default_patterns) if rule]
+        self._levels: Dict[str, Optional[_RuleSet]] = {}
+
+    @staticmethod
+    def translate(pattern: str) -> Optional[Tuple[str, bool, bool]]:
+        """Convierte una línea de .gitignore en (regex, es_negación, solo_directorios)"""
+        line = pattern.rstrip('\n').rstrip()
+        if not line or line.startswith('#'):
+            return None
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        if line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        anchored = '/' in line
+        line = line.lstrip('/')
+        if not line:
+            return None
+
+        out = []
+        i = 0
+        n = len(line)
+        while i < n:
+            if line.startswith('**/', i) and (i == 0 or line[i - 1] == '/'):
+                out.append('(?:.*/)?')
+                i += 3
+            elif line.startswith('/**', i) and i + 3 == n:
+                out.append('/.*')
+                i += 3
+            elif line[i] == '*':
+                if line.startswith('**', i):
+                    out.append('.*')
+                    i += 2
+                else:
+                    out.append('[^/]*')
+                    i += 1
+            elif line[i] == '?':
+                out.append('[^/]')
+                i += 1
+            elif line[i] == '[':
+                end = line.find(']', i + 2)
+                if end == -1:
+                    out.append(re.escape('['))
+                    i += 1
+                    continue
+                content = line[i + 1:end].replace('\\', '\\\\')
+                if content.startswith('!'):
+                    content = '^' + content[1:]
+                out.append(f'[{content}]')
+                i = end + 1
+            else:
+                out.append(re.escape(line[i]))
+                i += 1
+
+        prefix = '' if anchored else '(?:.*/)?'
+        return prefix + ''.join(out), negated, dir_only
+
+    def _level(self, rel_dir: str) -> Optional[_RuleSet]:
+        """Reglas compiladas del .gitignore de un directorio (cargadas una sola vez)"""
+        if rel_dir in self._levels:
+            return self._levels[rel_dir]
+        rules = list(self._default_rules) if rel_dir == '' else []
+        ignore_path = os.path.join(self.base_path, rel_dir, GITIGNORE_FILE)
+        if os.path.isfile(ignore_path):
+            try:
+                with open(ignore_path, "r", encoding="utf-8", errors="ignore") as f:
+                    rules.extend(rule for rule in map(self.translate, f) if rule)
+            except OSError as e:
+                logger.warning(f"Error al leer {ignore_path}: {e}")
+        rule_set = _RuleSet(rules) if rules else None
+        self._levels[rel_dir] = rule_set
+        return rule_set
+
+    def _match(self, rel_path: str, is_dir: bool) -> bool:
+        """Evalúa la ruta contra los .gitignore de sus ancestros, del más profundo a la raíz"""
+        rel_dir = rel_path
+        while True:
+            slash = rel_dir.rfind('/')
+            rel_dir = rel_dir[:slash] if slash != -1 else ''
+            rule_set = self._level(rel_dir)
+            if rule_set is not None:
+                result = rule_set.match(rel_path[len(rel_dir) + 1:] if rel_dir else rel_path, is_dir)
+                if result is not None:
+                    return result
+            if not rel_dir:
+                return False
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Indica si una ruta relativa está ignorada (incluido por estar dentro de un directorio ignorado)"""
+        rel_path = rel_path.replace(os.sep, '/').strip('/')
+        if not rel_path or rel_path == '.':
+            return False
+        slash = rel_path.find('/')
+        while slash != -1:
+            if self._match(rel_path[:slash], True):
+                return True
+            slash = rel_path.find('/', slash + 1)
+        return self._match(rel_path, is_dir)
+
+    def walk(self) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        Equivalente a os.walk sobre el proyecto sin los directorios ni archivos ignorados.
+        La lista de directorios retornada es la del propio os.walk, por lo que el
+        llamador puede seguir podándola.
+        """
+        for root, dirs, files in os.walk(self.base_path):
+            rel_root = os.path.relpath(root, self.base_path)
+            prefix = '' if rel_root == '.' else rel_root.replace(os.sep, '/') + '/'
+            dirs[:] = [d for d in dirs if not self._match(prefix + d, True)]
+            files[:] = [f for f in files if not self._match(prefix + f, False)]
+            yield root, dirs, files
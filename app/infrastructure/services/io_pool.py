@@ -0,0 +1,75 @@
+# app/infrastructure/services/io_pool.py
+"""
+Pool acotado de hilos para el trabajo de sistema de archivos de las rutas
+(extracción de ZIP, clonado, recorridos y lectura de archivos), de modo que los
+handlers async no bloqueen el event loop. Tiene su propio límite para que varias
+subidas simultáneas no agoten el pool por defecto de asyncio.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.core.profiler import profiler
+
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "8"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="io-pool")
+
+
+class UploadTooLargeError(Exception):
+    """El archivo subido supera MAX_UPLOAD_BYTES"""
+
+
+async def run_io(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Ejecuta func en el pool de E/S. Propaga el contexto (contextvars) para que
+    las métricas y el perfil de la petición sigan asociados a la petición original.
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, profiler.record, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+async def spool_upload(upload, destination: str, max_bytes: int = MAX_UPLOAD_BYTES,
+                       chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Copia un UploadFile a disco por bloques, escribiendo en el pool de E/S.
+    Corta la copia (y borra el archivo parcial) en cuanto se supera max_bytes.
+    Retorna los bytes escritos. El cuerpo de la petición ya fue recibido: el límite
+    sobre la red lo aplica UploadLimitMiddleware; esta es una segunda comprobación.
+    """
+    written = 0
+    target = await run_io(open, destination, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > max_bytes:
+                raise UploadTooLargeError(f"El archivo supera el máximo de {max_bytes // (1024 * 1024)}MB")
+            await run_io(target.write, chunk)
+    except BaseException:
+        await run_io(target.close)
+        await run_io(_remove_quietly, destination)
+        raise
+    await run_io(target.close)
+    return written
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def shutdown() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
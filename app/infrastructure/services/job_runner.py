@@ -0,0 +1,158 @@
+# app/infrastructure/services/job_runner.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+
+from app.domain.entities.diagram_job import DiagramJob, EstadoJob
+from app.domain.repositories.diagram_job_repository import DiagramJobRepository
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+PROGRESS_FLUSH_SECONDS = 0.5  # Frecuencia máxima de escritura del progreso en la tabla
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+# Un trabajo en curso sin actualizar durante este tiempo quedó huérfano (su proceso terminó)
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))
+
+# Reporta el progreso: (fase, archivos_procesados, archivos_totales)
+ProgressCallback = Callable[..., None]
+# Ejecuta un trabajo y retorna el resultado serializable
+JobHandler = Callable[[DiagramJob, ProgressCallback], Dict]
+
+
+class JobCancelledError(Exception):
+    """Se lanza dentro del trabajo cuando fue cancelado mientras se ejecutaba"""
+
+
+class DiagramJobRunner:
+    """
+    Ejecuta trabajos de generación de diagramas en un pool local de hilos.
+    El estado vive en la tabla de trabajos, que comparten todos los workers del
+    servicio: cada trabajo se reclama con una transición condicional queued ->
+    running, así lo ejecuta un solo proceso, y toda escritura posterior exige que
+    siga en running, así nunca se sobrescribe una cancelación.
+    Un hilo de mantenimiento renueva la fecha de los trabajos en curso, reencola
+    los que quedaron en running sin actualizar (su proceso terminó) y encola los
+    pendientes.
+    La cancelación se lee de la tabla: el trabajo se detiene en el siguiente reporte
+    de progreso y, si se cancela durante la conversión, su resultado se descarta.
+    """
+
+    def __init__(self, repository: DiagramJobRepository, handlers: Dict[str, JobHandler],
+                 max_workers: int = JOB_WORKERS):
+        self.repository = repository
+        self.handlers = handlers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="diagram-job")
+        self._scheduled: Set[str] = set()  # Encolados o en ejecución en este proceso
+        self._running: Set[str] = set()  # Reclamados por este proceso
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._maintenance: Optional[threading.Thread] = None
+
+    def submit(self, job: DiagramJob) -> DiagramJob:
+        """Persiste un trabajo nuevo y lo encola"""
+        if job.source not in self.handlers:
+            raise ValueError(f"Origen de trabajo no soportado: {job.source}")
+        self.repository.save(job)
+        self._enqueue(job.id)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[DiagramJob]:
+        """Cancela un trabajo encolado o en ejecución. Retorna None si no existe"""
+        job = self.repository.get_by_id(job_id)
+        if job is None or job.esta_finalizado():
+            return job
+        job.cancelar()
+        if self.repository.update_if(job, EstadoJob.QUEUED, EstadoJob.RUNNING):
+            return job
+        # Terminó entre la lectura y la escritura
+        return self.repository.get_by_id(job_id)
+
+    def recover(self) -> int:
+        """
+        Encola los trabajos pendientes, reencola los huérfanos y arranca el hilo de
+        mantenimiento. Retorna cuántos trabajos quedaron encolados.
+        """
+        queued = self._sweep()
+        if self._maintenance is None:
+            self._maintenance = threading.Thread(
+                target=self._maintain, name="diagram-job-maintenance", daemon=True
+            )
+            self._maintenance.start()
+        return queued
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _maintain(self) -> None:
+        while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                with self._lock:
+                    running = list(self._running)
+                self.repository.touch(running)
+                self._sweep()
+            except Exception as e:
+                logger.error(f"Error en el mantenimiento de trabajos: {e}")
+
+    def _sweep(self) -> int:
+        requeued = self.repository.requeue_stale(datetime.now() - timedelta(seconds=JOB_STALE_SECONDS))
+        if requeued:
+            logger.info(f"Trabajos huérfanos reencolados: {requeued}")
+        jobs = self.repository.list_by_status(EstadoJob.QUEUED)
+        for job in jobs:
+            self._enqueue(job.id)
+        return len(jobs)
+
+    def _enqueue(self, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._scheduled:
+                return
+            self._scheduled.add(job_id)
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id: str) -> None:
+        try:
+            job = self.repository.get_by_id(job_id)
+            if job is None or job.estado != EstadoJob.QUEUED:
+                return
+            job.iniciar()
+            # Reclamo atómico: si otro proceso lo tomó o se canceló, no se ejecuta
+            if not self.repository.update_if(job, EstadoJob.QUEUED):
+                return
+            with self._lock:
+                self._running.add(job_id)
+
+            last_flush = [0.0, job.fase]
+
+            def progress(fase: str, procesados: int = 0, totales: int = 0) -> None:
+                job.reportar_progreso(fase, procesados, totales)
+                now = time.monotonic()
+                if fase != last_flush[1] or now - last_flush[0] >= PROGRESS_FLUSH_SECONDS:
+                    # Si ya no está en running, se canceló (quizá desde otro proceso)
+                    if not self.repository.update_if(job, EstadoJob.RUNNING):
+                        raise JobCancelledError(job_id)
+                    last_flush[0], last_flush[1] = now, fase
+
+            try:
+                result = self.handlers[job.source](job, progress)
+            except JobCancelledError:
+                logger.info(f"Trabajo {job_id} cancelado")
+                return
+            except Exception as e:
+                logger.error(f"Error en el trabajo {job_id}: {e}")
+                job.fallar(str(e))
+                self.repository.update_if(job, EstadoJob.RUNNING)
+                return
+
+            job.completar(result)
+            if not self.repository.update_if(job, EstadoJob.RUNNING):
+                logger.info(f"Trabajo {job_id} cancelado durante la conversión, se descarta el resultado")
+        finally:
+            with self._lock:
+                self._scheduled.discard(job_id)
+                self._running.discard(job_id)
@@ -0,0 +1,110 @@
+# app/infrastructure/services/language_detector.py
+import os
+from typing import Dict, Set, Tuple
+
+from app.infrastructure.services.file_index import FileIndex
+
+# Manifiestos de proyecto y el lenguaje que sugieren
+MANIFEST_LANGUAGES = {
+    'package.json': 'javascript',
+    'tsconfig.json': 'typescript',
+    'pom.xml': 'java',
+    'build.gradle': 'java',
+    'build.gradle.kts': 'java',
+    'composer.json': 'php',
+    'pyproject.toml': 'python',
+    'setup.py': 'python',
+    'setup.cfg': 'python',
+    'requirements.txt': 'python',
+    'Pipfile': 'python',
+    'go.mod': 'go',
+    'Cargo.toml': 'rust',
+    '.csproj': 'csharp',
+    '.sln': 'csharp',
+}
+
+# Intérpretes de shebang y su lenguaje
+SHEBANG_LANGUAGES = {
+    'python': 'python',
+    'node': 'javascript',
+    'nodejs': 'javascript',
+    'deno': 'typescript',
+    'php': 'php',
+}
+
+MANIFEST_WEIGHT = 0.1  # Fracción de los bytes de código que aporta cada manifiesto
+
+
+class LanguageDetector:
+    """
+    Detecta el lenguaje principal de un proyecto a partir de los metadatos de un
+    FileIndex: histograma de extensiones ponderado por bytes, shebangs de archivos
+    sin extensión y manifiestos. Trabaja solo sobre el histograma ya calculado,
+    por lo que no vuelve a recorrer el disco.
+    """
+
+    def __init__(self, extension_to_language: Dict[str, str], min_files: int = 3, min_share: float = 0.4):
+        self.extension_to_language = extension_to_language
+        self.languages = set(extension_to_language.values())
+        self.min_files = min_files
+        self.min_share = min_share
+
+    def histogram(self, index: FileIndex) -> Dict[str, Tuple[int, int]]:
+        """Agrupa el histograma de extensiones del índice por lenguaje: (archivos, bytes)"""
+        result: Dict[str, Tuple[int, int]] = {}
+        for extension, (files, size) in index.extension_stats.items():
+            if extension.startswith('#!'):
+                language = SHEBANG_LANGUAGES.get(extension[2:])
+            else:
+                language = self.extension_to_language.get(extension)
+            if language not in self.languages:
+                continue
+            prev_files, prev_size = result.get(language, (0, 0))
+            result[language] = (prev_files + files, prev_size + size)
+        return result
+
+    def manifest_languages(self, index: FileIndex) -> Set[str]:
+        """Lenguajes sugeridos por los manifiestos presentes en el proyecto"""
+        found = set()
+        for manifest in index.manifests:
+            name = os.path.basename(manifest)
+            language = MANIFEST_LANGUAGES.get(name) or MANIFEST_LANGUAGES.get(os.path.splitext(name)[1])
+            if language in self.languages:
+                found.add(language)
+        return found
+
+    def detect(self, index: FileIndex) -> str:
+        """Retorna el lenguaje predominante o 'any' si no hay uno claro"""
+        histogram = self.histogram(index)
+        total_files = sum(files for files, _ in histogram.values())
+        if total_files == 0:
+            return 'any'
+
+        # Bytes más un punto por archivo para que los archivos vacíos también cuenten
+        scores = {language: size + files for language, (files, size) in histogram.items()}
+        code_weight = sum(scores.values())
+        for language in self.manifest_languages(index):
+            if language in scores:
+                scores[language] += code_weight * MANIFEST_WEIGHT
+
+        primary_language = max(scores, key=scores.get)
+        max_score = scores[primary_language]
+        total_score = sum(scores.values())
+
+        # JavaScript y TypeScript juntos se tratan como JavaScript
+        if 'javascript' in scores and 'typescript' in scores:
+            if scores['javascript'] + scores['typescript'] > max_score:
+                return 'javascript'
+
+        if total_files < self.min_files or max_score / total_score < self.min_share:
+            return 'any'
+        return primary_language
+
+    def language_stats(self, index: FileIndex, extension_to_label: Dict[str, str]) -> Dict[str, int]:
+        """Cantidad de archivos por lenguaje (etiquetas legibles) según el histograma"""
+        language_counts: Dict[str, int] = {}
+        for extension, (files, _) in index.extension_stats.items():
+            label = extension_to_label.get(extension)
+            if label:
+                language_counts[label] = language_counts.get(label, 0) + files
+        return language_counts
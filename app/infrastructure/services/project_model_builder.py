@@ -0,0 +1,120 @@
+# app/infrastructure/services/project_model_builder.py
+"""
+Construye el ProjectModel de los diagramas de componentes y de paquetes a partir
+del FileIndex cacheado del proyecto, sin volver a recorrer el disco.
+"""
+import logging
+import os
+from typing import Iterable, List, Optional, Set
+
+from app.application.services.converters.project_model import Manifest, SourceImports, TreeEntry
+from app.core import metrics
+from app.infrastructure.services.file_index import FileIndex
+from app.infrastructure.services.source_reader import SourceFile
+
+logger = logging.getLogger(__name__)
+
+IMPORT_KEYWORDS = ('import ', 'from ', 'include ', 'require', 'using ', 'package ')
+IMPORT_HEADER_LINES = 50  # Los imports suelen estar en las primeras líneas
+
+
+def _to_posix(path: str) -> str:
+    return path.replace(os.sep, '/')
+
+
+def build_tree(file_index: FileIndex, extensions: Iterable[str], max_depth: Optional[int] = None,
+               max_files: Optional[int] = None, skip_dirs: Iterable[str] = (),
+               unlisted_dirs: Iterable[str] = ()) -> List[TreeEntry]:
+    """
+    Árbol de directorios y archivos relevantes en orden de recorrido.
+    - max_depth: nivel máximo de directorio (la raíz es 0).
+    - skip_dirs: si la ruta del directorio contiene alguno, se omite con todo su contenido.
+    - unlisted_dirs: si la ruta del directorio contiene alguno, no se lista el directorio
+      pero sí sus archivos.
+    Los directorios se derivan de las rutas de los archivos indexados.
+    """
+    extensions = {ext.lower() for ext in extensions}
+    skip_dirs = tuple(skip_dirs)
+    unlisted_dirs = tuple(unlisted_dirs)
+    tree: List[TreeEntry] = []
+    listed: Set[str] = set()
+    files = 0
+
+    for entry in file_index.entries:
+        directory = _to_posix(os.path.dirname(entry.path))
+        parts = directory.split('/') if directory else []
+        if max_depth is not None and len(parts) > max_depth:
+            continue
+        if directory and any(skip in directory.lower() for skip in skip_dirs):
+            continue
+
+        # Directorios ancestros aún no listados, de arriba hacia abajo
+        for level in range(1, len(parts) + 1):
+            ancestor = '/'.join(parts[:level])
+            if ancestor in listed:
+                continue
+            listed.add(ancestor)
+            if not any(hidden in ancestor.lower() for hidden in unlisted_dirs):
+                tree.append(TreeEntry(ancestor, is_directory=True))
+
+        if entry.extension not in extensions:
+            continue
+        if max_files is not None and files >= max_files:
+            break
+        tree.append(TreeEntry(_to_posix(entry.path)))
+        files += 1
+    return tree
+
+
+@metrics.timed("read", step="imports")
+def collect_imports(file_index: FileIndex, extensions: Iterable[str],
+                    max_files: int = 50) -> List[SourceImports]:
+    """Líneas de import de la cabecera de los primeros `max_files` archivos que tengan alguna"""
+    sources: List[SourceImports] = []
+    for entry in file_index.files_with_extensions(extensions):
+        if len(sources) >= max_files:
+            break
+        try:
+            with SourceFile(file_index.absolute_path(entry)) as source:
+                import_lines = tuple(
+                    line for line in source.head_lines(IMPORT_HEADER_LINES)
+                    if any(keyword in line for keyword in IMPORT_KEYWORDS)
+                )
+        except Exception as e:
+            logger.warning(f"Error al leer {entry.path}: {e}")
+            continue
+        if import_lines:
+            sources.append(SourceImports(_to_posix(entry.path), import_lines))
+    return sources
+
+
+def collect_manifests(file_index: FileIndex, root_names: Iterable[str], suffixes: Iterable[str] = (),
+                      max_size: Optional[int] = None, max_chars: Optional[int] = None) -> List[Manifest]:
+    """
+    Manifiestos del proyecto: los de `root_names` en la raíz (en ese orden) y los que
+    terminan en alguno de `suffixes` en cualquier nivel. Los mayores de `max_size` bytes
+    se omiten y el contenido se recorta a `max_chars` caracteres.
+    """
+    root_names = list(root_names)
+    suffixes = tuple(suffixes)
+    found = {entry.path: entry for entry in file_index.entries}
+    paths = [name for name in root_names if name in found]
+    if suffixes:
+        paths += [path for path in file_index.manifests if path.endswith(suffixes) and path not in paths]
+
+    manifests: List[Manifest] = []
+    for path in paths:
+        entry = found[path]
+        if max_size is not None and entry.size > max_size:
+            logger.info(f"Manifiesto omitido por tamaño: {path} ({entry.size} bytes)")
+            continue
+        try:
+            with SourceFile(file_index.absolute_path(entry)) as source:
+                content = source.text()
+        except Exception as e:
+            logger.warning(f"Error al leer {path}: {e}")
+            continue
+        if max_chars is not None and len(content) > max_chars:
+            content = content[:max_chars]
+        manifests.append(Manifest(_to_posix(path), content))
+    return manifests
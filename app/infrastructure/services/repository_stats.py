@@ -0,0 +1,175 @@
+# app/infrastructure/services/repository_stats.py
+"""
+Motor de estadísticas de repositorios para /analyze-repo y /analyze-zip.
+
+Cada archivo se abre una sola vez con SourceFile y sus métricas se guardan en
+columnas (array) en lugar de un objeto por archivo. Sobre las columnas se
+calculan totales, agrupaciones por extensión o directorio y consultas top-N;
+los modelos de respuesta solo se construyen para las filas que se devuelven.
+"""
+import heapq
+import logging
+import os
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from app.core import metrics
+from app.infrastructure.services.source_reader import SourceFile
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = ("lines", "classes", "functions", "comments", "loc", "size")
+GROUP_KEYS = ("extension", "directory")
+ROOT_DIRECTORY = "."
+
+
+@dataclass(frozen=True)
+class StatsProfile:
+    """Qué archivos se analizan y cómo se reconocen clases, funciones, comentarios y tests"""
+    extensions: Tuple[str, ...]
+    class_pattern: Pattern[bytes]
+    function_pattern: Pattern[bytes]
+    line_pattern: Pattern[bytes]  # Ver comment_line_pattern()
+    test_pattern: Pattern[str]  # Se aplica al nombre del archivo en minúsculas
+
+
+def comment_line_pattern(prefixes: Iterable[bytes]) -> Pattern[bytes]:
+    """
+    Patrón para SourceFile.classify_lines: el grupo 1 marca las líneas de comentario
+    y la alternativa vacía las líneas en blanco.
+    """
+    alternatives = b"|".join(re.escape(prefix) for prefix in prefixes)
+    return re.compile(rb'^[ \t\r\f\v]*(?:(' + alternatives + rb')|$)', re.MULTILINE)
+
+
+class RepositoryStats:
+    """Métricas por archivo en columnas; las rutas, extensiones y directorios se internan"""
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.extensions: List[str] = []
+        self.directories: List[str] = []
+        self._extension_ids: Dict[str, int] = {}
+        self._directory_ids: Dict[str, int] = {}
+        self.extension_column = array("I")
+        self.directory_column = array("I")
+        self.columns: Dict[str, array] = {name: array("Q") for name in METRIC_COLUMNS}
+        self.is_test = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @staticmethod
+    def _intern(value: str, values: List[str], ids: Dict[str, int]) -> int:
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(values)
+            values.append(value)
+        return index
+
+    def add(self, path: str, extension: str, is_test: bool, **values: int) -> None:
+        """Agrega un archivo; `values` trae una entrada por cada columna de METRIC_COLUMNS"""
+        self.paths.append(path)
+        self.extension_column.append(self._intern(extension, self.extensions, self._extension_ids))
+        directory = os.path.dirname(path) or ROOT_DIRECTORY
+        self.directory_column.append(self._intern(directory, self.directories, self._directory_ids))
+        for name in METRIC_COLUMNS:
+            self.columns[name].append(values[name])
+        self.is_test.append(1 if is_test else 0)
+
+    def totals(self) -> Dict[str, int]:
+        totals = {name: sum(column) for name, column in self.columns.items()}
+        totals["files"] = len(self)
+        totals["test_files"] = self.is_test.count(1)
+        return totals
+
+    def group_by(self, key: str, directory_depth: Optional[int] = None) -> List[Dict]:
+        """
+        Agrega las métricas por extensión o por directorio (opcionalmente truncado a
+        los primeros `directory_depth` niveles). Ordenado por líneas de código.
+        """
+        if key == "extension":
+            labels = self.extensions
+            column = self.extension_column
+        elif key == "directory":
+            labels = [truncate_directory(d, directory_depth) for d in self.directories]
+            column = self.directory_column
+        else:
+            raise ValueError(f"Agrupación no soportada: {key}. Use una de {', '.join(GROUP_KEYS)}")
+
+        groups: Dict[str, Dict] = {}
+        for row, label_id in enumerate(column):
+            label = labels[label_id]
+            group = groups.get(label)
+            if group is None:
+                group = groups[label] = dict.fromkeys(METRIC_COLUMNS, 0)
+                group.update(key=label, files=0, test_files=0)
+            group["files"] += 1
+            group["test_files"] += self.is_test[row]
+            for name, values in self.columns.items():
+                group[name] += values[row]
+        return sorted(groups.values(), key=lambda g: (-g["loc"], g["key"]))
+
+    def top(self, count: int, metric: str = "loc") -> List[int]:
+        """Índices de las `count` filas con mayor valor en la métrica"""
+        if metric not in self.columns:
+            raise ValueError(f"Métrica no soportada: {metric}. Use una de {', '.join(METRIC_COLUMNS)}")
+        column = self.columns[metric]
+        return heapq.nlargest(count, range(len(self)), key=column.__getitem__)
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> range:
+        """Índices de una página del listado de archivos (en orden de recorrido)"""
+        end = len(self) if limit is None else min(len(self), offset + limit)
+        return range(min(offset, len(self)), end)
+
+    def row(self, index: int) -> Dict:
+        """Fila con los campos de FileStat"""
+        return {
+            "path": self.paths[index],
+            "size_kb": round(self.columns["size"][index] / 1024, 2),
+            "classes": self.columns["classes"][index],
+            "functions": self.columns["functions"][index],
+            "extension": self.extensions[self.extension_column[index]],
+            "comments": self.columns["comments"][index],
+            "loc": self.columns["loc"][index],
+            "is_test": bool(self.is_test[index]),
+        }
+
+
+def truncate_directory(directory: str, depth: Optional[int]) -> str:
+    if not depth or directory == ROOT_DIRECTORY:
+        return directory
+    return os.sep.join(directory.split(os.sep)[:depth])
+
+
+@metrics.timed("analyze")
+def collect_statistics(base_path: str, walk: Iterable, profile: StatsProfile) -> RepositoryStats:
+    """Recorre el proyecto (con el walk ya filtrado por .gitignore) y mide cada archivo"""
+    stats = RepositoryStats()
+    for root, _, filenames in walk:
+        for fname in filenames:
+            if not fname.endswith(profile.extensions):
+                continue
+            full_path = os.path.join(root, fname)
+            rel_path = os.path.relpath(full_path, base_path)
+            try:
+                with SourceFile(full_path) as source:
+                    lines = source.line_count()
+                    comments, blanks = source.classify_lines(profile.line_pattern)
+                    stats.add(
+                        rel_path,
+                        os.path.splitext(fname)[1],
+                        bool(profile.test_pattern.search(fname.lower())) or "test" in rel_path.lower(),
+                        lines=lines,
+                        classes=source.count(profile.class_pattern),
+                        functions=source.count(profile.function_pattern),
+                        comments=comments,
+                        loc=lines - comments - blanks,
+                        size=source.size,
+                    )
+            except Exception as e:
+                logger.warning(f"No se pudo analizar {full_path}: {e}")
+    metrics.inc("uml_files_analyzed_total", len(stats))
+    return stats
@@ -0,0 +1,193 @@
+# app/infrastructure/services/source_reader.py
+"""
+Lectura de archivos de código sin decodificarlos completos.
+
+SourceFile mapea en memoria los archivos grandes (los pequeños se leen como bytes),
+detecta la codificación por BOM o muestreo y permite contar coincidencias de
+expresiones regulares de bytes, contar líneas y decodificar solo las primeras N
+líneas. El texto completo se decodifica únicamente cuando se pide con text().
+"""
+import codecs
+import mmap
+import re
+from typing import List, Optional, Pattern, Tuple, Union
+
+MMAP_THRESHOLD = 64 * 1024  # Por debajo se lee el archivo como bytes
+SNIFF_SIZE = 8 * 1024  # Bytes muestreados para detectar la codificación
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+# Marcas de orden de bytes; las de UTF-32 van primero porque contienen a las de UTF-16
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+# Codificación de respaldo cuando la muestra no es UTF-8 válido (archivos heredados de Windows)
+LEGACY_ENCODING = "cp1252"
+
+# Líneas en blanco y líneas que empiezan por un marcador de comentario (tras espacios)
+_BLANK_LINE = re.compile(rb'^[ \t\r\f\v]*$', re.MULTILINE)
+
+
+def sniff_encoding(sample: bytes) -> tuple:
+    """Retorna (codificación, longitud del BOM) a partir de los primeros bytes del archivo"""
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    if b"\x00" in sample:
+        # UTF-16 sin BOM: los NUL caen en las posiciones altas de cada carácter ASCII
+        even = sample[0::2].count(0)
+        odd = sample[1::2].count(0)
+        if odd > even * 2:
+            return "utf-16-le", 0
+        if even > odd * 2:
+            return "utf-16-be", 0
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8", 0
+    except UnicodeDecodeError:
+        return LEGACY_ENCODING, 0
+
+
+def normalize_newlines(text: str) -> str:
+    """Traduce \\r\\n y \\r a \\n, como open() en modo texto"""
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class SourceFile:
+    """
+    Archivo de código abierto para escaneo a nivel de bytes.
+    Para codificaciones que no son compatibles con ASCII (UTF-16/32) el contenido
+    se transcodifica a UTF-8 una vez, de modo que los patrones de bytes siempre aplican.
+    """
+
+    def __init__(self, path: str, mmap_threshold: int = MMAP_THRESHOLD):
+        self.path = path
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._file = open(path, "rb")
+        try:
+            self.size = self._init_buffer(mmap_threshold)
+        except BaseException:
+            self.close()
+            raise
+
+    def _init_buffer(self, mmap_threshold: int) -> int:
+        size = self._file.seek(0, 2)
+        self._file.seek(0)
+        if size >= mmap_threshold:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            data: Union[bytes, mmap.mmap] = self._mmap
+        else:
+            data = self._file.read()
+
+        self.encoding, bom_length = sniff_encoding(bytes(data[:SNIFF_SIZE]))
+        if self.encoding.startswith(("utf-16", "utf-32")):
+            data = bytes(data[bom_length:]).decode(self.encoding, errors="ignore").encode("utf-8")
+            self.encoding, bom_length = "utf-8", 0
+        self._data = data
+        self._offset = bom_length
+        return size
+
+    @property
+    def buffer(self) -> Union[bytes, mmap.mmap]:
+        """Contenido en bytes (incluye el BOM UTF-8 si lo hubiera)"""
+        return self._data
+
+    def count(self, pattern: Pattern[bytes]) -> int:
+        """Cuenta las coincidencias de un patrón de bytes sin decodificar el archivo"""
+        return sum(1 for _ in pattern.finditer(self._data, self._offset))
+
+    def search(self, pattern: Pattern[bytes]) -> bool:
+        return pattern.search(self._data, self._offset) is not None
+
+    def count_bytes(self, sub: bytes) -> int:
+        """Cuenta una secuencia de bytes recorriendo el archivo por bloques"""
+        if isinstance(self._data, bytes):
+            return self._data.count(sub, self._offset)
+        total = 0
+        step = SCAN_CHUNK_SIZE
+        overlap = len(sub) - 1
+        position = self._offset
+        while position < len(self._data):
+            # El solapamiento cuenta una vez las coincidencias que cruzan el borde del bloque
+            total += self._data[position:position + step + overlap].count(sub)
+            position += step
+        return total
+
+    def line_count(self) -> int:
+        """Número de líneas, igual que len(texto.splitlines()) para saltos \\n y \\r\\n"""
+        length = len(self._data) - self._offset
+        if length <= 0:
+            return 0
+        newlines = self.count_bytes(b"\n")
+        return newlines if self._data[-1:] == b"\n" else newlines + 1
+
+    def blank_line_count(self) -> int:
+        """Líneas vacías o solo con espacios"""
+        return self._drop_trailing_empty_line(self.count(_BLANK_LINE))
+
+    def classify_lines(self, pattern: Pattern[bytes]) -> Tuple[int, int]:
+        """
+        Clasifica las líneas en una sola pasada con un patrón multilínea anclado
+        al inicio de línea: retorna (líneas donde participó el grupo 1, líneas vacías).
+        """
+        marked = 0
+        blanks = 0
+        for match in pattern.finditer(self._data, self._offset):
+            if match.group(1) is not None:
+                marked += 1
+            else:
+                blanks += 1
+        return marked, self._drop_trailing_empty_line(blanks)
+
+    def _drop_trailing_empty_line(self, blanks: int) -> int:
+        # La "línea" vacía tras el último salto de línea no cuenta como línea
+        if len(self._data) <= self._offset or self._data[-1:] == b"\n":
+            blanks -= 1
+        return max(0, blanks)
+
+    def head_lines(self, count: int) -> List[str]:
+        """Decodifica solo las primeras `count` líneas (separadas por \\n)"""
+        end = self._offset
+        for _ in range(count):
+            newline = self._data.find(b"\n", end)
+            if newline < 0:
+                end = len(self._data)
+                break
+            end = newline + 1
+        head = bytes(self._data[self._offset:end]).decode(self.encoding, errors="ignore")
+        lines = normalize_newlines(head).split("\n")
+        if len(lines) > count:
+            lines = lines[:count]
+        return lines
+
+    def text(self) -> str:
+        """Decodifica el archivo completo"""
+        return normalize_newlines(bytes(self._data[self._offset:]).decode(self.encoding, errors="ignore"))
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._data = b""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "SourceFile":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+
+
+def read_source_text(path: str) -> str:
+    """Lee y decodifica un archivo de código con la codificación detectada"""
+    with SourceFile(path) as source:
+        return source.text()
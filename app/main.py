@@ -1,10 +1,15 @@
 # /app/main.py
 import os
+import time
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.infrastructure.api.routes import auth, diagram, proyecto, user, version_diagrama, github_repository, zip_upload
+from app.core import loop_monitor, metrics, profiler
+from app.application.services.converters import parallel_parser
+from app.infrastructure.services import cpu_pool, io_pool
+from app.infrastructure.api.upload_limit import UploadLimitMiddleware
+from app.infrastructure.api.routes import auth, diagram, proyecto, user, version_diagrama, github_repository, zip_upload, diagram_jobs, monitoring, admin_profiler
 
 app = FastAPI(
     title="Diagrama UML Api Rest",
@@ -21,6 +26,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Limita el tamaño de las subidas de ZIP en el stream de recepción, tanto si
+# declaran Content-Length como si no (chunked)
+app.add_middleware(UploadLimitMiddleware, max_bytes=io_pool.MAX_UPLOAD_BYTES)
+
+# Métricas por petición y cabecera Server-Timing (solo con METRICS_ENABLED)
+if metrics.METRICS_ENABLED:
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        token = metrics.begin_request()
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        metrics.registry.observe(
+            "uml_http_request_seconds", time.perf_counter() - start,
+            method=request.method, path=getattr(route, "path", "unmatched"), status=str(response.status_code)
+        )
+        server_timing = metrics.end_request(token)
+        if server_timing:
+            response.headers["Server-Timing"] = server_timing
+        return response
+
+# Perfilado de una petición concreta con la cabecera X-Profile-Request (solo con PROFILER_ADMIN_TOKEN)
+if profiler.PROFILER_ENABLED:
+    @app.middleware("http")
+    async def profiler_middleware(request: Request, call_next):
+        token = profiler.request_profiling(request.headers.get(profiler.PROFILE_REQUEST_HEADER))
+        try:
+            return await call_next(request)
+        finally:
+            profiler.reset_request_profiling(token)
+
+# Peticiones en curso para atribuir los bloqueos del event loop (solo con LOOP_MONITOR_ENABLED)
+if loop_monitor.LOOP_MONITOR_ENABLED:
+    @app.middleware("http")
+    async def loop_monitor_middleware(request: Request, call_next):
+        request_id = id(request)
+        loop_monitor.monitor.request_started(request_id, f"{request.method} {request.url.path}")
+        try:
+            return await call_next(request)
+        finally:
+            loop_monitor.monitor.request_finished(request_id)
+
+    @app.on_event("startup")
+    async def start_loop_monitor():
+        loop_monitor.monitor.start()
+
+    @app.on_event("shutdown")
+    async def stop_loop_monitor():
+        loop_monitor.monitor.stop()
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(user.router, prefix="/api")  # ✅ Volver al original
@@ -29,6 +84,21 @@ app.include_router(version_diagrama.router, prefix="/api")
 app.include_router(proyecto.router, prefix="/api")
 app.include_router(github_repository.router, prefix="/api")
 app.include_router(zip_upload.router, prefix="/api")
+app.include_router(diagram_jobs.router, prefix="/api")
+app.include_router(monitoring.router)
+app.include_router(admin_profiler.router, prefix="/api")
+
+# Abrir la tabla de trabajos de diagramas y encolar los que quedaron pendientes
+@app.on_event("startup")
+async def start_diagram_jobs():
+    diagram_jobs.start_job_runner()
+
+@app.on_event("shutdown")
+async def stop_diagram_jobs():
+    diagram_jobs.stop_job_runner()
+    io_pool.shutdown()
+    cpu_pool.shutdown()
+    parallel_parser.shutdown()
 
 # Escuchar en el puerto proporcionado por la variable de entorno 'PORT' y en 0.0.0.0
 if __name__ == "__main__":
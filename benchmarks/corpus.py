@@ -0,0 +1,285 @@
+# benchmarks/corpus.py
+"""
+Generadores deterministas de corpus sintéticos por lenguaje para los benchmarks
+de convertidores. Un mismo (lenguaje, parámetros, semilla) produce siempre el
+mismo código, de modo que los resultados de distintas ejecuciones son comparables.
+"""
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+LANGUAGES = ("csharp", "java", "python", "php", "javascript", "typescript")
+
+FILE_EXTENSIONS = {
+    "csharp": ".cs",
+    "java": ".java",
+    "python": ".py",
+    "php": ".php",
+    "javascript": ".js",
+    "typescript": ".ts",
+}
+
+HTTP_METHODS = ("get", "post", "put", "delete")
+
+
+@dataclass
+class CorpusSpec:
+    classes: int = 40  # Clases de dominio generadas
+    methods: int = 6  # Métodos por clase
+    depth: int = 2  # Profundidad de anidamiento de bloques (if/for) en cada método
+    statements: int = 3  # Sentencias por bloque (controla el tamaño de los archivos)
+    classes_per_file: int = 4
+    modules: int = 4  # Namespaces/paquetes entre los que se reparten las clases
+    seed: int = 42
+
+
+@dataclass
+class Corpus:
+    language: str
+    spec: CorpusSpec
+    files: Dict[str, str] = field(default_factory=dict)  # ruta relativa -> código
+
+    @property
+    def class_count(self) -> int:
+        return self.spec.classes + self.spec.modules  # clases de dominio + un controlador por módulo
+
+    def sources(self) -> List[str]:
+        """Código de cada archivo terminado en salto de línea, como lo leen los endpoints"""
+        return [code + "\n" for code in self.files.values()]
+
+    def write(self, directory: str) -> None:
+        """Escribe los archivos del corpus bajo directory (como un proyecto extraído)"""
+        for path, code in self.files.items():
+            target = os.path.join(directory, *path.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(code)
+
+
+class _Model:
+    """Modelo abstracto del corpus (clases, herencia, dependencias) común a todos los lenguajes"""
+
+    def __init__(self, spec: CorpusSpec):
+        rng = random.Random(spec.seed)
+        self.spec = spec
+        self.classes = []
+        for i in range(spec.classes):
+            module = i % spec.modules
+            base = i - spec.modules if i >= spec.modules and rng.random() < 0.3 else None
+            deps = sorted({rng.randrange(spec.classes) for _ in range(2)} - {i})
+            self.classes.append({
+                "name": f"Entity{i}",
+                "module": module,
+                "base": f"Entity{base}" if base is not None else None,
+                "deps": [f"Entity{d}" for d in deps],
+                "dep_modules": sorted({d % spec.modules for d in deps} - {module}),
+            })
+
+
+def _c_like_body(spec: CorpusSpec, call: Callable[[int], str], var: str, indent: str, level: int = 0) -> List[str]:
+    """Cuerpo de método con bloques if/for anidados para lenguajes con llaves"""
+    lines = []
+    for s in range(spec.statements):
+        lines.append(f"{indent}{call(s)};")
+    if level < spec.depth:
+        lines.append(f"{indent}if ({var} > {level}) {{")
+        lines.extend(_c_like_body(spec, call, var, indent + "    ", level + 1))
+        lines.append(f"{indent}}} else {{")
+        lines.append(f"{indent}    {call(level)};")
+        lines.append(f"{indent}}}")
+    return lines
+
+
+def _python_body(spec: CorpusSpec, call: Callable[[int], str], indent: str, level: int = 0) -> List[str]:
+    lines = [f"{indent}{call(s)}" for s in range(spec.statements)]
+    if level < spec.depth:
+        lines.append(f"{indent}if value > {level}:")
+        lines.extend(_python_body(spec, call, indent + "    ", level + 1))
+        lines.append(f"{indent}else:")
+        lines.append(f"{indent}    {call(level)}")
+    return lines
+
+
+def _csharp_class(cls: Dict, spec: CorpusSpec) -> List[str]:
+    base = f" : {cls['base']}" if cls["base"] else ""
+    lines = [f"    public class {cls['name']}{base}", "    {"]
+    for j, dep in enumerate(cls["deps"]):
+        lines.append(f"        private {dep} _dep{j};")
+        lines.append(f"        public {dep} Dependency{j} {{ get; set; }}")
+    lines.append(f"        public {cls['name']}({', '.join(f'{d} dep{j}' for j, d in enumerate(cls['deps']))})")
+    lines.append("        {")
+    lines.extend(f"            _dep{j} = dep{j};" for j in range(len(cls["deps"])))
+    lines.append("        }")
+    for m in range(spec.methods):
+        lines.append(f"        public int Method{m}(int value)")
+        lines.append("        {")
+        call = (lambda s: f"_dep{s % len(cls['deps'])}.Method{(s + m) % spec.methods}(value - 1)") if cls["deps"] \
+            else (lambda s: f"Console.WriteLine(value + {s})")
+        lines.extend(_c_like_body(spec, call, "value", " " * 12))
+        lines.append("            return value;")
+        lines.append("        }")
+    lines.append("    }")
+    return lines
+
+
+def _csharp_file(module: int, classes: List[Dict], spec: CorpusSpec, controller: bool) -> str:
+    lines = ["using System;", "using System.Collections.Generic;"]
+    for dep_module in sorted({m for c in classes for m in c["dep_modules"]}):
+        lines.append(f"using Bench.Module{dep_module};")
+    if controller:
+        lines.append("using Microsoft.AspNetCore.Mvc;")
+    lines += [f"namespace Bench.Module{module}", "{"]
+    if controller:
+        lines += [f"    public class Module{module}Controller : ControllerBase", "    {"]
+        for i, method in enumerate(HTTP_METHODS):
+            lines.append(f'        [Http{method.capitalize()}("items/{i}")]')
+            lines.append(f"        public IActionResult {method.capitalize()}Item{i}(int id)")
+            lines.append("        {")
+            lines.append("            return Ok(id);")
+            lines.append("        }")
+        lines.append("    }")
+    for cls in classes:
+        lines.extend(_csharp_class(cls, spec))
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _java_file(module: int, classes: List[Dict], spec: CorpusSpec, controller: bool) -> str:
+    lines = [f"package bench.module{module};", "", "import java.util.List;"]
+    for dep_module in sorted({m for c in classes for m in c["dep_modules"]}):
+        lines.append(f"import bench.module{dep_module}.*;")
+    if controller:
+        lines += ["import org.springframework.web.bind.annotation.*;", "", "@RestController",
+                  f"public class Module{module}Controller {{"]
+        for i, method in enumerate(HTTP_METHODS):
+            lines.append(f'    @{method.capitalize()}Mapping("/items/{i}")')
+            lines.append(f"    public ResponseEntity<String> {method}Item{i}(int id) {{")
+            lines.append("        return null;")
+            lines.append("    }")
+        lines.append("}")
+    for cls in classes:
+        extends = f" extends {cls['base']}" if cls["base"] else ""
+        lines += ["", f"class {cls['name']}{extends} {{"]
+        for j, dep in enumerate(cls["deps"]):
+            lines.append(f"    private {dep} dep{j};")
+        for m in range(spec.methods):
+            lines.append(f"    public int method{m}(int value) {{")
+            call = (lambda s: f"dep{s % len(cls['deps'])}.method{(s + m) % spec.methods}(value - 1)") if cls["deps"] \
+                else (lambda s: f"System.out.println(value + {s})")
+            lines.extend(_c_like_body(spec, call, "value", " " * 8))
+            lines.append("        return value;")
+            lines.append("    }")
+        lines.append("}")
+    return "\n".join(lines)
+
+
+def _python_file(module: int, classes: List[Dict], spec: CorpusSpec, controller: bool) -> str:
+    lines = ["import os", "from typing import List"]
+    for dep_module in sorted({m for c in classes for m in c["dep_modules"]}):
+        lines.append(f"from bench.module{dep_module} import models as module{dep_module}")
+    if controller:
+        lines += ["from flask import Flask", "", "app = Flask(__name__)"]
+        for i, method in enumerate(HTTP_METHODS):
+            lines += ["", f"@app.route('/items/{i}', methods=['{method.upper()}'])", f"def {method}_item_{i}():",
+                      f"    return '{i}'"]
+    for cls in classes:
+        base = f"({cls['base']})" if cls["base"] else ""
+        lines += ["", "", f"class {cls['name']}{base}:"]
+        args = "".join(f", dep{j}: '{d}'" for j, d in enumerate(cls["deps"]))
+        lines.append(f"    def __init__(self{args}):")
+        lines.extend(f"        self.dep{j} = dep{j}" for j in range(len(cls["deps"])))
+        if not cls["deps"]:
+            lines.append("        self.value = 0")
+        for m in range(spec.methods):
+            lines.append("")
+            lines.append(f"    def method_{m}(self, value):")
+            call = (lambda s: f"self.dep{s % len(cls['deps'])}.method_{(s + m) % spec.methods}(value - 1)") \
+                if cls["deps"] else (lambda s: f"print(value + {s})")
+            lines.extend(_python_body(spec, call, " " * 8))
+            lines.append("        return value")
+    return "\n".join(lines)
+
+
+def _php_file(module: int, classes: List[Dict], spec: CorpusSpec, controller: bool) -> str:
+    lines = ["<?php", "", f"namespace Bench\\Module{module};", ""]
+    for dep_module in sorted({m for c in classes for m in c["dep_modules"]}):
+        lines.append(f"use Bench\\Module{dep_module}\\Entity;")
+    if controller:
+        lines += ["use Illuminate\\Routing\\Controller;", "", f"class Module{module}Controller extends Controller", "{"]
+        for name in ("index", "show", "store", "update", "destroy"):
+            lines += [f"    public function {name}($id)", "    {", "        return $id;", "    }"]
+        lines.append("}")
+    for cls in classes:
+        extends = f" extends {cls['base']}" if cls["base"] else ""
+        lines += ["", f"class {cls['name']}{extends}", "{"]
+        for j, dep in enumerate(cls["deps"]):
+            lines.append(f"    private {dep} $dep{j};")
+        for m in range(spec.methods):
+            lines.append(f"    public function method{m}(int $value): int")
+            lines.append("    {")
+            call = (lambda s: f"$this->dep{s % len(cls['deps'])}->method{(s + m) % spec.methods}($value - 1)") \
+                if cls["deps"] else (lambda s: f"echo $value + {s}")
+            lines.extend(_c_like_body(spec, call, "$value", " " * 8))
+            lines.append("        return $value;")
+            lines.append("    }")
+        lines.append("}")
+    return "\n".join(lines)
+
+
+def _js_file(module: int, classes: List[Dict], spec: CorpusSpec, controller: bool, typed: bool) -> str:
+    annotation = ": number" if typed else ""
+    lines = []
+    for dep_module in sorted({m for c in classes for m in c["dep_modules"]}):
+        lines.append(f"import {{ Entity }} from '../module{dep_module}/index';")
+    if controller:
+        lines += ["const express = require('express');", "const router = express.Router();", ""]
+        for i, method in enumerate(HTTP_METHODS):
+            lines += [f"router.{method}('/items/{i}', async (req, res) => {{", f"    res.json({{ id: {i} }});", "});"]
+    for cls in classes:
+        extends = f" extends {cls['base']}" if cls["base"] else ""
+        lines += ["", f"export class {cls['name']}{extends} {{"]
+        params = ", ".join(f"dep{j}" + (f": {d}" if typed else "") for j, d in enumerate(cls["deps"]))
+        lines.append(f"    constructor({params}) {{")
+        if cls["base"]:
+            lines.append("        super();")
+        lines.extend(f"        this.dep{j} = dep{j};" for j in range(len(cls["deps"])))
+        lines.append("    }")
+        for m in range(spec.methods):
+            lines.append(f"    method{m}(value{annotation}){annotation} {{")
+            call = (lambda s: f"this.dep{s % len(cls['deps'])}.method{(s + m) % spec.methods}(value - 1)") \
+                if cls["deps"] else (lambda s: f"console.log(value + {s})")
+            lines.extend(_c_like_body(spec, call, "value", " " * 8))
+            lines.append("        return value;")
+            lines.append("    }")
+        lines.append("}")
+    return "\n".join(lines)
+
+
+_WRITERS = {
+    "csharp": _csharp_file,
+    "java": _java_file,
+    "python": _python_file,
+    "php": _php_file,
+    "javascript": lambda *args: _js_file(*args, typed=False),
+    "typescript": lambda *args: _js_file(*args, typed=True),
+}
+
+
+def generate_corpus(language: str, spec: CorpusSpec = None) -> Corpus:
+    """Genera el corpus sintético de un lenguaje"""
+    if language not in _WRITERS:
+        raise ValueError(f"Lenguaje sin generador de corpus: {language}")
+    spec = spec or CorpusSpec()
+    model = _Model(spec)
+    writer = _WRITERS[language]
+    extension = FILE_EXTENSIONS[language]
+    corpus = Corpus(language=language, spec=spec)
+
+    for module in range(spec.modules):
+        members = [c for c in model.classes if c["module"] == module]
+        chunks = [members[i:i + spec.classes_per_file] for i in range(0, len(members), spec.classes_per_file)]
+        for index, chunk in enumerate(chunks or [[]]):
+            path = f"src/module{module}/file{index}{extension}"
+            corpus.files[path] = writer(module, chunk, spec, index == 0)
+    return corpus
@@ -0,0 +1,244 @@
+# benchmarks/run_converters.py
+"""
+Benchmark de todos los convertidores registrados en DiagramFactory.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.run_converters --classes 80 --methods 8 --depth 3 --repeat 15 \
+        --output bench.json [--baseline bench_anterior.json]
+
+Para cada combinación (lenguaje, tipo de diagrama) se genera el corpus sintético del
+lenguaje, se escribe en un directorio temporal y la entrada se arma como en los
+endpoints de ZIP (ProjectModel para componentes y paquetes, código por archivo
+para el resto). Se mide latencia (p50/p99), throughput (KB/s, clases/s) y memoria pico
+(tracemalloc, en una ejecución aparte para no distorsionar los tiempos).
+Las cachés por contenido (tablas de rutas, manifiestos) se vacían antes de cada
+ejecución medida, así p50/p99 miden el análisis completo; warm_p50_ms mide las
+mismas ejecuciones con las cachés llenas.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from app.application.services.converters import manifest_parser, route_table
+from app.application.services.converters.parallel_parser import source_input
+from app.application.services.converters.project_model import ProjectModel
+from app.application.services.diagram_factory import DiagramFactory
+from app.infrastructure.api.routes import zip_upload
+from benchmarks.corpus import LANGUAGES, Corpus, CorpusSpec, generate_corpus
+
+# Alias de lenguaje en DiagramFactory -> corpus a usar
+LANGUAGE_ALIASES = {"js": "javascript", "ts": "typescript", "any": "python"}
+# Alias de tipo de diagrama que apuntan al mismo convertidor
+DIAGRAM_TYPE_ALIASES = {"use_case": "usecase"}
+
+REGRESSION_THRESHOLD = 1.2  # p50 un 20% más lento que la línea base se reporta como regresión
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por rango más cercano"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def clear_caches() -> None:
+    """Vacía las cachés por contenido de los convertidores"""
+    route_table.clear_cache()
+    manifest_parser.clear_cache()
+
+
+def timed_runs(language: str, diagram_type: str, code, repeat: int, cold: bool) -> tuple:
+    """Latencias de repeat conversiones y la salida de la última"""
+    latencies = []
+    output = ""
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        converter = DiagramFactory.create_converter(language, diagram_type)
+        start = time.perf_counter()
+        output = converter.convert(code)
+        latencies.append(time.perf_counter() - start)
+    return latencies, output
+
+
+def converter_input(language: str, diagram_type: str, corpus: Corpus,
+                    project_info: Dict) -> Union[str, List[str], ProjectModel]:
+    """
+    Arma la entrada tal como la construyen los endpoints de ZIP: el ProjectModel
+    del proyecto extraído para componentes y paquetes, y la lista de archivos (o el
+    código combinado, según el convertidor) para el resto.
+    """
+    if diagram_type == "package":
+        return zip_upload.build_package_model(project_info, include_external_deps=False)
+    if diagram_type == "component":
+        return zip_upload.build_component_model(project_info, None, include_external_deps=False)
+    return source_input(DiagramFactory.create_converter(language, diagram_type), corpus.sources())
+
+
+def benchmark_combination(language: str, diagram_type: str, code, input_bytes: int, classes: int,
+                          repeat: int, warmup: int) -> Dict:
+    converter_name = type(DiagramFactory.create_converter(language, diagram_type)).__name__
+    result = {
+        "language": language,
+        "diagram_type": diagram_type,
+        "converter": converter_name,
+        "input_kb": round(input_bytes / 1024, 2),
+        "classes": classes,
+    }
+    try:
+        for _ in range(warmup):
+            DiagramFactory.create_converter(language, diagram_type).convert(code)
+
+        latencies, output = timed_runs(language, diagram_type, code, repeat, cold=True)
+        warm_latencies, _ = timed_runs(language, diagram_type, code, repeat, cold=False)
+
+        clear_caches()
+        tracemalloc.start()
+        DiagramFactory.create_converter(language, diagram_type).convert(code)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    except Exception as e:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    p50 = percentile(latencies, 50)
+    result.update({
+        "runs": repeat,
+        "p50_ms": round(p50 * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "warm_p50_ms": round(percentile(warm_latencies, 50) * 1000, 3),
+        "kb_per_s": round(result["input_kb"] / p50, 1) if p50 else None,
+        "classes_per_s": round(classes / p50, 1) if p50 else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "output_chars": len(output),
+    })
+    return result
+
+
+def unique_combinations() -> List[tuple]:
+    """Combinaciones registradas sin alias duplicados (mismo convertidor y mismo corpus)"""
+    seen = set()
+    combinations = []
+    # Los nombres canónicos primero para que los alias sean los descartados
+    ordered = sorted(
+        DiagramFactory.available_combinations(),
+        key=lambda c: (c[0] in LANGUAGE_ALIASES, c[1] in DIAGRAM_TYPE_ALIASES, c),
+    )
+    for language, diagram_type in ordered:
+        corpus_language = LANGUAGE_ALIASES.get(language, language)
+        canonical_type = DIAGRAM_TYPE_ALIASES.get(diagram_type, diagram_type)
+        key = (corpus_language, canonical_type)
+        if key in seen or corpus_language not in LANGUAGES:
+            continue
+        seen.add(key)
+        combinations.append((language, diagram_type, corpus_language))
+    return combinations
+
+
+def compare_with_baseline(results: List[Dict], baseline_path: str) -> List[Dict]:
+    """Compara el p50 de cada combinación con una ejecución anterior"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["language"], r["diagram_type"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["language"], result["diagram_type"]))
+        if not previous or "p50_ms" not in result or not previous.get("p50_ms"):
+            continue
+        ratio = result["p50_ms"] / previous["p50_ms"]
+        result["p50_vs_baseline"] = round(ratio, 3)
+        if ratio >= REGRESSION_THRESHOLD:
+            regressions.append(result)
+    return regressions
+
+
+def run(spec: CorpusSpec, repeat: int, warmup: int, languages: Optional[List[str]] = None,
+        diagram_types: Optional[List[str]] = None) -> Dict:
+    corpora = {}
+    results = []
+    with tempfile.TemporaryDirectory(prefix="uml_bench_") as workdir:
+        for language, diagram_type, corpus_language in unique_combinations():
+            if languages and corpus_language not in languages:
+                continue
+            if diagram_types and diagram_type not in diagram_types:
+                continue
+            if corpus_language not in corpora:
+                corpus = generate_corpus(corpus_language, spec)
+                project_path = os.path.join(workdir, corpus_language)
+                corpus.write(project_path)
+                corpora[corpus_language] = corpus, {"temp_path": project_path}
+            corpus, project_info = corpora[corpus_language]
+            code = converter_input(language, diagram_type, corpus, project_info)
+            input_bytes = sum(len(source.encode("utf-8")) for source in corpus.files.values())
+            result = benchmark_combination(language, diagram_type, code, input_bytes, corpus.class_count,
+                                           repeat, warmup)
+            results.append(result)
+            status = result.get("error") or f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms " \
+                                             f"{result['kb_per_s']}KB/s peak={result['peak_memory_kb']}KB"
+            print(f"{language:>10} {diagram_type:<10} {status}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "warmup": warmup,
+            "corpus": vars(spec),
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de convertidores de diagramas UML")
+    parser.add_argument("--classes", type=int, default=CorpusSpec.classes)
+    parser.add_argument("--methods", type=int, default=CorpusSpec.methods)
+    parser.add_argument("--depth", type=int, default=CorpusSpec.depth)
+    parser.add_argument("--statements", type=int, default=CorpusSpec.statements,
+                        help="Sentencias por bloque (tamaño de los archivos)")
+    parser.add_argument("--classes-per-file", type=int, default=CorpusSpec.classes_per_file)
+    parser.add_argument("--modules", type=int, default=CorpusSpec.modules)
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--language", action="append", choices=LANGUAGES,
+                        help="Limitar a uno o más lenguajes")
+    parser.add_argument("--diagram-type", action="append", help="Limitar a uno o más tipos de diagrama")
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto stdout)")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para detectar regresiones")
+    args = parser.parse_args(argv)
+
+    spec = CorpusSpec(
+        classes=args.classes, methods=args.methods, depth=args.depth, statements=args.statements,
+        classes_per_file=args.classes_per_file, modules=args.modules, seed=args.seed,
+    )
+    report = run(spec, args.repeat, args.warmup, args.language, args.diagram_type)
+
+    regressions = []
+    if args.baseline:
+        regressions = compare_with_baseline(report["results"], args.baseline)
+        report["regressions"] = [(r["language"], r["diagram_type"], r["p50_vs_baseline"]) for r in regressions]
+        for r in regressions:
+            print(f"REGRESIÓN {r['language']} {r['diagram_type']}: x{r['p50_vs_baseline']}", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+# loadtest/run.py
+"""
+Prueba de carga HTTP de la API con una mezcla de operaciones a un RPS objetivo.
+
+Uso (desde la raíz del repositorio, con el Postgres de loadtest/server.py levantado):
+    python -m loadtest.run --start-server --rps 20 --duration 60 --output carga.json \
+        [--mix login=1,list_projects=4,generate_diagram=2,create_version=1] [--baseline carga_anterior.json]
+
+o contra una API ya levantada:
+    python -m loadtest.run --base-url http://localhost:8000 --rps 20 --duration 60
+
+La carga es de lazo abierto: las peticiones se planifican a intervalos fijos sin
+esperar a las anteriores, y la latencia reportada incluye el tiempo en cola desde
+el instante planificado (así un servidor saturado no reduce la carga que recibe).
+En paralelo se sondea /health para medir el lag del event loop.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from benchmarks.run_converters import REGRESSION_THRESHOLD, percentile
+from loadtest.seed import SeedData, SeedSpec, seed
+from loadtest.server import AppServer
+
+DEFAULT_MIX = {"login": 1, "list_projects": 4, "generate_diagram": 2, "create_version": 1}
+HEALTH_INTERVAL = 0.5  # Segundos entre sondas de /health
+
+
+@dataclass
+class Sample:
+    operation: str
+    scheduled: float
+    latency: float  # Desde el instante planificado hasta la respuesta
+    service_time: float  # Desde el envío hasta la respuesta
+    status: int  # 0 si la petición no llegó a completarse
+    error: Optional[str] = None
+
+
+class Workload:
+    """Operaciones de la mezcla. Cada una retorna la respuesta HTTP"""
+
+    def __init__(self, base_url: str, data: SeedData, seed_value: int = 42):
+        self.base_url = base_url
+        self.data = data
+        self._local = threading.local()
+        self._random = random.Random(seed_value)
+        self._random_lock = threading.Lock()
+        self.operations: Dict[str, Callable[[], requests.Response]] = {
+            "login": self.login,
+            "list_projects": self.list_projects,
+            "generate_diagram": self.generate_diagram,
+            "create_version": self.create_version,
+        }
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _pick(self, items: List):
+        with self._random_lock:
+            return self._random.choice(items)
+
+    def _user(self):
+        return self._pick(self.data.users)
+
+    def login(self) -> requests.Response:
+        user = self._user()
+        return self.session.post(
+            f"{self.base_url}/api/login", params={"email": user.email, "password": user.password}, timeout=60
+        )
+
+    def list_projects(self) -> requests.Response:
+        user = self._user()
+        return self.session.get(f"{self.base_url}/api/proyectos/accessible", params={"user_id": user.id}, timeout=60)
+
+    def generate_diagram(self) -> requests.Response:
+        user = self._pick([u for u in self.data.users if u.projects])
+        return self.session.post(
+            f"{self.base_url}/api/diagramas/generar",
+            json={
+                "codigo": self.data.sample_code,
+                "lenguaje": "python",
+                "diagramas": ["clases", "secuencia"],
+                "proyecto_id": self._pick(user.projects),
+            },
+            timeout=60,
+        )
+
+    def create_version(self) -> requests.Response:
+        user = self._pick([u for u in self.data.users if u.diagrams])
+        return self.session.post(
+            f"{self.base_url}/api/diagramas/{self._pick(user.diagrams)}/versiones",
+            json={
+                "contenido_original": self.data.sample_code,
+                "lenguaje_original": "python",
+                "notas_version": "loadtest",
+                "creado_por": user.id,
+            },
+            timeout=60,
+        )
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Operación desconocida: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_operation(workload: Workload, operation: str, scheduled: float) -> Sample:
+    sent = time.perf_counter()
+    try:
+        response = workload.operations[operation]()
+        status, error = response.status_code, None if response.status_code < 400 else response.text[:200]
+    except requests.RequestException as e:
+        status, error = 0, f"{type(e).__name__}: {e}"
+    done = time.perf_counter()
+    return Sample(operation, scheduled, done - scheduled, done - sent, status, error)
+
+
+def probe_health(base_url: str, stop: threading.Event, results: List[Dict]) -> None:
+    """Sondea /health: el tiempo de ida y vuelta crece si el event loop está bloqueado"""
+    session = requests.Session()
+    while not stop.wait(HEALTH_INTERVAL):
+        start = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}/health", timeout=30)
+            rtt = time.perf_counter() - start
+            results.append({"rtt": rtt, "loop_lag_ms": response.json().get("loop_lag_ms")})
+        except (requests.RequestException, ValueError):
+            results.append({"rtt": time.perf_counter() - start, "loop_lag_ms": None})
+
+
+def drive(workload: Workload, mix: Dict[str, float], rps: float, duration: float,
+          concurrency: int, seed_value: int = 42) -> tuple:
+    """Lanza las operaciones a ritmo constante y retorna (muestras, sondas de /health, segundos)"""
+    chooser = random.Random(seed_value)
+    names, weights = list(mix), list(mix.values())
+    total = int(rps * duration)
+    samples: List[Sample] = []
+    futures = []
+    health: List[Dict] = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe_health, args=(workload.base_url, stop, health), daemon=True)
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadtest") as executor:
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            operation = chooser.choices(names, weights)[0]
+            futures.append(executor.submit(run_operation, workload, operation, scheduled))
+        for future in futures:
+            samples.append(future.result())
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+    return samples, health, elapsed
+
+
+def summarize(samples: List[Sample], health: List[Dict], elapsed: float) -> Dict:
+    def latency_stats(values: List[float]) -> Dict:
+        if not values:
+            return {}
+        return {
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p90_ms": round(percentile(values, 90) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(max(values) * 1000, 2),
+        }
+
+    operations = {}
+    for name in sorted({s.operation for s in samples}):
+        group = [s for s in samples if s.operation == name]
+        errors = [s for s in group if s.status == 0 or s.status >= 400]
+        operations[name] = {
+            "requests": len(group),
+            "throughput_rps": round(len(group) / elapsed, 2),
+            "error_rate": round(len(errors) / len(group), 4),
+            "status_codes": {str(code): sum(1 for s in group if s.status == code)
+                             for code in sorted({s.status for s in group})},
+            "latency": latency_stats([s.latency for s in group]),
+            "service_time": latency_stats([s.service_time for s in group]),
+            "sample_errors": list({s.error for s in errors if s.error})[:3],
+        }
+
+    lags = [h["loop_lag_ms"] / 1000 for h in health if h["loop_lag_ms"] is not None]
+    failures = sum(1 for s in samples if s.status == 0 or s.status >= 400)
+    return {
+        "total_requests": len(samples),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0,
+        "error_rate": round(failures / len(samples), 4) if samples else 0,
+        "latency": latency_stats([s.latency for s in samples]),
+        "operations": operations,
+        "event_loop": {
+            "probes": len(health),
+            "health_rtt": latency_stats([h["rtt"] for h in health]),
+            "scheduling_lag": latency_stats(lags),
+        },
+    }
+
+
+def compare_with_baseline(summary: Dict, baseline_path: str) -> List[Dict]:
+    """Compara p50/p99 de cada operación con una ejecución anterior"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["summary"]["operations"]
+    regressions = []
+    for name, current in summary["operations"].items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            before, after = previous["latency"].get(key), current["latency"].get(key)
+            if not before or after is None:
+                continue
+            ratio = round(after / before, 3)
+            current.setdefault("vs_baseline", {})[key] = ratio
+            if ratio >= REGRESSION_THRESHOLD:
+                regressions.append({"operation": name, "metric": key, "ratio": ratio})
+    return regressions
+
+
+def print_summary(summary: Dict) -> None:
+    print(f"{summary['total_requests']} peticiones en {summary['elapsed_s']}s "
+          f"({summary['throughput_rps']} rps, errores {summary['error_rate']:.2%})", file=sys.stderr)
+    for name, op in summary["operations"].items():
+        lat = op["latency"]
+        print(f"{name:>18} n={op['requests']:<6} p50={lat['p50_ms']}ms p99={lat['p99_ms']}ms "
+              f"errores={op['error_rate']:.2%}", file=sys.stderr)
+    loop = summary["event_loop"]
+    if loop["probes"]:
+        print(f"{'event loop':>18} /health p50={loop['health_rtt']['p50_ms']}ms "
+              f"p99={loop['health_rtt']['p99_ms']}ms max={loop['health_rtt']['max_ms']}ms", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de diagramas UML")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="URL de una API ya levantada")
+    target.add_argument("--start-server", action="store_true",
+                        help="Levanta la API contra el Postgres configurado en LOADTEST_DB_*")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--concurrency", type=int, default=64, help="Peticiones simultáneas máximas del cliente")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Pesos por operación, p. ej. login=1,list_projects=4")
+    parser.add_argument("--users", type=int, default=SeedSpec.users)
+    parser.add_argument("--projects-per-user", type=int, default=SeedSpec.projects_per_user)
+    parser.add_argument("--diagrams-per-project", type=int, default=SeedSpec.diagrams_per_project)
+    parser.add_argument("--prefix", default=SeedSpec.prefix, help="Prefijo de los datos sembrados")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto stdout)")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para detectar regresiones")
+    args = parser.parse_args(argv)
+
+    server = AppServer(port=args.port, workers=args.server_workers) if args.start_server else None
+    base_url = server.start() if server else args.base_url.rstrip("/")
+    try:
+        spec = SeedSpec(args.users, args.projects_per_user, args.diagrams_per_project, args.prefix)
+        data = seed(base_url, spec)
+        print(f"Sembrados {len(data.users)} usuarios y {data.diagram_count} diagramas", file=sys.stderr)
+        samples, health, elapsed = drive(
+            Workload(base_url, data, args.seed), args.mix, args.rps, args.duration, args.concurrency, args.seed
+        )
+    finally:
+        if server:
+            server.stop()
+
+    summary = summarize(samples, health, elapsed)
+    print_summary(summary)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "base_url": base_url,
+            "rps": args.rps,
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "seed": vars(spec),
+        },
+        "summary": summary,
+    }
+
+    regressions = []
+    if args.baseline:
+        regressions = compare_with_baseline(summary, args.baseline)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESIÓN {r['operation']} {r['metric']}: x{r['ratio']}", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
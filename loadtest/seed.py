@@ -0,0 +1,114 @@
+# loadtest/seed.py
+"""
+Siembra de datos para las pruebas de carga a través de la propia API: usuarios,
+proyectos y diagramas. Es idempotente por prefijo: un usuario que ya existe
+simplemente inicia sesión y se reutilizan sus proyectos.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import requests
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+SEED_PASSWORD = "loadtest-password"
+
+
+@dataclass
+class SeedSpec:
+    users: int = 10
+    projects_per_user: int = 2
+    diagrams_per_project: int = 2
+    prefix: str = "loadtest"
+
+
+@dataclass
+class SeededUser:
+    id: str
+    email: str
+    password: str
+    token: str
+    projects: List[str] = field(default_factory=list)
+    diagrams: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SeedData:
+    users: List[SeededUser]
+    # Código de ejemplo para generar diagramas y crear versiones
+    sample_code: str
+
+    @property
+    def diagram_count(self) -> int:
+        return sum(len(u.diagrams) for u in self.users)
+
+
+def sample_source(classes: int = 6) -> str:
+    """Código Python sintético de tamaño moderado (el mismo en cada ejecución)"""
+    corpus = generate_corpus("python", CorpusSpec(classes=classes, methods=4, modules=2))
+    return corpus.source()
+
+
+def login(session: requests.Session, base_url: str, email: str, password: str) -> Dict:
+    response = session.post(f"{base_url}/api/login", params={"email": email, "password": password}, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def ensure_user(session: requests.Session, base_url: str, email: str, nombre: str) -> SeededUser:
+    response = session.post(
+        f"{base_url}/api/register",
+        json={"email": email, "nombre": nombre, "password": SEED_PASSWORD},
+        timeout=30,
+    )
+    if response.status_code not in (200, 400):  # 400: ya registrado
+        response.raise_for_status()
+    data = login(session, base_url, email, SEED_PASSWORD)
+    return SeededUser(id=data["user"]["id"], email=email, password=SEED_PASSWORD, token=data["access_token"])
+
+
+def accessible_projects(session: requests.Session, base_url: str, user_id: str) -> List[str]:
+    response = session.get(f"{base_url}/api/proyectos/accessible", params={"user_id": user_id}, timeout=30)
+    response.raise_for_status()
+    return [str(p["id"]) for p in response.json().get("proyectos", [])]
+
+
+def seed(base_url: str, spec: SeedSpec) -> SeedData:
+    session = requests.Session()
+    code = sample_source()
+    users = []
+    for i in range(spec.users):
+        user = ensure_user(session, base_url, f"{spec.prefix}-{i}@example.com", f"{spec.prefix} {i}")
+        user.projects = accessible_projects(session, base_url, user.id)
+        for j in range(len(user.projects), spec.projects_per_user):
+            response = session.post(
+                f"{base_url}/api/proyectos/crear",
+                json={"nombre": f"{spec.prefix} proyecto {i}-{j}", "user_id": user.id},
+                timeout=30,
+            )
+            response.raise_for_status()
+            user.projects.append(str(response.json()["proyecto"]["id"]))
+
+        for project_id in user.projects[:spec.projects_per_user]:
+            response = session.get(f"{base_url}/api/diagramas/proyecto/{project_id}", timeout=30)
+            response.raise_for_status()
+            existing = [str(d["id"]) for d in response.json()]
+            for k in range(len(existing), spec.diagrams_per_project):
+                response = session.post(
+                    f"{base_url}/api/diagramas/crear",
+                    json={
+                        "nombre": f"{spec.prefix} diagrama {k}",
+                        "proyecto_id": project_id,
+                        "creado_por": user.id,
+                        "tipo_diagrama": "class",
+                        "contenido_original": code,
+                        "lenguaje_original": "python",
+                        "contenido_plantuml": "@startuml\n@enduml",
+                    },
+                    timeout=30,
+                )
+                response.raise_for_status()
+                existing.append(str(response.json()["id"]))
+            user.diagrams.extend(existing[:spec.diagrams_per_project])
+        users.append(user)
+    return SeedData(users=users, sample_code=code)
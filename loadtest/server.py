@@ -0,0 +1,100 @@
+# loadtest/server.py
+"""
+Arranque de la API para las pruebas de carga contra un Postgres local.
+
+Postgres de prueba (los modelos usan tipos propios de Postgres: UUID, ARRAY):
+    docker run --rm -d -p 5432:5432 -e POSTGRES_PASSWORD=loadtest -e POSTGRES_DB=uml_loadtest postgres:16
+
+La configuración sale de las variables LOADTEST_DB_* (con valores por defecto para
+ese contenedor) y se pasa al proceso de la API como DB_*.
+"""
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_DB_ENV = {
+    "DB_DRIVER": "asyncpg",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "loadtest",
+    "DB_HOST": "localhost:5432",
+    "DB_NAME": "uml_loadtest",
+    "DB_SSL": "disable",
+    "DB_ECHO": "false",  # El log de cada consulta distorsiona las mediciones
+}
+
+# Crea las tablas que falten sin borrar datos (a diferencia de init_db.py)
+CREATE_SCHEMA_SCRIPT = """
+import asyncio
+from app.infrastructure.database import models
+from app.infrastructure.database.base import Base
+from app.infrastructure.database.session import engine
+
+async def main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+asyncio.run(main())
+"""
+
+
+def database_env() -> Dict[str, str]:
+    """Variables DB_* para la API, tomadas de LOADTEST_DB_* o de los valores por defecto"""
+    return {name: os.getenv(f"LOADTEST_{name}", default) for name, default in DEFAULT_DB_ENV.items()}
+
+
+class AppServer:
+    """Proceso de uvicorn con la API apuntando a la base de datos de pruebas de carga"""
+
+    def __init__(self, port: int = 8765, workers: int = 1, extra_env: Optional[Dict[str, str]] = None):
+        self.port = port
+        self.workers = workers
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.env = {**os.environ, **database_env(), **(extra_env or {})}
+        self._process: Optional[subprocess.Popen] = None
+
+    def create_schema(self) -> None:
+        subprocess.run([sys.executable, "-c", CREATE_SCHEMA_SCRIPT], cwd=REPO_ROOT, env=self.env, check=True)
+
+    def start(self, timeout: float = 60.0) -> str:
+        self.create_schema()
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=REPO_ROOT, env=self.env,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"La API terminó al arrancar (código {self._process.returncode})")
+            try:
+                if requests.get(f"{self.base_url}/health", timeout=1).ok:
+                    return self.base_url
+            except requests.RequestException:
+                pass
+            time.sleep(0.25)
+        self.stop()
+        raise RuntimeError("La API no respondió a /health a tiempo")
+
+    def stop(self) -> None:
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False